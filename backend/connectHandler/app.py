@@ -1,19 +1,18 @@
 import json
-import boto3
-import os
 import logging
 import time  # Import time
 from datetime import datetime, timedelta, timezone  # Import datetime utilities
 
+from wuwadraft_core.tables import get_tables
+
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize DynamoDB client (Boto3 will use the Lambda's execution role credentials)
-dynamodb = boto3.resource('dynamodb')
-# Use the exact table name you created in DynamoDB
-TABLE_NAME = os.environ.get('CONNECTIONS_TABLE_NAME', 'WuwaDraftConnections')
-table = dynamodb.Table(TABLE_NAME)
+# --- DynamoDB Setup ---
+# Split or single-table layout, see wuwadraft_core.tables. The tables (and boto3) are built on
+# the first connect rather than at import, so they stay out of this function's cold start.
+connections_table, _ = get_tables()
 
 def handler(event, context):
     logger.info(f"Received event: {json.dumps(event, indent=2)}")
@@ -31,18 +30,18 @@ def handler(event, context):
     CONNECTION_TTL_HOURS = 5
 
     try:
-        logger.info(f"Attempting to save connectionId {connection_id} to table {TABLE_NAME}")
+        logger.info(f"Attempting to save connectionId {connection_id} to table {connections_table.name}")
         
         # Calculate TTL for connection expiration (5 hours from connection)
         expiry_time = datetime.now(timezone.utc) + timedelta(hours=CONNECTION_TTL_HOURS)
         ttl_timestamp = int(expiry_time.timestamp())  # Convert to Unix epoch seconds
         logger.info(f"Connection {connection_id} will expire at {expiry_time.isoformat()} (TTL: {ttl_timestamp})")
         
-        table.put_item(
+        connections_table.put_item(
             Item={
                 'connectionId': connection_id,
                 'ttl': ttl_timestamp,  # Add TTL attribute for automatic DynamoDB expiration
-                'connectTime': datetime.now(timezone.utc).isoformat()  # Optional: track connect time
+                'connectTime': time.time_ns() // 1_000_000  # Optional: track connect time (epoch ms)
             }
         )
         logger.info(f"Successfully saved connectionId {connection_id} with TTL")
@@ -1,309 +1,303 @@
 # backend/defaultHandler/app.py
 
 import json
-import boto3
 import logging
-import os
-import uuid # Import uuid library for generating unique IDs
-from datetime import datetime, timezone, timedelta # For timestamps and timedelta
-from boto3.dynamodb.conditions import Key, Attr # Keep this if needed elsewhere
+from datetime import datetime, timezone, timedelta # For the lobby TTL
 from botocore.exceptions import ClientError # Remove ConditionalCheckFailedException from import
-import time
-import random  # Added for random selection on timeout
-import decimal
+
+from wuwadraft_core import clients as core_clients
+from wuwadraft_core.constants import (
+    EQUILIBRATION_PHASE_NAME, PRE_DRAFT_READY_STATE,
+    DRAFT_COMPLETE_PHASE, TURN_DURATION_SECONDS, RESUME_GRACE_SECONDS,
+    SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY, TURN_TIMEOUT_GRACE_MS
+)
+from wuwadraft_core.tables import get_tables
+from wuwadraft_core.messaging import send_message_to_client, schedule_resume_hold_expiry
+from wuwadraft_core.teardown import (
+    detach_connection_transact_item, lobby_update_transact_item, run_teardown_writes,
+    detach_connection_fallback, teardown_lobby
+)
+from wuwadraft_core.lobby_state import (
+    RESUME_HOLD_PREFIXES, broadcast_lobby_state, build_lobby_state_payload, is_slot_disconnect_expired, resume_hold_expires_at
+)
+from wuwadraft_core.rate_limit import allow_request
+from wuwadraft_core.spectators import add_spectator, build_spectator_payload
+from wuwadraft_core.lobby_browser import PUBLIC_LISTING_ATTRIBUTE, PUBLIC_LISTING_OPEN, sync_public_listing, list_public_lobbies
+from wuwadraft_core.resonators import get_all_resonator_names_from_s3, get_resonator_catalogue, resolve_pool_filter
+from wuwadraft_core.matchmaking import queue_for_matchmaking, leave_matchmaking
+from wuwadraft_core.scoring import is_valid_sequence, score_box
+from wuwadraft_core.equilibration import MAX_EQUILIBRATION_BANS, NEUTRAL_ORDER, P1_FAVORED_ORDER, decide_equilibration
+from wuwadraft_core.draft_formats import (
+    BAN_KIND, PICK_KIND, DEFAULT_DRAFT_FORMAT_ID, get_draft_format, get_draft_formats, get_draft_table, lobby_draft_format_fields,
+    max_selections
+)
+from wuwadraft_core.series import get_series_game, get_series_length, game_record, next_game_pool, parse_series_settings
+from wuwadraft_core.auto_select import (
+    AUTO_SELECT_STRATEGIES, BAN_QUEUE, DEFAULT_AUTO_SELECT_STRATEGY, build_candidate_queues, pool_positions, queue_removals
+)
+from wuwadraft_core.clock import monotonic_ms, ms_from_now, now_ms, timestamp_ms
+from wuwadraft_core.concurrency import VERSION_ATTRIBUTE, LobbyConflict, consistent_read, versioned, update_lobby, retry_on_conflict
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# --- Helper Function (Decimal Encoder) ---
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, decimal.Decimal):
-            # Check if it's an integer stored as Decimal
-            if obj % 1 == 0:
-                return int(obj)
-            else:
-                # Keep precision for floats stored as Decimal
-                # Using str() preserves precision accurately
-                return float(obj)
-        # Let the base class default method raise the TypeError
-        return json.JSONEncoder.default(self, obj)
-# --- END Helper Function ---
-
 # --- ADD HELPER FUNCTION FOR TURN LOGIC ---
-def resolve_turn_from_role(turn_designation, player_roles):
-    """Resolves the actual player turn (P1/P2) from a role designation and player role mapping.
-    
-    Args:
-        turn_designation (str): The role from the draft template (P1_ROLE, P2_ROLE, ROLE_A, or ROLE_B)
-        player_roles (dict): Mapping of template roles to actual players
-        
+def determine_next_state(current_step_index, draft_table, equilibration_banner=None):
+    """Calculates the next phase, turn, index and turn timer once step current_step_index is done.
+
+    draft_table is the lobby's compiled DraftTable (wuwadraft_core.draft_formats). Pass
+    equilibration_banner while that player still has equilibration bans to make: the draft
+    then enters the equilibration phase at the format's insertion point, with the index
+    left on the last completed step.
+    """
+    next_index = current_step_index + 1
+    if equilibration_banner and next_index == draft_table.equilibration_before:
+        logger.info(f"Draft progression: From index {current_step_index} -> {EQUILIBRATION_PHASE_NAME} ({equilibration_banner}) before step {next_index}")
+        return EQUILIBRATION_PHASE_NAME, equilibration_banner, current_step_index, draft_table.equilibration_seconds
+    if next_index < len(draft_table.steps):
+        step = draft_table.steps[next_index]
+        logger.info(f"Draft progression: From index {current_step_index} -> To index {next_index} ({step.phase}, {step.turn})")
+        return step.phase, step.turn, next_index, step.seconds
+    # Reached the end of the defined order
+    logger.info(f"Draft progression: Reached end of draft order (index {current_step_index}). Setting state to COMPLETE.")
+    return DRAFT_COMPLETE_PHASE, None, -1, None # Indicate completion with index -1
+
+def build_draft_start_payload(draft_table, num_equilibration_bans, equilibration_banner_slot, started_message):
+    """Lobby attributes that start a draft at its first step, or its equilibration bans if the format puts them first."""
+    first_phase, actual_current_turn, first_step_index, first_turn_seconds = determine_next_state(
+        -1, draft_table, equilibration_banner_slot if num_equilibration_bans > 0 else None
+    )
+    draft_start_payload = {
+        'lobbyState': 'DRAFTING', # Transition to active drafting
+        'currentPhase': first_phase,
+        'currentTurn': actual_current_turn,
+        'currentStepIndex': first_step_index, # -1 in the equilibration phase: no standard step completed yet
+        'turnExpiresAt': ms_from_now(first_turn_seconds)
+    }
+    if first_phase == EQUILIBRATION_PHASE_NAME:
+        draft_start_payload['lastAction'] = f"{started_message} {equilibration_banner_slot} to make {num_equilibration_bans} Equilibration Ban(s)."
+    else:
+        draft_start_payload['lastAction'] = f"{started_message} {actual_current_turn} to {draft_table.steps[0].kind.upper()}." # e.g., P1 to BAN.
+    return draft_start_payload
+
+def lobby_resonator_pool(lobby_item):
+    """availableResonators for a new draft: the lobby's poolFilter resolved against the cached catalogue, else every resonator."""
+    pool_filter = lobby_item.get('poolFilter')
+    if not pool_filter:
+        return get_all_resonator_names_from_s3()
+    catalogue = get_resonator_catalogue()
+    try:
+        return resolve_pool_filter(catalogue, pool_filter)
+    except ValueError as e:
+        logger.error(f"Lobby {lobby_item.get('lobbyId')}: poolFilter no longer matches catalogue {catalogue.version}, using every resonator: {e}")
+        return list(catalogue.names)
+
+def lobby_candidate_queues(lobby_item, available_resonators):
+    """autoSelectQueues for a draft of lobby_item starting with available_resonators (see wuwadraft_core.auto_select)."""
+    return build_candidate_queues(
+        lobby_item.get('autoSelectStrategy', DEFAULT_AUTO_SELECT_STRATEGY), available_resonators,
+        lobby_item.get('player1Sequences'), lobby_item.get('player2Sequences')
+    )
+
+def queue_remove_clause(lobby_item, selections):
+    """' REMOVE ...' taking selections out of the lobby's autoSelectQueues, or '' if it has none."""
+    removals = queue_removals(lobby_item.get('autoSelectQueues'), selections)
+    return " REMOVE " + ", ".join(removals) if removals else ""
+
+def pending_equilibration_banner(lobby_item):
+    """The player ('P1'/'P2') who still has equilibration bans to make, or None."""
+    if int(lobby_item.get('equilibrationBansMade', 0)) < int(lobby_item.get('equilibrationBansAllowed', 0)):
+        return lobby_item.get('currentEquilibrationBanner')
+    return None
+
+def get_current_draft_step(draft_table, current_step_index):
+    """The DraftStep at current_step_index, or None outside the standard steps (e.g. equilibration bans)."""
+    if 0 <= current_step_index < len(draft_table.steps):
+        return draft_table.steps[current_step_index]
+    return None
+
+def append_draft_event(lobby_item, kind, slot, resonator_names, last_action):
+    """Builds the next eventSeq and bounded recentEvents list for a draft action's selections.
+
+    The log lets a resuming client catch up with only the selections it missed
+    instead of the full lobby state. A multi-select action logs one event per resonator.
+
     Returns:
-        str: The resolved player (P1 or P2) or None if resolution fails
+        tuple: (new_event_seq, new_recent_events_list)
     """
-    logger.info(f"Resolving turn from designation '{turn_designation}' using roles {player_roles}")
-    
-    # Handle P1_FAVORED_DRAFT_ORDER roles
-    if 'P1_ROLE_IN_TEMPLATE' in player_roles:
-        if turn_designation == 'P1_ROLE':
-            return player_roles.get('P1_ROLE_IN_TEMPLATE')
-        elif turn_designation == 'P2_ROLE':
-            return player_roles.get('P2_ROLE_IN_TEMPLATE')
-    
-    # Handle NEUTRAL_DRAFT_ORDER_TEMPLATE_V2 roles
-    elif 'ROLE_A' in player_roles:
-        if turn_designation == 'ROLE_A':
-            return player_roles.get('ROLE_A')
-        elif turn_designation == 'ROLE_B':
-            return player_roles.get('ROLE_B')
-    
-    logger.error(f"Could not resolve turn. Designation: {turn_designation}, Roles: {player_roles}")
+    new_event_seq = int(lobby_item.get('eventSeq', 0))
+    recent_events = list(lobby_item.get('recentEvents') or [])
+    for resonator_name in resonator_names:
+        new_event_seq += 1
+        recent_events.append({
+            'seq': new_event_seq,
+            'kind': kind, # 'ban' or 'pick'
+            'slot': slot, # 'P1' or 'P2'
+            'resonator': resonator_name,
+            'lastAction': last_action
+        })
+    return new_event_seq, recent_events[-RECENT_EVENTS_LIMIT:]
+
+def get_requested_selections(message_data):
+    """The resonators a makeBan/makePick selects: resonatorNames, or the single resonatorName older clients send.
+
+    Returns None if neither is a non-empty name (list).
+    """
+    resonator_names = message_data.get('resonatorNames')
+    if resonator_names is None:
+        resonator_name = message_data.get('resonatorName')
+        return [resonator_name] if resonator_name else None
+    if not isinstance(resonator_names, list) or not resonator_names or not all(isinstance(name, str) and name for name in resonator_names):
+        return None
+    return resonator_names
+
+def apply_selections(available_resonators, selections, expected_count):
+    """Validates a step's selections against the pool in one pass.
+
+    Returns:
+        tuple: (error message or None, availableResonators without the selections)
+    """
+    if len(selections) != expected_count:
+        return f"This step takes {expected_count} selection(s), got {len(selections)}.", None
+    selected = set(selections)
+    if len(selected) != len(selections):
+        return "The same resonator was selected more than once.", None
+    new_available_list = [r for r in available_resonators if r not in selected]
+    if len(available_resonators) - len(new_available_list) != len(selected):
+        unavailable = selected.difference(available_resonators)
+        return f"Resonator {', '.join(sorted(unavailable))} is not available.", None
+    return None, new_available_list
+
+def get_events_since(lobby_item, last_seen_event_seq):
+    """Returns the logged events after last_seen_event_seq, or None if the log no longer covers the gap."""
+    current_event_seq = int(lobby_item.get('eventSeq', 0))
+    if last_seen_event_seq is None or last_seen_event_seq > current_event_seq:
+        return None
+    missed_events = [e for e in (lobby_item.get('recentEvents') or []) if int(e['seq']) > last_seen_event_seq]
+    if len(missed_events) != current_event_seq - last_seen_event_seq:
+        return None # Gap is older than the bounded log (or the log was reset)
+    return missed_events
+
+def find_recent_request(lobby_item, request_id):
+    """Returns the recorded outcome if request_id already ran against this lobby, else None."""
+    if not request_id:
+        return None
+    for recent_request in lobby_item.get('recentRequests') or []:
+        if recent_request.get('requestId') == request_id:
+            return recent_request
     return None
 
-def determine_next_state(current_step_index, effective_draft_order_list_of_dicts):
-    """Calculates the next phase, turn designation, and index based on the current step index."""
-    next_index = current_step_index + 1
-    if next_index < len(effective_draft_order_list_of_dicts):
-        step_info = effective_draft_order_list_of_dicts[next_index]
-        next_phase = step_info['phase']
-        next_turn_designation = step_info['turnPlayerDesignation'] # This is 'P1_ROLE', 'ROLE_A', etc.
-        logger.info(f"Draft progression: From index {current_step_index} -> To index {next_index} ({next_phase}, {next_turn_designation})")
-        return next_phase, next_turn_designation, next_index
-    else:
-        # Reached the end of the defined order
-        logger.info(f"Draft progression: Reached end of draft order (index {current_step_index}). Setting state to COMPLETE.")
-        # Return completion state and an index marker (e.g., -1 or None)
-        return DRAFT_COMPLETE_PHASE, None, -1 # Indicate completion with index -1 (or None)
-# --- END HELPER FUNCTION ---
+def append_recent_request(lobby_item, request_id, response):
+    """Builds the bounded recentRequests list with this request's outcome added.
 
-# ==================== NEW/MODIFIED SECTION START ====================
+    It is written in the same update as the action itself, so a resent request finds
+    its outcome whenever the action took effect. Without a request_id the list is unchanged.
+    """
+    recent_requests = list(lobby_item.get('recentRequests') or [])
+    if request_id:
+        recent_requests.append({
+            'requestId': request_id,
+            'statusCode': response['statusCode'],
+            'body': response['body']
+        })
+    return recent_requests[-RECENT_REQUESTS_LIMIT:]
 
-# --- S3 Configuration for Resonator Data ---
-S3_BUCKET_NAME = os.environ.get('S3_ASSET_BUCKET_NAME', 'wuwadraft')
-RESONATORS_JSON_KEY = os.environ.get('S3_RESONATORS_KEY', 'data/resonators_master_data.json')
+def acknowledge_draft_action(apigw_management_client, connection_id, lobby_id, action, message_data, lobby_item, updated_lobby_item):
+    """Sends the actor actionAccepted as soon as its ban or pick is written, ahead of the broadcast.
 
-# --- Fallback Resonator List ---
-FALLBACK_RESONATOR_NAMES = sorted([
-    'Jiyan', 'Yinlin', 'Changli', 'Jinhsi', 'Zhezhi', 'Xiangli Yao', 'The Shorekeeper', 
-    'Camellya', 'Carlotta', 'Roccia', 'Brant', 'Cantarella', 'Phoebe', 'Zani', 
-    'Ciaconna', 'Lingyang', 'Calcharo', 'Encore', 'Jianxin', 'Verina', 'Rover', 
-    'Yangyang', 'Chixia', 'Baizhi', 'Sanhua', 'Yuanwu', 'Aalto', 'Danjin', 
-    'Mortefi', 'Taoqi', 'Youhu', 'Lumi'
-])
+    The ack carries the new version and eventSeq. If the client sent the lastEventSeq the
+    action was applied to, it also carries the action's events and the header fields a
+    selection changes, which the client applies the way a resumed client replays missed
+    events, so the broadcast can skip it.
 
-# --- MOVED/MODIFIED S3 Loading Logic ---
-def get_all_resonator_names_from_s3():
-    """Fetches resonator data from S3 and RETURNS the list of names."""
-    try:
-        logger.info(f"S3_FETCH: Attempting to load resonator data from s3://{S3_BUCKET_NAME}/{RESONATORS_JSON_KEY}")
-        s3 = boto3.client('s3')
-        s3_object = s3.get_object(Bucket=S3_BUCKET_NAME, Key=RESONATORS_JSON_KEY)
-        resonator_data_json = s3_object['Body'].read().decode('utf-8')
-        resonators_list_of_dicts = json.loads(resonator_data_json)
-        
-        names = [resonator['name'] for resonator in resonators_list_of_dicts if 'name' in resonator]
-        logger.info(f"S3_FETCH: Successfully loaded {len(names)} resonator names from S3.")
-        return sorted(names)
-    except Exception as e:
-        logger.error(f"S3_FETCH_ERROR: Could not load resonator data from S3. Using fallback list. Error: {e}", exc_info=True)
-        return list(FALLBACK_RESONATOR_NAMES)
+    Returns:
+        str or None: the connection to leave out of the broadcast, or None if it still needs the full state
+    """
+    previous_event_seq = int(lobby_item.get('eventSeq', 0))
+    new_event_seq = int(updated_lobby_item.get('eventSeq', 0))
+    ack_payload = {
+        "type": "actionAccepted",
+        "action": action,
+        "lobbyId": lobby_id,
+        "requestId": message_data.get('requestId'),
+        "version": updated_lobby_item.get(VERSION_ATTRIBUTE),
+        "eventSeq": new_event_seq
+    }
+    new_events = [draft_event for draft_event in updated_lobby_item.get('recentEvents') or [] if int(draft_event['seq']) > previous_event_seq]
+    client_is_current = message_data.get('lastEventSeq') == previous_event_seq and len(new_events) == new_event_seq - previous_event_seq
+    if client_is_current:
+        ack_payload.update({
+            "fromEventSeq": previous_event_seq,
+            "events": new_events,
+            "serverTime": now_ms(),
+            **{field: updated_lobby_item.get(field) for field in ACTION_ACK_FIELDS}
+        })
+    acked = send_message_to_client(apigw_management_client, connection_id, ack_payload)
+    return connection_id if client_is_current and acked else None
+
+def replay_recent_request(apigw_management_client, lobby_id, lobby_item, connection_id, recent_request):
+    """Answers a resent request with its original outcome, without writing anything.
 
-# ===================== NEW/MODIFIED SECTION END =====================
+    The sender is sent the current lobby state in case the original broadcast was lost.
+    """
+    logger.info(f"Request {recent_request['requestId']} from {connection_id} already processed for lobby {lobby_id}. Returning original result.")
+    send_message_to_client(apigw_management_client, connection_id, build_lobby_state_payload(lobby_id, lobby_item, lobby_item.get('lastAction')))
+    return {'statusCode': int(recent_request['statusCode']), 'body': recent_request['body']}
+
+def get_lobby_id_for_action(message_data, connection_id):
+    """Finds the lobby a turn action targets.
+
+    Current clients send lobbyId with every action, so no connections_table read is needed.
+    Legacy clients without lobbyId fall back to the connection's currentLobbyId. Either way
+    the caller must check is_lobby_participant() on the lobby item it reads anyway, since
+    currentLobbyId can outlive the seat (e.g. after a kick or a resume on a new connection).
+    Returns the lobby_id, or None if it can't be found.
+    """
+    lobby_id = message_data.get('lobbyId')
+    if lobby_id:
+        return lobby_id
+    logger.info(f"LEGACY_LOBBY_LOOKUP: No lobbyId in message from {connection_id}, reading connections table.")
+    connection_item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
+    if not connection_item or 'currentLobbyId' not in connection_item:
+        return None
+    return connection_item['currentLobbyId']
+
+def is_lobby_participant(lobby_item, connection_id):
+    """True if connection_id holds the host or a player seat on the lobby item."""
+    return connection_id in (
+        lobby_item.get('hostConnectionId'),
+        lobby_item.get('player1ConnectionId'),
+        lobby_item.get('player2ConnectionId')
+    )
+# --- END HELPER FUNCTION ---
 
 # --- Equilibration System Constants ---
-# Weighted points for sequences S0-S6
-SEQUENCE_POINTS = {
-    0: 3,  # S0
-    1: 5,  # S1
-    2: 9,  # S2
-    3: 10, # S3
-    4: 11, # S4
-    5: 12, # S5
-    6: 16  # S6
-}
-
-# Thresholds for different equilibration actions
-SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY = 6
-SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN = 12
-SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS = 24
-
-# --- Define the Draft Order ---
-# Structure: (Phase Name, Player Turn)
-DRAFT_ORDER = [
-    ('BAN1', 'P1'),    # Step 0
-    ('BAN1', 'P2'),    # Step 1
-    ('PICK1', 'P1'),   # Step 2
-    ('PICK1', 'P2'),   # Step 3
-    ('PICK1', 'P1'),   # Step 4 
-    ('PICK1', 'P2'),   # Step 5 
-    ('BAN2', 'P1'),    # Step 6
-    ('BAN2', 'P2'),    # Step 7
-    ('PICK2', 'P2'),   # Step 8
-    ('PICK2', 'P1'),   # Step 9
-    # Add more steps if needed (e.g., for BAN3/PICK3 if structure changes)
-]
-
-# Draft Order Templates
-P1_FAVORED_DRAFT_ORDER = [
-    {'phase': 'BAN1', 'turnPlayerDesignation': 'P1_ROLE'},
-    {'phase': 'BAN1', 'turnPlayerDesignation': 'P2_ROLE'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'P1_ROLE'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'P2_ROLE'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'P1_ROLE'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'P2_ROLE'},
-    {'phase': 'BAN2', 'turnPlayerDesignation': 'P1_ROLE'},
-    {'phase': 'BAN2', 'turnPlayerDesignation': 'P2_ROLE'},
-    {'phase': 'PICK2', 'turnPlayerDesignation': 'P2_ROLE'},
-    {'phase': 'PICK2', 'turnPlayerDesignation': 'P1_ROLE'}
-]
-
-NEUTRAL_DRAFT_ORDER_TEMPLATE_V2 = [
-    {'phase': 'BAN1', 'turnPlayerDesignation': 'ROLE_A'},
-    {'phase': 'BAN1', 'turnPlayerDesignation': 'ROLE_B'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'ROLE_B'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'ROLE_A'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'ROLE_A'},
-    {'phase': 'PICK1', 'turnPlayerDesignation': 'ROLE_B'},
-    {'phase': 'BAN2', 'turnPlayerDesignation': 'ROLE_B'},
-    {'phase': 'BAN2', 'turnPlayerDesignation': 'ROLE_A'},
-    {'phase': 'PICK2', 'turnPlayerDesignation': 'ROLE_A'},
-    {'phase': 'PICK2', 'turnPlayerDesignation': 'ROLE_B'}
-]
-
-EQUILIBRATION_PHASE_NAME = 'EQUILIBRATE_BANS'
-EQUILIBRATION_PHASE_TIMEOUT_SECONDS = 120 # 2 minutes
-
-PRE_DRAFT_READY_STATE = 'PRE_DRAFT_READY'
-
-DRAFT_COMPLETE_PHASE = 'DRAFT_COMPLETE' # Constant for completed state
-# --- End Draft Order Definition ---
+# Sequence points and the box score computation live in wuwadraft_core.scoring,
+# the score difference thresholds in wuwadraft_core.constants
+
+# --- Draft Order ---
+# Draft formats (ban/pick steps, turn order, timers, equilibration insertion point) are defined
+# in wuwadraft_core/draft_formats.json and compiled by wuwadraft_core.draft_formats
 
 # --- Configuration ---
-CONNECTIONS_TABLE_NAME = os.environ.get('CONNECTIONS_TABLE_NAME', 'WuwaDraftConnections')
-LOBBIES_TABLE_NAME = os.environ.get('LOBBIES_TABLE_NAME', 'WuwaDraftLobbies')
-TURN_DURATION_SECONDS = 30  # 30 seconds per turn
+RECENT_EVENTS_LIMIT = 20 # Draft selections kept on the lobby item for resume catch-up
+# What a ban or pick changes besides the selections themselves, sent to the actor in actionAccepted
+ACTION_ACK_FIELDS = ('lobbyState', 'currentPhase', 'currentTurn', 'turnExpiresAt', 'equilibrationBansMade', 'lastAction')
+RECENT_REQUESTS_LIMIT = 20 # Processed requestIds (and outcomes) kept on the lobby item to absorb resends
 # -------------------
 
-# Initialize DynamoDB resource client
-dynamodb = boto3.resource('dynamodb')
-connections_table = dynamodb.Table(CONNECTIONS_TABLE_NAME)
-lobbies_table = dynamodb.Table(LOBBIES_TABLE_NAME)
-
-# Store API Gateway Management client globally? No, create per invocation for endpoint.
+# Initialize DynamoDB tables (split or single-table layout, see wuwadraft_core.tables)
+connections_table, lobbies_table = get_tables()
 
 def get_apigw_management_client(event):
-    """Creates an API Gateway Management API client using the specific endpoint"""
+    """Returns the (cached) API Gateway Management API client for this event's endpoint"""
     domain_name = event.get('requestContext', {}).get('domainName')
     stage = event.get('requestContext', {}).get('stage')
     if not domain_name or not stage:
         logger.error("Could not extract domainName or stage from event context")
         raise ValueError("Missing domainName or stage in event context")
-    endpoint_url = f"https://{domain_name}/{stage}"
-    logger.info(f"Creating ApiGatewayManagementApi client with endpoint: {endpoint_url}")
-    return boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
-
-def send_message_to_client(apigw_client, connection_id, payload_dict): # Expects a Python dictionary
-    """Sends a JSON payload to a specific connectionId, using DecimalEncoder."""
-    logger.info(f"SEND_MSG_CLIENT_ENTRY: Received payload_dict for {connection_id}: {payload_dict}") # Log raw dict
-    try:
-        # Serialize the dict to JSON string using DecimalEncoder
-        payload_json_string = json.dumps(payload_dict, cls=DecimalEncoder)
-
-        # Log exactly what is being prepared to be sent
-        logger.info(f"SEND_MESSAGE_TO_CLIENT: Connection: {connection_id}, Payload being sent: {payload_json_string}")
-
-        apigw_client.post_to_connection(
-            ConnectionId=connection_id,
-            Data=payload_json_string.encode('utf-8') # Encode the string to bytes
-        )
-        logger.info(f"Message sent successfully to {connection_id}")
-        return True
-    except apigw_client.exceptions.GoneException:
-        logger.warning(f"Client {connection_id} is gone. Cannot send message.")
-    except Exception as e:
-        # Log the full exception details
-        logger.error(f"Failed to post message to connectionId {connection_id}: {str(e)}", exc_info=True) 
-    return False
-
-# --- Helper Function to Broadcast Lobby State ---
-def broadcast_lobby_state(lobby_id, apigw_client, last_action=None, exclude_connection_id=None):
-    try:
-        logger.info(f"BROADCAST_LOBBY_STATE: Fetching item for lobby {lobby_id}. Last Action: {last_action}")
-        final_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-        final_lobby_item_for_broadcast = final_response.get('Item')
-
-        if not final_lobby_item_for_broadcast:
-            logger.warning(f"BROADCAST_LOBBY_STATE: Cannot broadcast, lobby {lobby_id} item not found.")
-            return False
-
-        logger.info(f"BROADCAST_LOBBY_STATE_ITEM_DUMP for {lobby_id}: {json.dumps(final_lobby_item_for_broadcast, cls=DecimalEncoder)}")
-        
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        # ++ ADD THIS LOG LINE +++++++++++++++++++++++++++++++++++++++++++++++++++
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        logger.info(f"BROADCAST_DEBUG: Lobby {lobby_id} - Value of 'equilibrationEnabled' from DDB for broadcast: {final_lobby_item_for_broadcast.get('equilibrationEnabled')}")
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        # ++ END OF ADDED LOG LINE +++++++++++++++++++++++++++++++++++++++++++++++
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-
-        state_payload = { # This is a Python dictionary
-            "type": "lobbyStateUpdate",
-            "lobbyId": lobby_id,
-            "hostName": final_lobby_item_for_broadcast.get('hostName'),
-            "player1Name": final_lobby_item_for_broadcast.get('player1Name'),
-            "player2Name": final_lobby_item_for_broadcast.get('player2Name'),
-            "lobbyState": final_lobby_item_for_broadcast.get('lobbyState'),
-            "player1Ready": final_lobby_item_for_broadcast.get('player1Ready', False),
-            "player2Ready": final_lobby_item_for_broadcast.get('player2Ready', False),
-            "currentPhase": final_lobby_item_for_broadcast.get('currentPhase'),
-            "currentTurn": final_lobby_item_for_broadcast.get('currentTurn'),
-            "bans": final_lobby_item_for_broadcast.get('bans', []),
-            "player1Picks": final_lobby_item_for_broadcast.get('player1Picks', []),
-            "player2Picks": final_lobby_item_for_broadcast.get('player2Picks', []),
-            "availableResonators": final_lobby_item_for_broadcast.get('availableResonators', []),
-            "turnExpiresAt": final_lobby_item_for_broadcast.get('turnExpiresAt'),
-            "equilibrationEnabled": final_lobby_item_for_broadcast.get('equilibrationEnabled', False),
-            "player1ScoreSubmitted": final_lobby_item_for_broadcast.get('player1ScoreSubmitted', False),
-            "player2ScoreSubmitted": final_lobby_item_for_broadcast.get('player2ScoreSubmitted', False),
-            "player1WeightedBoxScore": final_lobby_item_for_broadcast.get('player1WeightedBoxScore'),
-            "player2WeightedBoxScore": final_lobby_item_for_broadcast.get('player2WeightedBoxScore'),
-            "player1Sequences": final_lobby_item_for_broadcast.get('player1Sequences'),
-            "player2Sequences": final_lobby_item_for_broadcast.get('player2Sequences'),
-            "effectiveDraftOrder": final_lobby_item_for_broadcast.get('effectiveDraftOrder'),
-            "playerRoles": final_lobby_item_for_broadcast.get('playerRoles'),
-            "equilibrationBansAllowed": final_lobby_item_for_broadcast.get('equilibrationBansAllowed', 0),
-            "equilibrationBansMade": final_lobby_item_for_broadcast.get('equilibrationBansMade', 0),
-            "currentEquilibrationBanner": final_lobby_item_for_broadcast.get('currentEquilibrationBanner')
-        }
-        if last_action:
-            state_payload["lastAction"] = last_action
-
-        # Log the dictionary that is about to be passed to send_message_to_client
-        logger.info(f"BROADCAST_LOBBY_STATE: Constructed state_payload DICT for lobby {lobby_id}: {state_payload}")
-
-        participants = [
-            final_lobby_item_for_broadcast.get('hostConnectionId'),
-            final_lobby_item_for_broadcast.get('player1ConnectionId'),
-            final_lobby_item_for_broadcast.get('player2ConnectionId')
-        ]
-        valid_connection_ids = [pid for pid in participants if pid]
-
-        success_count = 0
-        for recipient_id in valid_connection_ids:
-            if recipient_id == exclude_connection_id:
-                continue
-            # Pass the Python dictionary directly.
-            # send_message_to_client will handle the serialization with DecimalEncoder.
-            if send_message_to_client(apigw_client, recipient_id, state_payload):
-                 success_count += 1
-
-        logger.info(f"Broadcast complete for lobby {lobby_id}. Sent to {success_count} participant(s).")
-        return True
-
-    except Exception as broadcast_err:
-        logger.error(f"Error during broadcast_lobby_state for {lobby_id}: {str(broadcast_err)}", exc_info=True)
-        return False
+    return core_clients.get_apigw_management_client(f"https://{domain_name}/{stage}")
 
 def handler(event, context):
     logger.info(f"Raw event received: {json.dumps(event)}")
@@ -331,6 +325,8 @@ def handler(event, context):
 
     except json.JSONDecodeError:
         logger.error(f"Received non-JSON message body from {connection_id}: {message_body_str}")
+        if not allow_request(connection_id, None):
+            return {'statusCode': 429, 'body': 'Too many requests.'}
         send_message_to_client(apigw_management_client, connection_id, {
             "type": "error",
             "message": "Invalid message format. Body must be JSON."
@@ -340,23 +336,76 @@ def handler(event, context):
         logger.error(f"Error processing message setup: {str(e)}")
         return {'statusCode': 500, 'body': 'Internal processing error.'}
 
+    # Drop floods before they reach the tables (see wuwadraft_core.rate_limit)
+    if not allow_request(connection_id, action):
+        return {'statusCode': 429, 'body': 'Too many requests.'}
 
     # --- Route based on action ---
+    # Lobby writes are versioned; if another action changed the lobby between this action's
+    # read and its write, the whole action is re-run from a fresh read.
+    try:
+        return retry_on_conflict(
+            lambda: route_action(event, action, message_data, connection_id, player_name, apigw_management_client),
+            f"'{action}' from {connection_id}"
+        )
+    except LobbyConflict as conflict:
+        logger.warning(f"Giving up on '{action}' from {connection_id} after repeated lobby conflicts: {conflict}")
+        send_message_to_client(apigw_management_client, connection_id, {
+            "type": "error",
+            "message": "The lobby is busy, please try again."
+        })
+        return {'statusCode': 409, 'body': 'Conflict, lobby changed during request.'}
+
+def route_action(event, action, message_data, connection_id, player_name, apigw_management_client):
+    """Runs one client action. May raise LobbyConflict, in which case handler retries it."""
     try:
         if action == 'createLobby':
             player_name = message_data.get('name', 'UnknownHost')
             logger.info(f"Processing 'createLobby' action for {connection_id} ({player_name})")
 
-            # --- CALL THE S3 FETCH FUNCTION HERE ---
-            all_resonators_for_new_lobby = get_all_resonator_names_from_s3()
-            # --- END OF CALL ---
+            draft_format_id = message_data.get('draftFormat') or DEFAULT_DRAFT_FORMAT_ID
+            if not get_draft_format(draft_format_id):
+                logger.warning(f"createLobby from {connection_id} asked for unknown draft format '{draft_format_id}'.")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Unknown draft format. Available formats: {', '.join(sorted(get_draft_formats()))}."})
+                return {'statusCode': 400, 'body': 'Unknown draft format.'}
+            try:
+                series_length, fearless = parse_series_settings(message_data)
+            except ValueError as e:
+                logger.warning(f"createLobby from {connection_id} has invalid series settings: {e}")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": str(e)})
+                return {'statusCode': 400, 'body': 'Invalid series settings.'}
+
+            auto_select_strategy = message_data.get('autoSelect') or DEFAULT_AUTO_SELECT_STRATEGY
+            if auto_select_strategy not in AUTO_SELECT_STRATEGIES:
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Unknown autoSelect strategy. Available: {', '.join(AUTO_SELECT_STRATEGIES)}."})
+                return {'statusCode': 400, 'body': 'Unknown autoSelect strategy.'}
+
+            # An optional poolFilter narrows the pool with set operations on the cached catalogue's indexes
+            pool_filter = message_data.get('poolFilter')
+            if pool_filter:
+                try:
+                    all_resonators_for_new_lobby = resolve_pool_filter(get_resonator_catalogue(), pool_filter)
+                except ValueError as e:
+                    logger.warning(f"createLobby from {connection_id} has an invalid poolFilter: {e}")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": str(e)})
+                    return {'statusCode': 400, 'body': 'Invalid pool filter.'}
+                pool_needed = max_selections(get_draft_format(draft_format_id)) + MAX_EQUILIBRATION_BANS
+                if len(all_resonators_for_new_lobby) < pool_needed:
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"The pool filter leaves {len(all_resonators_for_new_lobby)} resonators; this draft format needs at least {pool_needed}."})
+                    return {'statusCode': 400, 'body': 'Pool too small.'}
+            else:
+                # --- CALL THE S3 FETCH FUNCTION HERE ---
+                all_resonators_for_new_lobby = get_all_resonator_names_from_s3()
+                # --- END OF CALL ---
 
+            import uuid # Imported where used, like random below, to keep module init minimal
             lobby_id = str(uuid.uuid4())[:8].upper()
-            timestamp = datetime.now(timezone.utc).isoformat()
+            timestamp = now_ms()
             
             # Get equilibration setting from client message_data
             enable_equilibration = message_data.get('enableEquilibration', True)
             logger.info(f"Lobby {lobby_id} will have equilibration system enabled: {enable_equilibration}")
+            is_public = bool(message_data.get('isPublic', False)) # Opt-in listing in listLobbies
 
             # Calculate TTL for lobby expiration (5 hours from creation)
             LOBBY_LIFESPAN_HOURS = 5 
@@ -368,10 +417,20 @@ def handler(event, context):
                 'lobbyId': lobby_id,
                 'hostConnectionId': connection_id,
                 'hostName': player_name,
+                'hostResumeToken': uuid.uuid4().hex, # Reclaims the host role after a dropped connection (see resumeSession)
                 'lobbyState': 'WAITING',
                 'createdAt': timestamp,
                 'ttl': ttl_timestamp,  # Add TTL attribute for automatic DynamoDB expiration
                 'equilibrationEnabled': enable_equilibration,
+                'draftFormatId': draft_format_id, # Key into wuwadraft_core/draft_formats.json
+                'poolFilter': pool_filter or None, # Re-resolved when both players are ready (see lobby_resonator_pool)
+                'autoSelectStrategy': auto_select_strategy, # What a turn timeout selects (see wuwadraft_core.auto_select)
+
+                # Best-of-N series (see wuwadraft_core.series)
+                'seriesLength': series_length,
+                'fearless': fearless,
+                'seriesGame': 1,
+                'seriesHistory': [],
                 
                 # Initialize all player-related fields
                 'player1ConnectionId': None,
@@ -397,16 +456,24 @@ def handler(event, context):
                 'player1Picks': [],
                 'player2Picks': [],
                 'availableResonators': all_resonators_for_new_lobby,
-                
+
+                # Resume catch-up log (see append_draft_event)
+                'eventSeq': 0,
+                'recentEvents': [],
+
                 # Equilibration-specific fields
                 'effectiveDraftOrder': None,
                 'equilibrationBansTarget': 0,
                 'equilibrationBansMade': 0,
+                'version': 1, # Bumped by every lobby write (see wuwadraft_core.concurrency)
+                'isPublic': is_public,
                 'lastAction': f"{player_name} created the lobby (Equilibration: {'ON' if enable_equilibration else 'OFF'})."
             }
+            if is_public: # Sparse index key, kept only while the lobby is open (see wuwadraft_core.lobby_browser)
+                new_lobby_item[PUBLIC_LISTING_ATTRIBUTE] = PUBLIC_LISTING_OPEN
             
             lobbies_table.put_item(Item=new_lobby_item)
-            logger.info(f"Lobby item created in {LOBBIES_TABLE_NAME} with ID {lobby_id}")
+            logger.info(f"Lobby item created in {lobbies_table.name} with ID {lobby_id}")
 
             # Update the connection item for the host
             connections_table.update_item(
@@ -414,7 +481,7 @@ def handler(event, context):
                 UpdateExpression="SET currentLobbyId = :lid, playerName = :pn",
                 ExpressionAttributeValues={':lid': lobby_id, ':pn': player_name}
             )
-            logger.info(f"Connection item for host {connection_id} updated in {CONNECTIONS_TABLE_NAME}")
+            logger.info(f"Connection item for host {connection_id} updated in {connections_table.name}")
 
             # Send confirmation back to the host
             response_payload = {
@@ -422,7 +489,15 @@ def handler(event, context):
                 "lobbyId": lobby_id,
                 "isHost": True,
                 "message": f"Lobby {lobby_id} created successfully.",
-                "equilibrationEnabled": enable_equilibration
+                "equilibrationEnabled": enable_equilibration,
+                "draftFormatId": draft_format_id,
+                "poolSize": len(all_resonators_for_new_lobby),
+                "autoSelect": auto_select_strategy,
+                "seriesLength": series_length,
+                "fearless": fearless,
+                "isPublic": is_public,
+                "resumeToken": new_lobby_item['hostResumeToken'],
+                "resumeGraceSeconds": RESUME_GRACE_SECONDS
             }
             send_message_to_client(apigw_management_client, connection_id, response_payload)
 
@@ -443,7 +518,7 @@ def handler(event, context):
 
             # 1. Get the current lobby state
             try:
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id})
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
 
                 if not lobby_item:
@@ -461,25 +536,49 @@ def handler(event, context):
                 expression_attribute_values = {}
                 expression_attribute_names = {} # Needed if attributes conflict with reserved words
 
+                remove_expression_parts = []
+                import uuid
+                resume_token = uuid.uuid4().hex
+
+                # A slot held for a dropped player is reclaimable once its resume grace window
+                # has passed, but only while the lobby is WAITING (a paused draft stays held).
+                is_waiting = lobby_item.get('lobbyState', 'WAITING') == 'WAITING'
+
                 # Check Player 1 slot
                 # Use .get() which returns None if key doesn't exist or value is explicitly None
-                if lobby_item.get('player1ConnectionId') is None:
+                if lobby_item.get('player1ConnectionId') is None or (is_waiting and is_slot_disconnect_expired(lobby_item, 'player1')):
                     assigned_slot = 'P1'
                     update_expression_parts.append("#p1ConnId = :connId")
                     update_expression_parts.append("#p1Name = :pName")
+                    update_expression_parts.append("#p1Token = :resumeToken")
                     expression_attribute_names["#p1ConnId"] = "player1ConnectionId"
                     expression_attribute_names["#p1Name"] = "player1Name"
+                    expression_attribute_names["#p1Token"] = "player1ResumeToken"
                     expression_attribute_values[":connId"] = connection_id
                     expression_attribute_values[":pName"] = player_name
+                    expression_attribute_values[":resumeToken"] = resume_token
+                    if lobby_item.get('player1DisconnectedAt'):
+                        logger.info(f"Reclaiming expired P1 slot in lobby {lobby_id} for {connection_id}.")
+                        update_expression_parts.extend(["player1Ready = :falseVal", "player1ScoreSubmitted = :falseVal"])
+                        remove_expression_parts.extend(["player1DisconnectedAt", "player1Sequences", "player1WeightedBoxScore"])
+                        expression_attribute_values[":falseVal"] = False
                 # Check Player 2 slot
-                elif lobby_item.get('player2ConnectionId') is None:
+                elif lobby_item.get('player2ConnectionId') is None or (is_waiting and is_slot_disconnect_expired(lobby_item, 'player2')):
                     assigned_slot = 'P2'
                     update_expression_parts.append("#p2ConnId = :connId")
                     update_expression_parts.append("#p2Name = :pName")
+                    update_expression_parts.append("#p2Token = :resumeToken")
                     expression_attribute_names["#p2ConnId"] = "player2ConnectionId"
                     expression_attribute_names["#p2Name"] = "player2Name"
+                    expression_attribute_names["#p2Token"] = "player2ResumeToken"
                     expression_attribute_values[":connId"] = connection_id
                     expression_attribute_values[":pName"] = player_name
+                    expression_attribute_values[":resumeToken"] = resume_token
+                    if lobby_item.get('player2DisconnectedAt'):
+                        logger.info(f"Reclaiming expired P2 slot in lobby {lobby_id} for {connection_id}.")
+                        update_expression_parts.extend(["player2Ready = :falseVal", "player2ScoreSubmitted = :falseVal"])
+                        remove_expression_parts.extend(["player2DisconnectedAt", "player2Sequences", "player2WeightedBoxScore"])
+                        expression_attribute_values[":falseVal"] = False
                 else:
                     # Lobby is full
                     logger.warning(f"Lobby {lobby_id} is full. Cannot add {connection_id}.")
@@ -492,15 +591,21 @@ def handler(event, context):
 
                 # 3. Update the lobby item in WuwaDraftLobbies
                 update_expression = "SET " + ", ".join(update_expression_parts)
+                if remove_expression_parts:
+                    update_expression += " REMOVE " + ", ".join(remove_expression_parts)
                 logger.info(f"Updating lobby {lobby_id} with UpdateExpression: {update_expression}, Values: {expression_attribute_values}")
 
-                lobbies_table.update_item(
+                # Versioned, so two players racing for the same slot can't both get it
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression,
                     ExpressionAttributeNames=expression_attribute_names,
-                    ExpressionAttributeValues=expression_attribute_values
-                )
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
                 logger.info(f"Lobby {lobby_id} updated successfully with {connection_id} as {assigned_slot}")
+                sync_public_listing(lobby_id, updated_lobby_item) # Unlists a public lobby once both slots are taken
 
                 # 4. Update the connection item for the joining player in WuwaDraftConnections
                 connections_table.update_item(
@@ -521,94 +626,22 @@ def handler(event, context):
                     "isHost": False, 
                     "message": f"Successfully joined lobby {lobby_id} as {assigned_slot}.",
                     "equilibrationEnabled": lobby_item.get('equilibrationEnabled', False),
-                    "playerScoreSubmitted": False  # Explicitly set to False for this join/rejoin into slot
+                    "playerScoreSubmitted": False,  # Explicitly set to False for this join/rejoin into slot
+                    "resumeToken": resume_token, # Presented with resumeSession to reclaim this slot after a dropped connection
+                    "resumeGraceSeconds": RESUME_GRACE_SECONDS
                 }
                 send_message_to_client(apigw_management_client, connection_id, response_payload)
 
                 # --- BEGIN NOTIFICATION BLOCK ---
-                # Fetch the latest lobby state again to ensure we have player names/IDs
-                try:
-                    logger.info(f"JOIN_LOBBY_BROADCAST: Attempting to fetch lobby item for broadcast. LobbyID: {lobby_id}")
-                    updated_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                    updated_lobby_item = updated_response.get('Item')
-
-                    if not updated_lobby_item:
-                        logger.error(f"JOIN_LOBBY_BROADCAST_ERROR: Lobby item for {lobby_id} is NULL after get_item for broadcast.")
-                        # Don't fail the whole join, just log error and return
-                        return {'statusCode': 200, 'body': 'Player joined lobby, but failed to broadcast update.'}
-
-                    # VERY IMPORTANT LOGS:
-                    p1_score_submitted_from_db = updated_lobby_item.get('player1ScoreSubmitted')
-                    p2_score_submitted_from_db = updated_lobby_item.get('player2ScoreSubmitted')
-                    logger.info(f"JOIN_LOBBY_BROADCAST_DATA: LobbyID: {lobby_id}, Fetched P1ScoreSubmitted: {p1_score_submitted_from_db} (type: {type(p1_score_submitted_from_db)})")
-                    logger.info(f"JOIN_LOBBY_BROADCAST_DATA: LobbyID: {lobby_id}, Fetched P2ScoreSubmitted: {p2_score_submitted_from_db} (type: {type(p2_score_submitted_from_db)})")
-                    # Log the entire item to be sure
-                    logger.info(f"JOIN_LOBBY_BROADCAST_FULL_ITEM: {json.dumps(updated_lobby_item, cls=DecimalEncoder)}")
-
-                    # Prepare the state update payload
-                    state_payload = {
-                        "type": "lobbyStateUpdate",
-                        "lobbyId": lobby_id,
-                        "hostName": updated_lobby_item.get('hostName'),
-                        "player1Name": updated_lobby_item.get('player1Name'),
-                        "player2Name": updated_lobby_item.get('player2Name'),
-                        "lobbyState": updated_lobby_item.get('lobbyState', 'WAITING'),
-                        "player1Ready": updated_lobby_item.get('player1Ready', False),
-                        "player2Ready": updated_lobby_item.get('player2Ready', False),
-                        "equilibrationEnabled": updated_lobby_item.get('equilibrationEnabled', False),
-                        "currentPhase": updated_lobby_item.get('currentPhase'),
-                        "currentTurn": updated_lobby_item.get('currentTurn'),
-                        "bans": updated_lobby_item.get('bans', []),
-                        "player1Picks": updated_lobby_item.get('player1Picks', []),
-                        "player2Picks": updated_lobby_item.get('player2Picks', []),
-                        "availableResonators": updated_lobby_item.get('availableResonators', []),
-                        "turnExpiresAt": updated_lobby_item.get('turnExpiresAt'),
-                        "player1ScoreSubmitted": bool(p1_score_submitted_from_db),  # Explicitly cast to bool after logging
-                        "player2ScoreSubmitted": bool(p2_score_submitted_from_db),   # Explicitly cast to bool after logging
-                        "player1WeightedBoxScore": updated_lobby_item.get('player1WeightedBoxScore'),
-                        "player2WeightedBoxScore": updated_lobby_item.get('player2WeightedBoxScore'),
-                        "player1Sequences": updated_lobby_item.get('player1Sequences'),
-                        "player2Sequences": updated_lobby_item.get('player2Sequences'),
-                        "effectiveDraftOrder": updated_lobby_item.get('effectiveDraftOrder'),
-                        "playerRoles": updated_lobby_item.get('playerRoles'),
-                        "equilibrationBansAllowed": updated_lobby_item.get('equilibrationBansAllowed', 0),
-                        "equilibrationBansMade": updated_lobby_item.get('equilibrationBansMade', 0),
-                        "currentEquilibrationBanner": updated_lobby_item.get('currentEquilibrationBanner'),
-                        "lastAction": f"{player_name} joined as {assigned_slot}."
-                        
-                    }
-                    if not state_payload.get('lastAction'): # If not already set by some other logic
-                        joining_player_name_for_action = player_name # This is the name of the player who just joined
-                        joining_player_assigned_slot = assigned_slot # This is the slot they were assigned
-                        state_payload['lastAction'] = f"{joining_player_name_for_action} joined as {joining_player_assigned_slot}."
-                    logger.info(f"JOIN_LOBBY_BROADCAST_PAYLOAD: Broadcasting lobby state update: {json.dumps(state_payload, cls=DecimalEncoder)}")
-
-                    # Get all current participant connection IDs
-                    participants = [
-                        updated_lobby_item.get('hostConnectionId'),
-                        updated_lobby_item.get('player1ConnectionId'),
-                        updated_lobby_item.get('player2ConnectionId')
-                    ]
-                    # Filter out any None values (e.g., if P2 hasn't joined yet)
-                    valid_connection_ids = [pid for pid in participants if pid]
-
-                    # Send the update to ALL participants
-                    failed_sends = []
-                    for recipient_id in valid_connection_ids:
-                        if not send_message_to_client(apigw_management_client, recipient_id, state_payload):
-                             # Track failures (e.g., if someone disconnected just now)
-                             failed_sends.append(recipient_id)
-
-                    if failed_sends:
-                         logger.warning(f"Failed to send state update to some connections: {failed_sends}")
-
-                except Exception as broadcast_err:
-                     # Log error during broadcast but don't fail the join operation itself
-                     logger.error(f"Error broadcasting lobby state update for {lobby_id}: {str(broadcast_err)}", exc_info=True)
+                # updated_lobby_item is the item as written (ReturnValues='ALL_NEW'), no re-read needed.
+                # broadcast_lobby_state logs its own errors, so a failed broadcast doesn't fail the join.
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=f"{player_name} joined as {assigned_slot}.", lobby_item=updated_lobby_item)
                 # --- END NOTIFICATION BLOCK ---
 
                 return {'statusCode': 200, 'body': 'Player joined lobby.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error joining lobby {lobby_id} for {connection_id}: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {
@@ -616,29 +649,314 @@ def handler(event, context):
                 })
                 return {'statusCode': 500, 'body': 'Failed to join lobby.'}
 
+        # --- spectateLobby Handler ---
+        # Spectators watch read-only: they go into the lobby's spectator shards
+        # (wuwadraft_core.spectators) rather than the lobby item, and never get a slot.
+        elif action == 'spectateLobby':
+            lobby_id = message_data.get('lobbyId')
+            if not lobby_id:
+                logger.error(f"Spectate request from {connection_id} missing lobbyId.")
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Lobby ID is required to spectate."
+                })
+                return {'statusCode': 400, 'body': 'Missing lobbyId.'}
+
+            logger.info(f"Processing 'spectateLobby' for {connection_id} into lobby {lobby_id}")
+            try:
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
+                lobby_item = response.get('Item')
+                if not lobby_item:
+                    logger.warning(f"Lobby {lobby_id} not found for spectator {connection_id}.")
+                    send_message_to_client(apigw_management_client, connection_id, {
+                        "type": "error", "message": f"Lobby {lobby_id} not found."
+                    })
+                    return {'statusCode': 404, 'body': 'Lobby not found.'}
+
+                if is_lobby_participant(lobby_item, connection_id):
+                    send_message_to_client(apigw_management_client, connection_id, {
+                        "type": "error", "message": "You are already in this lobby."
+                    })
+                    return {'statusCode': 400, 'body': 'Already a participant.'}
+
+                add_spectator(lobby_id, connection_id, lobby_item.get('ttl'))
+                if not lobby_item.get('hasSpectators'):
+                    # Turns on spectator fan-out in broadcast_lobby_state for this lobby
+                    lobby_item = update_lobby(
+                        lobby_item,
+                        Key={'lobbyId': lobby_id},
+                        UpdateExpression="SET hasSpectators = :trueVal",
+                        ExpressionAttributeValues={':trueVal': True},
+                        ReturnValues='ALL_NEW'
+                    )['Attributes']
+
+                # Lets the disconnect handler take the connection back out of its shard
+                connections_table.update_item(
+                    Key={'connectionId': connection_id},
+                    UpdateExpression="SET spectatingLobbyId = :lobbyId",
+                    ConditionExpression="attribute_exists(connectionId)",
+                    ExpressionAttributeValues={':lobbyId': lobby_id}
+                )
+
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "spectateJoined",
+                    "lobbyId": lobby_id,
+                    "message": f"Spectating lobby {lobby_id}."
+                })
+                send_message_to_client(apigw_management_client, connection_id,
+                                       build_spectator_payload(build_lobby_state_payload(lobby_id, lobby_item)))
+                return {'statusCode': 200, 'body': 'Spectating lobby.'}
+
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
+            except Exception as e:
+                logger.error(f"Error adding spectator {connection_id} to lobby {lobby_id}: {str(e)}", exc_info=True)
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Failed to spectate lobby."
+                })
+                return {'statusCode': 500, 'body': 'Failed to spectate lobby.'}
+
+        # --- listLobbies Handler ---
+        # Open public lobbies come from the sparse PublicLobbiesIndex (wuwadraft_core.lobby_browser), never a Scan.
+        elif action == 'listLobbies':
+            cursor = message_data.get('cursor')
+            try:
+                page = list_public_lobbies(cursor, message_data.get('pageSize'))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"listLobbies from {connection_id} with bad paging ({cursor}): {str(e)}")
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Invalid lobby list page."
+                })
+                return {'statusCode': 400, 'body': 'Invalid cursor or page size.'}
+            except Exception as e:
+                logger.error(f"Error listing public lobbies for {connection_id}: {str(e)}", exc_info=True)
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Failed to list lobbies."
+                })
+                return {'statusCode': 500, 'body': 'Failed to list lobbies.'}
+
+            send_message_to_client(apigw_management_client, connection_id, {
+                "type": "lobbyList",
+                "lobbies": page['lobbies'],
+                "cursor": cursor,
+                "nextCursor": page['nextCursor']
+            })
+            return {'statusCode': 200, 'body': 'Lobbies listed.'}
+
+        # --- joinMatchmaking / leaveMatchmaking Handlers ---
+        # Queued connections are paired by score and put into new lobbies by the matchmaking
+        # Lambda (wuwadraft_core.matchmaking); a match arrives as a lobbyJoined message.
+        elif action == 'joinMatchmaking':
+            player_name = message_data.get('name', 'Player')
+            received_sequences = message_data.get('sequences', {}) # Dict: {'CharName': S_val}
+
+            if not isinstance(received_sequences, dict):
+                logger.warning(f"joinMatchmaking from {connection_id} without a sequences map.")
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Submit your box score to join matchmaking."
+                })
+                return {'statusCode': 400, 'body': 'Invalid sequences.'}
+
+            valid_sequences_to_store = {
+                char_name: s_value for char_name, s_value in received_sequences.items() if is_valid_sequence(s_value)
+            }
+            weighted_box_score = score_box(valid_sequences_to_store) # Computed here, like submitBoxScore
+            try:
+                queued_at = queue_for_matchmaking(connection_id, player_name, weighted_box_score, valid_sequences_to_store)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                logger.info(f"joinMatchmaking: {connection_id} is already in a lobby (or gone).")
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "error", "message": "Leave your current lobby before joining matchmaking."
+                })
+                return {'statusCode': 409, 'body': 'Already in a lobby.'}
+
+            send_message_to_client(apigw_management_client, connection_id, {
+                "type": "matchmakingQueued",
+                "score": weighted_box_score,
+                "queuedAt": queued_at,
+                "message": "Looking for an opponent with a similar box score..."
+            })
+            return {'statusCode': 200, 'body': 'Queued for matchmaking.'}
+
+        elif action == 'leaveMatchmaking':
+            was_queued = leave_matchmaking(connection_id)
+            send_message_to_client(apigw_management_client, connection_id, {
+                "type": "matchmakingLeft",
+                "wasQueued": was_queued
+            })
+            return {'statusCode': 200, 'body': 'Left matchmaking.'}
+
+        # --- NEW: resumeSession Handler ---
+        elif action == 'resumeSession':
+            lobby_id = message_data.get('lobbyId')
+            resume_token = message_data.get('resumeToken')
+            last_seen_event_seq = message_data.get('lastSeenEventSeq') # None if the client lost its state (e.g. page reload)
+
+            if not lobby_id or not resume_token:
+                logger.warning(f"resumeSession request from {connection_id} missing lobbyId or resumeToken.")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "resumeFailed", "message": "Missing lobby ID or resume token."})
+                return {'statusCode': 400, 'body': 'Missing lobbyId or resumeToken.'}
+
+            logger.info(f"Processing 'resumeSession' for {connection_id} into lobby {lobby_id} (last seen event {last_seen_event_seq})")
+
+            try:
+                lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read()).get('Item')
+                if not lobby_item:
+                    logger.info(f"resumeSession: Lobby {lobby_id} no longer exists.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "resumeFailed", "message": f"Lobby {lobby_id} no longer exists."})
+                    return {'statusCode': 404, 'body': 'Lobby not found.'}
+
+                # The host token reclaims the host role plus any slot the host was playing in
+                resumed_prefixes = []
+                if lobby_item.get('hostResumeToken') == resume_token:
+                    resumed_prefixes = ['host'] + [candidate_prefix for candidate_prefix in ('player1', 'player2')
+                                                   if lobby_item.get(f"{candidate_prefix}ConnectionId") == lobby_item.get('hostConnectionId')]
+                else:
+                    for candidate_prefix in ('player1', 'player2'):
+                        if lobby_item.get(f"{candidate_prefix}ResumeToken") == resume_token:
+                            resumed_prefixes = [candidate_prefix]
+                            break
+
+                if not resumed_prefixes:
+                    logger.info(f"resumeSession: No slot in lobby {lobby_id} holds the presented token.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "resumeFailed", "message": "Your slot in this lobby is no longer held."})
+                    return {'statusCode': 403, 'body': 'Resume token not recognised.'}
+
+                if is_slot_disconnect_expired(lobby_item, resumed_prefixes[0]):
+                    logger.info(f"resumeSession: Grace window for {resumed_prefixes[0]} in lobby {lobby_id} has passed.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "resumeFailed", "message": "The reconnect window has expired."})
+                    return {'statusCode': 410, 'body': 'Resume window expired.'}
+
+                is_host = resumed_prefixes[0] == 'host'
+                token_prefix = resumed_prefixes[0] # Whose token the write is conditioned on
+                slot_prefix = next((prefix for prefix in resumed_prefixes if prefix != 'host'), None)
+                assigned_slot = None
+                other_prefix = None
+                if slot_prefix:
+                    assigned_slot = 'P1' if slot_prefix == 'player1' else 'P2'
+                    other_prefix = 'player2' if slot_prefix == 'player1' else 'player1'
+                player_name = lobby_item.get(f"{slot_prefix}Name", assigned_slot) if slot_prefix else lobby_item.get('hostName', 'Host')
+                import uuid
+                new_resume_token = uuid.uuid4().hex # Rotate so a leaked token is single-use
+                last_action_msg = f"{player_name} (Host) reconnected." if is_host else f"{player_name} reconnected."
+
+                update_expression_parts = []
+                remove_expression_parts = []
+                for resumed_prefix in resumed_prefixes:
+                    update_expression_parts.extend([f"{resumed_prefix}ConnectionId = :connId", f"{resumed_prefix}ResumeToken = :newToken"])
+                    remove_expression_parts.append(f"{resumed_prefix}DisconnectedAt")
+                update_expression_parts.append("lastAction = :lastAct")
+                expression_attribute_values = {
+                    ':connId': connection_id,
+                    ':newToken': new_resume_token,
+                    ':oldToken': resume_token
+                }
+
+                # Unpause once nobody else is still away, restarting the turn clock with the time that was left
+                draft_still_paused = bool(lobby_item.get('draftPaused'))
+                resumed_turn_expires_at = lobby_item.get('turnExpiresAt')
+                if slot_prefix and draft_still_paused and not lobby_item.get(f"{other_prefix}DisconnectedAt"):
+                    remaining_seconds = int(lobby_item.get('pausedTurnRemainingSeconds') or TURN_DURATION_SECONDS)
+                    resumed_turn_expires_at = ms_from_now(remaining_seconds)
+                    update_expression_parts.append("turnExpiresAt = :expires")
+                    expression_attribute_values[':expires'] = resumed_turn_expires_at
+                    remove_expression_parts.extend(["draftPaused", "pausedTurnRemainingSeconds"])
+                    draft_still_paused = False
+                    last_action_msg = f"{player_name} reconnected. Draft resumed."
+                expression_attribute_values[':lastAct'] = last_action_msg
+
+                update_expression = "SET " + ", ".join(update_expression_parts) + " REMOVE " + ", ".join(remove_expression_parts)
+                logger.info(f"resumeSession: Rebinding {resumed_prefixes} of lobby {lobby_id} to {connection_id}. Update: {update_expression}")
+                # If the token was rotated concurrently, the retry's fresh read no longer finds it
+                resumed_lobby_item = update_lobby(
+                    lobby_item,
+                    Key={'lobbyId': lobby_id},
+                    UpdateExpression=update_expression,
+                    ConditionExpression=f"{token_prefix}ResumeToken = :oldToken",
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+
+                connections_table.update_item(
+                    Key={'connectionId': connection_id},
+                    UpdateExpression="SET currentLobbyId = :lid, playerName = :pn",
+                    ExpressionAttributeValues={':lid': lobby_id, ':pn': player_name}
+                )
+
+                # Only the selections missed since lastSeenEventSeq are sent when the log still covers them
+                missed_events = get_events_since(lobby_item, last_seen_event_seq)
+                resume_payload = {
+                    "type": "sessionResumed",
+                    "lobbyId": lobby_id,
+                    "assignedSlot": assigned_slot,
+                    "isHost": is_host,
+                    "resumeToken": new_resume_token,
+                    "resumeGraceSeconds": RESUME_GRACE_SECONDS,
+                    "equilibrationEnabled": lobby_item.get('equilibrationEnabled', False),
+                    "playerScoreSubmitted": bool(slot_prefix and lobby_item.get(f"{slot_prefix}ScoreSubmitted")),
+                    "fullState": missed_events is None
+                }
+                if missed_events is not None:
+                    resume_payload.update({
+                        "fromEventSeq": last_seen_event_seq,
+                        "events": missed_events,
+                        "eventSeq": lobby_item.get('eventSeq', 0),
+                        "lobbyState": lobby_item.get('lobbyState'),
+                        "currentPhase": lobby_item.get('currentPhase'),
+                        "currentTurn": lobby_item.get('currentTurn'),
+                        "equilibrationBansMade": lobby_item.get('equilibrationBansMade', 0),
+                        "turnExpiresAt": resumed_turn_expires_at,
+                        "draftPaused": draft_still_paused,
+                        "pausedTurnRemainingSeconds": lobby_item.get('pausedTurnRemainingSeconds') if draft_still_paused else None,
+                        "hostDisconnected": bool(resumed_lobby_item.get('hostDisconnectedAt')),
+                        "player1Disconnected": bool(resumed_lobby_item.get('player1DisconnectedAt')),
+                        "player2Disconnected": bool(resumed_lobby_item.get('player2DisconnectedAt')),
+                        "reconnectExpiresAt": resume_hold_expires_at(resumed_lobby_item),
+                        "lastAction": last_action_msg
+                    })
+                send_message_to_client(apigw_management_client, connection_id, resume_payload)
+
+                # Everyone else needs the reconnect/unpause. The resumed client only needs the
+                # full state when the event log could not cover its gap.
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg,
+                                      exclude_connection_id=connection_id if missed_events is not None else None,
+                                      lobby_item=resumed_lobby_item)
+
+                return {'statusCode': 200, 'body': 'Session resumed.'}
+
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
+            except Exception as e:
+                logger.error(f"Error processing resumeSession for {connection_id} on lobby {lobby_id}: {str(e)}", exc_info=True)
+                send_message_to_client(apigw_management_client, connection_id, {"type": "resumeFailed", "message": "Failed to resume session."})
+                return {'statusCode': 500, 'body': 'Failed to resume session.'}
+        # --- END resumeSession Handler ---
+
         elif action == 'playerReady':
             logger.info(f"Processing 'playerReady' action for {connection_id}")
 
-            # 1. Find which lobby the sender is in from Connections table
+            # 1. Find which lobby the sender is in (sent by the client, Connections table for legacy clients)
             try:
-                connection_item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
-                if not connection_item or 'currentLobbyId' not in connection_item:
+                lobby_id = get_lobby_id_for_action(message_data, connection_id)
+                if not lobby_id:
                     logger.warning(f"Connection {connection_id} not found or not in a lobby.")
                     return {'statusCode': 404, 'body': 'Connection not associated with a lobby.'}
-                lobby_id = connection_item['currentLobbyId']
-                player_name = connection_item.get('playerName', 'Unknown') # Get name from connection record
                 logger.info(f"Found lobby {lobby_id} for connection {connection_id}")
             except Exception as e:
                  logger.error(f"Failed to get connection details for {connection_id}: {str(e)}")
                  return {'statusCode': 500, 'body': 'Error finding connection details.'}
 
-            # 2. Get the current lobby state with ConsistentRead
+            # 2. Get the current lobby state (the versioned write below catches a stale read)
             try:
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
-                    logger.warning(f"Lobby {lobby_id} not found (though connection table referenced it).")
+                    logger.warning(f"Lobby {lobby_id} not found for playerReady.")
                     return {'statusCode': 404, 'body': 'Lobby data not found.'}
+                if not is_lobby_participant(lobby_item, connection_id):
+                    logger.warning(f"Connection {connection_id} sent 'playerReady' for lobby {lobby_id} but is not a participant.")
+                    return {'statusCode': 403, 'body': 'Not a participant in this lobby.'}
                 logger.info(f"Found lobby item: {lobby_item}")
             except Exception as e:
                  logger.error(f"Failed to get lobby {lobby_id}: {str(e)}")
@@ -656,35 +974,29 @@ def handler(event, context):
             else:
                 logger.warning(f"Connection {connection_id} sent 'playerReady' but is not P1 or P2 in lobby {lobby_id}.")
                 return {'statusCode': 200, 'body': 'Ready signal ignored (not P1 or P2).'}
+            player_name = lobby_item.get(f"{player_slot_key}Name", 'Unknown')
 
             # Define the current event's last action message early
             current_event_last_action = f"{player_name} ({player_slot_key}) is Ready."
 
-            # 4. Update the player's ready status in WuwaDraftLobbies
+            # 4. Update the player's ready status in WuwaDraftLobbies. ALL_NEW returns the
+            # latest lobby state, so it doesn't have to be re-fetched.
             try:
                 logger.info(f"Updating {player_slot_key} ready status to True in lobby {lobby_id}")
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=f"SET {ready_flag_key} = :true",
-                    ExpressionAttributeValues={':true': True}
-                )
+                    ExpressionAttributeValues={':true': True},
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
                 logger.info(f"Updated {player_slot_key} ready status in lobby {lobby_id}")
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                  logger.error(f"Failed to update ready status for {player_slot_key} in {lobby_id}: {str(e)}")
                  return {'statusCode': 500, 'body': 'Failed to update ready status.'}
 
-            # 5. Re-fetch the LATEST lobby state AFTER the update
-            try:
-                logger.info(f"Re-fetching lobby state for {lobby_id} after ready update.")
-                updated_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                updated_lobby_item = updated_response.get('Item')
-                if not updated_lobby_item:
-                    logger.error(f"Could not re-fetch lobby {lobby_id} after ready update.")
-                    return {'statusCode': 500, 'body': 'Failed to fetch updated lobby state.'}
-            except Exception as e:
-                 logger.error(f"Failed to re-fetch lobby {lobby_id} after ready update: {str(e)}")
-                 return {'statusCode': 500, 'body': 'Error fetching updated lobby state.'}
-
             p1_ready = updated_lobby_item.get('player1Ready', False)
             p2_ready = updated_lobby_item.get('player2Ready', False)
             current_lobby_state_from_db = updated_lobby_item.get('lobbyState', 'WAITING')
@@ -696,7 +1008,12 @@ def handler(event, context):
                 is_equilibration_active = updated_lobby_item.get('equilibrationEnabled', False)
                 
                 # Initialize variables for draft setup
-                effective_draft_order_to_use = []
+                draft_format = get_draft_format(updated_lobby_item.get('draftFormatId'))
+                if not draft_format:
+                    logger.error(f"Lobby {lobby_id}: Draft format '{updated_lobby_item.get('draftFormatId')}' is not available.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "This lobby's draft format is no longer available."})
+                    return {'statusCode': 500, 'body': 'Draft format unavailable.'}
+                draft_order_name = NEUTRAL_ORDER # Which of the format's orders (wuwadraft_core.equilibration) to use
                 assigned_player_roles = {} # Stores how P1/P2 map to roles in the chosen template
                 last_action_for_draft_start = "Draft starting."
 
@@ -710,7 +1027,7 @@ def handler(event, context):
                         # Send error back to the player who just readied up
                         send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Cannot start draft, all players must submit Box Scores first."})
                         # Broadcast current WAITING state which should show who hasn't submitted
-                        broadcast_lobby_state(lobby_id, apigw_management_client, last_action="Waiting for all Box Scores to be submitted.")
+                        broadcast_lobby_state(lobby_id, apigw_management_client, last_action="Waiting for all Box Scores to be submitted.", lobby_item=updated_lobby_item)
                         return {'statusCode': 200, 'body': 'Waiting for scores.'}
 
                     # --- SCORES ARE SUBMITTED, PROCEED WITH EQUILIBRATION ---
@@ -722,33 +1039,29 @@ def handler(event, context):
                     p2_score = int(p2_score) if p2_score is not None else 0
 
                     logger.info(f"Lobby {lobby_id}: P1 Score={p1_score}, P2 Score={p2_score}")
-                    weighted_score_diff = abs(p1_score - p2_score)
+                    # Order, Lower Score Player (LSP) and equilibration bans (wuwadraft_core.equilibration)
+                    equilibration_outcome = decide_equilibration(p1_score, p2_score)
+                    weighted_score_diff = equilibration_outcome.score_diff
+                    lower_score_player_slot = equilibration_outcome.lower_score_player_slot # None if scores are equal
                     logger.info(f"Lobby {lobby_id}: Weighted Score Difference = {weighted_score_diff}")
 
-                    lower_score_player_slot = None
-                    # Determine Lower Score Player (LSP)
-                    if p1_score < p2_score:
-                        lower_score_player_slot = 'P1'
-                    elif p2_score < p1_score:
-                        lower_score_player_slot = 'P2'
-                    # If scores are equal, there's no LSP for priority in P1_FAVORED, but threshold still matters for NEUTRAL vs P1_FAVORED
-
                     # A. Draft Order Priority Determination (Proposal Step 4A)
-                    if weighted_score_diff < SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY:
+                    if equilibration_outcome.draft_order == NEUTRAL_ORDER:
                         logger.info(f"Lobby {lobby_id}: Score diff ({weighted_score_diff}) < {SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY}. Using NEUTRAL_DRAFT_ORDER.")
-                        effective_draft_order_to_use = NEUTRAL_DRAFT_ORDER_TEMPLATE_V2
+                        draft_order_name = NEUTRAL_ORDER
                         
                         # Randomly assign ROLE_A and ROLE_B to P1 and P2
                         players = ['P1', 'P2']
+                        import random
                         random.shuffle(players)
                         # 'playerRoles' will map the template's ROLE_A/ROLE_B to actual P1/P2
                         # e.g., if players = ['P2', 'P1'], then ROLE_A is P2, ROLE_B is P1
                         assigned_player_roles = {'ROLE_A': players[0], 'ROLE_B': players[1]}
                         logger.info(f"Lobby {lobby_id}: Neutral order roles assigned: {assigned_player_roles}")
                         last_action_for_draft_start = f"Scores close ({p1_score} vs {p2_score}). Neutral draft order. {assigned_player_roles['ROLE_A']} is ROLE_A, {assigned_player_roles['ROLE_B']} is ROLE_B."
-                    else: # weighted_score_diff >= SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY
+                    else: # P1_FAVORED_ORDER: weighted_score_diff >= SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY
                         logger.info(f"Lobby {lobby_id}: Score diff ({weighted_score_diff}) >= {SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY}. Using P1_FAVORED_DRAFT_ORDER.")
-                        effective_draft_order_to_use = P1_FAVORED_DRAFT_ORDER
+                        draft_order_name = P1_FAVORED_ORDER
                         
                         if lower_score_player_slot == 'P1':
                             # P1 (LSP) gets the 'P1' role in P1_FAVORED_DRAFT_ORDER
@@ -766,39 +1079,28 @@ def handler(event, context):
                             last_action_for_draft_start = f"Scores at {weighted_score_diff} difference. P1 gets favored draft order by default."
                         logger.info(f"Lobby {lobby_id}: P1 Favored order roles: {assigned_player_roles} (P1_ROLE_IN_TEMPLATE is the player taking the 'P1' slot in P1_FAVORED_DRAFT_ORDER)")
 
-                    draft_initialization_payload['effectiveDraftOrder'] = effective_draft_order_to_use
-                    draft_initialization_payload['playerRoles'] = assigned_player_roles
-
                     # B. Conditional Equilibration Pool Ban(s) for LSP (Proposal Step 4B)
-                    num_equilibration_bans = 0
-                    equilibration_banner_slot = None # This is the LSP who gets to make EQ bans
-                    lsp_gets_draft_priority = (weighted_score_diff >= SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY) # True if not neutral
+                    num_equilibration_bans = equilibration_outcome.equilibration_bans
+                    equilibration_banner_slot = equilibration_outcome.equilibration_banner_slot # This is the LSP who gets to make EQ bans
 
-                    if lsp_gets_draft_priority and lower_score_player_slot: # lower_score_player_slot was determined earlier
-                        equilibration_banner_slot = lower_score_player_slot
-                        
-                        # Check thresholds for EQ bans (these apply only if LSP already has draft order priority)
-                        if SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN <= weighted_score_diff < SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS:
-                            num_equilibration_bans = 1
-                            logger.info(f"Lobby {lobby_id}: LSP ({equilibration_banner_slot}) gets 1 Equilibration Ban (score diff: {weighted_score_diff}).")
-                        elif weighted_score_diff >= SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS:
-                            num_equilibration_bans = 2
-                            logger.info(f"Lobby {lobby_id}: LSP ({equilibration_banner_slot}) gets 2 Equilibration Bans (score diff: {weighted_score_diff}).")
+                    if equilibration_banner_slot:
+                        if num_equilibration_bans:
+                            logger.info(f"Lobby {lobby_id}: LSP ({equilibration_banner_slot}) gets {num_equilibration_bans} Equilibration Ban(s) (score diff: {weighted_score_diff}).")
                         else:
                             logger.info(f"Lobby {lobby_id}: Score difference ({weighted_score_diff}) grants P1 favored order but no Equilibration Bans.")
                     else:
                         logger.info(f"Lobby {lobby_id}: No LSP priority or no clear LSP for Equilibration Bans (neutral order or equal scores below major threshold).")
 
                     logger.info(f"Lobby {lobby_id}: Both players ready. BSS results calculated. Transitioning to PRE_DRAFT_READY state.")
-                    logger.info(f"Lobby {lobby_id}: Calculated BSS - Draft Order: {effective_draft_order_to_use}, Roles: {assigned_player_roles}, EQ Bans Allowed: {num_equilibration_bans}, EQ Banner: {equilibration_banner_slot}")
+                    logger.info(f"Lobby {lobby_id}: Calculated BSS - Draft Order: {draft_format.id} {draft_order_name}, Roles: {assigned_player_roles}, EQ Bans Allowed: {num_equilibration_bans}, EQ Banner: {equilibration_banner_slot}")
 
                     # This will be the payload used for the DynamoDB update for the PRE_DRAFT_READY state
                     draft_initialization_payload = {
                         'lobbyState': PRE_DRAFT_READY_STATE,
                         'equilibrationEnabled': is_equilibration_active, # IMPORTANT: Preserve this flag
 
-                        # Store the results of BSS calculations
-                        'effectiveDraftOrder': effective_draft_order_to_use,
+                        # Store the results of BSS calculations (effectiveDraftOrder and the draftFormat snapshot)
+                        **lobby_draft_format_fields(draft_format, draft_order_name),
                         'playerRoles': assigned_player_roles,
                         'equilibrationBansAllowed': num_equilibration_bans,
                         'currentEquilibrationBanner': equilibration_banner_slot,
@@ -811,11 +1113,15 @@ def handler(event, context):
                         'turnExpiresAt': None,
 
                         # Initialize/reset draft lists
-                        'availableResonators': get_all_resonator_names_from_s3(),
+                        'availableResonators': lobby_resonator_pool(updated_lobby_item),
                         'bans': [],
                         'player1Picks': [],
                         'player2Picks': [],
 
+                        # Lists were rebuilt, so earlier draft events can no longer be replayed
+                        'eventSeq': int(updated_lobby_item.get('eventSeq', 0)) + 1,
+                        'recentEvents': [],
+
                         # Appropriate last action message
                         'lastAction': f"{last_action_for_draft_start} All players ready. Waiting for Host to start draft."
                     }
@@ -842,28 +1148,32 @@ def handler(event, context):
                         
                         logger.info(f"Lobby {lobby_id}: Updating DDB to PRE_DRAFT_READY. Expression: {update_item_expression}")
                         logger.info(f"Lobby {lobby_id}: Names: {expression_attribute_names}")
-                        logger.info(f"Lobby {lobby_id}: Values: {json.dumps(expression_attribute_values, cls=DecimalEncoder, indent=2)}")
+                        logger.info(f"Lobby {lobby_id}: Values: {json.dumps(expression_attribute_values, indent=2)}")
                         
-                        lobbies_table.update_item(
+                        updated_lobby_item = update_lobby(
+                            updated_lobby_item,
                             Key={'lobbyId': lobby_id},
                             UpdateExpression=update_item_expression,
                             ConditionExpression=condition_item_expression,
                             ExpressionAttributeNames=expression_attribute_names,
-                            ExpressionAttributeValues=expression_attribute_values
-                        )
+                            ExpressionAttributeValues=expression_attribute_values,
+                            ReturnValues='ALL_NEW'
+                        )['Attributes']
                         logger.info(f"Lobby {lobby_id} successfully updated to PRE_DRAFT_READY state.")
 
+                    except LobbyConflict:
+                        raise # Re-run from a fresh read by retry_on_conflict
                     except Exception as e:
                         logger.error(f"Lobby {lobby_id}: Error updating DDB to PRE_DRAFT_READY state: {str(e)}", exc_info=True)
                         raise
 
                     final_last_action = draft_initialization_payload.get('lastAction')
-                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action)
+                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action, lobby_item=updated_lobby_item)
 
                 else: # Equilibration is OFF
                     logger.info(f"Lobby {lobby_id}: Equilibration is OFF. Using NEUTRAL_DRAFT_ORDER with random roles.")
-                    effective_draft_order_to_use = NEUTRAL_DRAFT_ORDER_TEMPLATE_V2
                     players = ['P1', 'P2']
+                    import random
                     random.shuffle(players)
                     assigned_player_roles = {'ROLE_A': players[0], 'ROLE_B': players[1]}
                     logger.info(f"Lobby {lobby_id}: Neutral order roles assigned: {assigned_player_roles}")
@@ -874,7 +1184,7 @@ def handler(event, context):
                     pre_draft_payload = {
                         'lobbyState': PRE_DRAFT_READY_STATE,
                         'equilibrationEnabled': False, # Explicitly set to False when equilibration is OFF
-                        'effectiveDraftOrder': effective_draft_order_to_use,
+                        **lobby_draft_format_fields(draft_format, NEUTRAL_ORDER),
                         'playerRoles': assigned_player_roles,
                         'equilibrationBansAllowed': 0,
                         'currentEquilibrationBanner': None,
@@ -883,10 +1193,12 @@ def handler(event, context):
                         'currentTurn': None,
                         'currentStepIndex': None,
                         'turnExpiresAt': None,
-                        'availableResonators': get_all_resonator_names_from_s3(),
+                        'availableResonators': lobby_resonator_pool(updated_lobby_item),
                         'bans': [],
                         'player1Picks': [],
                         'player2Picks': [],
+                        'eventSeq': int(updated_lobby_item.get('eventSeq', 0)) + 1,
+                        'recentEvents': [],
                         'lastAction': f"{last_action_for_draft_start} All players ready. Waiting for Host to start draft."
                     }
 
@@ -909,25 +1221,29 @@ def handler(event, context):
 
                         update_item_expression = "SET " + ", ".join(update_expression_parts)
                         
-                        lobbies_table.update_item(
+                        updated_lobby_item = update_lobby(
+                            updated_lobby_item,
                             Key={'lobbyId': lobby_id},
                             UpdateExpression=update_item_expression,
                             ConditionExpression=condition_item_expression,
                             ExpressionAttributeNames=expression_attribute_names,
-                            ExpressionAttributeValues=expression_attribute_values
-                        )
+                            ExpressionAttributeValues=expression_attribute_values,
+                            ReturnValues='ALL_NEW'
+                        )['Attributes']
                         logger.info(f"Lobby {lobby_id} successfully updated to PRE_DRAFT_READY state.")
 
+                    except LobbyConflict:
+                        raise # Re-run from a fresh read by retry_on_conflict
                     except Exception as e:
                         logger.error(f"Lobby {lobby_id}: Error updating DDB to PRE_DRAFT_READY state: {str(e)}", exc_info=True)
                         raise 
 
                     final_last_action = pre_draft_payload.get('lastAction')
-                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action)
+                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action, lobby_item=updated_lobby_item)
 
             # If not all conditions met to go to PRE_DRAFT_READY (e.g., only one player ready)
             # or if the PRE_DRAFT_READY logic path didn't execute/return:
-            broadcast_lobby_state(lobby_id, apigw_management_client, last_action=current_event_last_action)
+            broadcast_lobby_state(lobby_id, apigw_management_client, last_action=current_event_last_action, lobby_item=updated_lobby_item)
             logger.info(f"Lobby {lobby_id}: Broadcast initiated from playerReady.")
 
             return {'statusCode': 200, 'body': 'Player readiness updated.'}
@@ -945,8 +1261,8 @@ def handler(event, context):
                 return {'statusCode': 400, 'body': 'Missing lobbyId.'}
 
             try:
-                # Get the current lobby state with ConsistentRead
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                # Get the current lobby state (the versioned write below catches a stale read)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
 
                 if not lobby_item:
@@ -973,63 +1289,38 @@ def handler(event, context):
                     })
                     return {'statusCode': 400, 'body': 'Lobby not in PRE_DRAFT_READY state.'}
                 
+                # 3. Verify no player is currently disconnected (their slot is only being held for resume)
+                if lobby_item.get('player1DisconnectedAt') or lobby_item.get('player2DisconnectedAt'):
+                    logger.warning(f"Host {connection_id} attempted to start draft for lobby {lobby_id} while a player is disconnected.")
+                    send_message_to_client(apigw_management_client, connection_id, {
+                        "type": "error",
+                        "message": "Cannot start draft while a player is reconnecting."
+                    })
+                    return {'statusCode': 400, 'body': 'Player disconnected.'}
+
                 logger.info(f"Host {connection_id} validated for starting draft in lobby {lobby_id} (State: {PRE_DRAFT_READY_STATE}).")
                 # --- End of Step 1.5 Validation Logic ---
 
                 # --- Step 1.6: Draft Initiation Logic ---
                 # Retrieve the pre-calculated BSS results and draft setup from the lobby item
-                effective_draft_order_to_use = lobby_item.get('effectiveDraftOrder')
-                assigned_player_roles = lobby_item.get('playerRoles', {}) # Default to empty dict if missing
                 num_equilibration_bans = lobby_item.get('equilibrationBansAllowed', 0)
                 equilibration_banner_slot = lobby_item.get('currentEquilibrationBanner') # This is 'P1' or 'P2'
                 
                 # Ensure essential draft setup data is present
-                if not effective_draft_order_to_use or not assigned_player_roles:
+                try:
+                    draft_table = get_draft_table(lobby_item)
+                except (KeyError, ValueError) as e:
+                    draft_table = None
+                    logger.error(f"Lobby {lobby_id}: Could not compile the stored draft order: {e}")
+                if not draft_table or not draft_table.steps:
                     logger.error(f"Lobby {lobby_id}: Critical draft setup data (effectiveDraftOrder or playerRoles) missing from PRE_DRAFT_READY state.")
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Internal server error: Draft setup data missing."})
                     return {'statusCode': 500, 'body': 'Draft setup data missing.'}
 
-                draft_start_payload = {
-                    'lobbyState': 'DRAFTING', # Transition to active drafting
-                }
-
-                if num_equilibration_bans > 0 and equilibration_banner_slot:
-                    # --- SETUP FOR EQUILIBRATION BAN PHASE ---
-                    logger.info(f"Lobby {lobby_id}: Host starting draft. Initiating {EQUILIBRATION_PHASE_NAME} for {equilibration_banner_slot}.")
-                    eq_ban_expires_at_dt = datetime.now(timezone.utc) + timedelta(seconds=EQUILIBRATION_PHASE_TIMEOUT_SECONDS)
-                    
-                    draft_start_payload.update({
-                        'currentPhase': EQUILIBRATION_PHASE_NAME,
-                        'currentTurn': equilibration_banner_slot,
-                        'currentStepIndex': -1, # Or 0 if you count EQ bans as steps in an order
-                        'turnExpiresAt': eq_ban_expires_at_dt.isoformat(),
-                        'lastAction': f"Host started the draft. {equilibration_banner_slot} to make {num_equilibration_bans} Equilibration Ban(s)."
-                    })
-                else:
-                    # --- NO EQUILIBRATION BANS (or BSS was off), SETUP FOR STANDARD DRAFT ---
-                    logger.info(f"Lobby {lobby_id}: Host starting draft. Initiating standard draft sequence.")
-                    
-                    first_step_info = effective_draft_order_to_use[0] # Get the first step from the stored order
-                    first_phase_from_order = first_step_info['phase']
-                    first_turn_role_in_template = first_step_info['turnPlayerDesignation'] # e.g., 'ROLE_A' or 'P1_ROLE'
-                    
-                    # Resolve the actual player ('P1' or 'P2') for the first turn
-                    actual_current_turn = resolve_turn_from_role(first_turn_role_in_template, assigned_player_roles)
-                    
-                    if not actual_current_turn:
-                        logger.error(f"Lobby {lobby_id}: CRITICAL - Could not resolve actual current turn for standard draft start from stored roles. Roles: {assigned_player_roles}, Designation: {first_turn_role_in_template}")
-                        send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Internal server error: Could not determine first turn."})
-                        return {'statusCode': 500, 'body': 'Could not determine first turn.'}
-
-                    std_turn_expires_at_dt = datetime.now(timezone.utc) + timedelta(seconds=TURN_DURATION_SECONDS)
-                    
-                    draft_start_payload.update({
-                        'currentPhase': first_phase_from_order,
-                        'currentTurn': actual_current_turn,
-                        'currentStepIndex': 0, # Start at the first step of the standard order
-                        'turnExpiresAt': std_turn_expires_at_dt.isoformat(),
-                        'lastAction': f"Host started the draft. {actual_current_turn} to {first_phase_from_order.split('1')[0]}." # e.g., P1 to BAN.
-                    })
+                # The first step, or the equilibration phase if the format puts it first
+                draft_start_payload = build_draft_start_payload(draft_table, num_equilibration_bans, equilibration_banner_slot, "Host started the draft.")
+                draft_start_payload['autoSelectQueues'] = lobby_candidate_queues(lobby_item, lobby_item.get('availableResonators') or [])
+                logger.info(f"Lobby {lobby_id}: Host starting draft. Initiating {draft_start_payload['currentPhase']} for {draft_start_payload['currentTurn']}.")
 
                 # --- Update DynamoDB ---
                 try:
@@ -1057,38 +1348,35 @@ def handler(event, context):
 
                     logger.info(f"Lobby {lobby_id}: Host starting draft. Update Expression: {update_item_expression}")
                     logger.info(f"Lobby {lobby_id}: ExpressionAttributeNames: {expression_attribute_names}")
-                    logger.info(f"Lobby {lobby_id}: ExpressionAttributeValues: {json.dumps(expression_attribute_values, cls=DecimalEncoder, indent=2)}")
+                    logger.info(f"Lobby {lobby_id}: ExpressionAttributeValues: {json.dumps(expression_attribute_values, indent=2)}")
                     
-                    lobbies_table.update_item(
+                    # A conflict (state changed or host left) re-runs the validation above from a fresh read
+                    updated_lobby_item = update_lobby(
+                        lobby_item,
                         Key={'lobbyId': lobby_id},
                         UpdateExpression=update_item_expression,
                         ConditionExpression=condition_item_expression,
                         ExpressionAttributeNames=expression_attribute_names,
-                        ExpressionAttributeValues=expression_attribute_values
-                    )
+                        ExpressionAttributeValues=expression_attribute_values,
+                        ReturnValues='ALL_NEW'
+                    )['Attributes']
                     logger.info(f"Lobby {lobby_id} successfully updated by host to start the draft.")
 
-                except ClientError as e:
-                    if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                        logger.warning(f"Lobby {lobby_id}: Conditional check failed for hostStartsDraft. State might have changed or not host. Current state in DB: {lobby_item.get('lobbyState')}")
-                        send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to start draft, state changed or action not allowed."})
-                        # Broadcast current state so host sees the actual situation
-                        broadcast_lobby_state(lobby_id, apigw_management_client, last_action="Failed attempt to start draft due to state conflict.")
-                        return {'statusCode': 409, 'body': 'Conflict, state changed or not authorized.'}
-                    else:
-                        logger.error(f"Lobby {lobby_id}: ClientError updating DDB for hostStartsDraft: {str(e)}", exc_info=True)
-                        raise # Re-raise to be caught by the outer try/except
+                except LobbyConflict:
+                    raise # Re-run from a fresh read by retry_on_conflict
                 except Exception as e:
                     logger.error(f"Lobby {lobby_id}: Error updating DDB for hostStartsDraft: {str(e)}", exc_info=True)
                     raise # Re-raise
 
                 # Broadcast the new state (draft is now active)
                 final_last_action = draft_start_payload.get('lastAction')
-                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action)
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=final_last_action, lobby_item=updated_lobby_item)
                 
                 return {'statusCode': 200, 'body': 'Draft started by host.'}
                 # --- End of Step 1.6 Draft Initiation Logic ---
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error processing hostStartsDraft for lobby {lobby_id}: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Server error starting draft."})
@@ -1107,36 +1395,44 @@ def handler(event, context):
             logger.info(f"--- Entered 'makeBan' action block --- Connection: {connection_id}")
             logger.info(f"DEBUG: 'makeBan' received message data: {message_data}")
 
-            resonator_name = message_data.get('resonatorName')
-            if not resonator_name:
-                logger.error(f"'makeBan' request from {connection_id} missing 'resonatorName'.")
-                return {'statusCode': 400, 'body': 'Missing resonatorName in request.'}
-            logger.info(f"Received resonatorName: {resonator_name}")
+            selections = get_requested_selections(message_data)
+            if not selections:
+                logger.error(f"'makeBan' request from {connection_id} missing 'resonatorNames'/'resonatorName'.")
+                return {'statusCode': 400, 'body': 'Missing resonatorNames in request.'}
+            selection_text = ', '.join(selections)
+            logger.info(f"Received resonatorNames: {selections}")
+            request_id = message_data.get('requestId') # Optional; lets a resent ban return its original result
 
-            # Get lobby_id from connection_id
+            # Get lobby_id from the message (connections table for legacy clients)
             try:
-                connection_item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
-                if not connection_item or 'currentLobbyId' not in connection_item:
+                lobby_id = get_lobby_id_for_action(message_data, connection_id)
+                if not lobby_id:
                     logger.warning(f"Connection {connection_id} not found or not in a lobby for makeBan.")
                     return {'statusCode': 404, 'body': 'Connection not associated with a lobby.'}
-                lobby_id = connection_item['currentLobbyId']
                 logger.info(f"Found lobbyId: {lobby_id} for connection {connection_id}")
             except Exception as e:
                 logger.error(f"Failed to get connection details for {connection_id}: {str(e)}")
                 return {'statusCode': 500, 'body': 'Error finding connection details.'}
 
-            # Get lobby_item using ConsistentRead=True
+            # Get lobby_item (the versioned write below catches a stale read)
             try:
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for makeBan.")
                     return {'statusCode': 404, 'body': 'Lobby data not found.'}
+                if not is_lobby_participant(lobby_item, connection_id):
+                    logger.warning(f"Connection {connection_id} sent 'makeBan' for lobby {lobby_id} but is not a participant.")
+                    return {'statusCode': 403, 'body': 'Not a participant in this lobby.'}
                 logger.info(f"Fetched lobby_item for {lobby_id}. Current turn: {lobby_item.get('currentTurn')}")
             except Exception as e:
                 logger.error(f"Failed to get lobby {lobby_id}: {str(e)}")
                 return {'statusCode': 500, 'body': 'Error fetching lobby data.'}
 
+            recent_request = find_recent_request(lobby_item, request_id)
+            if recent_request:
+                return replay_recent_request(apigw_management_client, lobby_id, lobby_item, connection_id, recent_request)
+
             # Determine which player is making the action
             player_making_action = None
             if lobby_item.get('player1ConnectionId') == connection_id:
@@ -1145,6 +1441,11 @@ def handler(event, context):
                 player_making_action = 'P2'
 
             current_phase_from_db = lobby_item.get('currentPhase')
+
+            if lobby_item.get('draftPaused'):
+                logger.info(f"makeBan ignored for lobby {lobby_id}: draft is paused waiting for a player to reconnect.")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Draft is paused while a player reconnects."})
+                return {'statusCode': 409, 'body': 'Draft paused.'}
             
             # THIS IS THE CRITICAL NEW BRANCHING LOGIC:
             if current_phase_from_db == EQUILIBRATION_PHASE_NAME:
@@ -1156,88 +1457,98 @@ def handler(event, context):
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Not your turn to make an equilibration ban."})
                     return {'statusCode': 400, 'body': 'Not your turn.'}
 
-                if resonator_name not in lobby_item.get('availableResonators', []):
-                    logger.warning(f"Invalid equilibration ban attempt for unavailable resonator {resonator_name} in lobby {lobby_id}")
-                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Resonator {resonator_name} is not available."})
-                    return {'statusCode': 400, 'body': 'Resonator not available.'}
-
                 eq_bans_made = int(lobby_item.get('equilibrationBansMade', 0))
                 eq_bans_allowed = int(lobby_item.get('equilibrationBansAllowed', 0))
                 
-                if eq_bans_made >= eq_bans_allowed:
+                if eq_bans_made + len(selections) > eq_bans_allowed:
                     logger.warning(f"Too many equilibration bans attempted in lobby {lobby_id}")
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "No more equilibration bans allowed."})
                     return {'statusCode': 400, 'body': 'No more equilibration bans allowed.'}
 
+                # The banner may make the remaining equilibration bans one at a time or together
+                selection_error, new_available_list = apply_selections(lobby_item.get('availableResonators', []), selections, len(selections))
+                if selection_error:
+                    logger.warning(f"Invalid equilibration ban attempt for {selections} in lobby {lobby_id}: {selection_error}")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": selection_error})
+                    return {'statusCode': 400, 'body': 'Resonator not available.'}
+
                 # 2. Process the ban
-                eq_bans_made += 1
-                new_available_list = [r for r in lobby_item.get('availableResonators', []) if r != resonator_name]
+                eq_bans_made += len(selections)
                 
+                eq_ban_last_action = f"{player_making_action} made equilibration ban {eq_bans_made} of {eq_bans_allowed}: {selection_text}"
+                if eq_bans_made >= eq_bans_allowed:
+                    eq_ban_last_action = f"Equilibration bans complete. {player_making_action} made final ban: {selection_text}. Starting standard draft."
+                new_event_seq, new_recent_events = append_draft_event(lobby_item, 'ban', player_making_action, selections, eq_ban_last_action)
+
                 # 3. If more EQ bans:
                 if eq_bans_made < eq_bans_allowed:
                     # Log lobby state before update
-                    logger.info(f"MAKE_ACTION_DEBUG (equilibrationBan): Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item, cls=DecimalEncoder)}")
+                    logger.info(f"MAKE_ACTION_DEBUG (equilibrationBan): Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item)}")
 
                     # Update DDB with new ban and increment counter
+                    eq_ban_response = {'statusCode': 200, 'body': 'Equilibration ban processed.'}
                     try:
-                        lobbies_table.update_item(
+                        updated_lobby_item = update_lobby(
+                            lobby_item,
                             Key={'lobbyId': lobby_id},
                             UpdateExpression="""
                                 SET bans = list_append(if_not_exists(bans, :empty_list), :new_ban),
                                     availableResonators = :new_available,
                                     equilibrationBansMade = :eq_bans_made,
+                                    eventSeq = :event_seq,
+                                    recentEvents = :recent_events,
+                                    recentRequests = :recent_requests,
                                     lastAction = :last_action
-                            """,
+                            """ + queue_remove_clause(lobby_item, selections),
                             ExpressionAttributeValues={
                                 ':empty_list': [],
-                                ':new_ban': [resonator_name],
+                                ':new_ban': selections,
                                 ':new_available': new_available_list,
                                 ':eq_bans_made': eq_bans_made,
-                                ':last_action': f"{player_making_action} made equilibration ban {eq_bans_made} of {eq_bans_allowed}: {resonator_name}"
-                            }
-                        )
+                                ':event_seq': new_event_seq,
+                                ':recent_events': new_recent_events,
+                                ':recent_requests': append_recent_request(lobby_item, request_id, eq_ban_response),
+                                ':last_action': eq_ban_last_action
+                            },
+                            ReturnValues='ALL_NEW'
+                        )['Attributes']
                         logger.info(f"Updated lobby {lobby_id} with equilibration ban {eq_bans_made} of {eq_bans_allowed}")
+                        logger.info(f"MAKE_ACTION_DEBUG (equilibrationBan): Lobby item AFTER update for lobby {lobby_id}: {json.dumps(updated_lobby_item)}")
                         
-                        # Immediately re-fetch and log to see what changed
-                        refetched_item_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                        refetched_item = refetched_item_response.get('Item')
-                        logger.info(f"MAKE_ACTION_DEBUG (equilibrationBan): Lobby item AFTER update (re-fetched) for lobby {lobby_id}: {json.dumps(refetched_item, cls=DecimalEncoder)}")
-                        
-                        # Broadcast the update
-                        broadcast_lobby_state(lobby_id, apigw_management_client, f"{player_making_action} made equilibration ban {eq_bans_made} of {eq_bans_allowed}: {resonator_name}")
-                        return {'statusCode': 200, 'body': 'Equilibration ban processed.'}
+                        # Ack the banner first, then broadcast to everyone else
+                        acked_connection_id = acknowledge_draft_action(apigw_management_client, connection_id, lobby_id, action, message_data, lobby_item, updated_lobby_item)
+                        broadcast_lobby_state(lobby_id, apigw_management_client, eq_ban_last_action, exclude_connection_id=acked_connection_id, lobby_item=updated_lobby_item)
+                        return eq_ban_response
+                    except LobbyConflict:
+                        raise # Re-run from a fresh read by retry_on_conflict
                     except Exception as e:
                         logger.error(f"Failed to update lobby {lobby_id} after equilibration ban: {str(e)}")
                         return {'statusCode': 500, 'body': 'Failed to process equilibration ban.'}
                 
                 # 4. Else (all EQ bans done - transition to standard draft):
                 else:
-                    # Get effective draft order and player roles
-                    effective_draft_order = lobby_item.get('effectiveDraftOrder')
-                    player_roles = lobby_item.get('playerRoles', {})
-                    
-                    if not effective_draft_order or not player_roles:
-                        logger.error(f"Missing draft configuration for lobby {lobby_id}")
+                    # Get the standard step the equilibration bans were inserted before
+                    try:
+                        draft_table = get_draft_table(lobby_item)
+                        first_phase, actual_first_turn, first_step_index, first_turn_seconds = determine_next_state(
+                            int(lobby_item.get('currentStepIndex', -1)), draft_table
+                        )
+                    except (KeyError, ValueError) as e:
+                        logger.error(f"Missing draft configuration for lobby {lobby_id}: {e}")
                         return {'statusCode': 500, 'body': 'Draft configuration missing.'}
                     
-                    # Get first step of standard draft
-                    first_step = effective_draft_order[0]
-                    first_phase = first_step['phase']
-                    first_turn_role = first_step['turnPlayerDesignation']
-                    
-                    # Resolve actual first turn
-                    actual_first_turn = resolve_turn_from_role(first_turn_role, player_roles)
                     if not actual_first_turn:
                         logger.error(f"Failed to resolve first turn for lobby {lobby_id}")
                         return {'statusCode': 500, 'body': 'Failed to determine first turn.'}
                     
-                    # Set standard turn timer
-                    turn_expires_at_dt = datetime.now(timezone.utc) + timedelta(seconds=TURN_DURATION_SECONDS)
-                    turn_expires_at_iso = turn_expires_at_dt.isoformat()
+                    # Set that step's turn timer
+                    turn_expires_at = ms_from_now(first_turn_seconds)
                     
                     # Update DDB for standard draft start
+                    eq_final_response = {'statusCode': 200, 'body': 'Equilibration bans complete, draft starting.'}
                     try:
-                        lobbies_table.update_item(
+                        updated_lobby_item = update_lobby(
+                            lobby_item,
                             Key={'lobbyId': lobby_id},
                             UpdateExpression="""
                                 SET bans = list_append(if_not_exists(bans, :empty_list), :new_ban),
@@ -1247,30 +1558,36 @@ def handler(event, context):
                                     currentStepIndex = :next_index,
                                     turnExpiresAt = :expires,
                                     equilibrationBansMade = :eq_bans_made,
+                                    eventSeq = :event_seq,
+                                    recentEvents = :recent_events,
+                                    recentRequests = :recent_requests,
                                     lastAction = :last_action
-                            """,
+                            """ + queue_remove_clause(lobby_item, selections),
                             ExpressionAttributeValues={
                                 ':empty_list': [],
-                                ':new_ban': [resonator_name],
+                                ':new_ban': selections,
                                 ':new_available': new_available_list,
                                 ':next_phase': first_phase,
                                 ':next_turn': actual_first_turn,
-                                ':next_index': 0,
-                                ':expires': turn_expires_at_iso,
+                                ':next_index': first_step_index,
+                                ':expires': turn_expires_at,
                                 ':eq_bans_made': eq_bans_made,
-                                ':last_action': f"Equilibration bans complete. {player_making_action} made final ban: {resonator_name}. Starting standard draft."
-                            }
-                        )
+                                ':event_seq': new_event_seq,
+                                ':recent_events': new_recent_events,
+                                ':recent_requests': append_recent_request(lobby_item, request_id, eq_final_response),
+                                ':last_action': eq_ban_last_action
+                            },
+                            ReturnValues='ALL_NEW'
+                        )['Attributes']
                         logger.info(f"Updated lobby {lobby_id} to start standard draft after equilibration bans")
+                        logger.info(f"MAKE_ACTION_DEBUG (equilibrationBanFinal): Lobby item AFTER update for lobby {lobby_id}: {json.dumps(updated_lobby_item)}")
                         
-                        # Immediately re-fetch and log to see what changed
-                        refetched_item_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                        refetched_item = refetched_item_response.get('Item')
-                        logger.info(f"MAKE_ACTION_DEBUG (equilibrationBanFinal): Lobby item AFTER update (re-fetched) for lobby {lobby_id}: {json.dumps(refetched_item, cls=DecimalEncoder)}")
-                        
-                        # Broadcast the update
-                        broadcast_lobby_state(lobby_id, apigw_management_client, f"Equilibration bans complete. {player_making_action} made final ban: {resonator_name}. Starting standard draft.")
-                        return {'statusCode': 200, 'body': 'Equilibration bans complete, draft starting.'}
+                        # Ack the banner first, then broadcast to everyone else
+                        acked_connection_id = acknowledge_draft_action(apigw_management_client, connection_id, lobby_id, action, message_data, lobby_item, updated_lobby_item)
+                        broadcast_lobby_state(lobby_id, apigw_management_client, eq_ban_last_action, exclude_connection_id=acked_connection_id, lobby_item=updated_lobby_item)
+                        return eq_final_response
+                    except LobbyConflict:
+                        raise # Re-run from a fresh read by retry_on_conflict
                     except Exception as e:
                         logger.error(f"Failed to update lobby {lobby_id} for standard draft start: {str(e)}")
                         return {'statusCode': 500, 'body': 'Failed to start standard draft.'}
@@ -1280,12 +1597,12 @@ def handler(event, context):
                 logger.info(f"Processing Standard Ban for lobby {lobby_id} by {player_making_action} in phase {current_phase_from_db}")
                 
                 # Log lobby state at start of standard ban processing
-                logger.info(f"STANDARD_BAN: lobby_item: {json.dumps(lobby_item, cls=DecimalEncoder)}")
+                logger.info(f"STANDARD_BAN: lobby_item: {json.dumps(lobby_item)}")
                 logger.info(f"STANDARD_BAN: Current phase: {lobby_item.get('currentPhase')}")
                 logger.info(f"STANDARD_BAN: Current turn: {lobby_item.get('currentTurn')}")
                 logger.info(f"STANDARD_BAN: Current step index: {lobby_item.get('currentStepIndex')}")
-                logger.info(f"STANDARD_BAN: Effective draft order: {json.dumps(lobby_item.get('effectiveDraftOrder'), cls=DecimalEncoder)}")
-                logger.info(f"STANDARD_BAN: Player roles: {json.dumps(lobby_item.get('playerRoles'), cls=DecimalEncoder)}")
+                logger.info(f"STANDARD_BAN: Effective draft order: {json.dumps(lobby_item.get('effectiveDraftOrder'))}")
+                logger.info(f"STANDARD_BAN: Player roles: {json.dumps(lobby_item.get('playerRoles'))}")
                 
                 # Validate standard ban
                 if lobby_item.get('lobbyState') != 'DRAFTING':
@@ -1293,7 +1610,16 @@ def handler(event, context):
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Draft is not active."})
                     return {'statusCode': 400, 'body': 'Draft not active.'}
 
-                if not current_phase_from_db.startswith('BAN'):
+                # Get current step index and the compiled draft order
+                current_step_index = int(lobby_item.get('currentStepIndex', -1))
+                try:
+                    draft_table = get_draft_table(lobby_item)
+                except (KeyError, ValueError) as e:
+                    logger.error(f"STANDARD_BAN: Missing or invalid draft order configuration: {e}")
+                    return {'statusCode': 500, 'body': 'Missing draft order configuration.'}
+                current_step = get_current_draft_step(draft_table, current_step_index)
+
+                if not current_step or current_step.kind != BAN_KIND:
                     logger.warning(f"STANDARD_BAN: Invalid phase {current_phase_from_db} for ban in lobby {lobby_id}")
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Cannot ban during phase: {current_phase_from_db}."})
                     return {'statusCode': 400, 'body': 'Not a banning phase.'}
@@ -1303,44 +1629,25 @@ def handler(event, context):
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Not your turn."})
                     return {'statusCode': 400, 'body': 'Not your turn.'}
 
-                if resonator_name not in lobby_item.get('availableResonators', []):
-                    logger.warning(f"STANDARD_BAN: Invalid resonator {resonator_name} - not in available list")
-                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Resonator {resonator_name} is not available."})
-                    return {'statusCode': 400, 'body': 'Resonator not available.'}
-
-                # Get current step index and validate
-                current_step_index = int(lobby_item.get('currentStepIndex', -1))
-                logger.info(f"STANDARD_BAN: Current step index: {current_step_index}")
-                
-                if current_step_index < 0:
-                    logger.error(f"STANDARD_BAN: Invalid step index {current_step_index}")
-                    return {'statusCode': 500, 'body': 'Invalid draft step index.'}
-
-                # Get effective draft order
-                effective_draft_order = lobby_item.get('effectiveDraftOrder')
-                if not effective_draft_order:
-                    logger.error(f"STANDARD_BAN: Missing effectiveDraftOrder")
-                    return {'statusCode': 500, 'body': 'Missing draft order configuration.'}
+                # All of the step's selections are checked in one pass and applied in one write
+                selection_error, new_available_list = apply_selections(lobby_item.get('availableResonators', []), selections, current_step.count)
+                if selection_error:
+                    logger.warning(f"STANDARD_BAN: Invalid selection {selections}: {selection_error}")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": selection_error})
+                    return {'statusCode': 400, 'body': 'Invalid selection.'}
 
-                # Calculate next state
-                logger.info(f"STANDARD_BAN: Calling determine_next_state with index: {current_step_index}, order: {json.dumps(effective_draft_order, cls=DecimalEncoder)}")
-                next_phase, next_turn_designation, next_step_index = determine_next_state(current_step_index, effective_draft_order)
-                logger.info(f"STANDARD_BAN: Got from determine_next_state: phase={next_phase}, turn_des={next_turn_designation}, next_idx={next_step_index}")
-
-                # Resolve next turn
-                player_roles = lobby_item.get('playerRoles', {})
-                logger.info(f"STANDARD_BAN: Calling resolve_turn_from_role with des: {next_turn_designation}, roles: {json.dumps(player_roles, cls=DecimalEncoder)}")
-                actual_next_turn = resolve_turn_from_role(next_turn_designation, player_roles)
-                logger.info(f"STANDARD_BAN: Got actual_next_turn: {actual_next_turn}")
-
-                if not actual_next_turn:
-                    logger.error(f"STANDARD_BAN: Failed to resolve next turn")
-                    return {'statusCode': 500, 'body': 'Failed to determine next turn.'}
+                # Calculate next state (the next turn is resolved in the compiled table)
+                next_phase, actual_next_turn, next_step_index, next_turn_seconds = determine_next_state(
+                    current_step_index, draft_table, pending_equilibration_banner(lobby_item)
+                )
+                logger.info(f"STANDARD_BAN: Got from determine_next_state: phase={next_phase}, turn={actual_next_turn}, next_idx={next_step_index}")
 
                 # Prepare update
-                new_available_list = [r for r in lobby_item.get('availableResonators', []) if r != resonator_name]
-                turn_expires_at_dt = datetime.now(timezone.utc) + timedelta(seconds=TURN_DURATION_SECONDS)
-                turn_expires_at_iso = turn_expires_at_dt.isoformat()
+                turn_expires_at = None
+                if actual_next_turn: # A format may end on a ban
+                    turn_expires_at = ms_from_now(next_turn_seconds)
+
+                new_event_seq, new_recent_events = append_draft_event(lobby_item, 'ban', player_making_action, selections, f"{player_making_action} banned {selection_text}")
 
                 update_expression = """
                     SET bans = list_append(if_not_exists(bans, :empty_list), :new_ban),
@@ -1349,51 +1656,56 @@ def handler(event, context):
                         currentTurn = :next_turn,
                         currentStepIndex = :next_index,
                         turnExpiresAt = :expires,
+                        eventSeq = :event_seq,
+                        recentEvents = :recent_events,
+                        recentRequests = :recent_requests,
                         lastAction = :last_action
-                """
+                """ + queue_remove_clause(lobby_item, selections)
+                ban_response = {'statusCode': 200, 'body': 'Standard ban processed.'}
                 expression_values = {
                     ':empty_list': [],
-                    ':new_ban': [resonator_name],
+                    ':new_ban': selections,
                     ':new_available': new_available_list,
                     ':next_phase': next_phase,
                     ':next_turn': actual_next_turn,
                     ':next_index': next_step_index,
-                    ':expires': turn_expires_at_iso,
-                    ':last_action': f"{player_making_action} banned {resonator_name}"
+                    ':expires': turn_expires_at,
+                    ':event_seq': new_event_seq,
+                    ':recent_events': new_recent_events,
+                    ':recent_requests': append_recent_request(lobby_item, request_id, ban_response),
+                    ':last_action': f"{player_making_action} banned {selection_text}"
                 }
 
                 logger.info(f"STANDARD_BAN: Update payload:")
                 logger.info(f"  UpdateExpression: {update_expression}")
-                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_values, cls=DecimalEncoder)}")
+                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_values)}")
 
                 # Log lobby state before update
-                logger.info(f"MAKE_ACTION_DEBUG (makeBan): Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item, cls=DecimalEncoder)}")
+                logger.info(f"MAKE_ACTION_DEBUG (makeBan): Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item)}")
 
                 try:
-                    lobbies_table.update_item(
+                    # If the step moved on, the retry re-validates the ban against the fresh state
+                    updated_lobby_item = update_lobby(
+                        lobby_item,
                         Key={'lobbyId': lobby_id},
                         UpdateExpression=update_expression,
                         ConditionExpression="currentStepIndex = :expected_index",
-                        ExpressionAttributeValues={**expression_values, ':expected_index': current_step_index}
-                    )
+                        ExpressionAttributeValues={**expression_values, ':expected_index': current_step_index},
+                        ReturnValues='ALL_NEW'
+                    )['Attributes']
                     logger.info(f"STANDARD_BAN: Successfully updated lobby {lobby_id}")
-
-                    # Immediately re-fetch and log to see what changed
-                    refetched_item_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                    refetched_item = refetched_item_response.get('Item')
-                    logger.info(f"MAKE_ACTION_DEBUG (makeBan): Lobby item AFTER update (re-fetched) for lobby {lobby_id}: {json.dumps(refetched_item, cls=DecimalEncoder)}")
-
-                    # Broadcast the update
-                    broadcast_lobby_state(lobby_id, apigw_management_client, f"{player_making_action} banned {resonator_name}")
-                    return {'statusCode': 200, 'body': 'Standard ban processed.'}
+                    logger.info(f"MAKE_ACTION_DEBUG (makeBan): Lobby item AFTER update for lobby {lobby_id}: {json.dumps(updated_lobby_item)}")
+
+                    # Ack the banner first, then broadcast to everyone else
+                    acked_connection_id = acknowledge_draft_action(apigw_management_client, connection_id, lobby_id, action, message_data, lobby_item, updated_lobby_item)
+                    broadcast_lobby_state(lobby_id, apigw_management_client, f"{player_making_action} banned {selection_text}",
+                                          exclude_connection_id=acked_connection_id, lobby_item=updated_lobby_item)
+                    return ban_response
+                except LobbyConflict:
+                    raise # Re-run from a fresh read by retry_on_conflict
                 except ClientError as e:
-                    if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                        logger.warning(f"STANDARD_BAN: Conditional check failed - state changed during update")
-                        send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Action failed, state may have changed. Please wait for update."})
-                        return {'statusCode': 409, 'body': 'Conflict, state changed during request.'}
-                    else:
-                        logger.error(f"STANDARD_BAN: Failed to update lobby: {str(e)}")
-                        return {'statusCode': 500, 'body': 'Failed to update lobby state.'}
+                    logger.error(f"STANDARD_BAN: Failed to update lobby: {str(e)}")
+                    return {'statusCode': 500, 'body': 'Failed to update lobby state.'}
                 except Exception as e:
                     logger.error(f"STANDARD_BAN: Unexpected error: {str(e)}")
                     return {'statusCode': 500, 'body': 'Internal server error during update.'}
@@ -1404,18 +1716,19 @@ def handler(event, context):
             logger.info(f"--- !!! Entered 'makePick' action block !!! --- Connection: {connection_id}")
             logger.info(f"DEBUG: 'makePick' received message data: {message_data}")
 
-            resonator_name = message_data.get('resonatorName')
-            if not resonator_name:
-                logger.error(f"'makePick' request from {connection_id} missing 'resonatorName'.")
-                return {'statusCode': 400, 'body': 'Missing resonatorName in request.'}
-            logger.info(f"Received resonatorName: {resonator_name}")
+            selections = get_requested_selections(message_data)
+            if not selections:
+                logger.error(f"'makePick' request from {connection_id} missing 'resonatorNames'/'resonatorName'.")
+                return {'statusCode': 400, 'body': 'Missing resonatorNames in request.'}
+            selection_text = ', '.join(selections)
+            logger.info(f"Received resonatorNames: {selections}")
+            request_id = message_data.get('requestId') # Optional; lets a resent pick return its original result
             lobby_id = None
             try:
-                connection_item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
-                if not connection_item or 'currentLobbyId' not in connection_item:
+                lobby_id = get_lobby_id_for_action(message_data, connection_id)
+                if not lobby_id:
                     logger.warning(f"Connection {connection_id} not found or not in a lobby for makePick.")
                     return {'statusCode': 404, 'body': 'Connection not associated with a lobby.'}
-                lobby_id = connection_item['currentLobbyId']
                 logger.info(f"Found lobbyId: {lobby_id} for connection {connection_id}")
             except Exception as e:
                  logger.error(f"Failed to get connection details for {connection_id}: {str(e)}")
@@ -1423,12 +1736,15 @@ def handler(event, context):
             lobby_item = None
             if lobby_id:
                 try:
-                    # Use ConsistentRead for validation
-                    response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                    # The versioned write below catches a stale read, so only retries need ConsistentRead
+                    response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                     lobby_item = response.get('Item')
                     if not lobby_item:
                         logger.warning(f"Lobby {lobby_id} not found for makePick.")
                         return {'statusCode': 404, 'body': 'Lobby data not found.'}
+                    if not is_lobby_participant(lobby_item, connection_id):
+                        logger.warning(f"Connection {connection_id} sent 'makePick' for lobby {lobby_id} but is not a participant.")
+                        return {'statusCode': 403, 'body': 'Not a participant in this lobby.'}
                     logger.info(f"Fetched lobby_item for {lobby_id}. Current turn: {lobby_item.get('currentTurn')}")
                 except Exception as e:
                      logger.error(f"Failed to get lobby {lobby_id}: {str(e)}")
@@ -1437,6 +1753,10 @@ def handler(event, context):
                  logger.error(f"Cannot fetch lobby item because lobby_id is missing for connection {connection_id}")
                  return {'statusCode': 500, 'body': 'Internal error: lobby_id missing.'}
 
+            recent_request = find_recent_request(lobby_item, request_id)
+            if recent_request:
+                return replay_recent_request(apigw_management_client, lobby_id, lobby_item, connection_id, recent_request)
+
             # --- Step 2: Validation (Keep uncommented) ---
             current_phase = lobby_item.get('currentPhase')
             current_turn = lobby_item.get('currentTurn')
@@ -1446,13 +1766,25 @@ def handler(event, context):
             player2_conn_id = lobby_item.get('player2ConnectionId')
 
             # a) Check if drafting is in progress
+            if lobby_item.get('draftPaused'):
+                logger.info(f"Pick attempt in lobby {lobby_id} ignored: draft is paused waiting for a player to reconnect.")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Draft is paused while a player reconnects."})
+                return {'statusCode': 409, 'body': 'Draft paused.'}
+
             if lobby_state != 'DRAFTING':
                 logger.warning(f"Pick attempt in lobby {lobby_id} which is not in DRAFTING state ({lobby_state}).")
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Draft is not active."})
                 return {'statusCode': 400, 'body': 'Draft not active.'}
 
-            # b) Check if it's a PICKING phase
-            if not current_phase or not current_phase.startswith('PICK'):
+            # b) Check if it's a PICKING phase (per the lobby's compiled draft order)
+            try:
+                current_step_index = int(lobby_item.get('currentStepIndex', -1))
+                draft_table = get_draft_table(lobby_item)
+            except (TypeError, KeyError, ValueError) as e:
+                logger.error(f"Invalid currentStepIndex or draft order in lobby {lobby_id} during pick. Error: {e}")
+                return {'statusCode': 500, 'body': 'Internal error: Invalid draft step index.'}
+            current_step = get_current_draft_step(draft_table, current_step_index)
+            if not current_step or current_step.kind != PICK_KIND:
                 logger.warning(f"Pick attempt in lobby {lobby_id} during non-pick phase ({current_phase}).")
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Cannot pick during phase: {current_phase}."})
                 return {'statusCode': 400, 'body': 'Not a picking phase.'}
@@ -1469,89 +1801,43 @@ def handler(event, context):
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Not your turn."})
                 return {'statusCode': 400, 'body': 'Not your turn.'}
 
-            # d) Check if the resonator is available
-            if resonator_name not in available_resonators:
-                logger.warning(f"Pick attempt in lobby {lobby_id} for unavailable resonator '{resonator_name}'. Available: {available_resonators}")
-                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Resonator '{resonator_name}' is not available."})
-                return {'statusCode': 400, 'body': 'Resonator not available.'}
+            # d) Check the step's selections against the pool in one pass
+            selection_error, new_available_list = apply_selections(available_resonators, selections, current_step.count)
+            if selection_error:
+                logger.warning(f"Pick attempt in lobby {lobby_id} with invalid selection {selections}: {selection_error}. Available: {available_resonators}")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": selection_error})
+                return {'statusCode': 400, 'body': 'Invalid selection.'}
 
             # --- Validation Passed ---
-            logger.info(f"Validation passed for pick of '{resonator_name}' by {current_turn} in lobby {lobby_id}, phase {current_phase}.")
+            logger.info(f"Validation passed for pick of {selections} by {current_turn} in lobby {lobby_id}, phase {current_phase}.")
             # --- End of Step 2 ---
 
-            # 5. *** Calculate Next State using Index ***
-            current_step_index_decimal = lobby_item.get('currentStepIndex', -1) # Get value which might be Decimal
-
-            # --- ADD INT CONVERSION AND CHECK ---
-            try:
-                # Convert the retrieved value (Decimal or -1) to an integer
-                current_step_index = int(current_step_index_decimal)
-                # Check if conversion resulted in -1 unexpectedly (handles edge cases)
-                if current_step_index == -1 and current_step_index_decimal != -1:
-                     raise ValueError("Invalid step index (-1) after conversion.")
-            except (TypeError, ValueError) as e:
-                 # Log error if conversion fails or value is invalid
-                 logger.error(f"Invalid currentStepIndex '{current_step_index_decimal}' retrieved from lobby {lobby_id} during pick. Error: {e}")
-                 return {'statusCode': 500, 'body': 'Internal error: Invalid draft step index.'}
-            # --- END ADDITION ---
-
-            # Check if index is valid before proceeding (it might be -1 if draft never initialized index)
-            if current_step_index < 0: # Check less than 0 to catch default -1
-                 logger.error(f"Cannot determine next state for lobby {lobby_id}: currentStepIndex is invalid ({current_step_index}).")
-                 return {'statusCode': 500, 'body': 'Internal error: Invalid draft step index state.'}
-
-            # Now call determine_next_state with the guaranteed integer index
-            effective_draft_order = lobby_item.get('effectiveDraftOrder')
-            if not effective_draft_order:
-                logger.error(f"Lobby {lobby_id} missing effectiveDraftOrder during pick.")
-                return {'statusCode': 500, 'body': 'Internal error: Missing draft order configuration.'}
-            
-            # 1. Determine next state from draft order
-            next_phase, next_turn_designation, next_step_index = determine_next_state(current_step_index, effective_draft_order)
-
-            # 2. Resolve the actual player for the next turn
-            player_roles = lobby_item.get('playerRoles', {})
-            actual_next_turn = None  # Initialize to None
-            
-            if next_turn_designation:  # Only attempt to resolve if there is a designation
-                if 'P1_ROLE_IN_TEMPLATE' in player_roles:  # P1_FAVORED_DRAFT_ORDER was chosen
-                    if next_turn_designation == 'P1_ROLE':
-                        actual_next_turn = player_roles['P1_ROLE_IN_TEMPLATE']
-                    elif next_turn_designation == 'P2_ROLE':
-                        actual_next_turn = player_roles['P2_ROLE_IN_TEMPLATE']
-                elif 'ROLE_A' in player_roles:  # NEUTRAL_DRAFT_ORDER_TEMPLATE_V2 was chosen
-                    if next_turn_designation == 'ROLE_A':
-                        actual_next_turn = player_roles['ROLE_A']
-                    elif next_turn_designation == 'ROLE_B':
-                        actual_next_turn = player_roles['ROLE_B']
-                
-                # Log if resolution failed but a designation was expected
-                if not actual_next_turn:
-                    logger.warning(f"Lobby {lobby_id}: Could not resolve actual_next_turn from designation '{next_turn_designation}' and roles {player_roles}. This is expected if draft is completing.")
+            # 5. *** Calculate Next State using Index (the next turn comes resolved from the compiled draft order) ***
+            next_phase, actual_next_turn, next_step_index, next_turn_seconds = determine_next_state(
+                current_step_index, draft_table, pending_equilibration_banner(lobby_item)
+            )
 
             # If draft is complete, next turn should be None
-            if next_phase == 'DRAFT_COMPLETE':
-                actual_next_turn = None
+            if next_phase == DRAFT_COMPLETE_PHASE:
                 logger.info(f"Lobby {lobby_id}: Draft is now complete. Next turn is None.")
 
             # 3. Now it's safe to log these resolved values
-            logger.info(f"MAKE_PICK_FINAL_STEP_DEBUG: Processing pick: {resonator_name} by {current_turn}")
-            logger.info(f"MAKE_PICK_FINAL_STEP_DEBUG: Next state determined: Phase='{next_phase}', TurnDes='{next_turn_designation}', Index='{next_step_index}'")
+            logger.info(f"MAKE_PICK_FINAL_STEP_DEBUG: Processing pick: {selection_text} by {current_turn}")
+            logger.info(f"MAKE_PICK_FINAL_STEP_DEBUG: Next state determined: Phase='{next_phase}', Index='{next_step_index}'")
             logger.info(f"MAKE_PICK_FINAL_STEP_DEBUG: Actual next turn resolved to: {actual_next_turn}")
 
             # 4. Prepare payload for DynamoDB update
             try:
-                new_available_list = [res for res in available_resonators if res != resonator_name]
-
                 # --- Calculate expiry for the NEXT turn ---
-                turn_expires_at_iso = None
+                turn_expires_at = None
                 if actual_next_turn:  # Only set expiry if there is a next turn
-                    now = datetime.now(timezone.utc)
-                    expires_at_dt = now + timedelta(seconds=TURN_DURATION_SECONDS)
-                    turn_expires_at_iso = expires_at_dt.isoformat()
-                logger.info(f"Setting next turn expiry for lobby {lobby_id} to: {turn_expires_at_iso}")
+                    turn_expires_at = ms_from_now(next_turn_seconds)
+                logger.info(f"Setting next turn expiry for lobby {lobby_id} to: {turn_expires_at}")
                 # --- End Calculation ---
 
+                new_event_seq, new_recent_events = append_draft_event(lobby_item, 'pick', current_turn, selections, f'{current_turn} picked {selection_text}')
+                pick_response = {'statusCode': 200, 'body': 'Pick processed successfully.'}
+
                 # Determine which player's pick list to update
                 update_expression_string = ""
                 expression_attribute_values_dict = {}
@@ -1566,18 +1852,24 @@ def handler(event, context):
                             currentTurn = :next_turn,
                             currentStepIndex = :next_index,
                             turnExpiresAt = :expires,
+                            eventSeq = :event_seq,
+                            recentEvents = :recent_events,
+                            recentRequests = :recent_requests,
                             lastAction = :last_action_val 
-                    """
+                    """ + queue_remove_clause(lobby_item, selections)
                     expression_attribute_values_dict = {
                         ':empty_list': [],
-                        ':new_pick_p1': [resonator_name],
+                        ':new_pick_p1': selections,
                         ':new_available': new_available_list,
                         ':next_phase': next_phase,
                         ':next_turn': actual_next_turn,
                         ':next_index': next_step_index,
                         ':expected_index': current_step_index,
-                        ':expires': turn_expires_at_iso,
-                        ':last_action_val': f'{current_turn} picked {resonator_name}'
+                        ':expires': turn_expires_at,
+                        ':event_seq': new_event_seq,
+                        ':recent_events': new_recent_events,
+                        ':recent_requests': append_recent_request(lobby_item, request_id, pick_response),
+                        ':last_action_val': f'{current_turn} picked {selection_text}'
                     }
                 elif current_turn == 'P2':
                     player_pick_list_key = ":new_pick_p2"
@@ -1588,18 +1880,24 @@ def handler(event, context):
                             currentTurn = :next_turn,
                             currentStepIndex = :next_index,
                             turnExpiresAt = :expires,
+                            eventSeq = :event_seq,
+                            recentEvents = :recent_events,
+                            recentRequests = :recent_requests,
                             lastAction = :last_action_val 
-                    """
+                    """ + queue_remove_clause(lobby_item, selections)
                     expression_attribute_values_dict = {
                         ':empty_list': [],
-                        ':new_pick_p2': [resonator_name],
+                        ':new_pick_p2': selections,
                         ':new_available': new_available_list,
                         ':next_phase': next_phase,
                         ':next_turn': actual_next_turn,
                         ':next_index': next_step_index,
                         ':expected_index': current_step_index,
-                        ':expires': turn_expires_at_iso,
-                        ':last_action_val': f'{current_turn} picked {resonator_name}'
+                        ':expires': turn_expires_at,
+                        ':event_seq': new_event_seq,
+                        ':recent_events': new_recent_events,
+                        ':recent_requests': append_recent_request(lobby_item, request_id, pick_response),
+                        ':last_action_val': f'{current_turn} picked {selection_text}'
                     }
                 else:
                     # Should not happen if validation passed, but handle defensively
@@ -1612,43 +1910,35 @@ def handler(event, context):
                 logger.info(f"UpdateItem Params for lobby {lobby_id} (pick for {current_turn}):")
                 logger.info(f"  UpdateExpression: {update_expression_string}")
                 logger.info(f"  ConditionExpression: {condition_expression_string}")
-                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_attribute_values_dict, cls=DecimalEncoder, indent=2)}")
+                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_attribute_values_dict, indent=2)}")
                 # --- END LOGGING ---
 
-            except ClientError as e:
-                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                    logger.warning(f"Conditional check failed for pick update in lobby {lobby_id}. State likely changed. Index={current_step_index}")
-                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Action failed, state may have changed. Please wait for update."})
-                    return {'statusCode': 409, 'body': 'Conflict, state changed during request.'}
-                else:
-                    logger.error(f"Failed to update lobby {lobby_id} after pick: {str(e)}")
-                    return {'statusCode': 500, 'body': 'Failed to update lobby state.'}
             except Exception as e:
-                 logger.error(f"Unexpected error updating lobby {lobby_id} after pick: {str(e)}")
+                 logger.error(f"Unexpected error preparing the pick update for lobby {lobby_id}: {str(e)}")
                  return {'statusCode': 500, 'body': 'Internal server error during update.'}
             
             try:
                 logger.info(f"Attempting to update lobby {lobby_id} state in DynamoDB for {current_turn} pick (using index).")
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression_string,
                     ConditionExpression=condition_expression_string,
-                    ExpressionAttributeValues=expression_attribute_values_dict
-                )
-
-                # Immediately re-fetch and log to see what changed
-                refetched_item_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                refetched_item = refetched_item_response.get('Item')
-                logger.info(f"MAKE_ACTION_DEBUG (makePick): Lobby item AFTER update (re-fetched) for lobby {lobby_id}: {json.dumps(refetched_item, cls=DecimalEncoder)}")
+                    ExpressionAttributeValues=expression_attribute_values_dict,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+                logger.info(f"MAKE_ACTION_DEBUG (makePick): Lobby item AFTER update for lobby {lobby_id}: {json.dumps(updated_lobby_item)}")
 
 
                 # --- End of Step 3 ---
 
-                last_action_for_broadcast = f'{current_turn} picked {resonator_name}'
+                last_action_for_broadcast = f'{current_turn} picked {selection_text}'
                 logger.info(f"MAKE_PICK_DEBUG: Calling centralized broadcast_lobby_state for lobby {lobby_id}. Last Action: '{last_action_for_broadcast}'")
                     
-                # apigw_management_client is the client object initialized at the start of your main Lambda handler
-                broadcast_success = broadcast_lobby_state(lobby_id, apigw_management_client, last_action_for_broadcast) 
+                # Ack the picker first, then broadcast to everyone else
+                acked_connection_id = acknowledge_draft_action(apigw_management_client, connection_id, lobby_id, action, message_data, lobby_item, updated_lobby_item)
+                broadcast_success = broadcast_lobby_state(lobby_id, apigw_management_client, last_action_for_broadcast,
+                                                          exclude_connection_id=acked_connection_id, lobby_item=updated_lobby_item)
                     
                 if broadcast_success:
                     logger.info(f"MAKE_PICK_DEBUG: Centralized broadcast after pick successful for lobby {lobby_id}.")
@@ -1656,21 +1946,22 @@ def handler(event, context):
                     logger.warning(f"MAKE_PICK_DEBUG: Centralized broadcast after pick may have encountered issues for lobby {lobby_id} (check broadcast_lobby_state logs).")
                     # --- END OF REPLACEMENT ---
             
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except ClientError as e:
-                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                        logger.warning(f"Conditional check failed for pick update in lobby {lobby_id}. State likely changed. Index={current_step_index}")
-                        send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Action failed, state may have changed. Please wait for update."})
-                        return {'statusCode': 409, 'body': 'Conflict, state changed during request.'}
-                else:
-                    logger.error(f"MAKE_PICK_ERROR: ClientError updating DDB for lobby {lobby_id}: {str(e)}", exc_info=True)
-                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to record pick."}) # Send error to client
-                    return {'statusCode': 500, 'body': 'Failed to process pick due to database error.'}
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException': # currentStepIndex failed with the version intact
+                    logger.warning(f"Conditional check failed for pick update in lobby {lobby_id}. State likely changed. Index={current_step_index}")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Action failed, state may have changed. Please wait for update."})
+                    return {'statusCode': 409, 'body': 'Conflict, state changed during request.'}
+                logger.error(f"MAKE_PICK_ERROR: ClientError updating DDB for lobby {lobby_id}: {str(e)}", exc_info=True)
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to record pick."}) # Send error to client
+                return {'statusCode': 500, 'body': 'Failed to process pick due to database error.'}
             except Exception as e:
                 logger.error(f"MAKE_PICK_ERROR: Unexpected error for lobby {lobby_id}: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Server error processing pick."}) # Send error to client
                 return {'statusCode': 500, 'body': 'Internal server error processing pick.'}
 
-            return {'statusCode': 200, 'body': 'Pick processed successfully.'}
+            return pick_response
 
         # --- ADD TIMEOUT HANDLER ---
         elif action == 'turnTimeout':
@@ -1687,10 +1978,8 @@ def handler(event, context):
             # 1. Find lobby for the connection
             lobby_id = None
             try:
-                connection_item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
-                if connection_item and 'currentLobbyId' in connection_item:
-                    lobby_id = connection_item['currentLobbyId']
-                else: # Should not happen if player is in draft, but handle defensively
+                lobby_id = get_lobby_id_for_action(message_data, connection_id)
+                if not lobby_id: # Should not happen if player is in draft, but handle defensively
                      logger.warning(f"Connection {connection_id} reporting timeout not found or not in lobby.")
                      return {'statusCode': 404, 'body': 'Connection not associated with a lobby.'}
                 logger.info(f"Found lobbyId: {lobby_id} for timeout request from {connection_id}")
@@ -1702,11 +1991,14 @@ def handler(event, context):
             lobby_item = None
             if lobby_id:
                 try:
-                    response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                    response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                     lobby_item = response.get('Item')
                     if not lobby_item:
                         logger.warning(f"Lobby {lobby_id} not found for timeout processing.")
                         return {'statusCode': 404, 'body': 'Lobby data not found.'}
+                    if not is_lobby_participant(lobby_item, connection_id):
+                        logger.warning(f"Connection {connection_id} sent 'turnTimeout' for lobby {lobby_id} but is not a participant.")
+                        return {'statusCode': 403, 'body': 'Not a participant in this lobby.'}
                     logger.info(f"Fetched current lobby state for {lobby_id} to process timeout.")
                     # --- ADD DEBUG LOGGING HERE ---
                     logger.info(f"DEBUG: Fetched lobby state for timeout check. DB Phase: {lobby_item.get('currentPhase')}, DB Turn: {lobby_item.get('currentTurn')}, DB Index: {lobby_item.get('currentStepIndex')}, DB Expires: {lobby_item.get('turnExpiresAt')}")
@@ -1720,10 +2012,15 @@ def handler(event, context):
             # 3. *** Timeout Validation ***
             current_phase_db = lobby_item.get('currentPhase')
             current_turn_db = lobby_item.get('currentTurn')
-            current_step_index_decimal = lobby_item.get('currentStepIndex', -1)
+            current_step_index_db = lobby_item.get('currentStepIndex', -1)
             turn_expires_at_db = lobby_item.get('turnExpiresAt')
             logger.info(f"DEBUG: Timeout Check: Expected={expected_phase}/{expected_turn}, DB={current_phase_db}/{current_turn_db}, Expires={turn_expires_at_db}")
 
+            # A paused draft has no running timer; a late timeout from before the pause is stale.
+            if lobby_item.get('draftPaused'):
+                logger.info(f"Timeout ignored for lobby {lobby_id}. Draft is paused waiting for a player to reconnect.")
+                return {'statusCode': 200, 'body': 'Timeout ignored, draft paused.'}
+
             # --- UNCOMMENT THIS CHECK ---
             # a) Check if the turn reported by client matches the DB
             if current_phase_db != expected_phase or current_turn_db != expected_turn:
@@ -1733,25 +2030,30 @@ def handler(event, context):
 
             # --- CORRECT THIS CHECK ---
             # b) Check if the expiry time has actually passed
-            now = datetime.now(timezone.utc)
+            now = now_ms()
             if not turn_expires_at_db:
                  logger.warning(f"Timeout processing failed for lobby {lobby_id}. Missing turnExpiresAt attribute.")
                  return {'statusCode': 500, 'body': 'Internal error: Missing expiry data.'}
             
             try:
-                # Parse the expiry time string to datetime object
-                expires_at = datetime.fromisoformat(turn_expires_at_db.replace('Z', '+00:00'))
-                # Add a 2-second grace period to account for network delays and timing differences
-                grace_period = timedelta(seconds=3)
-                if now < expires_at - grace_period: # Only reject if we're well before the expiry
-                    logger.warning(f"Timeout check failed for lobby {lobby_id}. Expiry {turn_expires_at_db} has not passed yet ({now.isoformat()}). Client timer might be fast or message delayed.")
+                expires_at = timestamp_ms(turn_expires_at_db) # Epoch ms; an ISO string on lobbies from before
+                # Clients count down on server time, so the grace only has to cover the message's trip here
+                if now < expires_at - TURN_TIMEOUT_GRACE_MS:
+                    logger.warning(f"Timeout check failed for lobby {lobby_id}. Expiry {turn_expires_at_db} has not passed yet ({now}). Client timer might be fast or message delayed.")
+                    # The client's clock offset ran ahead; our clock lets it correct that and restart its countdown
+                    send_message_to_client(apigw_management_client, connection_id, {
+                        "type": "turnTimeoutEarly",
+                        "lobbyId": lobby_id,
+                        "turnExpiresAt": expires_at,
+                        "serverTime": now
+                    })
                     return {'statusCode': 400, 'body': 'Timeout condition not met (time has not passed).'}
             except ValueError as e:
                 logger.error(f"Error parsing expiry time for lobby {lobby_id}: {str(e)}")
                 return {'statusCode': 500, 'body': 'Internal error: Invalid expiry time format.'}
             
             # If we reach here, time HAS passed or is within grace period
-            logger.info(f"Timeout time condition met for lobby {lobby_id}. Expiry: {turn_expires_at_db}, Current: {now.isoformat()}.")
+            logger.info(f"Timeout time condition met for lobby {lobby_id}. Expiry: {turn_expires_at_db}, Current: {now}.")
             # --- END CORRECTION ---
 
             # --- *** NEW AND CORRECTED LOGIC PLACEMENT *** ---
@@ -1759,60 +2061,55 @@ def handler(event, context):
             if current_phase_db == EQUILIBRATION_PHASE_NAME:
                 logger.info(f"Timeout occurred during EQUILIBRATION_PHASE_NAME for lobby {lobby_id}. Skipping bans and starting standard draft.")
 
-                effective_draft_order = lobby_item.get('effectiveDraftOrder')
-                player_roles = lobby_item.get('playerRoles', {})
-                if not effective_draft_order or not player_roles:
-                    logger.error(f"Missing draft configuration for lobby {lobby_id} during EQ ban timeout.")
+                try:
+                    draft_table = get_draft_table(lobby_item)
+                    first_phase, actual_first_turn, first_step_index, first_turn_seconds = determine_next_state(
+                        int(current_step_index_db), draft_table
+                    )
+                except (TypeError, KeyError, ValueError) as e:
+                    logger.error(f"Missing draft configuration for lobby {lobby_id} during EQ ban timeout: {e}")
                     return {'statusCode': 500, 'body': 'Draft configuration missing.'}
-
-                first_step = effective_draft_order[0]
-                first_phase = first_step['phase']
-                first_turn_role = first_step['turnPlayerDesignation']
-                actual_first_turn = resolve_turn_from_role(first_turn_role, player_roles)
                 
                 if not actual_first_turn:
                     logger.error(f"Failed to resolve first turn for lobby {lobby_id} after EQ ban timeout.")
                     return {'statusCode': 500, 'body': 'Failed to determine first turn.'}
 
-                turn_expires_at_dt = datetime.now(timezone.utc) + timedelta(seconds=TURN_DURATION_SECONDS)
-                turn_expires_at_iso = turn_expires_at_dt.isoformat()
+                turn_expires_at = ms_from_now(first_turn_seconds)
                 last_action_msg = f"{current_turn_db} timed out on Equilibration Bans. Skipping to start the draft."
 
                 try:
-                    lobbies_table.update_item(
+                    updated_lobby_item = update_lobby(
+                        lobby_item,
                         Key={'lobbyId': lobby_id},
                         UpdateExpression="SET currentPhase = :next_phase, currentTurn = :next_turn, currentStepIndex = :next_index, turnExpiresAt = :expires, lastAction = :last_action",
                         ConditionExpression="currentPhase = :expected_phase AND currentTurn = :expected_turn",
                         ExpressionAttributeValues={
                             ':next_phase': first_phase,
                             ':next_turn': actual_first_turn,
-                            ':next_index': 0,
-                            ':expires': turn_expires_at_iso,
+                            ':next_index': first_step_index,
+                            ':expires': turn_expires_at,
                             ':last_action': last_action_msg,
                             ':expected_phase': EQUILIBRATION_PHASE_NAME,
                             ':expected_turn': current_turn_db
-                        }
-                    )
+                        },
+                        ReturnValues='ALL_NEW'
+                    )['Attributes']
                     logger.info(f"Lobby {lobby_id} updated to start standard draft after EQ ban timeout.")
-                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg)
+                    broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, lobby_item=updated_lobby_item)
                     return {'statusCode': 200, 'body': 'Equilibration ban timeout processed, draft started.'}
                 except ClientError as e:
-                    if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                        logger.warning(f"Conditional check failed for EQ ban timeout update in lobby {lobby_id}. State likely already changed.")
-                        return {'statusCode': 409, 'body': 'Conflict, state changed during request.'}
-                    else:
-                        logger.error(f"Failed to update lobby {lobby_id} after EQ ban timeout: {str(e)}")
-                        return {'statusCode': 500, 'body': 'Failed to process equilibration ban timeout.'}
+                    logger.error(f"Failed to update lobby {lobby_id} after EQ ban timeout: {str(e)}")
+                    return {'statusCode': 500, 'body': 'Failed to process equilibration ban timeout.'}
             
             # --- *** END OF NEW LOGIC BLOCK *** ---
 
             # c) Convert and check index (Keep fix from Response #87)
             current_step_index = None # Initialize
             try:
-                current_step_index = int(current_step_index_decimal)
-                if current_step_index == -1 and current_step_index_decimal != -1: raise ValueError("Invalid step index (-1)")
+                current_step_index = int(current_step_index_db)
+                if current_step_index == -1 and current_step_index_db != -1: raise ValueError("Invalid step index (-1)")
             except (TypeError, ValueError) as e:
-                  logger.error(f"Invalid currentStepIndex '{current_step_index_decimal}' ... Error: {e}")
+                  logger.error(f"Invalid currentStepIndex '{current_step_index_db}' ... Error: {e}")
                   return {'statusCode': 500, 'body': 'Internal error: Invalid draft step index.'}
 
             # This check will now be correctly bypassed by the logic above for EQ bans
@@ -1836,113 +2133,119 @@ def handler(event, context):
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Timeout occurred, but no characters available."})
                 return {'statusCode': 500, 'body': 'Internal error: No characters available on timeout.'}
 
-            random_choice = random.choice(available_resonators)
-            is_ban_phase = current_phase_db.startswith('BAN')
+            try:
+                draft_table = get_draft_table(lobby_item)
+            except (KeyError, ValueError) as e:
+                logger.error(f"Lobby {lobby_id} has no valid draft order during timeout: {e}")
+                return {'statusCode': 500, 'body': 'Internal error: Missing draft order configuration.'}
+            current_step = get_current_draft_step(draft_table, current_step_index)
+            if not current_step:
+                logger.warning(f"Timeout ignored for lobby {lobby_id}. Step index {current_step_index} is outside the draft order.")
+                return {'statusCode': 200, 'body': 'Timeout ignored, draft finished or invalid state.'}
+
+            # The front of the lobby's candidate queue for this selection (wuwadraft_core.auto_select); a
+            # multi-select step takes that many. Bans and picks keep the queues to the current pool,
+            # so the front is always selectable. Lobbies that started without queues build them now.
+            is_ban_phase = current_step.kind == BAN_KIND
+            queue_key = BAN_QUEUE if is_ban_phase else timed_out_player
+            stored_queues = lobby_item.get('autoSelectQueues')
+            candidate_queues = stored_queues or lobby_candidate_queues(lobby_item, available_resonators)
+            random_choices = list(candidate_queues.get(queue_key) or [])[:current_step.count]
+            if len(random_choices) < min(current_step.count, len(available_resonators)): # A short queue; should not happen
+                import random
+                random_choices = random.sample(available_resonators, min(current_step.count, len(available_resonators)))
+            random_choice_text = ', '.join(random_choices)
             action_taken = "banned" if is_ban_phase else "picked"
-            logger.info(f"Timeout action for {timed_out_player} in lobby {lobby_id}: Randomly {action_taken} '{random_choice}'.")
+            logger.info(f"Timeout action for {timed_out_player} in lobby {lobby_id}: Auto-{action_taken} '{random_choice_text}' ({lobby_item.get('autoSelectStrategy', DEFAULT_AUTO_SELECT_STRATEGY)}).")
 
             # 5. *** Calculate Next State ***
-            effective_draft_order = lobby_item.get('effectiveDraftOrder')
-            if not effective_draft_order:
-                logger.error(f"Lobby {lobby_id} missing effectiveDraftOrder during timeout.")
-                return {'statusCode': 500, 'body': 'Internal error: Missing draft order configuration.'}
-            next_phase, next_turn_designation, next_step_index = determine_next_state(current_step_index, effective_draft_order)
-
-            # Resolve the actual player turn based on playerRoles and the role from the template
-            player_roles = lobby_item.get('playerRoles', {})
-            actual_next_turn = None
-            if 'P1_ROLE_IN_TEMPLATE' in player_roles: # P1_FAVORED_DRAFT_ORDER was chosen
-                if next_turn_designation == 'P1_ROLE':
-                    actual_next_turn = player_roles['P1_ROLE_IN_TEMPLATE']
-                elif next_turn_designation == 'P2_ROLE':
-                    actual_next_turn = player_roles['P2_ROLE_IN_TEMPLATE']
-            elif 'ROLE_A' in player_roles: # NEUTRAL_DRAFT_ORDER_TEMPLATE_V2 was chosen
-                if next_turn_designation == 'ROLE_A':
-                    actual_next_turn = player_roles['ROLE_A']
-                elif next_turn_designation == 'ROLE_B':
-                    actual_next_turn = player_roles['ROLE_B']
-            
-            if not actual_next_turn:
-                logger.error(f"Lobby {lobby_id}: Could not resolve actual next turn from designation '{next_turn_designation}' and roles {player_roles}. Defaulting to P1.")
-                actual_next_turn = 'P1' # Fallback, should not happen
+            next_phase, actual_next_turn, next_step_index, next_turn_seconds = determine_next_state(
+                current_step_index, draft_table, pending_equilibration_banner(lobby_item)
+            )
 
             # 6. *** Update DynamoDB ***
             try:
-                new_available_list = [res for res in available_resonators if res != random_choice]
-                turn_expires_at_iso = None # Calculate expiry for the NEW turn
+                # The selections are removed from availableResonators and the queues by position, not by rebuilding the lists
+                removed_paths = [f"availableResonators[{position}]" for position in pool_positions(available_resonators, random_choices)]
+                if stored_queues:
+                    removed_paths += queue_removals(stored_queues, random_choices)
+                turn_expires_at = None # Calculate expiry for the NEW turn
                 if actual_next_turn:
-                    now = datetime.now(timezone.utc)
-                    expires_at_dt = now + timedelta(seconds=TURN_DURATION_SECONDS)
-                    turn_expires_at_iso = expires_at_dt.isoformat()
-                logger.info(f"Setting next turn expiry (after timeout) for lobby {lobby_id} to: {turn_expires_at_iso}")
+                    turn_expires_at = ms_from_now(next_turn_seconds)
+                logger.info(f"Setting next turn expiry (after timeout) for lobby {lobby_id} to: {turn_expires_at}")
 
                 # Log lobby state before update
-                logger.info(f"TIMEOUT_HANDLER_DEBUG: Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item, cls=DecimalEncoder)}")
+                logger.info(f"TIMEOUT_HANDLER_DEBUG: Lobby item BEFORE update for lobby {lobby_id}: {json.dumps(lobby_item)}")
 
                 update_expression = ""
                 expression_attribute_values = {}
 
                 base_update = """
-                    SET availableResonators = :new_available,
-                        currentPhase = :next_phase,
+                    SET currentPhase = :next_phase,
                         currentTurn = :next_turn,
                         currentStepIndex = :next_index,
                         turnExpiresAt = :expires,
                         lastAction = :last_action
                 """
-                last_action = f'{timed_out_player} timed out, randomly {action_taken} {random_choice}'
+                last_action = f'{timed_out_player} timed out, auto-{action_taken} {random_choice_text}'
+                new_event_seq, new_recent_events = append_draft_event(lobby_item, 'ban' if is_ban_phase else 'pick', timed_out_player, random_choices, last_action)
+                base_update += ", eventSeq = :event_seq, recentEvents = :recent_events"
                 base_values = {
-                    ':new_available': new_available_list,
                     ':next_phase': next_phase,
                     ':next_turn': actual_next_turn,
                     ':next_index': next_step_index,
-                    ':expires': turn_expires_at_iso,
+                    ':expires': turn_expires_at,
                     ':expected_index': current_step_index, # Use the int version here
+                    ':event_seq': new_event_seq,
+                    ':recent_events': new_recent_events,
                     ':last_action': last_action
                 }
 
                 if is_ban_phase:
                     update_expression = base_update + ", bans = list_append(if_not_exists(bans, :empty_list), :new_ban)"
-                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_ban': [random_choice]}
+                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_ban': random_choices}
                 elif timed_out_player == 'P1':
                     update_expression = base_update + ", player1Picks = list_append(if_not_exists(player1Picks, :empty_list), :new_pick)"
-                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_pick': [random_choice]}
+                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_pick': random_choices}
                 elif timed_out_player == 'P2':
                     update_expression = base_update + ", player2Picks = list_append(if_not_exists(player2Picks, :empty_list), :new_pick)"
-                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_pick': [random_choice]}
+                    expression_attribute_values = {**base_values, ':empty_list': [], ':new_pick': random_choices}
                 else: # Should not happen
                      raise ValueError(f"Invalid timed_out_player: {timed_out_player}")
+                if not stored_queues:
+                    update_expression += ", autoSelectQueues = :candidate_queues"
+                    expression_attribute_values[':candidate_queues'] = {
+                        key: [name for name in queue if name not in random_choices] for key, queue in candidate_queues.items()
+                    }
+                update_expression += " REMOVE " + ", ".join(removed_paths)
 
                 logger.info(f"TIMEOUT_HANDLER_DEBUG: Attempting to update lobby {lobby_id} state after timeout.")
-                lobbies_table.update_item(
+                # If the player acted first, the retry's fresh read ignores this timeout as stale
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression,
                     ConditionExpression="currentStepIndex = :expected_index", # Check against expected int index
-                    ExpressionAttributeValues=expression_attribute_values
-                )
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
                 logger.info(f"TIMEOUT_HANDLER_DEBUG: Successfully updated lobby {lobby_id} state after timeout.")
-
-                # Immediately re-fetch and log to see what changed
-                refetched_item_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                refetched_item = refetched_item_response.get('Item')
-                logger.info(f"TIMEOUT_HANDLER_DEBUG: Lobby item AFTER update (re-fetched) for lobby {lobby_id}: {json.dumps(refetched_item, cls=DecimalEncoder)}")
+                logger.info(f"TIMEOUT_HANDLER_DEBUG: Lobby item AFTER update for lobby {lobby_id}: {json.dumps(updated_lobby_item)}")
 
                 # Call centralized broadcast function
                 logger.info(f"TIMEOUT_HANDLER_DEBUG: Calling centralized broadcast_lobby_state for lobby {lobby_id}. Last Action: '{last_action}'")
-                broadcast_success = broadcast_lobby_state(lobby_id, apigw_management_client, last_action)
+                broadcast_success = broadcast_lobby_state(lobby_id, apigw_management_client, last_action, lobby_item=updated_lobby_item)
                 
                 if broadcast_success:
                     logger.info(f"TIMEOUT_HANDLER_DEBUG: Centralized broadcast after timeout successful for lobby {lobby_id}.")
                 else:
                     logger.warning(f"TIMEOUT_HANDLER_DEBUG: Centralized broadcast after timeout may have encountered issues for lobby {lobby_id}.")
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except ClientError as e:
-                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                    logger.warning(f"Conditional check failed for lobby {lobby_id} during timeout update. State may have changed.")
-                    return {'statusCode': 409, 'body': 'State changed during timeout processing.'}
-                else:
-                    logger.error(f"Failed to update lobby {lobby_id} after timeout (ClientError): {str(e)}", exc_info=True)
-                    return {'statusCode': 500, 'body': 'Failed to update lobby state after timeout.'}
+                logger.error(f"Failed to update lobby {lobby_id} after timeout (ClientError): {str(e)}", exc_info=True)
+                return {'statusCode': 500, 'body': 'Failed to update lobby state after timeout.'}
             except Exception as e:
                  logger.error(f"Unexpected error updating/broadcasting lobby {lobby_id} after timeout: {str(e)}", exc_info=True)
                  return {'statusCode': 500, 'body': 'Internal server error during timeout update.'}
@@ -1953,13 +2256,47 @@ def handler(event, context):
 
         elif action == 'ping':
             # API Gateway idle timeout resets upon receiving a message.
-            # No action needed usually, but we can log it or send pong.
             logger.info(f"Received ping from {connection_id}")
-            # Optional: Send pong back
-            # send_message_to_client(apigw_management_client, connection_id, {"type": "pong"})
+            # A ping with clientTime is a time-sync request (see wuwadraft_core.clock); keep-alive pings get no reply
+            client_time = message_data.get('clientTime')
+            if isinstance(client_time, (int, float)) and not isinstance(client_time, bool):
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "pong",
+                    "clientTime": client_time,
+                    "serverTime": now_ms(),
+                    "serverMonotonic": monotonic_ms()
+                })
             return {'statusCode': 200, 'body': 'Pong.'}
         # --- END PING HANDLER ---
 
+        # --- reconnectTimeout Handler ---
+        # Sent by a participant's client once a held place's reconnectExpiresAt passes (see lobby_state.resume_hold_expires_at)
+        elif action == 'reconnectTimeout':
+            lobby_id = message_data.get('lobbyId')
+            if not lobby_id:
+                return {'statusCode': 400, 'body': 'Missing lobbyId.'}
+            lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True).get('Item')
+            if not lobby_item:
+                return {'statusCode': 404, 'body': 'Lobby not found.'}
+            if not is_lobby_participant(lobby_item, connection_id):
+                logger.warning(f"Connection {connection_id} sent 'reconnectTimeout' for lobby {lobby_id} but is not a participant.")
+                return {'statusCode': 403, 'body': 'Not a participant in this lobby.'}
+
+            if not any(is_slot_disconnect_expired(lobby_item, slot_prefix) for slot_prefix in RESUME_HOLD_PREFIXES):
+                # Nothing expired yet: the client's clock ran ahead (or the player came back), so let it reschedule
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "reconnectTimeoutEarly",
+                    "lobbyId": lobby_id,
+                    "reconnectExpiresAt": resume_hold_expires_at(lobby_item),
+                    "serverTime": now_ms()
+                })
+                return {'statusCode': 400, 'body': 'No resume hold has expired.'}
+
+            logger.info(f"Resume hold expired in lobby {lobby_id}; reported by {connection_id}.")
+            schedule_resume_hold_expiry(lobby_id)
+            return {'statusCode': 202, 'body': 'Resume hold expiry scheduled.'}
+        # --- END reconnectTimeout Handler ---
+
         # --- NEW: leaveLobby Handler ---
         elif action == 'leaveLobby':
             logger.info(f"Processing 'leaveLobby' for connection {connection_id}")
@@ -1970,9 +2307,8 @@ def handler(event, context):
                  return {'statusCode': 400, 'body': 'Missing lobbyId.'}
 
             try:
-                # Get lobby state
-                # Use ConsistentRead=True to get latest state before modifying
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                # Get lobby state (the versioned write below catches a stale read)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for leaving connection {connection_id}.")
@@ -2016,11 +2352,13 @@ def handler(event, context):
                         p_ready_ph: 'player1Ready',
                         p_seq_ph: 'player1Sequences',
                         p_score_ph: 'player1WeightedBoxScore',
-                        p_submitted_ph: 'player1ScoreSubmitted'
+                        p_submitted_ph: 'player1ScoreSubmitted',
+                        '#p1tok': 'player1ResumeToken',
+                        '#p1dc': 'player1DisconnectedAt'
                     })
                     
                     # Add to remove expressions using placeholders
-                    remove_expressions.extend([p_conn_id_ph, p_name_ph, p_seq_ph, p_score_ph])
+                    remove_expressions.extend([p_conn_id_ph, p_name_ph, p_seq_ph, p_score_ph, '#p1tok', '#p1dc'])
                     # Add to set expressions using placeholders
                     update_expressions.extend([
                         f"{p_ready_ph} = :falseVal",
@@ -2045,11 +2383,13 @@ def handler(event, context):
                         p_ready_ph: 'player2Ready',
                         p_seq_ph: 'player2Sequences',
                         p_score_ph: 'player2WeightedBoxScore',
-                        p_submitted_ph: 'player2ScoreSubmitted'
+                        p_submitted_ph: 'player2ScoreSubmitted',
+                        '#p2tok': 'player2ResumeToken',
+                        '#p2dc': 'player2DisconnectedAt'
                     })
                     
                     # Add to remove expressions using placeholders
-                    remove_expressions.extend([p_conn_id_ph, p_name_ph, p_seq_ph, p_score_ph])
+                    remove_expressions.extend([p_conn_id_ph, p_name_ph, p_seq_ph, p_score_ph, '#p2tok', '#p2dc'])
                     # Add to set expressions using placeholders
                     update_expressions.extend([
                         f"{p_ready_ph} = :falseVal",
@@ -2097,9 +2437,10 @@ def handler(event, context):
                     remove_expressions.extend([ # Remove all draft-specific fields
                         "currentPhase", "currentTurn", "currentStepIndex",
                         "turnExpiresAt", "bans", "player1Picks",
-                        "player2Picks", "availableResonators",
-                        "effectiveDraftOrder", "playerRoles",
-                        "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner"
+                        "player2Picks", "availableResonators", "autoSelectQueues",
+                        "effectiveDraftOrder", "playerRoles", "draftFormat",
+                        "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner",
+                        "draftPaused", "pausedTurnRemainingSeconds", "seriesGame", "seriesHistory"
                     ])
                     expression_values[':waitState'] = 'WAITING'
                     expression_values[':lastAct'] = last_action_msg
@@ -2127,8 +2468,9 @@ def handler(event, context):
                     
                     # Remove pre-draft ready state specific data
                     remove_expressions.extend([
-                        "effectiveDraftOrder", "playerRoles",
-                        "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner"
+                        "effectiveDraftOrder", "playerRoles", "draftFormat",
+                        "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner",
+                        "seriesGame", "seriesHistory"
                     ])
                     
                     # Check if equilibration is enabled to determine what score data to preserve
@@ -2171,13 +2513,16 @@ def handler(event, context):
                 logger.info(f"Expression Attribute Values: {expression_values}")
 
                 # Perform the update
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=final_update_expr,
                     ExpressionAttributeNames=expression_names,
-                    ExpressionAttributeValues=expression_values
-                )
+                    ExpressionAttributeValues=expression_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
                 logger.info(f"Lobby {lobby_id} updated for player leave.")
+                sync_public_listing(lobby_id, updated_lobby_item)
 
                 # Remove currentLobbyId from connection
                 try:
@@ -2186,10 +2531,12 @@ def handler(event, context):
                     logger.error(f"Failed to cleanup connection {connection_id} after leave: {conn_clean_err}")
 
                 # Broadcast updated state
-                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, exclude_connection_id=connection_id)
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, exclude_connection_id=connection_id, lobby_item=updated_lobby_item)
 
                 return {'statusCode': 200, 'body': 'Player left lobby.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error processing leaveLobby for {connection_id} on lobby {lobby_id}: {str(e)}", exc_info=True)
                 return {'statusCode': 500, 'body': 'Failed to leave lobby.'}
@@ -2229,34 +2576,19 @@ def handler(event, context):
                  ]
                  valid_connection_ids = [pid for pid in participants if pid]
 
-                 # Delete the lobby item
-                 logger.info(f"Host {connection_id} deleting lobby {lobby_id}.")
-                 lobbies_table.delete_item(Key={'lobbyId': lobby_id})
-                 logger.info(f"Lobby {lobby_id} deleted successfully.")
-
                  # --- CORRECTED NOTIFICATION LOGIC ---
-                 # Notify ALL participants (including host) and cleanup connections table
+                 # Notify ALL participants (including host) and cleanup connections table.
+                 # The lobby delete and connection cleanup share one transaction while the
+                 # redirects go out in parallel.
                  force_redirect_payload = {
                      "type": "forceRedirect",
                      "reason": "deleted", # Use 'deleted' reason
                      "message": f"Lobby {lobby_id} was deleted by the host."
                  }
-                 logger.info(f"Notifying participants and cleaning up connections for deleted lobby {lobby_id}. Participants: {valid_connection_ids}")
-                 for pid in valid_connection_ids:
-                     logger.info(f"Sending forceRedirect to {pid} and cleaning up connection.")
-                     # Send redirect message first
-                     send_message_to_client(apigw_management_client, pid, force_redirect_payload)
-
-                     # Cleanup connection entry (best effort)
-                     try:
-                         connections_table.update_item(
-                             Key={'connectionId': pid},
-                             UpdateExpression="REMOVE currentLobbyId"
-                             # Add ConditionExpression if needed, e.g., check if currentLobbyId still matches lobby_id
-                         )
-                         logger.info(f"Removed currentLobbyId from connection {pid}")
-                     except Exception as conn_clean_err:
-                         logger.error(f"Failed to cleanup connection {pid} after lobby deletion: {conn_clean_err}")
+                 logger.info(f"Host {connection_id} deleting lobby {lobby_id}. Participants: {valid_connection_ids}")
+                 teardown_lobby(apigw_management_client, lobby_id, valid_connection_ids, force_redirect_payload, valid_connection_ids,
+                                has_spectators=lobby_item.get('hasSpectators', False))
+                 logger.info(f"Lobby {lobby_id} deleted successfully.")
                  # --- END CORRECTED NOTIFICATION LOGIC ---
 
                  return {'statusCode': 200, 'body': 'Lobby deleted successfully.'}
@@ -2285,9 +2617,9 @@ def handler(event, context):
             logger.info(f"Received kick request for Slot: {player_slot_to_kick}, Lobby: {lobby_id}")
 
             try:
-                # Get lobby item (ConsistentRead recommended for checks)
+                # Get lobby item (the versioned write below catches a stale read)
                 logger.info(f"Fetching lobby {lobby_id} for kick attempt by {connection_id}")
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for kick attempt by {connection_id}.")
@@ -2321,14 +2653,12 @@ def handler(event, context):
                      return {'statusCode': 400, 'body': 'Host cannot kick self.'}
                 logger.info(f"Target player identified: Slot={player_slot_to_kick}, Name={kicked_player_name}, ConnId={kicked_connection_id}")
 
-                # --- CORRECTED LOGIC: Notify Kicked Player FIRST ---
-                logger.info(f"Sending forceRedirect notification to kicked player {kicked_connection_id}")
+                # --- CORRECTED LOGIC: Notify Kicked Player (sent once the DB writes below commit) ---
                 force_redirect_payload = {
                     "type": "forceRedirect",
                     "reason": "kicked",
                     "message": f"You were kicked from lobby {lobby_id} by the host."
                 }
-                send_message_to_client(apigw_management_client, kicked_connection_id, force_redirect_payload)
                 # --- END CORRECTED LOGIC ---
 
                 # Prepare attribute names and values for robust update
@@ -2349,8 +2679,13 @@ def handler(event, context):
                 submitted_ph = "#submitted"
                 la_ph = "#la"
 
-                update_expression = f"REMOVE {conn_id_ph}, {name_ph}, {sequences_ph}, {score_ph} SET {ready_ph} = :falseVal, {submitted_ph} = :falseVal, {la_ph} = :lastAct"
+                token_ph = "#token"
+                disconnected_ph = "#disconnectedAt"
+
+                update_expression = f"REMOVE {conn_id_ph}, {name_ph}, {sequences_ph}, {score_ph}, {token_ph}, {disconnected_ph} SET {ready_ph} = :falseVal, {submitted_ph} = :falseVal, {la_ph} = :lastAct"
                 expression_attribute_names = {
+                    token_ph: f"{target_slot_label}ResumeToken",
+                    disconnected_ph: f"{target_slot_label}DisconnectedAt",
                     conn_id_ph: conn_id_attr_name,
                     name_ph: name_attr_name,
                     sequences_ph: sequences_attr_name,
@@ -2365,28 +2700,41 @@ def handler(event, context):
                     ':kick_conn_id_val': kicked_connection_id
                 }
                 condition_expression_str = f"attribute_exists({conn_id_ph}) AND {conn_id_ph} = :kick_conn_id_val"
-
-                logger.info(f"Attempting UpdateItem for kick. Update: {update_expression}, Condition: {condition_expression_str}, Names: {expression_attribute_names}, Values: {expression_attribute_values}")
-                lobbies_table.update_item(
-                    Key={'lobbyId': lobby_id},
+                kick_update = versioned(
+                    lobby_item,
                     UpdateExpression=update_expression,
                     ConditionExpression=condition_expression_str,
                     ExpressionAttributeNames=expression_attribute_names,
                     ExpressionAttributeValues=expression_attribute_values
                 )
-                logger.info(f"Lobby {lobby_id} updated successfully.")
 
-                # Cleanup kicked player's connection item
-                try:
-                    logger.info(f"Cleaning up connection table for kicked player {kicked_connection_id}")
-                    connections_table.update_item(
-                        Key={'connectionId': kicked_connection_id},
-                        UpdateExpression="REMOVE currentLobbyId"
-                    )
-                    logger.info(f"Removed currentLobbyId from kicked connection {kicked_connection_id}")
-                except Exception as conn_clean_err:
-                    # Log error but don't fail the whole operation
-                    logger.error(f"Failed to cleanup connection {kicked_connection_id} after kick: {conn_clean_err}")
+                logger.info(f"Attempting transactional kick. Update: {kick_update['UpdateExpression']}, Condition: {kick_update['ConditionExpression']}, Names: {kick_update['ExpressionAttributeNames']}, Values: {kick_update['ExpressionAttributeValues']}")
+                # Slot reset and the kicked player's connection cleanup commit together. If the lobby
+                # changed, the fallback kick update raises LobbyConflict and the kick is retried, so
+                # nothing is sent to the kicked player until the kick is written.
+                run_teardown_writes(
+                    [
+                        lobby_update_transact_item(lobby_id, kick_update['UpdateExpression'], kick_update['ConditionExpression'],
+                                                   kick_update['ExpressionAttributeNames'], kick_update['ExpressionAttributeValues']),
+                        detach_connection_transact_item(kicked_connection_id)
+                    ],
+                    [
+                        (f"kick update on lobby {lobby_id}", lambda: update_lobby(
+                            lobby_item,
+                            Key={'lobbyId': lobby_id},
+                            UpdateExpression=update_expression,
+                            ConditionExpression=condition_expression_str,
+                            ExpressionAttributeNames=expression_attribute_names,
+                            ExpressionAttributeValues=expression_attribute_values
+                        ), True),
+                        detach_connection_fallback(kicked_connection_id)
+                    ]
+                )
+                logger.info(f"Lobby {lobby_id} updated successfully.")
+                logger.info(f"Sending forceRedirect notification to kicked player {kicked_connection_id}")
+                send_message_to_client(apigw_management_client, kicked_connection_id, force_redirect_payload)
+                if lobby_item.get('isPublic'): # The transaction doesn't return the item, so this reads it
+                    sync_public_listing(lobby_id)
 
                 # Broadcast updated state to remaining participants
                 logger.info(f"Broadcasting state update after kick for lobby {lobby_id}")
@@ -2395,19 +2743,13 @@ def handler(event, context):
                 logger.info(f"Kick player action completed successfully for lobby {lobby_id}")
                 return {'statusCode': 200, 'body': 'Player kicked successfully.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except ClientError as e:
-                 if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                     # Log more details including the exception
-                     logger.warning(f"Conditional check failed for kickPlayer in lobby {lobby_id}. Player slot: {player_slot_to_kick}, Expected ConnId: {kicked_connection_id}. Maybe player left or changed? Full error: {e}", exc_info=True)
-                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to kick player, slot may have changed."})
-                     # Broadcast current state so host sees the actual situation
-                     broadcast_lobby_state(lobby_id, apigw_management_client)
-                     return {'statusCode': 409, 'body': 'Conflict, player slot changed.'}
-                 else:
-                      # Log the full error traceback for other ClientErrors
-                      logger.error(f"Error processing kickPlayer for {connection_id} on lobby {lobby_id} (ClientError): {str(e)}", exc_info=True)
-                      send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Failed to kick player due to database error."})
-                      return {'statusCode': 500, 'body': 'Failed to kick player (database error).'}
+                 # Log the full error traceback for ClientErrors (a changed slot is a LobbyConflict, retried from a fresh read)
+                 logger.error(f"Error processing kickPlayer for {connection_id} on lobby {lobby_id} (ClientError): {str(e)}", exc_info=True)
+                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Failed to kick player due to database error."})
+                 return {'statusCode': 500, 'body': 'Failed to kick player (database error).'}
             except Exception as e:
                  # Log the full error traceback for any other unexpected errors
                  logger.error(f"Unexpected error processing kickPlayer for {connection_id} on lobby {lobby_id}: {str(e)}", exc_info=True)
@@ -2425,8 +2767,8 @@ def handler(event, context):
                 return {'statusCode': 400, 'body': 'Missing lobbyId.'}
 
             try:
-                # Get lobby item with ConsistentRead to ensure we see the latest state
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                # Get lobby item (the versioned write below catches a stale read)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for host join attempt by {connection_id}.")
@@ -2450,101 +2792,75 @@ def handler(event, context):
                 # Find first available slot and prepare update
                 assigned_slot_num = None # 1 or 2
                 update_expression = None
+                import uuid
                 expression_values = {
                     ':hostConnId': host_connection_id,
                     ':hostName': host_name,
-                    ':falseVal': False # Set ready status to False initially
+                    ':falseVal': False, # Set ready status to False initially
+                    ':resumeToken': lobby_item.get('hostResumeToken') or uuid.uuid4().hex # One token reclaims the host role and the slot
                 }
                 condition_expression = None
 
-                # Try to join P1 first, then P2
-                max_retries = 3
-                retry_count = 0
-                success = False
-                last_error = None
+                # Try to join P1 first, then P2. If another join lands first, the versioned
+                # write raises LobbyConflict and the whole action is retried from a fresh read.
+                if not lobby_item.get('player1ConnectionId'):  # This will work for both None and missing field
+                    assigned_slot_num = 1
+                    update_expression = "SET player1ConnectionId = :hostConnId, player1Name = :hostName, player1Ready = :falseVal, player1ResumeToken = :resumeToken, lastAction = :lastAct"
+                    # Check for both missing field and None value
+                    condition_expression = "attribute_not_exists(player1ConnectionId) OR player1ConnectionId = :nullVal OR player1ConnectionId = :emptyStr"
+                    expression_values[':lastAct'] = f"{host_name} (Host) joined as Player 1."
+                    expression_values[':nullVal'] = None
+                    expression_values[':emptyStr'] = ""
+                elif not lobby_item.get('player2ConnectionId'):  # This will work for both None and missing field
+                    assigned_slot_num = 2
+                    update_expression = "SET player2ConnectionId = :hostConnId, player2Name = :hostName, player2Ready = :falseVal, player2ResumeToken = :resumeToken, lastAction = :lastAct"
+                    # Check for both missing field and None value
+                    condition_expression = "attribute_not_exists(player2ConnectionId) OR player2ConnectionId = :nullVal OR player2ConnectionId = :emptyStr"
+                    expression_values[':lastAct'] = f"{host_name} (Host) joined as Player 2."
+                    expression_values[':nullVal'] = None
+                    expression_values[':emptyStr'] = ""
+                else:
+                    logger.warning(f"Host {connection_id} tried to join lobby {lobby_id}, but both slots are full.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Lobby is full, cannot join as player."})
+                    return {'statusCode': 400, 'body': 'Lobby is full.'}
 
-                while retry_count < max_retries and not success:
-                    try:
-                        # Refresh lobby state before each attempt
-                        response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                        lobby_item = response.get('Item')
-                        
-                        # Check slots again with fresh data
-                        if not lobby_item.get('player1ConnectionId'):  # This will work for both None and missing field
-                            assigned_slot_num = 1
-                            update_expression = "SET player1ConnectionId = :hostConnId, player1Name = :hostName, player1Ready = :falseVal, lastAction = :lastAct"
-                            # Check for both missing field and None value
-                            condition_expression = "attribute_not_exists(player1ConnectionId) OR player1ConnectionId = :nullVal OR player1ConnectionId = :emptyStr"
-                            expression_values[':lastAct'] = f"{host_name} (Host) joined as Player 1."
-                            expression_values[':nullVal'] = None
-                            expression_values[':emptyStr'] = ""
-                        elif not lobby_item.get('player2ConnectionId'):  # This will work for both None and missing field
-                            assigned_slot_num = 2
-                            update_expression = "SET player2ConnectionId = :hostConnId, player2Name = :hostName, player2Ready = :falseVal, lastAction = :lastAct"
-                            # Check for both missing field and None value
-                            condition_expression = "attribute_not_exists(player2ConnectionId) OR player2ConnectionId = :nullVal OR player2ConnectionId = :emptyStr"
-                            expression_values[':lastAct'] = f"{host_name} (Host) joined as Player 2."
-                            expression_values[':nullVal'] = None
-                            expression_values[':emptyStr'] = ""
-                        else:
-                            logger.warning(f"Host {connection_id} tried to join lobby {lobby_id}, but both slots are full.")
-                            send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Lobby is full, cannot join as player."})
-                            return {'statusCode': 400, 'body': 'Lobby is full.'}
-
-                        assigned_slot_str = f"P{assigned_slot_num}"
-                        last_action_msg = expression_values[':lastAct']
-                        logger.info(f"Host {connection_id} attempting to join slot {assigned_slot_str} in lobby {lobby_id} (attempt {retry_count + 1}/{max_retries})")
-                        logger.info(f"Update expression: {update_expression}")
-                        logger.info(f"Condition expression: {condition_expression}")
-                        logger.info(f"Expression values: {expression_values}")
-
-                        # Attempt to update the lobby item conditionally
-                        lobbies_table.update_item(
-                            Key={'lobbyId': lobby_id},
-                            UpdateExpression=update_expression,
-                            ConditionExpression=condition_expression,
-                            ExpressionAttributeValues=expression_values
-                        )
-                        success = True
-                        logger.info(f"Host {connection_id} successfully joined slot {assigned_slot_str} in lobby {lobby_id}.")
-
-                        # Send lobbyJoined message to the host to update their client state
-                        send_message_to_client(apigw_management_client, connection_id, {
-                            "type": "lobbyJoined",
-                            "lobbyId": lobby_id,
-                            "assignedSlot": assigned_slot_str,
-                            "isHost": True, # Keep host status
-                            "message": f"Successfully joined as {assigned_slot_str}"
-                        })
-
-                        # Broadcast updated state to all participants
-                        broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg)
-
-                        return {'statusCode': 200, 'body': 'Host joined slot successfully.'}
-
-                    except ClientError as e:
-                        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                            retry_count += 1
-                            last_error = e
-                            if retry_count < max_retries:
-                                # Wait a short time before retrying (increasing delay with each retry)
-                                time.sleep(0.1 * retry_count)
-                                continue
-                            else:
-                                logger.warning(f"Failed to join slot after {max_retries} attempts for host {connection_id} in lobby {lobby_id}. Last error: {str(last_error)}")
-                                # Get final state to show what changed
-                                final_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-                                final_lobby_item = final_response.get('Item')
-                                if final_lobby_item:
-                                    logger.info(f"Final lobby state: P1={final_lobby_item.get('player1ConnectionId')}, P2={final_lobby_item.get('player2ConnectionId')}")
-                                    logger.info(f"Final lobby state details: {json.dumps(final_lobby_item, default=str)}")
-                                
-                                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to join slot after multiple attempts. Please try again."})
-                                broadcast_lobby_state(lobby_id, apigw_management_client) # Broadcast current state so host sees who joined
-                                return {'statusCode': 409, 'body': 'Conflict, slot taken.'}
-                        else:
-                            raise e
+                assigned_slot_str = f"P{assigned_slot_num}"
+                last_action_msg = expression_values[':lastAct']
+                logger.info(f"Host {connection_id} attempting to join slot {assigned_slot_str} in lobby {lobby_id}")
+                logger.info(f"Update expression: {update_expression}")
+                logger.info(f"Condition expression: {condition_expression}")
+                logger.info(f"Expression values: {expression_values}")
 
+                # Attempt to update the lobby item conditionally
+                updated_lobby_item = update_lobby(
+                    lobby_item,
+                    Key={'lobbyId': lobby_id},
+                    UpdateExpression=update_expression,
+                    ConditionExpression=condition_expression,
+                    ExpressionAttributeValues=expression_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+                logger.info(f"Host {connection_id} successfully joined slot {assigned_slot_str} in lobby {lobby_id}.")
+                sync_public_listing(lobby_id, updated_lobby_item)
+
+                # Send lobbyJoined message to the host to update their client state
+                send_message_to_client(apigw_management_client, connection_id, {
+                    "type": "lobbyJoined",
+                    "lobbyId": lobby_id,
+                    "assignedSlot": assigned_slot_str,
+                    "isHost": True, # Keep host status
+                    "message": f"Successfully joined as {assigned_slot_str}",
+                    "resumeToken": expression_values[':resumeToken'],
+                    "resumeGraceSeconds": RESUME_GRACE_SECONDS
+                })
+
+                # Broadcast updated state to all participants
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, lobby_item=updated_lobby_item)
+
+                return {'statusCode': 200, 'body': 'Host joined slot successfully.'}
+
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error processing hostJoinSlot for {connection_id} on lobby {lobby_id}: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Failed to join slot: {str(e)}"})
@@ -2560,8 +2876,8 @@ def handler(event, context):
                 return {'statusCode': 400, 'body': 'Missing lobbyId.'}
 
             try:
-                # 1. Get lobby item (ConsistentRead recommended for checks)
-                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+                # 1. Get lobby item (the versioned write below catches a stale read)
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = response.get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for reset attempt by {connection_id}.")
@@ -2581,10 +2897,11 @@ def handler(event, context):
                 # Define attributes to REMOVE, ensuring 'turnExpiresAt' is included
                 attributes_to_remove = [
                     "currentPhase", "currentTurn", "currentStepIndex", "turnExpiresAt",
-                    "bans", "player1Picks", "player2Picks", "availableResonators",
-                    "effectiveDraftOrder", "playerRoles",
+                    "bans", "player1Picks", "player2Picks", "availableResonators", "autoSelectQueues",
+                    "effectiveDraftOrder", "playerRoles", "draftFormat",
                     "player1Sequences", "player1WeightedBoxScore", "player2Sequences", "player2WeightedBoxScore",
-                    "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner"
+                    "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner",
+                    "draftPaused", "pausedTurnRemainingSeconds", "seriesGame", "seriesHistory" # A reset restarts the series
                 ]
 
                 update_expression_set_parts = [
@@ -2593,16 +2910,21 @@ def handler(event, context):
                     "#p2r = :falseVal",
                     "#la = :lastAct",
                     "#p1ss = :falseVal",
-                    "#p2ss = :falseVal"
+                    "#p2ss = :falseVal",
+                    "#es = :eventSeq",
+                    "#re = :emptyList"
                 ]
                 expression_attribute_names = {
                     '#ls': 'lobbyState', '#p1r': 'player1Ready', '#p2r': 'player2Ready', '#la': 'lastAction',
-                    '#p1ss': 'player1ScoreSubmitted', '#p2ss': 'player2ScoreSubmitted'
+                    '#p1ss': 'player1ScoreSubmitted', '#p2ss': 'player2ScoreSubmitted',
+                    '#es': 'eventSeq', '#re': 'recentEvents'
                 }
                 expression_attribute_values = {
                     ':waitState': 'WAITING',
                     ':falseVal': False,
-                    ':lastAct': last_action_msg
+                    ':lastAct': last_action_msg,
+                    ':eventSeq': int(lobby_item.get('eventSeq', 0)) + 1,
+                    ':emptyList': []
                 }
 
                 update_expression_remove_parts = []
@@ -2616,19 +2938,24 @@ def handler(event, context):
                     update_expression += " REMOVE " + ", ".join(update_expression_remove_parts)
 
                 logger.info(f"Resetting draft for lobby {lobby_id}. Update: {update_expression}")
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression,
                     ExpressionAttributeNames=expression_attribute_names,
-                    ExpressionAttributeValues=expression_attribute_values
-                )
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
                 logger.info(f"Lobby {lobby_id} draft reset successfully.")
+                sync_public_listing(lobby_id, updated_lobby_item)
 
                 # 4. Broadcast the reset state to all participants
-                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg)
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, lobby_item=updated_lobby_item)
 
                 return {'statusCode': 200, 'body': 'Draft reset successfully.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except ClientError as e:
                 logger.error(f"Error processing resetDraft for {connection_id} on lobby {lobby_id} (ClientError): {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"Failed to reset draft: {str(e)}"})
@@ -2638,6 +2965,109 @@ def handler(event, context):
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Internal server error during draft reset."})
                 return {'statusCode': 500, 'body': 'Failed to reset draft (server error).'}
 
+        elif action == 'nextGame':
+            # Best-of-N series: start the next game of the series from a completed draft in one write
+            logger.info(f"Processing 'nextGame' for connection {connection_id}")
+            lobby_id = message_data.get('lobbyId')
+            if not lobby_id:
+                logger.warning(f"nextGame request from {connection_id} missing lobbyId.")
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Lobby ID missing."})
+                return {'statusCode': 400, 'body': 'Missing lobbyId.'}
+
+            try:
+                # The versioned write below catches a stale read
+                response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
+                lobby_item = response.get('Item')
+                if not lobby_item:
+                    logger.warning(f"Lobby {lobby_id} not found for nextGame by {connection_id}.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Lobby not found."})
+                    return {'statusCode': 404, 'body': 'Lobby not found.'}
+
+                if connection_id != lobby_item.get('hostConnectionId'):
+                    logger.warning(f"Unauthorized nextGame attempt on lobby {lobby_id} by non-host {connection_id}.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Only the host can start the next game."})
+                    return {'statusCode': 403, 'body': 'Forbidden: Not the host.'}
+
+                series_length = get_series_length(lobby_item)
+                series_game = get_series_game(lobby_item)
+                if series_length < 2:
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "This lobby is not playing a series."})
+                    return {'statusCode': 400, 'body': 'Not a series.'}
+                if lobby_item.get('lobbyState') != 'DRAFTING' or lobby_item.get('currentPhase') != DRAFT_COMPLETE_PHASE:
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "The current game's draft is not complete yet."})
+                    return {'statusCode': 400, 'body': 'Draft not complete.'}
+                if series_game >= series_length:
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": f"The series is over ({series_game} of {series_length} games played)."})
+                    return {'statusCode': 400, 'body': 'Series over.'}
+                if lobby_item.get('player1DisconnectedAt') or lobby_item.get('player2DisconnectedAt'):
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Cannot start the next game while a player is reconnecting."})
+                    return {'statusCode': 400, 'body': 'Player disconnected.'}
+
+                # Box scores, roles, draft order and equilibration bans carry over from game 1
+                try:
+                    draft_table = get_draft_table(lobby_item)
+                except (KeyError, ValueError) as e:
+                    logger.error(f"Lobby {lobby_id}: Could not compile the stored draft order for nextGame: {e}")
+                    return {'statusCode': 500, 'body': 'Draft configuration missing.'}
+                num_equilibration_bans = int(lobby_item.get('equilibrationBansAllowed', 0))
+                new_available_list = next_game_pool(lobby_item)
+                selections_needed = sum(step.count for step in draft_table.steps) + num_equilibration_bans
+                if len(new_available_list) < selections_needed:
+                    logger.warning(f"Lobby {lobby_id}: Only {len(new_available_list)} resonators left for game {series_game + 1}, the draft needs {selections_needed}.")
+                    send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Not enough resonators left in the fearless pool for another game."})
+                    return {'statusCode': 400, 'body': 'Pool exhausted.'}
+
+                next_game = series_game + 1
+                next_game_payload = build_draft_start_payload(
+                    draft_table, num_equilibration_bans, lobby_item.get('currentEquilibrationBanner'), f"Host started game {next_game} of {series_length}."
+                )
+                next_game_payload.update({
+                    'seriesGame': next_game,
+                    'availableResonators': new_available_list,
+                    'autoSelectQueues': lobby_candidate_queues(lobby_item, new_available_list),
+                    'bans': [],
+                    'player1Picks': [],
+                    'player2Picks': [],
+                    'equilibrationBansMade': 0,
+                    # Lists were rebuilt, so earlier draft events can no longer be replayed
+                    'eventSeq': int(lobby_item.get('eventSeq', 0)) + 1,
+                    'recentEvents': []
+                })
+
+                update_expression_parts = ["#seriesHistory_attr = list_append(if_not_exists(#seriesHistory_attr, :empty_list), :finished_game)"]
+                expression_attribute_names = {'#seriesHistory_attr': 'seriesHistory', '#lobbyState_cond': 'lobbyState', '#currentPhase_cond': 'currentPhase'}
+                expression_attribute_values = {
+                    ':empty_list': [],
+                    ':finished_game': [game_record(lobby_item)],
+                    ':expected_state': 'DRAFTING',
+                    ':expected_phase': DRAFT_COMPLETE_PHASE
+                }
+                for key, value in next_game_payload.items():
+                    name_placeholder = f"#{key}_attr"
+                    value_placeholder = f":val_{key}"
+                    update_expression_parts.append(f"{name_placeholder} = {value_placeholder}")
+                    expression_attribute_names[name_placeholder] = key
+                    expression_attribute_values[value_placeholder] = value
+
+                logger.info(f"Lobby {lobby_id}: Starting series game {next_game} of {series_length} with {len(new_available_list)} resonators (fearless: {bool(lobby_item.get('fearless'))}).")
+                updated_lobby_item = update_lobby(
+                    lobby_item,
+                    Key={'lobbyId': lobby_id},
+                    UpdateExpression="SET " + ", ".join(update_expression_parts),
+                    ConditionExpression="#lobbyState_cond = :expected_state AND #currentPhase_cond = :expected_phase",
+                    ExpressionAttributeNames=expression_attribute_names,
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=next_game_payload['lastAction'], lobby_item=updated_lobby_item)
+                return {'statusCode': 200, 'body': 'Next game started.'}
+
+            except ClientError as e:
+                logger.error(f"Error processing nextGame for {connection_id} on lobby {lobby_id} (ClientError): {str(e)}", exc_info=True)
+                send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to start the next game."})
+                return {'statusCode': 500, 'body': 'Failed to start next game (database error).'}
+
         # --- ADD hostLeaveSlot Handler ---
         elif action == 'hostLeaveSlot':
             logger.info(f"Processing 'hostLeaveSlot' for connection {connection_id}")
@@ -2652,7 +3082,7 @@ def handler(event, context):
 
             try:
                 # Verify requester is host of the lobby
-                lobby_response = lobbies_table.get_item(Key={'lobbyId': lobby_id})
+                lobby_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
                 lobby_item = lobby_response.get('Item')
 
                 if not lobby_item:
@@ -2692,7 +3122,8 @@ def handler(event, context):
                 # Update lobby item to remove host from the player slot and clear score data
                 remove_fields = [player_slot_conn, player_slot_name, 
                                f"{player_slot_label}Sequences", 
-                               f"{player_slot_label}WeightedBoxScore"]
+                               f"{player_slot_label}WeightedBoxScore",
+                               f"{player_slot_label}ResumeToken"]
                 
                 remove_expr = "REMOVE " + ", ".join(remove_fields)
                 set_expr = f"SET {player_slot_label}Ready = :falseVal, {player_slot_label}ScoreSubmitted = :falseVal, lastAction = :lastAct"
@@ -2703,28 +3134,36 @@ def handler(event, context):
                     ':lastAct': f"{host_name} left {player_name}'s slot."
                 }
 
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression,
-                    ExpressionAttributeValues=expression_values
-                )
+                    ExpressionAttributeValues=expression_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
 
                 logger.info(f"Host left slot {player_slot_label}. Clearing score data for that slot.")
+                sync_public_listing(lobby_id, updated_lobby_item)
 
                 # Send lobbyJoined with slot: null to indicate user is no longer in a slot
                 send_message_to_client(apigw_management_client, connection_id, {
                     "type": "lobbyJoined",
                     "lobbyId": lobby_id,
                     "slot": None, # Not in a specific slot
-                    "isHost": True # Still the host
+                    "isHost": True, # Still the host
+                    "resumeToken": updated_lobby_item.get('hostResumeToken'),
+                    "resumeGraceSeconds": RESUME_GRACE_SECONDS
                 })
 
                 # Broadcast new state to all (which now shows an empty slot)
                 broadcast_lobby_state(lobby_id, apigw_management_client, 
-                                      last_action=f"{host_name} left {player_name}'s slot.")
+                                      last_action=f"{host_name} left {player_name}'s slot.",
+                                      lobby_item=updated_lobby_item)
 
                 return {'statusCode': 200, 'body': 'Host left player slot.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error processing hostLeaveSlot: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {
@@ -2744,7 +3183,7 @@ def handler(event, context):
             logger.info(f"Processing 'submitBoxScore' from {connection_id} for lobby {lobby_id}. Client calculated totalScore: {client_total_score}")
 
             try:
-                lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}).get('Item')
+                lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read()).get('Item')
                 if not lobby_item:
                     logger.warning(f"Lobby {lobby_id} not found for submitBoxScore by {connection_id}.")
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Lobby not found."})
@@ -2763,22 +3202,20 @@ def handler(event, context):
                     send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "You are not an active player in this lobby."})
                     return {'statusCode': 403, 'body': 'Not an active player.'}
 
-                # Validate received sequences format if necessary (e.g., ensure s_value is int between -1 and 6)
-                # For simplicity, we'll trust the client sends valid sequence numbers for storage.
-                # The client already filters for S0-S6 for point calculation.
                 valid_sequences_to_store = {}
-                for char_name, s_value in received_sequences.items():
-                    if isinstance(s_value, int) and -1 <= s_value <= 6: # Allow -1 (Not Owned) to be stored
+                for char_name, s_value in (received_sequences or {}).items():
+                    if is_valid_sequence(s_value): # Allow -1 (Not Owned) to be stored
                         valid_sequences_to_store[char_name] = s_value
                     else:
                         logger.warning(f"Lobby {lobby_id}: Invalid sequence value {s_value} for {char_name} from {connection_id}. Not storing this sequence entry.")
-                
-                # --- MODIFICATION: Use client_total_score directly ---
-                # No backend recalculation for playerXWeightedBoxScore based on SEQUENCE_POINTS here.
-                # We trust the client's calculation which now correctly considers only 'isLimited' resonators.
-                player_weighted_box_score_to_store = client_total_score
-                
-                logger.info(f"Lobby {lobby_id}: Player {player_name_for_action} ({player_slot_label}) submitted sequences. Using client-calculated score: {player_weighted_box_score_to_store}")
+
+                # The score is computed here from the sequences (see wuwadraft_core.scoring); the client's
+                # totalScore is only for display, so a modified client can't skew equilibration.
+                player_weighted_box_score_to_store = score_box(valid_sequences_to_store)
+                if client_total_score != player_weighted_box_score_to_store:
+                    logger.warning(f"Lobby {lobby_id}: {connection_id} sent totalScore {client_total_score}, server computed {player_weighted_box_score_to_store}.")
+
+                logger.info(f"Lobby {lobby_id}: Player {player_name_for_action} ({player_slot_label}) submitted sequences. Weighted box score: {player_weighted_box_score_to_store}")
 
                 update_expression_parts = []
                 expression_attribute_values = {}
@@ -2791,11 +3228,11 @@ def handler(event, context):
                 update_expression_parts.append(f"{seq_attr_name_placeholder} = :seq")
                 expression_attribute_values[':seq'] = valid_sequences_to_store
                 
-                # Player Weighted Box Score (from client)
+                # Player Weighted Box Score (computed above)
                 score_attr_name_placeholder = f"#{player_slot_label}WeightedBoxScore_attr"
                 expression_attribute_names[score_attr_name_placeholder] = f"{player_slot_label}WeightedBoxScore"
                 update_expression_parts.append(f"{score_attr_name_placeholder} = :score")
-                expression_attribute_values[':score'] = decimal.Decimal(str(player_weighted_box_score_to_store)) # Store as Decimal
+                expression_attribute_values[':score'] = player_weighted_box_score_to_store # The table serializer stores int/float as N
 
                 # Player Score Submitted Flag
                 submitted_attr_name_placeholder = f"#{player_slot_label}ScoreSubmitted_attr"
@@ -2814,20 +3251,24 @@ def handler(event, context):
                 logger.info(f"SUBMIT_BOX_SCORE_DDB_UPDATE for lobby {lobby_id}:")
                 logger.info(f"  UpdateExpression: {update_expression}")
                 logger.info(f"  ExpressionAttributeNames: {expression_attribute_names}")
-                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_attribute_values, cls=DecimalEncoder)}")
+                logger.info(f"  ExpressionAttributeValues: {json.dumps(expression_attribute_values)}")
 
-                lobbies_table.update_item(
+                updated_lobby_item = update_lobby(
+                    lobby_item,
                     Key={'lobbyId': lobby_id},
                     UpdateExpression=update_expression,
                     ExpressionAttributeNames=expression_attribute_names,
-                    ExpressionAttributeValues=expression_attribute_values
-                )
+                    ExpressionAttributeValues=expression_attribute_values,
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
 
-                send_message_to_client(apigw_management_client, connection_id, {"type": "boxScoreSubmitted"})
-                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg)
+                send_message_to_client(apigw_management_client, connection_id, {"type": "boxScoreSubmitted", "weightedBoxScore": player_weighted_box_score_to_store})
+                broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_msg, lobby_item=updated_lobby_item)
                 
                 return {'statusCode': 200, 'body': 'Box score submitted.'}
 
+            except LobbyConflict:
+                raise # Re-run from a fresh read by retry_on_conflict
             except Exception as e:
                 logger.error(f"Error processing submitBoxScore for {lobby_id}, connection {connection_id}: {str(e)}", exc_info=True)
                 send_message_to_client(apigw_management_client, connection_id, {"type": "error", "message": "Failed to submit box score."})
@@ -2842,6 +3283,8 @@ def handler(event, context):
             })
             return {'statusCode': 200, 'body': 'Message echoed.'}
 
+    except LobbyConflict:
+        raise # Re-run from a fresh read by retry_on_conflict
     except Exception as e:
         # Catch-all for errors during action processing
         logger.error(f"Error processing message action: {str(e)}", exc_info=True)
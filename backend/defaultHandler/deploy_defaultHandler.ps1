@@ -10,19 +10,11 @@ $FunctionName = "wuwaDraftDefaultHandler"
 # $AWSRegion = "us-east-1"
 
 
-# --- Activate Virtual Env (Important!) ---
-# Assuming venv is one level up (in backend/)
-Write-Host "Activating virtual environment..."
-# Note: Activating within a script can sometimes be tricky with scope.
-# It might be better to ensure venv is active *before* running the script.
-# If running manually, ensure venv is active first. If automating, consider other approaches.
-# For simplicity here, assuming venv is active *before* running this script.
-
-Write-Host "Installing dependencies into function directory..."
-python -m pip install -r requirements.txt -t .
-
+# boto3 is provided by the Lambda Python runtime and the shared code (wuwadraft_core) by the
+# wuwadraft-core layer (see ..\layers\wuwadraft_core\deploy_wuwadraft_core_layer.ps1), so the
+# package only needs app.py. Nothing is pip-installed into the function directory anymore.
 Write-Host "Creating deployment package: $ZipFileName ..."
-Compress-Archive -Path * -DestinationPath $ZipFileName -Force
+Compress-Archive -Path .\app.py -DestinationPath $ZipFileName -Force
 
 Write-Host "Deploying to AWS Lambda function: $FunctionName ..."
 # Add --region $AWSRegion if needed
@@ -1,136 +1,141 @@
 # backend/disconnectHandler/app.py
 
-import json
-import boto3
 import logging
 import os
-from datetime import datetime, timezone # Keep timezone
-from boto3.dynamodb.conditions import Attr # Keep if broadcast_lobby_state uses it (it doesn't directly)
-from botocore.exceptions import ClientError
-import decimal
+
+from wuwadraft_core import clients as core_clients
+from wuwadraft_core.constants import (
+    EQUILIBRATION_PHASE_NAME, PRE_DRAFT_READY_STATE, RESUME_GRACE_SECONDS, MIN_RESUMED_TURN_SECONDS, DRAFT_ACTIVE_STATES
+)
+from wuwadraft_core.tables import get_tables
+from wuwadraft_core.messaging import (
+    STALE_CONNECTION_RECONCILE_SOURCE, RESUME_HOLD_EXPIRY_SOURCE, send_message_to_client, mark_connection_gone,
+    set_default_reconciler_function
+)
+from wuwadraft_core.teardown import teardown_lobby
+from wuwadraft_core.lobby_state import RESUME_HOLD_PREFIXES, broadcast_lobby_state, is_slot_disconnect_expired
+from wuwadraft_core.spectators import remove_spectators
+from wuwadraft_core.lobby_browser import sync_public_listing
+from wuwadraft_core.clock import now_ms, timestamp_ms
+from wuwadraft_core.concurrency import LobbyConflict, consistent_read, update_lobby, retry_on_conflict
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# --- Helper Function (Decimal Encoder) ---
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, decimal.Decimal):
-            if obj % 1 == 0:
-                return int(obj)
-            else:
-                # Return as string to preserve precision for floats from DynamoDB
-                return str(obj) 
-        return json.JSONEncoder.default(self, obj)
-
 # --- DynamoDB Setup ---
-CONNECTIONS_TABLE_NAME = os.environ.get('CONNECTIONS_TABLE_NAME', 'WuwaDraftConnections')
-LOBBIES_TABLE_NAME = os.environ.get('LOBBIES_TABLE_NAME', 'WuwaDraftLobbies')
-dynamodb = boto3.resource('dynamodb')
-connections_table = dynamodb.Table(CONNECTIONS_TABLE_NAME)
-lobbies_table = dynamodb.Table(LOBBIES_TABLE_NAME)
+# Split or single-table layout, see wuwadraft_core.tables
+connections_table, lobbies_table = get_tables()
 
 # --- API Gateway Management Client Helper ---
 WEBSOCKET_ENDPOINT_URL = os.environ.get('WEBSOCKET_ENDPOINT_URL', None)
 
 def get_apigw_management_client():
-    """Creates an API Gateway Management API client."""
+    """Returns the (cached) API Gateway Management API client."""
     if not WEBSOCKET_ENDPOINT_URL:
         logger.error("WEBSOCKET_ENDPOINT_URL environment variable not set.")
         raise ValueError("Missing WebSocket endpoint URL configuration.")
-    logger.info(f"Creating ApiGatewayManagementApi client with endpoint: {WEBSOCKET_ENDPOINT_URL}")
-    return boto3.client('apigatewaymanagementapi', endpoint_url=WEBSOCKET_ENDPOINT_URL)
-
-# --- Send Message Helper ---
-# Ensure this uses DecimalEncoder consistently for all payloads from this handler
-def send_message_to_client(apigw_client, connection_id, payload_dict):
-    """Sends a JSON payload to a specific connectionId, using DecimalEncoder."""
-    try:
-        payload_json_string = json.dumps(payload_dict, cls=DecimalEncoder)
-        logger.info(f"SEND_MSG_CLIENT_DEBUG: Serialized JSON for {connection_id}: {payload_json_string}")
-        apigw_client.post_to_connection(
-            ConnectionId=connection_id,
-            Data=payload_json_string.encode('utf-8')
-        )
-        logger.info(f"Message sent successfully to {connection_id}")
-        return True
-    except apigw_client.exceptions.GoneException:
-        logger.warning(f"Client {connection_id} is gone. Cannot send message.")
-    except Exception as e:
-        logger.error(f"Failed to post message to connectionId {connection_id}: {str(e)}", exc_info=True)
-    return False
-
-# --- Broadcast Lobby State Helper ---
-# Ensure this function includes ALL necessary BSS fields. Your shared version looks good.
-def broadcast_lobby_state(lobby_id, apigw_client, last_action=None, exclude_connection_id=None):
-    try:
-        logger.info(f"BROADCAST_LOBBY_STATE: Fetching item for lobby {lobby_id}. Last Action: {last_action}")
-        final_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
-        final_lobby_item_for_broadcast = final_response.get('Item')
-
-        if not final_lobby_item_for_broadcast:
-            logger.warning(f"BROADCAST_LOBBY_STATE: Cannot broadcast, lobby {lobby_id} item not found.")
-            return False
-
-        logger.info(f"BROADCAST_LOBBY_STATE_ITEM_DUMP_DEBUG for lobby {lobby_id}: {json.dumps(final_lobby_item_for_broadcast, cls=DecimalEncoder)}")
-
-        state_payload = {
-            "type": "lobbyStateUpdate",
-            "lobbyId": lobby_id,
-            "hostName": final_lobby_item_for_broadcast.get('hostName'),
-            "player1Name": final_lobby_item_for_broadcast.get('player1Name'),
-            "player2Name": final_lobby_item_for_broadcast.get('player2Name'),
-            "lobbyState": final_lobby_item_for_broadcast.get('lobbyState'),
-            "player1Ready": final_lobby_item_for_broadcast.get('player1Ready', False),
-            "player2Ready": final_lobby_item_for_broadcast.get('player2Ready', False),
-            "currentPhase": final_lobby_item_for_broadcast.get('currentPhase'),
-            "currentTurn": final_lobby_item_for_broadcast.get('currentTurn'),
-            "bans": final_lobby_item_for_broadcast.get('bans', []),
-            "player1Picks": final_lobby_item_for_broadcast.get('player1Picks', []),
-            "player2Picks": final_lobby_item_for_broadcast.get('player2Picks', []),
-            "availableResonators": final_lobby_item_for_broadcast.get('availableResonators', []),
-            "turnExpiresAt": final_lobby_item_for_broadcast.get('turnExpiresAt'),
-            "equilibrationEnabled": final_lobby_item_for_broadcast.get('equilibrationEnabled', False), # Default to False if missing
-            "player1ScoreSubmitted": final_lobby_item_for_broadcast.get('player1ScoreSubmitted', False),
-            "player2ScoreSubmitted": final_lobby_item_for_broadcast.get('player2ScoreSubmitted', False),
-            "player1WeightedBoxScore": final_lobby_item_for_broadcast.get('player1WeightedBoxScore'),
-            "player2WeightedBoxScore": final_lobby_item_for_broadcast.get('player2WeightedBoxScore'),
-            "player1Sequences": final_lobby_item_for_broadcast.get('player1Sequences'),
-            "player2Sequences": final_lobby_item_for_broadcast.get('player2Sequences'),
-            "effectiveDraftOrder": final_lobby_item_for_broadcast.get('effectiveDraftOrder'),
-            "playerRoles": final_lobby_item_for_broadcast.get('playerRoles'),
-            "currentEquilibrationBanner": final_lobby_item_for_broadcast.get('currentEquilibrationBanner'), # Added
-            "equilibrationBansAllowed": final_lobby_item_for_broadcast.get('equilibrationBansAllowed', 0), # Renamed from equilibrationBansTarget
-            "equilibrationBansMade": final_lobby_item_for_broadcast.get('equilibrationBansMade', 0)
-        }
-        if last_action:
-            state_payload["lastAction"] = last_action
-        
-        logger.info(f"BROADCAST_LOBBY_STATE: Constructed state_payload DICT for lobby {lobby_id} (pre-send): {state_payload}")
-
-        participants = [
-            final_lobby_item_for_broadcast.get('hostConnectionId'),
-            final_lobby_item_for_broadcast.get('player1ConnectionId'),
-            final_lobby_item_for_broadcast.get('player2ConnectionId')
-        ]
-        valid_connection_ids = [pid for pid in participants if pid]
-        success_count = 0
-        for recipient_id in valid_connection_ids:
-            if recipient_id == exclude_connection_id:
-                continue
-            # Pass the Python dictionary directly. send_message_to_client handles serialization.
-            if send_message_to_client(apigw_client, recipient_id, state_payload):
-                 success_count += 1
-        
-        logger.info(f"Broadcast complete for lobby {lobby_id}. Sent to {success_count} participant(s).")
-        return True
-    except Exception as broadcast_err:
-        logger.error(f"Error during broadcast_lobby_state for {lobby_id}: {str(broadcast_err)}", exc_info=True)
-        return False
+    return core_clients.get_apigw_management_client(WEBSOCKET_ENDPOINT_URL)
+
+# This Lambda is the reconciler, so it hands its own Gone connections back to itself by default
+set_default_reconciler_function(os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
+
+# --- Resume Hold Helper ---
+def hold_slot_for_resume(lobby_item, lobby_id, connection_id, slot_prefixes, player_name, apigw_client):
+    """Marks a dropped connection's places ('host', 'player1', 'player2') as disconnected instead of clearing them.
+
+    The places (name, sequences, scores, picks, host role) are kept for RESUME_GRACE_SECONDS so
+    the connection's owner can reclaim them with their resume token. An active draft is paused
+    with the remaining turn time saved when a player slot is held, so nobody times out while
+    the player is away. A held place nobody reclaims is released by expire_resume_holds.
+    """
+    update_expression_parts = [f"{slot_prefix}DisconnectedAt = :now" for slot_prefix in slot_prefixes] + ["lastAction = :lastAct"]
+    expression_attribute_values = {
+        ':now': now_ms(),
+        ':connId': connection_id
+    }
+    last_action_message = f"{player_name} disconnected. Holding their slot for {RESUME_GRACE_SECONDS}s."
+    if slot_prefixes == ['host']:
+        last_action_message = f"{player_name} (Host) disconnected. Holding the lobby for {RESUME_GRACE_SECONDS}s."
+
+    holds_player_slot = any(slot_prefix != 'host' for slot_prefix in slot_prefixes)
+    if holds_player_slot and lobby_item.get('lobbyState') in DRAFT_ACTIVE_STATES and not lobby_item.get('draftPaused'):
+        remaining_seconds = MIN_RESUMED_TURN_SECONDS
+        turn_expires_at = timestamp_ms(lobby_item.get('turnExpiresAt'))
+        if turn_expires_at is not None:
+            remaining_seconds = max((turn_expires_at - now_ms()) // 1000, MIN_RESUMED_TURN_SECONDS)
+        update_expression_parts.extend([
+            "draftPaused = :trueVal",
+            "pausedTurnRemainingSeconds = :remaining",
+            "turnExpiresAt = :nullVal" # Stops every client's countdown while paused
+        ])
+        expression_attribute_values.update({':trueVal': True, ':remaining': remaining_seconds, ':nullVal': None})
+        last_action_message = f"{player_name} disconnected. Draft paused for up to {RESUME_GRACE_SECONDS}s while they reconnect."
+
+    expression_attribute_values[':lastAct'] = last_action_message
+
+    # Conditioned on the places still belonging to this connection: if the player already
+    # resumed on a new connection, the versioned write conflicts and the retry's fresh read
+    # no longer finds this connection in the slot, so a late disconnect can't mark them away.
+    updated_lobby_item = update_lobby(
+        lobby_item,
+        Key={'lobbyId': lobby_id},
+        UpdateExpression="SET " + ", ".join(update_expression_parts),
+        ConditionExpression=" AND ".join(f"{slot_prefix}ConnectionId = :connId" for slot_prefix in slot_prefixes),
+        ExpressionAttributeValues=expression_attribute_values,
+        ReturnValues='ALL_NEW'
+    )['Attributes']
+    logger.info(f"Holding {slot_prefixes} in lobby {lobby_id} for resume after {connection_id} disconnected.")
+
+    if apigw_client:
+        broadcast_lobby_state(lobby_id, apigw_client, last_action=last_action_message, exclude_connection_id=connection_id,
+                              lobby_item=updated_lobby_item)
+    return {'statusCode': 200, 'body': 'Player slot held for resume.'}
+
+def expire_resume_holds(lobby_id, apigw_management_client):
+    """Releases every place in the lobby whose resume grace window has passed.
+
+    Each is released as if its connection had dropped without a resume token: an expired
+    host closes the lobby, an expired player slot is freed and a paused draft is reset.
+    """
+    lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True).get('Item')
+    if not lobby_item:
+        return {'statusCode': 200, 'body': 'Lobby already gone.'}
+    expired_prefixes = [slot_prefix for slot_prefix in RESUME_HOLD_PREFIXES if is_slot_disconnect_expired(lobby_item, slot_prefix)]
+    if 'host' in expired_prefixes:
+        expired_prefixes = ['host'] # Closing the lobby releases everything else
+    for slot_prefix in expired_prefixes:
+        held_connection_id = lobby_item.get(f"{slot_prefix}ConnectionId")
+        logger.info(f"RESUME_EXPIRY: Releasing {slot_prefix} ({held_connection_id}) in lobby {lobby_id}.")
+        try:
+            retry_on_conflict(
+                lambda: update_lobby_after_disconnect(lobby_id, held_connection_id, lobby_item.get(f"{slot_prefix}Name") or "Player",
+                                                      apigw_management_client, release_hold=True),
+                f"resume hold expiry of {slot_prefix} in lobby {lobby_id}"
+            )
+        except LobbyConflict as conflict:
+            logger.error(f"RESUME_EXPIRY: Lobby {lobby_id} kept changing while releasing {slot_prefix}: {conflict}")
+    return {'statusCode': 200, 'body': f"Released {len(expired_prefixes)} expired hold(s)."}
 
 # --- Main Handler ---
 def handler(event, context):
+    # --- Stale connection reconcile ---
+    # Async invoke from a broadcast that hit GoneException. Each Gone connection is cleaned up
+    # exactly as if its $disconnect had arrived; ones already handled are no-ops.
+    if event.get('source') == STALE_CONNECTION_RECONCILE_SOURCE:
+        stale_connection_ids = event.get('connectionIds') or []
+        logger.info(f"STALE_CONN: Reconciling {stale_connection_ids} for lobby {event.get('lobbyId')}.")
+        for stale_connection_id in stale_connection_ids:
+            mark_connection_gone(stale_connection_id)
+            handler({'requestContext': {'connectionId': stale_connection_id}}, context)
+        return {'statusCode': 200, 'body': f"Reconciled {len(stale_connection_ids)} stale connection(s)."}
+
+    # --- Resume hold expiry ---
+    # Async invoke from a reconnectTimeout: places held for dropped connections that weren't reclaimed in time.
+    if event.get('source') == RESUME_HOLD_EXPIRY_SOURCE:
+        apigw_management_client = get_apigw_management_client() if WEBSOCKET_ENDPOINT_URL else None
+        return expire_resume_holds(event.get('lobbyId'), apigw_management_client)
+
     connection_id = event.get('requestContext', {}).get('connectionId')
     logger.info(f"Disconnect event for connectionId: {connection_id}")
 
@@ -147,12 +152,14 @@ def handler(event, context):
         logger.warning("WEBSOCKET_ENDPOINT_URL not set. Cannot broadcast on disconnect.")
 
     lobby_id = None
+    spectating_lobby_id = None
     player_name_for_logging = "Player"
     try:
         response = connections_table.get_item(Key={'connectionId': connection_id})
         connection_item = response.get('Item')
         if connection_item:
             lobby_id = connection_item.get('currentLobbyId')
+            spectating_lobby_id = connection_item.get('spectatingLobbyId')
             player_name_for_logging = connection_item.get('playerName', player_name_for_logging)
             if lobby_id:
                 logger.info(f"Connection {connection_id} ({player_name_for_logging}) was in lobby {lobby_id}.")
@@ -169,12 +176,32 @@ def handler(event, context):
     except Exception as e_del_conn:
         logger.error(f"Failed to delete connection {connection_id} from connections table: {str(e_del_conn)}", exc_info=True)
 
+    if spectating_lobby_id:
+        remove_spectators(spectating_lobby_id, [connection_id])
+        logger.info(f"Removed spectator {connection_id} from lobby {spectating_lobby_id}.")
+
     if not lobby_id:
         logger.info(f"No lobby associated with {connection_id} in connections table. No lobby updates to perform.")
         return {'statusCode': 200, 'body': 'Connection cleaned up, no lobby associated.'}
 
+    # Lobby writes are versioned, so a disconnect racing another lobby action is re-run from a fresh read
     try:
-        lobby_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+        return retry_on_conflict(
+            lambda: update_lobby_after_disconnect(lobby_id, connection_id, player_name_for_logging, apigw_management_client),
+            f"disconnect of {connection_id} from lobby {lobby_id}"
+        )
+    except LobbyConflict as conflict:
+        logger.error(f"DISCONNECT_HANDLER_ERROR: Lobby {lobby_id} kept changing while processing disconnect of {connection_id}: {conflict}")
+        return {'statusCode': 409, 'body': 'Disconnect conflicted with other lobby updates.'}
+
+def update_lobby_after_disconnect(lobby_id, connection_id, player_name_for_logging, apigw_management_client, release_hold=False):
+    """Frees, holds or tears down the disconnected connection's place in its lobby. May raise LobbyConflict.
+
+    With release_hold the place was held for resume and its grace window has passed, so it is
+    freed (or the lobby torn down) instead of being held again.
+    """
+    try:
+        lobby_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=consistent_read())
         lobby_item = lobby_response.get('Item')
 
         if not lobby_item:
@@ -194,8 +221,21 @@ def handler(event, context):
         last_action_message = f"{player_name_for_logging} disconnected."
         disconnected_player_slot_prefix = None
 
+        if release_hold:
+            held_prefixes = [slot_prefix for slot_prefix in RESUME_HOLD_PREFIXES if lobby_item.get(f"{slot_prefix}ConnectionId") == connection_id]
+            if not any(is_slot_disconnect_expired(lobby_item, slot_prefix) for slot_prefix in held_prefixes):
+                logger.info(f"RESUME_EXPIRY: {connection_id} no longer holds an expired place in lobby {lobby_id}.")
+                return {'statusCode': 200, 'body': 'Hold already released or resumed.'}
+
         if connection_id == host_connection_id:
             host_name = lobby_item.get('hostName', 'The Host')  # Get host name for message
+
+            # --- HOLD THE HOST ROLE (AND ANY SLOT THE HOST PLAYS IN) FOR RESUME ---
+            # Lobbies created before host resume tokens existed fall through to the teardown below.
+            if lobby_item.get('hostResumeToken') and not release_hold:
+                held_prefixes = ['host'] + [slot_prefix for slot_prefix in ('player1', 'player2')
+                                            if lobby_item.get(f"{slot_prefix}ConnectionId") == connection_id]
+                return hold_slot_for_resume(lobby_item, lobby_id, connection_id, held_prefixes, host_name, apigw_management_client)
             logger.info(f"Host ({host_name}) disconnected from lobby {lobby_id}. Preparing to notify players and delete lobby.")
 
             # 1. Identify remaining participants
@@ -205,37 +245,22 @@ def handler(event, context):
             if p2_connection_id and p2_connection_id != connection_id:  # Ensure P2 is not the host themselves
                 remaining_participant_ids.append(p2_connection_id)
 
-            # 2. Notify remaining participants
-            if apigw_management_client and remaining_participant_ids:
-                notification_payload = {
-                    "type": "forceRedirect",
-                    "reason": "host_disconnected",
-                    "message": f"{host_name} has disconnected. The lobby ({lobby_id}) is closing."
-                }
-                logger.info(f"Notifying remaining players ({remaining_participant_ids}) about host disconnect for lobby {lobby_id}.")
-                for pid in remaining_participant_ids:
-                    send_message_to_client(apigw_management_client, pid, notification_payload)
-            
-            # 3. Delete the lobby from DynamoDB
+            # 2. Notify remaining participants, delete the lobby and clean up their connection
+            # entries (remove currentLobbyId) concurrently. The delete and the cleanup share one
+            # transaction so players never point at a deleted lobby.
+            notification_payload = {
+                "type": "forceRedirect",
+                "reason": "host_disconnected",
+                "message": f"{host_name} has disconnected. The lobby ({lobby_id}) is closing."
+            }
+            if release_hold:
+                notification_payload["message"] = f"{host_name} did not reconnect in time. The lobby ({lobby_id}) is closing."
+            logger.info(f"Notifying remaining players ({remaining_participant_ids}) and deleting lobby {lobby_id} after host disconnect.")
             try:
-                lobbies_table.delete_item(Key={'lobbyId': lobby_id})
-                logger.info(f"Lobby {lobby_id} deleted due to host disconnect.")
-            except Exception as e_del_lobby:
-                logger.error(f"Failed to delete lobby {lobby_id} after host disconnect: {str(e_del_lobby)}", exc_info=True)
-                # Continue with connection cleanup even if lobby delete fails
-
-            # 4. Clean up connection table entries for remaining players (remove currentLobbyId)
-            # This ensures they don't think they are still in a deleted lobby
-            for pid in remaining_participant_ids:
-                try:
-                    connections_table.update_item(
-                        Key={'connectionId': pid},
-                        UpdateExpression="REMOVE currentLobbyId"
-                        # Optionally, add a ConditionExpression if currentLobbyId must match lobby_id
-                    )
-                    logger.info(f"Removed currentLobbyId from connection {pid} for deleted lobby {lobby_id}.")
-                except Exception as e_clean_conn:
-                    logger.error(f"Failed to clean currentLobbyId for connection {pid}: {str(e_clean_conn)}")
+                teardown_lobby(apigw_management_client, lobby_id, remaining_participant_ids, notification_payload, remaining_participant_ids,
+                               has_spectators=lobby_item.get('hasSpectators', False))
+            except Exception as e_teardown:
+                logger.error(f"Failed to tear down lobby {lobby_id} after host disconnect: {str(e_teardown)}", exc_info=True)
             
             return {'statusCode': 200, 'body': 'Host disconnected, lobby processed.'}
 
@@ -250,8 +275,18 @@ def handler(event, context):
             if apigw_management_client: # Broadcast a generic disconnect
                  broadcast_lobby_state(lobby_id, apigw_management_client, last_action_message, exclude_connection_id=connection_id)
             return {'statusCode': 200, 'body': 'Non-critical player disconnected.'}
-        
+
+        # --- HOLD THE SLOT FOR RESUME INSTEAD OF RESETTING ---
+        # Players who joined with a resume token keep their slot and the draft is paused.
+        # Lobbies created before resume tokens existed fall through to the reset logic below.
+        # Once the hold expires (release_hold) the slot is freed like a legacy disconnect.
+        if lobby_item.get(f"{disconnected_player_slot_prefix}ResumeToken") and not release_hold:
+            return hold_slot_for_resume(lobby_item, lobby_id, connection_id, [disconnected_player_slot_prefix],
+                                        player_name_for_logging, apigw_management_client)
+
         last_action_message = f"{player_name_for_logging} disconnected."
+        if release_hold:
+            player_name_for_logging = f"{player_name_for_logging} (did not reconnect in time)"
 
         # --- ALWAYS CLEAN THE SPECIFIC DISCONNECTED PLAYER'S SLOT ---
         if disconnected_player_slot_prefix:
@@ -260,7 +295,9 @@ def handler(event, context):
                 f"{disconnected_player_slot_prefix}ConnectionId",
                 f"{disconnected_player_slot_prefix}Name",
                 f"{disconnected_player_slot_prefix}Sequences",
-                f"{disconnected_player_slot_prefix}WeightedBoxScore"
+                f"{disconnected_player_slot_prefix}WeightedBoxScore",
+                f"{disconnected_player_slot_prefix}ResumeToken",
+                f"{disconnected_player_slot_prefix}DisconnectedAt"
             ])
             
             # Use ExpressionAttributeNames for all attributes being SET
@@ -275,8 +312,6 @@ def handler(event, context):
             ])
 
         # --- CONDITIONAL DRAFT RESET LOGIC ---
-        EQUILIBRATION_PHASE_NAME = 'EQUILIBRATE_BANS' # Ensure this constant is available
-        PRE_DRAFT_READY_STATE = 'PRE_DRAFT_READY'  # Define the pre-draft ready state constant
         
         if current_lobby_state == 'DRAFTING' or current_lobby_state == EQUILIBRATION_PHASE_NAME:
             logger.info(f"{player_name_for_logging} disconnected during active draft ('{current_lobby_state}') in lobby {lobby_id}. Resetting entire draft.")
@@ -297,7 +332,7 @@ def handler(event, context):
                     notification_payload = {
                         "type": "alert",
                         "message": f"{player_name_for_logging} disconnected during {current_lobby_state.lower()}. The draft has been reset.",
-                        "timestamp": datetime.now(timezone.utc).isoformat()
+                        "timestamp": now_ms()
                     }
                     logger.info(f"Notifying remaining players ({remaining_participant_ids}) about draft disconnect for lobby {lobby_id}.")
                     for pid in remaining_participant_ids:
@@ -331,10 +366,11 @@ def handler(event, context):
             
             # REMOVE operations for full reset
             remove_expressions.extend([ 
-                "currentPhase", "currentTurn", "currentStepIndex", "turnExpiresAt", 
-                "bans", "player1Picks", "player2Picks", "availableResonators",
-                "effectiveDraftOrder", "playerRoles", 
-                "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner"
+                "currentPhase", "currentTurn", "currentStepIndex", "turnExpiresAt", "draftPaused", "pausedTurnRemainingSeconds",
+                "bans", "player1Picks", "player2Picks", "availableResonators", "autoSelectQueues",
+                "effectiveDraftOrder", "playerRoles", "draftFormat",
+                "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner",
+                "seriesGame", "seriesHistory"
             ])
             # Only remove score data if equilibration is disabled - preserve for box score submission
             if not is_equilibration_enabled:
@@ -362,7 +398,7 @@ def handler(event, context):
                     notification_payload = {
                         "type": "alert",
                         "message": f"{player_name_for_logging} disconnected during pre-draft preparation. The lobby has been reset to waiting state.",
-                        "timestamp": datetime.now(timezone.utc).isoformat()
+                        "timestamp": now_ms()
                     }
                     logger.info(f"Notifying remaining players ({remaining_participant_ids}) about pre-draft disconnect for lobby {lobby_id}.")
                     for pid in remaining_participant_ids:
@@ -395,8 +431,9 @@ def handler(event, context):
             
             # Remove pre-draft ready state specific data
             remove_expressions.extend([
-                "effectiveDraftOrder", "playerRoles",
-                "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner"
+                "effectiveDraftOrder", "playerRoles", "draftFormat",
+                "equilibrationBansAllowed", "equilibrationBansMade", "currentEquilibrationBanner",
+                "seriesGame", "seriesHistory"
             ])
             # Only remove score data if equilibration is disabled - preserve for box score submission
             if not is_equilibration_enabled:
@@ -424,7 +461,7 @@ def handler(event, context):
                     notification_payload = {
                         "type": "alert",
                         "message": f"{player_name_for_logging} has left the lobby. Ready status has been reset.",
-                        "timestamp": datetime.now(timezone.utc).isoformat()
+                        "timestamp": now_ms()
                     }
                     logger.info(f"Notifying remaining players ({remaining_participant_ids}) about waiting state disconnect for lobby {lobby_id}.")
                     for pid in remaining_participant_ids:
@@ -492,16 +529,20 @@ def handler(event, context):
                 logger.info(f"DISCONNECT_HANDLER: ExpressionAttributeNames: {expression_attribute_names}")
                 update_kwargs['ExpressionAttributeNames'] = expression_attribute_names
             
-            lobbies_table.update_item(**update_kwargs)
+            updated_lobby_item = update_lobby(lobby_item, ReturnValues='ALL_NEW', **update_kwargs)['Attributes']
             logger.info(f"Lobby {lobby_id} updated after disconnect.")
+            sync_public_listing(lobby_id, updated_lobby_item) # A freed slot re-lists a public lobby
             
             if apigw_management_client:
-                 broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_message, exclude_connection_id=connection_id)
+                 broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_message, exclude_connection_id=connection_id,
+                                       lobby_item=updated_lobby_item)
         else:
             logger.warning(f"DISCONNECT_HANDLER: No DDB update expression generated for disconnect in lobby {lobby_id}.")
             if apigw_management_client: # Still broadcast if no DDB update but lastAction might be relevant
                  broadcast_lobby_state(lobby_id, apigw_management_client, last_action=last_action_message, exclude_connection_id=connection_id)
 
+    except LobbyConflict:
+        raise # Re-run from a fresh read by retry_on_conflict
     except Exception as e_main_try:
         logger.error(f"DISCONNECT_HANDLER_ERROR: Failed to process lobby updates for lobby {lobby_id} after disconnect of {connection_id}: {str(e_main_try)}", exc_info=True)
         if apigw_management_client: # Attempt to notify remaining players about the error
@@ -0,0 +1,130 @@
+# backend/draftStateHandler/app.py
+"""GET /lobbies/{lobbyId}/state: compact, cacheable draft state for stream overlays.
+
+Overlays (e.g. an OBS browser source) poll this instead of holding a WebSocket open. The
+response carries an ETag built from the lobby's `version`, which every lobby write bumps
+(see wuwadraft_core.concurrency), so a poll with a matching If-None-Match gets an empty 304.
+Cache-Control lets API Gateway/CloudFront and the browser serve repeat polls themselves,
+and each container also keeps the last read of a lobby for CONTAINER_CACHE_SECONDS, so a
+burst of polls costs at most one DynamoDB read per lobby per container.
+"""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from wuwadraft_core.encoding import DecimalEncoder
+from wuwadraft_core.tables import get_tables
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# --- DynamoDB Setup ---
+# Split or single-table layout, see wuwadraft_core.tables
+_, lobbies_table = get_tables()
+
+CACHE_MAX_AGE_SECONDS = int(os.environ.get('DRAFT_STATE_MAX_AGE_SECONDS', 2))
+CONTAINER_CACHE_SECONDS = 1
+MAX_CACHED_LOBBIES = 500
+# Only what an overlay renders; availableResonators and the box score data stay out
+STATE_ATTRIBUTES = (
+    'version', 'lobbyState', 'currentPhase', 'currentTurn', 'turnExpiresAt', 'draftPaused',
+    'hostName', 'player1Name', 'player2Name', 'player1Picks', 'player2Picks', 'bans', 'eventSeq'
+)
+
+_state_cache = OrderedDict() # lobbyId -> (time.monotonic() expiry, etag, body or None if not found)
+
+def build_compact_state(lobby_id, lobby_item):
+    return {
+        "lobbyId": lobby_id,
+        "version": lobby_item.get('version', 0),
+        "eventSeq": lobby_item.get('eventSeq', 0),
+        "state": lobby_item.get('lobbyState'),
+        "phase": lobby_item.get('currentPhase'),
+        "turn": lobby_item.get('currentTurn'),
+        "turnExpiresAt": lobby_item.get('turnExpiresAt'),
+        "paused": lobby_item.get('draftPaused', False),
+        "host": lobby_item.get('hostName'),
+        "P1": {"name": lobby_item.get('player1Name'), "picks": lobby_item.get('player1Picks', [])},
+        "P2": {"name": lobby_item.get('player2Name'), "picks": lobby_item.get('player2Picks', [])},
+        "bans": lobby_item.get('bans', [])
+    }
+
+def make_etag(lobby_id, lobby_item):
+    # Lobbies written before versioning have no version yet; their first write adds one
+    return f'"{lobby_id}-{lobby_item.get("version", 0)}"'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check. Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+
+def read_lobby_state(lobby_id):
+    """Returns (etag, body) for lobby_id, or (None, None) if there is no such lobby."""
+    now = time.monotonic()
+    cached = _state_cache.get(lobby_id)
+    if cached and cached[0] > now:
+        return cached[1], cached[2]
+
+    response = lobbies_table.get_item(
+        Key={'lobbyId': lobby_id},
+        ProjectionExpression=', '.join(f"#{attribute}" for attribute in STATE_ATTRIBUTES),
+        ExpressionAttributeNames={f"#{attribute}": attribute for attribute in STATE_ATTRIBUTES}
+    ) # Eventually consistent: a poll that is a moment behind just gets the change on the next one
+    lobby_item = response.get('Item')
+    etag, body = None, None
+    if lobby_item:
+        etag = make_etag(lobby_id, lobby_item)
+        body = json.dumps(build_compact_state(lobby_id, lobby_item), cls=DecimalEncoder, separators=(',', ':'))
+
+    _state_cache[lobby_id] = (now + CONTAINER_CACHE_SECONDS, etag, body)
+    _state_cache.move_to_end(lobby_id)
+    if len(_state_cache) > MAX_CACHED_LOBBIES:
+        _state_cache.popitem(last=False)
+    return etag, body
+
+def http_response(status_code, body='', etag=None, cache_seconds=CACHE_MAX_AGE_SECONDS):
+    headers = {
+        'Content-Type': 'application/json',
+        'Cache-Control': f"public, max-age={cache_seconds}" if cache_seconds else 'no-store',
+        'Access-Control-Allow-Origin': '*', # Overlays are served from other origins
+        'Access-Control-Expose-Headers': 'ETag'
+    }
+    if etag:
+        headers['ETag'] = etag
+    return {'statusCode': status_code, 'headers': headers, 'body': body}
+
+def handler(event, context):
+    # Works with HTTP API (payload 2.0) and REST API proxy events
+    method = event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method', 'GET')
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    lobby_id = (event.get('pathParameters') or {}).get('lobbyId') or (event.get('queryStringParameters') or {}).get('lobbyId')
+
+    if method == 'OPTIONS':
+        return {'statusCode': 204, 'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, OPTIONS',
+            'Access-Control-Allow-Headers': 'If-None-Match',
+            'Access-Control-Max-Age': '86400'
+        }, 'body': ''}
+    if method != 'GET':
+        return http_response(405, json.dumps({"message": "Method not allowed."}), cache_seconds=0)
+    # '#' would reach the lobby table's other items (e.g. spectator shards)
+    if not lobby_id or '#' in lobby_id:
+        return http_response(400, json.dumps({"message": "Lobby ID is required."}), cache_seconds=0)
+
+    try:
+        etag, body = read_lobby_state(lobby_id)
+    except Exception as e:
+        logger.error(f"DRAFT_STATE: Failed to read lobby {lobby_id}: {str(e)}", exc_info=True)
+        return http_response(500, json.dumps({"message": "Failed to read draft state."}), cache_seconds=0)
+
+    if body is None:
+        return http_response(404, json.dumps({"message": f"Lobby {lobby_id} not found."}))
+    if etag_matches(headers.get('if-none-match'), etag):
+        return http_response(304, etag=etag)
+    return http_response(200, body, etag=etag)
@@ -0,0 +1,25 @@
+# deploy_draftStateHandler.ps1
+
+Write-Host "Deploying draftStateHandler function..."
+
+# 1. Define variables (makes it easier to adapt)
+$FunctionDir = ".\draftStateHandler" # Relative path to the function code
+$ZipFileName = "..\draftStateHandler_deployment_package.zip" # Relative path for the zip file
+$FunctionName = "wuwaDraftDraftStateHandler"
+# Optional: Add your AWS Region if needed
+# $AWSRegion = "us-east-1"
+
+
+# boto3 is provided by the Lambda Python runtime and the shared code (wuwadraft_core) by the
+# wuwadraft-core layer (see ..\layers\wuwadraft_core\deploy_wuwadraft_core_layer.ps1), so the
+# package only needs app.py. Nothing is pip-installed into the function directory anymore.
+Write-Host "Creating deployment package: $ZipFileName ..."
+Compress-Archive -Path .\app.py -DestinationPath $ZipFileName -Force
+
+Write-Host "Deploying to AWS Lambda function: $FunctionName ..."
+# Add --region $AWSRegion if needed
+aws lambda update-function-code --function-name $FunctionName --zip-file "fileb://$ZipFileName"
+
+Write-Host "Deployment script finished."
+
+# Remember to deactivate manually after script if needed: deactivate
\ No newline at end of file
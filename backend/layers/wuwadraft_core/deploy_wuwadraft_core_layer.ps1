@@ -0,0 +1,27 @@
+# deploy_wuwadraft_core_layer.ps1
+
+Write-Host "Publishing wuwadraft-core layer..."
+
+# 1. Define variables (makes it easier to adapt)
+$LayerDir = ".\layers\wuwadraft_core" # Relative path to the layer (run from backend/)
+$ZipFileName = "..\wuwadraft_core_layer.zip" # Relative path for the zip file
+$LayerName = "wuwadraft-core"
+$FunctionNames = @("wuwaDraftConnectHandler", "wuwaDraftDefaultHandler", "wuwaDraftDisconnectHandler", "wuwaDraftDraftStateHandler", "wuwaDraftMatchmakingHandler") # Functions that import wuwadraft_core
+# Optional: Add your AWS Region if needed
+# $AWSRegion = "us-east-1"
+
+# Lambda puts the layer's python/ directory on sys.path, so the zip must contain python\wuwadraft_core\...
+# boto3 is not bundled: the runtime already provides it.
+Write-Host "Creating layer package: $ZipFileName ..."
+Compress-Archive -Path "$LayerDir\python" -DestinationPath $ZipFileName -Force
+
+Write-Host "Publishing layer version: $LayerName ..."
+# Add --region $AWSRegion if needed
+$LayerVersionArn = aws lambda publish-layer-version --layer-name $LayerName --zip-file "fileb://$ZipFileName" --compatible-runtimes python3.12 --query LayerVersionArn --output text
+
+foreach ($FunctionName in $FunctionNames) {
+    Write-Host "Attaching $LayerVersionArn to $FunctionName ..."
+    aws lambda update-function-configuration --function-name $FunctionName --layers $LayerVersionArn
+}
+
+Write-Host "Layer publish script finished."
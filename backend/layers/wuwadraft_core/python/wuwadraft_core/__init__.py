@@ -0,0 +1,25 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/__init__.py
+"""Code shared by the WuwaDraft Lambda handlers, shipped as the wuwadraft-core Lambda layer.
+
+Modules:
+    constants  - lobby states/phases and timing settings used by more than one handler
+    encoding   - DecimalEncoder for DynamoDB numbers
+    clients    - lazily created, per-container boto3 clients
+    clock      - server timestamps as integer epoch milliseconds, and the ping time-sync reply
+    serialization - AttributeValue (de)serializer for the low-level DynamoDB client
+    tables     - table layout (split or single table), client-backed tables and key helpers
+    messaging  - post_to_connection helpers and stale connection handling
+    lobby_state - lobbyStateUpdate payload and broadcast
+    teardown   - transactional lobby teardown
+    concurrency - versioned lobby writes and retry-on-conflict
+    rate_limit - per-connection token buckets for client actions
+    spectators - sharded spectator sets and their parallel fan-out
+    lobby_browser - public lobby listings from a sparse GSI
+    resonators - the resonator catalogue (S3, with a built-in fallback)
+    matchmaking - box score matchmaking queue and pairing engine
+    scoring    - server-side weighted box scores from a flat points lookup table
+    equilibration - draft order and equilibration bans from two box scores
+    draft_formats - JSON draft format definitions compiled into per-lobby transition tables
+    series     - best-of-N series and the fearless pool between games
+    auto_select - turn timeout selection strategies and their per-lobby candidate queues
+"""
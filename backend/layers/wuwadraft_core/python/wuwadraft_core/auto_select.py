@@ -0,0 +1,82 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/auto_select.py
+"""What turnTimeout selects for a player who ran out of time.
+
+A lobby's autoSelectStrategy (set on createLobby) ranks the pool for each player's picks:
+
+    uniform          - random order (the original behaviour)
+    ownedOnly        - the player's owned resonators (sequence S0 or higher) in random order,
+                       then the rest, so a timeout never hands them one they marked S-1 if avoidable
+    highestSequence  - owned resonators by sequence, highest first (ties in random order), then the rest
+
+Bans are always in random order. When a draft starts, the ranked lists are stored on the lobby as
+autoSelectQueues ({'ban': [...], 'P1': [...], 'P2': [...]}). Every ban and pick write (a timeout's
+too) removes the selected names from all three queues (queue_removals), so each queue only
+holds names still in the pool and a timeout takes the front of one queue as it is.
+"""
+import random
+from bisect import bisect_left
+
+BAN_QUEUE = 'ban'
+UNIFORM_STRATEGY = 'uniform'
+OWNED_ONLY_STRATEGY = 'ownedOnly'
+HIGHEST_SEQUENCE_STRATEGY = 'highestSequence'
+DEFAULT_AUTO_SELECT_STRATEGY = UNIFORM_STRATEGY
+
+def _shuffled(names, rng):
+    names = list(names)
+    rng.shuffle(names)
+    return names
+
+def rank_uniform(pool, sequences, rng):
+    return _shuffled(pool, rng)
+
+def rank_owned_only(pool, sequences, rng):
+    owned = [name for name in pool if int(sequences.get(name, -1)) >= 0]
+    not_owned = [name for name in pool if int(sequences.get(name, -1)) < 0]
+    return _shuffled(owned, rng) + _shuffled(not_owned, rng)
+
+def rank_highest_sequence(pool, sequences, rng):
+    tie_breaks = {name: rng.random() for name in pool}
+    return sorted(pool, key=lambda name: (-int(sequences.get(name, -1)), tie_breaks[name]))
+
+# Strategy name -> ranker(pool, {name: sequence}, rng) returning the pool in selection order
+AUTO_SELECT_STRATEGIES = {
+    UNIFORM_STRATEGY: rank_uniform,
+    OWNED_ONLY_STRATEGY: rank_owned_only,
+    HIGHEST_SEQUENCE_STRATEGY: rank_highest_sequence
+}
+
+def build_candidate_queues(strategy, available_resonators, player1_sequences, player2_sequences, rng=random):
+    """autoSelectQueues for a draft starting with available_resonators as its pool."""
+    rank = AUTO_SELECT_STRATEGIES.get(strategy, rank_uniform)
+    return {
+        BAN_QUEUE: rank_uniform(available_resonators, {}, rng),
+        'P1': rank(available_resonators, player1_sequences or {}, rng),
+        'P2': rank(available_resonators, player2_sequences or {}, rng)
+    }
+
+def queue_removals(candidate_queues, names):
+    """REMOVE paths dropping names from every queue of autoSelectQueues, highest position first per queue.
+
+    Returns [] for a lobby without queues (see lobby_candidate_queues in defaultHandler).
+    """
+    selected = set(names)
+    paths = []
+    for queue_key, queue in (candidate_queues or {}).items():
+        positions = [position for position, name in enumerate(queue) if name in selected]
+        paths.extend(f"autoSelectQueues.{queue_key}[{position}]" for position in reversed(positions))
+    return paths
+
+def pool_positions(available_resonators, names):
+    """Indexes of names in availableResonators, highest first, for a REMOVE of those list elements.
+
+    Pools are kept sorted, so this is a binary search per name rather than a rebuild of the list.
+    Raises ValueError if a name isn't in the pool.
+    """
+    positions = []
+    for name in names:
+        position = bisect_left(available_resonators, name)
+        if position == len(available_resonators) or available_resonators[position] != name:
+            raise ValueError(f"{name} is not in the pool")
+        positions.append(position)
+    return sorted(positions, reverse=True)
@@ -0,0 +1,45 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/clients.py
+"""Per-container boto3 factory.
+
+Clients are created on first use and reused by later invocations in the same container,
+so an invocation only pays for the clients it actually touches. boto3 itself is imported on
+first use too: it is the most expensive import in a cold start.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_clients_lock = threading.Lock() # Teardown helpers call into the factory from worker threads
+
+def _get_or_create(cache_key, factory):
+    client = _clients.get(cache_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(cache_key)
+            if client is None:
+                client = factory()
+                _clients[cache_key] = client
+    return client
+
+def _boto3():
+    import boto3
+    return boto3
+
+def get_dynamodb_client():
+    """Low-level client; tables.ClientTable does the (de)serialization."""
+    return _get_or_create('dynamodb', lambda: _boto3().client('dynamodb'))
+
+def get_lambda_client():
+    return _get_or_create('lambda', lambda: _boto3().client('lambda'))
+
+def get_s3_client():
+    return _get_or_create('s3', lambda: _boto3().client('s3'))
+
+def get_apigw_management_client(endpoint_url):
+    """API Gateway Management API client for one WebSocket stage endpoint."""
+    def create():
+        logger.info(f"Creating ApiGatewayManagementApi client with endpoint: {endpoint_url}")
+        return _boto3().client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+    return _get_or_create(('apigatewaymanagementapi', endpoint_url), create)
@@ -0,0 +1,36 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/clock.py
+"""Server timestamps as integer epoch milliseconds.
+
+turnExpiresAt, createdAt, playerNDisconnectedAt, connectTime and the serverTime sent with
+every lobby broadcast are all epoch ms, so handlers compare and add integers instead of
+formatting and parsing ISO strings, and browsers use them directly against Date.now().
+
+A ping carrying clientTime is answered with a pong echoing it next to serverTime and
+serverMonotonic. From (sent, serverTime, received) the client estimates its clock offset,
+keeping the sample with the shortest round trip, and runs turn countdowns on server time.
+"""
+import time
+from datetime import datetime
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+def monotonic_ms():
+    """Milliseconds on this container's monotonic clock; only comparable within one container."""
+    return time.monotonic_ns() // 1_000_000
+
+def ms_from_now(seconds):
+    """Epoch ms seconds from now, e.g. a turn's expiry."""
+    return now_ms() + int(seconds * 1000)
+
+def timestamp_ms(value):
+    """Epoch ms of a stored timestamp, or None if unset.
+
+    Accepts the ISO strings written before timestamps were epoch ms, which in-flight lobbies
+    and connections may still carry until their TTL expires.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+    return int(value)
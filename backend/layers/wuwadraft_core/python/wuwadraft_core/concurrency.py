@@ -0,0 +1,109 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/concurrency.py
+"""Optimistic concurrency for lobby writes.
+
+Every lobby mutation sets `version` to the version that was read plus one and is conditioned
+on the item still having the version that was read, so a write based on a stale read fails
+instead of silently overwriting a concurrent change. update_lobby turns that failure into
+LobbyConflict, and retry_on_conflict re-runs the whole read-validate-write after a jittered
+backoff. Handlers re-raise LobbyConflict from their broad except blocks so it reaches the retry. Retried attempts read with ConsistentRead (see consistent_read()); first attempts
+don't need to, because the version condition already rejects a stale read.
+"""
+import contextvars
+import logging
+import random
+import re
+import time
+
+from botocore.exceptions import ClientError
+
+from .serialization import deserialize_item
+from .tables import get_tables
+
+logger = logging.getLogger(__name__)
+
+VERSION_ATTRIBUTE = 'version'
+CONFLICT_MAX_ATTEMPTS = 4
+CONFLICT_BASE_BACKOFF_SECONDS = 0.025
+CONFLICT_MAX_BACKOFF_SECONDS = 0.4
+
+_SET_CLAUSE = re.compile(r'\bSET\s+', re.IGNORECASE)
+_retry_attempt = contextvars.ContextVar('lobby_retry_attempt', default=1)
+
+class LobbyConflict(Exception):
+    """A versioned lobby write failed because the lobby changed since it was read."""
+
+def consistent_read():
+    """ConsistentRead value for lobby reads: only retries need to see the latest write."""
+    return _retry_attempt.get() > 1
+
+def versioned(read_item, **update_kwargs):
+    """Returns update_item (or TransactWriteItems Update) kwargs with the version bump and condition added."""
+    read_version = (read_item or {}).get(VERSION_ATTRIBUTE)
+    names = dict(update_kwargs.get('ExpressionAttributeNames') or {})
+    values = dict(update_kwargs.get('ExpressionAttributeValues') or {})
+    names['#lobbyVersion'] = VERSION_ATTRIBUTE
+    values[':nextLobbyVersion'] = (read_version or 0) + 1
+
+    update_expression = update_kwargs['UpdateExpression']
+    if _SET_CLAUSE.search(update_expression):
+        update_expression = _SET_CLAUSE.sub(lambda m: m.group(0) + "#lobbyVersion = :nextLobbyVersion, ", update_expression, count=1)
+    else:
+        update_expression = f"SET #lobbyVersion = :nextLobbyVersion {update_expression}"
+
+    if read_version is None: # Lobby written before versioning existed
+        version_condition = "attribute_not_exists(#lobbyVersion)"
+    else:
+        version_condition = "#lobbyVersion = :readLobbyVersion"
+        values[':readLobbyVersion'] = read_version
+    condition_expression = update_kwargs.get('ConditionExpression')
+    if condition_expression:
+        condition_expression = f"({condition_expression}) AND {version_condition}"
+    else:
+        condition_expression = version_condition
+
+    return {
+        **update_kwargs,
+        'UpdateExpression': update_expression,
+        'ConditionExpression': condition_expression,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+def update_lobby(read_item, **update_kwargs):
+    """lobbies_table.update_item conditioned on read_item's version. Raises LobbyConflict if it changed.
+
+    If the version still matches, it was the caller's own ConditionExpression that failed
+    against the state it read, and the ConditionalCheckFailedException is raised as is.
+    """
+    _, lobbies_table = get_tables()
+    read_version = (read_item or {}).get(VERSION_ATTRIBUTE)
+    try:
+        return lobbies_table.update_item(ReturnValuesOnConditionCheckFailure='ALL_OLD', **versioned(read_item, **update_kwargs))
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        current_item = e.response.get('Item')
+        current_version = deserialize_item(current_item).get(VERSION_ATTRIBUTE) if current_item else None
+        if current_item is None or current_version != read_version:
+            raise LobbyConflict(f"Lobby {update_kwargs.get('Key')} changed since version {read_version}") from e
+        raise
+
+def retry_on_conflict(operation, description="lobby action"):
+    """Runs operation(), re-running it from a fresh read with jittered backoff on LobbyConflict.
+
+    Raises the last LobbyConflict once CONFLICT_MAX_ATTEMPTS attempts have all conflicted.
+    """
+    for attempt in range(1, CONFLICT_MAX_ATTEMPTS + 1):
+        token = _retry_attempt.set(attempt)
+        try:
+            return operation()
+        except LobbyConflict as conflict:
+            if attempt == CONFLICT_MAX_ATTEMPTS:
+                logger.warning(f"CONFLICT: {description} still conflicting after {attempt} attempts: {conflict}")
+                raise
+            # Full jitter: spreads out competing retries instead of having them collide again
+            delay = random.uniform(0, min(CONFLICT_MAX_BACKOFF_SECONDS, CONFLICT_BASE_BACKOFF_SECONDS * 2 ** attempt))
+            logger.info(f"CONFLICT: {description} attempt {attempt} conflicted ({conflict}). Retrying in {delay:.3f}s with a fresh read.")
+            time.sleep(delay)
+        finally:
+            _retry_attempt.reset(token)
@@ -0,0 +1,20 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/constants.py
+import os
+
+# Lobby states / phases
+EQUILIBRATION_PHASE_NAME = 'EQUILIBRATE_BANS'
+PRE_DRAFT_READY_STATE = 'PRE_DRAFT_READY'
+DRAFT_COMPLETE_PHASE = 'DRAFT_COMPLETE' # Constant for completed state
+DRAFT_ACTIVE_STATES = ('DRAFTING', EQUILIBRATION_PHASE_NAME)
+
+# Timing
+TURN_DURATION_SECONDS = 30  # 30 seconds per turn
+EQUILIBRATION_PHASE_TIMEOUT_SECONDS = 120 # 2 minutes
+RESUME_GRACE_SECONDS = int(os.environ.get('RESUME_GRACE_SECONDS', 120)) # How long a dropped player's slot is held
+MIN_RESUMED_TURN_SECONDS = 5 # Never hand a resumed turn back with less than this on the clock
+TURN_TIMEOUT_GRACE_MS = 500 # How early a turnTimeout may arrive; clients count down on server time (see ping)
+
+# Equilibration: weighted box score differences that call for each adjustment
+SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY = 6
+SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN = 12
+SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS = 24
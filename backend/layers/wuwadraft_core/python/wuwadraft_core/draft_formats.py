@@ -0,0 +1,179 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/draft_formats.py
+"""Draft formats: JSON definitions compiled into per-lobby transition tables.
+
+A format (draft_formats.json, or the file DRAFT_FORMATS_PATH points to) is:
+
+    "standard": {
+      "name": "...",
+      "turnSeconds": 30,                                  # default timer of every step
+      "equilibration": {"beforeStep": 0, "seconds": 120}, # where equilibration bans go, and their timer
+      "orders": {                                         # one step list per equilibration draft order
+        "P1_FAVORED": [{"kind": "ban", "turn": "P1_ROLE"}, ...],  # turns: P1_ROLE / P2_ROLE
+        "NEUTRAL":    [{"kind": "pick", "turn": "ROLE_A", "seconds": 45}, ...]  # turns: ROLE_A / ROLE_B
+      }
+    }
+
+A step may also set "phase" (named BAN1, PICK1, BAN2... by default, a new round each time
+the kind changes) and "count" (resonators selected in the step, 1 by default; the turn's
+player sends them together as makeBan/makePick resonatorNames). Formats are validated and
+normalized once per container. When both players are ready, the lobby stores the chosen
+order's normalized steps (effectiveDraftOrder) and a draftFormat snapshot whose key
+identifies them. get_draft_table then compiles those steps with the lobby's playerRoles
+into a DraftTable of DraftSteps with the phase kind, turn owner and timer resolved, cached
+per container by that key, so a turn action only indexes into a tuple.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import namedtuple
+
+from .constants import EQUILIBRATION_PHASE_TIMEOUT_SECONDS, TURN_DURATION_SECONDS
+from .equilibration import NEUTRAL_ORDER, P1_FAVORED_ORDER
+
+logger = logging.getLogger(__name__)
+
+DRAFT_FORMATS_PATH = os.environ.get('DRAFT_FORMATS_PATH') or os.path.join(os.path.dirname(__file__), 'draft_formats.json')
+DEFAULT_DRAFT_FORMAT_ID = 'standard'
+
+BAN_KIND = 'ban'
+PICK_KIND = 'pick'
+# Template roles each order's steps may use, and the playerRoles key that maps each to 'P1'/'P2'
+ORDER_ROLES = {
+    P1_FAVORED_ORDER: ('P1_ROLE', 'P2_ROLE'),
+    NEUTRAL_ORDER: ('ROLE_A', 'ROLE_B')
+}
+ROLE_ASSIGNMENT_KEYS = {
+    'P1_ROLE': 'P1_ROLE_IN_TEMPLATE',
+    'P2_ROLE': 'P2_ROLE_IN_TEMPLATE',
+    'ROLE_A': 'ROLE_A',
+    'ROLE_B': 'ROLE_B'
+}
+
+# orders: order name -> tuple of normalized step dicts; keys: order name -> snapshot key
+DraftFormat = namedtuple('DraftFormat', ['id', 'name', 'orders', 'equilibration_before', 'equilibration_seconds', 'keys'])
+# turn is the resolved 'P1' or 'P2'
+DraftStep = namedtuple('DraftStep', ['phase', 'kind', 'turn', 'count', 'seconds'])
+DraftTable = namedtuple('DraftTable', ['steps', 'equilibration_before', 'equilibration_seconds'])
+
+_draft_formats = None
+_draft_table_cache = {} # (snapshot key, playerRoles items) -> DraftTable
+
+def _positive_int(value, what):
+    if type(value) is not int or value < 1:
+        raise ValueError(f"{what} must be a positive integer, got {value!r}")
+    return value
+
+def normalize_steps(order_name, raw_steps, turn_seconds):
+    """The step dicts stored as effectiveDraftOrder. Raises ValueError on an invalid definition."""
+    if not raw_steps:
+        raise ValueError(f"order {order_name} has no steps")
+    roles = ORDER_ROLES[order_name]
+    rounds = {BAN_KIND: 0, PICK_KIND: 0}
+    previous_kind = None
+    steps = []
+    for position, raw_step in enumerate(raw_steps):
+        kind = raw_step.get('kind')
+        if kind not in rounds:
+            raise ValueError(f"{order_name} step {position}: kind must be '{BAN_KIND}' or '{PICK_KIND}', got {kind!r}")
+        if raw_step.get('turn') not in roles:
+            raise ValueError(f"{order_name} step {position}: turn must be one of {roles}, got {raw_step.get('turn')!r}")
+        if kind != previous_kind:
+            rounds[kind] += 1
+            previous_kind = kind
+        phase = raw_step.get('phase') or f"{kind.upper()}{rounds[kind]}"
+        if not phase.startswith(kind.upper()): # Clients still tell ban and pick phases apart by name
+            raise ValueError(f"{order_name} step {position}: phase {phase!r} must start with {kind.upper()}")
+        count = _positive_int(raw_step.get('count', 1), f"{order_name} step {position} count")
+        steps.append({
+            'phase': phase,
+            'turnPlayerDesignation': raw_step['turn'],
+            'kind': kind,
+            'count': count,
+            'seconds': _positive_int(raw_step.get('seconds', turn_seconds), f"{order_name} step {position} seconds")
+        })
+    return tuple(steps)
+
+def compile_draft_format(format_id, definition):
+    turn_seconds = _positive_int(definition.get('turnSeconds', TURN_DURATION_SECONDS), 'turnSeconds')
+    equilibration = definition.get('equilibration') or {}
+    equilibration_seconds = _positive_int(equilibration.get('seconds', EQUILIBRATION_PHASE_TIMEOUT_SECONDS), 'equilibration seconds')
+    raw_orders = definition.get('orders') or {}
+    if set(raw_orders) != set(ORDER_ROLES):
+        raise ValueError(f"orders must define exactly {sorted(ORDER_ROLES)}, got {sorted(raw_orders)}")
+    orders = {order_name: normalize_steps(order_name, raw_orders[order_name], turn_seconds) for order_name in ORDER_ROLES}
+
+    equilibration_before = equilibration.get('beforeStep', 0)
+    if type(equilibration_before) is not int or not all(0 <= equilibration_before < len(steps) for steps in orders.values()):
+        raise ValueError(f"equilibration beforeStep must be a step index of every order, got {equilibration_before!r}")
+
+    keys = {}
+    for order_name, steps in orders.items():
+        digest = hashlib.sha1(json.dumps([steps, equilibration_before, equilibration_seconds], sort_keys=True).encode('utf-8')).hexdigest()
+        keys[order_name] = f"{format_id}/{order_name}/{digest[:12]}"
+    return DraftFormat(format_id, definition.get('name', format_id), orders, equilibration_before, equilibration_seconds, keys)
+
+def get_draft_formats():
+    """{format id: DraftFormat}, loaded and compiled once per container. Invalid formats are left out."""
+    global _draft_formats
+    if _draft_formats is None:
+        with open(DRAFT_FORMATS_PATH, encoding='utf-8') as formats_file:
+            definitions = json.load(formats_file)
+        draft_formats = {}
+        for format_id, definition in definitions.items():
+            try:
+                draft_formats[format_id] = compile_draft_format(format_id, definition)
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error(f"DRAFT_FORMATS: Skipping invalid format '{format_id}' in {DRAFT_FORMATS_PATH}: {e}")
+        logger.info(f"DRAFT_FORMATS: Loaded {sorted(draft_formats)} from {DRAFT_FORMATS_PATH}")
+        _draft_formats = draft_formats
+    return _draft_formats
+
+def get_draft_format(format_id):
+    """The DraftFormat for format_id (the default format if None), or None if there is no such valid format."""
+    return get_draft_formats().get(format_id or DEFAULT_DRAFT_FORMAT_ID)
+
+def max_selections(draft_format):
+    """Resonators the format's longest order takes out of the pool, equilibration bans not included."""
+    return max(sum(step['count'] for step in steps) for steps in draft_format.orders.values())
+
+def lobby_draft_format_fields(draft_format, order_name):
+    """effectiveDraftOrder and draftFormat lobby attributes for draft_format's order_name order."""
+    return {
+        'effectiveDraftOrder': [dict(step) for step in draft_format.orders[order_name]],
+        'draftFormat': {
+            'id': draft_format.id,
+            'order': order_name,
+            'key': draft_format.keys[order_name],
+            'equilibrationBefore': draft_format.equilibration_before,
+            'equilibrationSeconds': draft_format.equilibration_seconds
+        }
+    }
+
+def compile_draft_table(steps, player_roles, equilibration_before=0, equilibration_seconds=EQUILIBRATION_PHASE_TIMEOUT_SECONDS):
+    """DraftTable for stored effectiveDraftOrder steps. Raises ValueError if a turn doesn't resolve to a player."""
+    compiled_steps = []
+    for step in steps:
+        designation = step['turnPlayerDesignation']
+        turn = player_roles.get(ROLE_ASSIGNMENT_KEYS.get(designation))
+        if turn not in ('P1', 'P2'):
+            raise ValueError(f"Cannot resolve turn designation {designation!r} with roles {player_roles}")
+        # Lobbies readied before formats were compiled store only phase and turnPlayerDesignation
+        kind = step.get('kind') or (BAN_KIND if step['phase'].startswith('BAN') else PICK_KIND)
+        compiled_steps.append(DraftStep(step['phase'], kind, turn, int(step.get('count', 1)), int(step.get('seconds', TURN_DURATION_SECONDS))))
+    return DraftTable(tuple(compiled_steps), int(equilibration_before), int(equilibration_seconds))
+
+def get_draft_table(lobby_item):
+    """The lobby's DraftTable, compiled once per container for each draftFormat key and role assignment."""
+    snapshot = lobby_item.get('draftFormat') or {}
+    player_roles = lobby_item.get('playerRoles') or {}
+    cache_key = (snapshot.get('key'), tuple(sorted(player_roles.items())))
+    draft_table = _draft_table_cache.get(cache_key)
+    if draft_table is None:
+        draft_table = compile_draft_table(
+            lobby_item.get('effectiveDraftOrder') or [], player_roles,
+            snapshot.get('equilibrationBefore', 0), snapshot.get('equilibrationSeconds', EQUILIBRATION_PHASE_TIMEOUT_SECONDS)
+        )
+        if snapshot.get('key'):
+            _draft_table_cache[cache_key] = draft_table
+    return draft_table
@@ -0,0 +1,14 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/encoding.py
+import decimal
+import json
+
+class DecimalEncoder(json.JSONEncoder):
+    """JSON encoder for DynamoDB numbers: integral Decimals become int, the rest float."""
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            # Check if it's an integer stored as Decimal
+            if obj % 1 == 0:
+                return int(obj)
+            return float(obj)
+        # Let the base class default method raise the TypeError
+        return json.JSONEncoder.default(self, obj)
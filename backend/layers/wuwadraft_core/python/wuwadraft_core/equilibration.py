@@ -0,0 +1,47 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/equilibration.py
+"""The equilibration decision: draft order and equilibration bans from two weighted box scores.
+
+playerReady applies it when both players are ready, and tools/equilibration_simulator.py
+checks its vectorized copy against it, so tuning runs and live lobbies share one rule.
+"""
+from collections import namedtuple
+
+from .constants import (
+    SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY, SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN, SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS
+)
+
+MAX_EQUILIBRATION_BANS = 2 # Past the extreme threshold
+
+NEUTRAL_ORDER = 'NEUTRAL' # NEUTRAL_DRAFT_ORDER_TEMPLATE_V2, roles assigned at random
+P1_FAVORED_ORDER = 'P1_FAVORED' # P1_FAVORED_DRAFT_ORDER, the lower score player takes its P1 role
+
+# lower_score_player_slot and equilibration_banner_slot are 'P1', 'P2' or None
+EquilibrationOutcome = namedtuple('EquilibrationOutcome', [
+    'score_diff', 'draft_order', 'lower_score_player_slot', 'equilibration_bans', 'equilibration_banner_slot'
+])
+
+def decide_equilibration(p1_score, p2_score,
+                         minor_threshold=SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY,
+                         major_threshold=SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN,
+                         extreme_threshold=SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS):
+    """EquilibrationOutcome for two weighted box scores. The thresholds are parameters only for the simulator."""
+    score_diff = abs(p1_score - p2_score)
+    lower_score_player_slot = None
+    if p1_score < p2_score:
+        lower_score_player_slot = 'P1'
+    elif p2_score < p1_score:
+        lower_score_player_slot = 'P2'
+
+    if score_diff < minor_threshold:
+        return EquilibrationOutcome(score_diff, NEUTRAL_ORDER, lower_score_player_slot, 0, None)
+
+    # The lower score player gets draft priority, and equilibration bans on top past the major threshold
+    equilibration_bans = 0
+    equilibration_banner_slot = None
+    if lower_score_player_slot:
+        equilibration_banner_slot = lower_score_player_slot
+        if major_threshold <= score_diff < extreme_threshold:
+            equilibration_bans = 1
+        elif score_diff >= extreme_threshold:
+            equilibration_bans = MAX_EQUILIBRATION_BANS
+    return EquilibrationOutcome(score_diff, P1_FAVORED_ORDER, lower_score_player_slot, equilibration_bans, equilibration_banner_slot)
@@ -0,0 +1,152 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/lobby_browser.py
+"""Public lobby listings, served from a sparse GSI.
+
+A lobby created with isPublic carries `publicListing` (the index's partition key; its sort
+key is the existing `createdAt`) only while it is WAITING with a free player slot. Items
+without the attribute are not in the index at all, so listing lobbies is a Query over
+exactly the open public lobbies and never a Scan of the lobbies table.
+
+sync_public_listing runs after writes that change slots or the lobby state. The listing
+write is conditioned on the lobby's version but doesn't bump it: it is derived data, and
+draft writes shouldn't conflict with it. Query pages are cached per container for
+LISTING_CACHE_SECONDS.
+"""
+import base64
+import binascii
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from .concurrency import VERSION_ATTRIBUTE
+from .tables import get_tables
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_LOBBIES_INDEX = os.environ.get('PUBLIC_LOBBIES_INDEX', 'PublicLobbiesIndex')
+PUBLIC_LISTING_ATTRIBUTE = 'publicListing'
+PUBLIC_LISTING_OPEN = 'OPEN'
+LISTING_PAGE_SIZE = 20
+LISTING_MAX_PAGE_SIZE = 50
+LISTING_CACHE_SECONDS = 3
+LISTING_MAX_CACHED_PAGES = 200
+LISTING_SYNC_MAX_ATTEMPTS = 3
+
+# Attributes a PublicLobbiesIndex LastEvaluatedKey may hold (table keys in either layout, then the
+# index keys) -> the value types allowed. createdAt is epoch ms; an ISO string on an older index.
+CURSOR_KEY_TYPES = {
+    'lobbyId': (str,),
+    'pk': (str,),
+    'sk': (str,),
+    PUBLIC_LISTING_ATTRIBUTE: (str,),
+    'createdAt': (int, str)
+}
+
+_listing_cache = OrderedDict() # (cursor, page size) -> (time.monotonic() expiry, page)
+
+def should_be_listed(lobby_item):
+    """True if lobby_item is public, WAITING and has a free player slot."""
+    return bool(lobby_item.get('isPublic')) \
+        and lobby_item.get('lobbyState', 'WAITING') == 'WAITING' \
+        and not (lobby_item.get('player1ConnectionId') and lobby_item.get('player2ConnectionId'))
+
+def sync_public_listing(lobby_id, lobby_item=None):
+    """Adds or removes publicListing so it matches the lobby. Reads the lobby if lobby_item is None.
+
+    Pass the item as just written (ReturnValues='ALL_NEW'); if the lobby has changed since,
+    the conditional write fails and the listing is re-synced from a fresh read. Never raises.
+    """
+    _, lobbies_table = get_tables()
+    try:
+        for _ in range(LISTING_SYNC_MAX_ATTEMPTS):
+            if lobby_item is None:
+                lobby_item = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True).get('Item')
+            if not lobby_item or not lobby_item.get('isPublic'):
+                return
+            listed = should_be_listed(lobby_item)
+            if listed == (PUBLIC_LISTING_ATTRIBUTE in lobby_item):
+                return
+            expression_attribute_values = {':readLobbyVersion': lobby_item.get(VERSION_ATTRIBUTE)}
+            if listed:
+                expression_attribute_values[':open'] = PUBLIC_LISTING_OPEN
+            try:
+                lobbies_table.update_item(
+                    Key={'lobbyId': lobby_id},
+                    UpdateExpression="SET #listing = :open" if listed else "REMOVE #listing",
+                    ConditionExpression="#lobbyVersion = :readLobbyVersion",
+                    ExpressionAttributeNames={'#listing': PUBLIC_LISTING_ATTRIBUTE, '#lobbyVersion': VERSION_ATTRIBUTE},
+                    ExpressionAttributeValues=expression_attribute_values
+                )
+                logger.info(f"LOBBY_BROWSER: Lobby {lobby_id} {'listed' if listed else 'unlisted'}.")
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                lobby_item = None # Changed since it was read, sync against the latest version
+        logger.warning(f"LOBBY_BROWSER: Gave up syncing the listing of lobby {lobby_id}, it kept changing.")
+    except Exception as e:
+        logger.error(f"LOBBY_BROWSER: Failed to sync the listing of lobby {lobby_id}: {str(e)}", exc_info=True)
+
+def encode_cursor(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """ExclusiveStartKey for a nextCursor from an earlier page. Raises ValueError if it isn't one."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(key, dict) or not key or not all(
+        name in CURSOR_KEY_TYPES and isinstance(value, CURSOR_KEY_TYPES[name]) and not isinstance(value, bool)
+        for name, value in key.items()
+    ):
+        raise ValueError("Invalid cursor.")
+    return key
+
+def build_listing_entry(lobby_item):
+    return {
+        "lobbyId": lobby_item.get('lobbyId'),
+        "hostName": lobby_item.get('hostName'),
+        "player1Name": lobby_item.get('player1Name'),
+        "player2Name": lobby_item.get('player2Name'),
+        "equilibrationEnabled": lobby_item.get('equilibrationEnabled', False),
+        "createdAt": lobby_item.get('createdAt')
+    }
+
+def list_public_lobbies(cursor=None, page_size=LISTING_PAGE_SIZE):
+    """One page of open public lobbies, newest first: {"lobbies": [...], "nextCursor": str or None}."""
+    page_size = max(1, min(int(page_size or LISTING_PAGE_SIZE), LISTING_MAX_PAGE_SIZE))
+    cache_key = (cursor, page_size)
+    now = time.monotonic()
+    cached = _listing_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    _, lobbies_table = get_tables()
+    query_kwargs = {
+        'IndexName': PUBLIC_LOBBIES_INDEX,
+        'KeyConditionExpression': "#listing = :open",
+        'FilterExpression': "#ttl > :now", # TTL deletes can lag expiry
+        'ExpressionAttributeNames': {'#listing': PUBLIC_LISTING_ATTRIBUTE, '#ttl': 'ttl'},
+        'ExpressionAttributeValues': {':open': PUBLIC_LISTING_OPEN, ':now': int(time.time())},
+        'ScanIndexForward': False, # Newest first
+        'Limit': page_size
+    }
+    if cursor:
+        query_kwargs['ExclusiveStartKey'] = decode_cursor(cursor)
+    response = lobbies_table.query(**query_kwargs)
+    page = {
+        "lobbies": [build_listing_entry(item) for item in response.get('Items', [])],
+        "nextCursor": encode_cursor(response.get('LastEvaluatedKey'))
+    }
+
+    _listing_cache[cache_key] = (now + LISTING_CACHE_SECONDS, page)
+    _listing_cache.move_to_end(cache_key)
+    if len(_listing_cache) > LISTING_MAX_CACHED_PAGES:
+        _listing_cache.popitem(last=False)
+    return page
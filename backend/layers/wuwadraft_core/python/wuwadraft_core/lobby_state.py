@@ -0,0 +1,127 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/lobby_state.py
+import json
+import logging
+
+from .clock import now_ms, timestamp_ms
+from .constants import RESUME_GRACE_SECONDS
+from .encoding import DecimalEncoder
+from .messaging import send_message_to_client, is_connection_known_gone, schedule_stale_connection_reconcile
+from .spectators import fan_out_to_spectators
+from .tables import get_tables
+
+logger = logging.getLogger(__name__)
+
+RESUME_HOLD_PREFIXES = ('host', 'player1', 'player2') # Places a dropped connection's resume token holds
+
+def is_slot_disconnect_expired(lobby_item, slot_prefix):
+    """True if the holder of slot_prefix ('host', 'player1', 'player2') disconnected and their resume grace window has passed."""
+    disconnected_at = timestamp_ms(lobby_item.get(f"{slot_prefix}DisconnectedAt"))
+    if disconnected_at is None:
+        return False
+    return now_ms() > disconnected_at + RESUME_GRACE_SECONDS * 1000
+
+def resume_hold_expires_at(lobby_item):
+    """Epoch ms when the first place held for a dropped connection stops being held, or None."""
+    disconnected_at = [timestamp_ms(lobby_item.get(f"{prefix}DisconnectedAt")) for prefix in RESUME_HOLD_PREFIXES]
+    disconnected_at = [t for t in disconnected_at if t is not None]
+    return min(disconnected_at) + RESUME_GRACE_SECONDS * 1000 if disconnected_at else None
+
+def build_lobby_state_payload(lobby_id, lobby_item, last_action=None):
+    """The lobbyStateUpdate message every client renders from."""
+    state_payload = {
+        "type": "lobbyStateUpdate",
+        "lobbyId": lobby_id,
+        "hostName": lobby_item.get('hostName'),
+        "player1Name": lobby_item.get('player1Name'),
+        "player2Name": lobby_item.get('player2Name'),
+        "lobbyState": lobby_item.get('lobbyState'),
+        "player1Ready": lobby_item.get('player1Ready', False),
+        "player2Ready": lobby_item.get('player2Ready', False),
+        "currentPhase": lobby_item.get('currentPhase'),
+        "currentTurn": lobby_item.get('currentTurn'),
+        "bans": lobby_item.get('bans', []),
+        "player1Picks": lobby_item.get('player1Picks', []),
+        "player2Picks": lobby_item.get('player2Picks', []),
+        "availableResonators": lobby_item.get('availableResonators', []),
+        "turnExpiresAt": lobby_item.get('turnExpiresAt'),
+        "serverTime": now_ms(), # Epoch ms, so clients can correct their countdowns for clock skew
+        "equilibrationEnabled": lobby_item.get('equilibrationEnabled', False),
+        "player1ScoreSubmitted": lobby_item.get('player1ScoreSubmitted', False),
+        "player2ScoreSubmitted": lobby_item.get('player2ScoreSubmitted', False),
+        "player1WeightedBoxScore": lobby_item.get('player1WeightedBoxScore'),
+        "player2WeightedBoxScore": lobby_item.get('player2WeightedBoxScore'),
+        "player1Sequences": lobby_item.get('player1Sequences'),
+        "player2Sequences": lobby_item.get('player2Sequences'),
+        "draftFormatId": lobby_item.get('draftFormatId'),
+        "poolFilter": lobby_item.get('poolFilter'),
+        "seriesLength": lobby_item.get('seriesLength', 1),
+        "fearless": lobby_item.get('fearless', False),
+        "seriesGame": lobby_item.get('seriesGame', 1),
+        "seriesHistory": lobby_item.get('seriesHistory', []),
+        "effectiveDraftOrder": lobby_item.get('effectiveDraftOrder'),
+        "playerRoles": lobby_item.get('playerRoles'),
+        "equilibrationBansAllowed": lobby_item.get('equilibrationBansAllowed', 0),
+        "equilibrationBansMade": lobby_item.get('equilibrationBansMade', 0),
+        "currentEquilibrationBanner": lobby_item.get('currentEquilibrationBanner'),
+        "eventSeq": lobby_item.get('eventSeq', 0),
+        "draftPaused": lobby_item.get('draftPaused', False),
+        "pausedTurnRemainingSeconds": lobby_item.get('pausedTurnRemainingSeconds'),
+        "player1Disconnected": bool(lobby_item.get('player1DisconnectedAt')),
+        "player2Disconnected": bool(lobby_item.get('player2DisconnectedAt')),
+        "hostDisconnected": bool(lobby_item.get('hostDisconnectedAt')),
+        "reconnectExpiresAt": resume_hold_expires_at(lobby_item) # Participants send reconnectTimeout once it passes
+    }
+    if last_action:
+        state_payload["lastAction"] = last_action
+    return state_payload
+
+def broadcast_lobby_state(lobby_id, apigw_client, last_action=None, exclude_connection_id=None, lobby_item=None):
+    """Sends lobbyStateUpdate to every participant, then the trimmed state to any spectators.
+
+    Pass lobby_item when the caller already has the item as written (update_item with
+    ReturnValues='ALL_NEW') to skip the ConsistentRead fetch.
+    """
+    try:
+        final_lobby_item_for_broadcast = lobby_item
+        if final_lobby_item_for_broadcast is None:
+            logger.info(f"BROADCAST_LOBBY_STATE: Fetching item for lobby {lobby_id}. Last Action: {last_action}")
+            _, lobbies_table = get_tables()
+            final_response = lobbies_table.get_item(Key={'lobbyId': lobby_id}, ConsistentRead=True)
+            final_lobby_item_for_broadcast = final_response.get('Item')
+
+        if not final_lobby_item_for_broadcast:
+            logger.warning(f"BROADCAST_LOBBY_STATE: Cannot broadcast, lobby {lobby_id} item not found.")
+            return False
+
+        logger.info(f"BROADCAST_LOBBY_STATE_ITEM_DUMP for {lobby_id}: {json.dumps(final_lobby_item_for_broadcast, cls=DecimalEncoder)}")
+
+        state_payload = build_lobby_state_payload(lobby_id, final_lobby_item_for_broadcast, last_action)
+        logger.info(f"BROADCAST_LOBBY_STATE: Constructed state_payload DICT for lobby {lobby_id}: {state_payload}")
+
+        participants = [
+            final_lobby_item_for_broadcast.get('hostConnectionId'),
+            final_lobby_item_for_broadcast.get('player1ConnectionId'),
+            final_lobby_item_for_broadcast.get('player2ConnectionId')
+        ]
+        valid_connection_ids = [pid for pid in participants if pid]
+
+        success_count = 0
+        gone_connection_ids = []
+        for recipient_id in valid_connection_ids:
+            if recipient_id == exclude_connection_id:
+                continue
+            # send_message_to_client handles the serialization with DecimalEncoder.
+            if send_message_to_client(apigw_client, recipient_id, state_payload):
+                 success_count += 1
+            elif is_connection_known_gone(recipient_id):
+                 gone_connection_ids.append(recipient_id)
+
+        logger.info(f"Broadcast complete for lobby {lobby_id}. Sent to {success_count} participant(s).")
+        schedule_stale_connection_reconcile(lobby_id, gone_connection_ids)
+        if final_lobby_item_for_broadcast.get('hasSpectators'):
+            fan_out_to_spectators(apigw_client, lobby_id, state_payload)
+        return True
+
+    except Exception as broadcast_err:
+        logger.error(f"Error during broadcast_lobby_state for {lobby_id}: {str(broadcast_err)}", exc_info=True)
+        return False
@@ -0,0 +1,304 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/matchmaking.py
+"""Box score matchmaking: the queue and the engine that pairs it into lobbies.
+
+A queued connection carries `matchmakingQueue`, the partition key of the sparse
+MatchmakingQueueIndex GSI on the connections table, whose sort key is the weighted box
+score (`matchmakingScore`). A tick Queries the index, which returns the whole queue already
+sorted by score, and pairs it in memory with pair_queue: adjacent players are paired
+closest first while their score difference is under SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY
+(the draft order stays neutral), a limit that widens the longer a player has waited, up to
+SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN. Each pair gets a lobby in one transaction that also
+takes both connections off the queue, so a player who left or was paired by a concurrent
+tick cancels it instead of ending up in two lobbies.
+
+Disconnecting deletes the connection item, which drops it from the index as well.
+"""
+import logging
+import os
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from .clients import get_dynamodb_client
+from .constants import RESUME_GRACE_SECONDS, SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY, SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN
+from .draft_formats import DEFAULT_DRAFT_FORMAT_ID
+from .lobby_state import broadcast_lobby_state
+from .messaging import send_message_to_client
+from .resonators import get_all_resonator_names_from_s3
+from .serialization import serialize_item, deserialize_item
+from .tables import get_tables, lobby_key, connection_key, serialize_request
+
+logger = logging.getLogger(__name__)
+
+MATCHMAKING_QUEUE_INDEX = os.environ.get('MATCHMAKING_QUEUE_INDEX', 'MatchmakingQueueIndex')
+MATCHMAKING_QUEUE_ATTRIBUTE = 'matchmakingQueue'
+MATCHMAKING_QUEUED = 'QUEUED'
+MATCHMAKING_SCORE_ATTRIBUTE = 'matchmakingScore'
+MATCHMAKING_QUEUED_AT_ATTRIBUTE = 'matchmakingQueuedAt' # Epoch seconds
+MATCHMAKING_SEQUENCES_ATTRIBUTE = 'matchmakingSequences'
+# Points of allowed score difference added per second waited
+MATCHMAKING_WIDEN_PER_SECOND = float(os.environ.get('MATCHMAKING_WIDEN_PER_SECOND', 0.2))
+MATCHMAKING_MAX_SCORE_DIFF = SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN # Closer than this needs no equilibration bans
+MATCHMAKING_MAX_PAIRING_ROUNDS = 8 # Anyone still unpaired after these waits for the next tick
+MATCHMAKING_MAX_WORKERS = int(os.environ.get('MATCHMAKING_MAX_WORKERS', 16))
+MATCHED_LOBBY_LIFESPAN_SECONDS = 5 * 60 * 60 # Same 5 hours as createLobby
+BATCH_GET_MAX_KEYS = 100 # DynamoDB BatchGetItem limit
+
+QueuedPlayer = namedtuple('QueuedPlayer', ['score', 'queued_at', 'connection_id', 'player_name'])
+
+def allowed_score_diff(waited_seconds):
+    """Score difference (exclusive) a player who has waited waited_seconds accepts."""
+    return min(SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY + MATCHMAKING_WIDEN_PER_SECOND * max(0, waited_seconds),
+               MATCHMAKING_MAX_SCORE_DIFF)
+
+def pair_queue(queued_players, now):
+    """Greedily pairs QueuedPlayers of similar score. Returns (pairs, unpaired).
+
+    In score order only neighbours can be each other's closest match, so each round takes the
+    neighbouring pairs within the longer waiter's allowed_score_diff, closest (then longest
+    waiting) first, and repeats over whoever is left, whose neighbours have changed. Input
+    already in score order, as the index returns it, sorts in linear time.
+    """
+    queue = sorted(queued_players)
+    pairs = []
+    for _ in range(MATCHMAKING_MAX_PAIRING_ROUNDS):
+        if len(queue) < 2:
+            break
+        allowed = [allowed_score_diff(now - player.queued_at) for player in queue]
+        candidates = sorted(
+            (queue[i + 1].score - queue[i].score, min(queue[i].queued_at, queue[i + 1].queued_at), i)
+            for i in range(len(queue) - 1)
+            if queue[i + 1].score - queue[i].score < max(allowed[i], allowed[i + 1])
+        )
+        if not candidates:
+            break
+        taken = bytearray(len(queue))
+        for _, _, i in candidates:
+            if not taken[i] and not taken[i + 1]:
+                taken[i] = taken[i + 1] = 1
+                pairs.append((queue[i], queue[i + 1]))
+        queue = [player for player, was_taken in zip(queue, taken) if not was_taken]
+    return pairs, queue
+
+def queue_for_matchmaking(connection_id, player_name, score, sequences):
+    """Puts a connection in the queue, or updates its entry. Returns the queuedAt it holds.
+
+    Raises ConditionalCheckFailedException if the connection is already in a lobby. A
+    connection that re-queues keeps its place (and the wait it has built up).
+    """
+    connections_table, _ = get_tables()
+    attributes = connections_table.update_item(
+        Key={'connectionId': connection_id},
+        UpdateExpression="SET #queue = :queued, #score = :score, #sequences = :sequences, playerName = :pn, "
+                         "#queuedAt = if_not_exists(#queuedAt, :now)",
+        ConditionExpression="attribute_exists(connectionId) AND attribute_not_exists(currentLobbyId)",
+        ExpressionAttributeNames={
+            '#queue': MATCHMAKING_QUEUE_ATTRIBUTE, '#score': MATCHMAKING_SCORE_ATTRIBUTE,
+            '#sequences': MATCHMAKING_SEQUENCES_ATTRIBUTE, '#queuedAt': MATCHMAKING_QUEUED_AT_ATTRIBUTE
+        },
+        ExpressionAttributeValues={
+            ':queued': MATCHMAKING_QUEUED, ':score': score, ':sequences': sequences,
+            ':pn': player_name, ':now': int(time.time())
+        },
+        ReturnValues='UPDATED_NEW'
+    )['Attributes']
+    logger.info(f"MATCHMAKING: {connection_id} ({player_name}) queued with score {score}.")
+    return attributes[MATCHMAKING_QUEUED_AT_ATTRIBUTE]
+
+def leave_matchmaking(connection_id):
+    """Takes a connection off the queue. Returns False if it wasn't queued."""
+    connections_table, _ = get_tables()
+    try:
+        connections_table.update_item(
+            Key={'connectionId': connection_id},
+            UpdateExpression="REMOVE #queue, #score, #sequences, #queuedAt",
+            ConditionExpression="attribute_exists(#queue)",
+            ExpressionAttributeNames={
+                '#queue': MATCHMAKING_QUEUE_ATTRIBUTE, '#score': MATCHMAKING_SCORE_ATTRIBUTE,
+                '#sequences': MATCHMAKING_SEQUENCES_ATTRIBUTE, '#queuedAt': MATCHMAKING_QUEUED_AT_ATTRIBUTE
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+    logger.info(f"MATCHMAKING: {connection_id} left the queue.")
+    return True
+
+def read_queue():
+    """Every queued player as a QueuedPlayer, in score order."""
+    connections_table, _ = get_tables()
+    query_kwargs = {
+        'IndexName': MATCHMAKING_QUEUE_INDEX,
+        'KeyConditionExpression': "#queue = :queued",
+        'ExpressionAttributeNames': {'#queue': MATCHMAKING_QUEUE_ATTRIBUTE},
+        'ExpressionAttributeValues': {':queued': MATCHMAKING_QUEUED}
+    }
+    queued_players = []
+    while True:
+        response = connections_table.query(**query_kwargs)
+        queued_players.extend(
+            QueuedPlayer(item[MATCHMAKING_SCORE_ATTRIBUTE], item.get(MATCHMAKING_QUEUED_AT_ATTRIBUTE, 0),
+                         item['connectionId'], item.get('playerName', 'Player'))
+            for item in response['Items']
+        )
+        if 'LastEvaluatedKey' not in response:
+            return queued_players
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def get_queued_sequences(connection_ids):
+    """connectionId -> matchmakingSequences, read with BatchGetItem (the index doesn't project them)."""
+    connections_table, _ = get_tables()
+    dynamodb_client = get_dynamodb_client()
+    sequences_by_id = {}
+    keys = [serialize_item(connection_key(connection_id)) for connection_id in connection_ids]
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request_items = {connections_table.name: {
+            'Keys': keys[start:start + BATCH_GET_MAX_KEYS],
+            'ProjectionExpression': "connectionId, #sequences",
+            'ExpressionAttributeNames': {'#sequences': MATCHMAKING_SEQUENCES_ATTRIBUTE}
+        }}
+        while request_items:
+            response = dynamodb_client.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(connections_table.name, []):
+                item = deserialize_item(item)
+                sequences_by_id[item['connectionId']] = item.get(MATCHMAKING_SEQUENCES_ATTRIBUTE)
+            request_items = response.get('UnprocessedKeys') # Throttled keys come back here
+    return sequences_by_id
+
+def build_matched_lobby_item(lobby_id, player1, player2, sequences_by_id, available_resonators, now):
+    """A WAITING lobby hosted by player1 from its slot, with both box scores already submitted."""
+    lobby_item = {
+        'lobbyId': lobby_id,
+        'hostConnectionId': player1.connection_id,
+        'hostName': player1.player_name,
+        'lobbyState': 'WAITING',
+        'createdAt': int(now * 1000), # Epoch ms
+        'ttl': int(now) + MATCHED_LOBBY_LIFESPAN_SECONDS,
+        'equilibrationEnabled': True,
+        'draftFormatId': DEFAULT_DRAFT_FORMAT_ID,
+        'matchmade': True,
+        'currentPhase': None,
+        'currentTurn': None,
+        'currentStepIndex': None,
+        'turnExpiresAt': None,
+        'bans': [],
+        'player1Picks': [],
+        'player2Picks': [],
+        'availableResonators': available_resonators,
+        'eventSeq': 0,
+        'recentEvents': [],
+        'effectiveDraftOrder': None,
+        'equilibrationBansTarget': 0,
+        'equilibrationBansMade': 0,
+        'version': 1, # Bumped by every lobby write (see concurrency)
+        'isPublic': False,
+        'lastAction': f"Matchmaking paired {player1.player_name} and {player2.player_name}."
+    }
+    for slot_prefix, player in (('player1', player1), ('player2', player2)):
+        lobby_item.update({
+            f"{slot_prefix}ConnectionId": player.connection_id,
+            f"{slot_prefix}Name": player.player_name,
+            f"{slot_prefix}Ready": False,
+            f"{slot_prefix}Sequences": sequences_by_id.get(player.connection_id) or {},
+            f"{slot_prefix}WeightedBoxScore": player.score,
+            f"{slot_prefix}ScoreSubmitted": True,
+            f"{slot_prefix}ResumeToken": uuid.uuid4().hex
+        })
+    lobby_item['hostResumeToken'] = lobby_item['player1ResumeToken'] # One token resumes player1's host role and slot together
+    return lobby_item
+
+def claim_queued_transact_item(connection_id, lobby_id):
+    """TransactWriteItems entry that moves a still-queued connection into lobby_id."""
+    connections_table, _ = get_tables()
+    return {'Update': {
+        'TableName': connections_table.name,
+        'Key': connection_key(connection_id),
+        'UpdateExpression': "SET currentLobbyId = :lid REMOVE #queue, #score, #sequences, #queuedAt",
+        'ConditionExpression': "#queue = :queued AND attribute_not_exists(currentLobbyId)",
+        'ExpressionAttributeNames': {
+            '#queue': MATCHMAKING_QUEUE_ATTRIBUTE, '#score': MATCHMAKING_SCORE_ATTRIBUTE,
+            '#sequences': MATCHMAKING_SEQUENCES_ATTRIBUTE, '#queuedAt': MATCHMAKING_QUEUED_AT_ATTRIBUTE
+        },
+        'ExpressionAttributeValues': {':lid': lobby_id, ':queued': MATCHMAKING_QUEUED}
+    }}
+
+def create_matched_lobby(apigw_client, pair, sequences_by_id, available_resonators, now):
+    """Writes the lobby for one pair and tells both players. Returns the lobbyId, or None if the pair was stale."""
+    # The longer waiter hosts and takes P1; the draft order still comes from the box scores
+    player1, player2 = sorted(pair, key=lambda player: player.queued_at)
+    lobby_id = str(uuid.uuid4())[:8].upper()
+    lobby_item = build_matched_lobby_item(lobby_id, player1, player2, sequences_by_id, available_resonators, now)
+    _, lobbies_table = get_tables()
+    transact_items = [
+        {'Put': {
+            'TableName': lobbies_table.name,
+            'Item': {**lobby_item, **lobby_key(lobby_id)},
+            'ConditionExpression': "attribute_not_exists(lobbyId)"
+        }},
+        claim_queued_transact_item(player1.connection_id, lobby_id),
+        claim_queued_transact_item(player2.connection_id, lobby_id)
+    ]
+    try:
+        get_dynamodb_client().transact_write_items(
+            TransactItems=[{op: serialize_request(dict(request)) for op, request in item.items()} for item in transact_items]
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        # One of them left, disconnected or was already paired; whoever is still queued waits for the next tick
+        logger.info(f"MATCHMAKING: Pair {player1.connection_id}/{player2.connection_id} is no longer queued, skipped.")
+        return None
+
+    logger.info(f"MATCHMAKING: Lobby {lobby_id} created for {player1.player_name} ({player1.score}) and {player2.player_name} ({player2.score}).")
+    for slot, slot_prefix, player in (('P1', 'player1', player1), ('P2', 'player2', player2)):
+        send_message_to_client(apigw_client, player.connection_id, {
+            "type": "lobbyJoined",
+            "lobbyId": lobby_id,
+            "assignedSlot": slot,
+            "isHost": slot == 'P1',
+            "message": f"Matched into lobby {lobby_id} as {slot}.",
+            "equilibrationEnabled": True,
+            "playerScoreSubmitted": True,
+            "matchmade": True,
+            "resumeToken": lobby_item[f"{slot_prefix}ResumeToken"],
+            "resumeGraceSeconds": RESUME_GRACE_SECONDS
+        })
+    broadcast_lobby_state(lobby_id, apigw_client, last_action=lobby_item['lastAction'], lobby_item=lobby_item)
+    return lobby_id
+
+def run_matchmaking_tick(apigw_client, now=None):
+    """Reads the queue, pairs it and creates a lobby per pair. Returns counts for logging."""
+    now = time.time() if now is None else now
+    started = time.perf_counter()
+    queued_players = read_queue()
+    read_done = time.perf_counter()
+    pairs, unpaired = pair_queue(queued_players, now)
+    pair_done = time.perf_counter()
+
+    lobbies_created = 0
+    if pairs:
+        sequences_by_id = get_queued_sequences([player.connection_id for pair in pairs for player in pair])
+        available_resonators = get_all_resonator_names_from_s3()
+        with ThreadPoolExecutor(max_workers=min(MATCHMAKING_MAX_WORKERS, len(pairs))) as pool:
+            futures = [pool.submit(create_matched_lobby, apigw_client, pair, sequences_by_id, available_resonators, now) for pair in pairs]
+            for future in futures:
+                try:
+                    lobbies_created += future.result() is not None
+                except Exception as e:
+                    logger.error(f"MATCHMAKING: Failed to create a matched lobby: {str(e)}", exc_info=True)
+
+    stats = {
+        'queued': len(queued_players),
+        'pairs': len(pairs),
+        'lobbiesCreated': lobbies_created,
+        'unpaired': len(unpaired),
+        'readMs': round((read_done - started) * 1000, 1),
+        'pairMs': round((pair_done - read_done) * 1000, 1),
+        'totalMs': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info(f"MATCHMAKING: Tick {stats}")
+    return stats
@@ -0,0 +1,109 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/messaging.py
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .clients import get_lambda_client
+from .encoding import DecimalEncoder
+
+logger = logging.getLogger(__name__)
+
+TEARDOWN_MAX_WORKERS = 8 # Threads used to fan out redirects alongside the DynamoDB write
+
+# --- Stale Connection Helpers ---
+# ConnectionIds that returned GoneException are remembered for the life of the container so
+# later sends skip them, while the reconciler clears them out of the lobby asynchronously.
+GONE_CONNECTION_CACHE_SECONDS = 600
+STALE_CONNECTION_RECONCILE_SOURCE = 'staleConnectionReconciler'
+RESUME_HOLD_EXPIRY_SOURCE = 'resumeHoldExpiry' # Held places nobody came back for, released like a disconnect
+gone_connection_cache = {} # connectionId -> time.monotonic() expiry
+reconciler_function_name = os.environ.get('STALE_CONNECTION_RECONCILER_FUNCTION') # The disconnect Lambda
+
+def set_default_reconciler_function(function_name):
+    """Used by the disconnect Lambda so it reconciles its own Gone connections unless configured otherwise."""
+    global reconciler_function_name
+    if not reconciler_function_name:
+        reconciler_function_name = function_name
+
+def is_connection_known_gone(connection_id):
+    """True if connection_id returned GoneException recently in this container."""
+    expires_at = gone_connection_cache.get(connection_id)
+    if expires_at is None:
+        return False
+    if expires_at < time.monotonic():
+        gone_connection_cache.pop(connection_id, None)
+        return False
+    return True
+
+def mark_connection_gone(connection_id):
+    gone_connection_cache[connection_id] = time.monotonic() + GONE_CONNECTION_CACHE_SECONDS
+
+def _invoke_reconciler(payload, description):
+    """Fire-and-forget invoke of the reconciler (the disconnect Lambda). Errors are only logged."""
+    if not reconciler_function_name:
+        logger.warning(f"STALE_CONN: STALE_CONNECTION_RECONCILER_FUNCTION not set. Not {description}.")
+        return
+    try:
+        get_lambda_client().invoke(
+            FunctionName=reconciler_function_name,
+            InvocationType='Event', # Fire-and-forget, the caller doesn't wait for the cleanup
+            Payload=json.dumps(payload).encode('utf-8')
+        )
+        logger.info(f"STALE_CONN: Scheduled {description}.")
+    except Exception as e:
+        logger.error(f"STALE_CONN: Failed to schedule {description}: {str(e)}")
+
+def schedule_stale_connection_reconcile(lobby_id, connection_ids):
+    """Hands Gone connectionIds to the reconciler (the disconnect Lambda) with an async invoke."""
+    if not connection_ids:
+        return
+    _invoke_reconciler({
+        'source': STALE_CONNECTION_RECONCILE_SOURCE,
+        'lobbyId': lobby_id,
+        'connectionIds': list(connection_ids)
+    }, f"reconcile of {connection_ids} for lobby {lobby_id}")
+
+def schedule_resume_hold_expiry(lobby_id):
+    """Asks the reconciler to release the lobby's places whose resume grace window has passed."""
+    _invoke_reconciler({
+        'source': RESUME_HOLD_EXPIRY_SOURCE,
+        'lobbyId': lobby_id
+    }, f"expiry of resume holds in lobby {lobby_id}")
+
+# --- Send Message Helpers ---
+def send_message_to_client(apigw_client, connection_id, payload_dict): # Expects a Python dictionary
+    """Sends a JSON payload to a specific connectionId, using DecimalEncoder."""
+    if is_connection_known_gone(connection_id):
+        logger.info(f"Skipping send to {connection_id}: connection is known to be gone.")
+        return False
+    try:
+        # Serialize the dict to JSON string using DecimalEncoder
+        payload_json_string = json.dumps(payload_dict, cls=DecimalEncoder)
+
+        # Log exactly what is being prepared to be sent
+        logger.info(f"SEND_MESSAGE_TO_CLIENT: Connection: {connection_id}, Payload being sent: {payload_json_string}")
+
+        apigw_client.post_to_connection(
+            ConnectionId=connection_id,
+            Data=payload_json_string.encode('utf-8') # Encode the string to bytes
+        )
+        logger.info(f"Message sent successfully to {connection_id}")
+        return True
+    except apigw_client.exceptions.GoneException:
+        logger.warning(f"Client {connection_id} is gone. Cannot send message.")
+        mark_connection_gone(connection_id)
+    except Exception as e:
+        # Log the full exception details
+        logger.error(f"Failed to post message to connectionId {connection_id}: {str(e)}", exc_info=True)
+    return False
+
+def send_message_to_clients(apigw_client, connection_ids, payload_dict):
+    """Sends the same payload to several connectionIds in parallel. Returns {connection_id: sent_ok}."""
+    unique_ids = [cid for cid in dict.fromkeys(connection_ids) if cid]
+    if len(unique_ids) <= 1:
+        return {cid: send_message_to_client(apigw_client, cid, payload_dict) for cid in unique_ids}
+    with ThreadPoolExecutor(max_workers=min(TEARDOWN_MAX_WORKERS, len(unique_ids))) as pool:
+        results = pool.map(lambda cid: send_message_to_client(apigw_client, cid, payload_dict), unique_ids)
+        return dict(zip(unique_ids, results))
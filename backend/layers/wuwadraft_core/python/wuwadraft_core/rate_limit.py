@@ -0,0 +1,125 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/rate_limit.py
+"""Per-connection rate limiting for client actions.
+
+Each connection gets a token bucket per limit (one per listed action, plus one shared by
+every other action, so made-up action names can't each get a fresh bucket). Buckets live
+in the container, so an over-limit request is dropped without touching DynamoDB. A
+connection's messages can land on different containers, so a fixed-window counter item
+(with a TTL) in the connections table also counts its requests (other than pings); once
+that counter reaches the bucket size for the window, every container drops the
+connection's requests until the next window. The counter is only written once a local
+bucket is half drained, adding every request the container allowed in the window since
+its last write, so clients that stay well under their limits never pay for the write.
+
+Limits can be overridden with the RATE_LIMITS environment variable, a JSON object of
+{"action": [burst, refill_per_second]}; use "default" for unlisted actions.
+"""
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from .tables import get_tables
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT_NAME = 'default'
+# action -> (burst, refill_per_second)
+RATE_LIMITS = {
+    'makeBan': (6, 1.0),
+    'makePick': (6, 1.0),
+    'turnTimeout': (4, 0.5),
+    'reconnectTimeout': (4, 0.5),
+    'playerReady': (4, 0.2),
+    'submitBoxScore': (3, 0.1),
+    'joinMatchmaking': (3, 0.1),
+    'ping': (3, 0.05),
+    DEFAULT_LIMIT_NAME: (10, 0.5)
+}
+RATE_LIMITS.update({action: tuple(limit) for action, limit in json.loads(os.environ.get('RATE_LIMITS') or '{}').items()})
+LOCAL_ONLY_LIMITS = ('ping',) # Never touch the tables, so a shared counter write would cost more than it saves
+SHARED_COUNTER_KEY_PREFIX = 'RATE#'
+SHARED_COUNTER_TTL_MARGIN_SECONDS = 60
+SHARED_CHECK_BELOW_FRACTION = 0.5 # Write the shared counter once fewer than this share of a bucket's tokens are left
+MAX_TRACKED_BUCKETS = 5000 # Oldest buckets are dropped first; a dropped bucket just starts full again
+
+# (connectionId, limit name) -> [tokens, time.monotonic() of last refill,
+#                                shared window, requests allowed in it not yet added to the shared counter]
+_buckets = OrderedDict()
+
+def limit_name_for(action):
+    return action if action in RATE_LIMITS else DEFAULT_LIMIT_NAME
+
+def _take_local_token(connection_id, limit_name):
+    """The connection's bucket with a token taken out, or None if it is empty."""
+    burst, refill_per_second = RATE_LIMITS[limit_name]
+    now = time.monotonic()
+    bucket_key = (connection_id, limit_name)
+    bucket = _buckets.get(bucket_key)
+    if bucket is None:
+        bucket = _buckets[bucket_key] = [burst, now, None, 0]
+        if len(_buckets) > MAX_TRACKED_BUCKETS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(bucket_key)
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * refill_per_second)
+        bucket[1] = now
+    if bucket[0] < 1:
+        return None
+    bucket[0] -= 1
+    return bucket
+
+def _shared_window(limit_name):
+    """(window length in seconds, current window number) of limit_name's shared counter."""
+    burst, refill_per_second = RATE_LIMITS[limit_name]
+    window_seconds = max(1, math.ceil(burst / refill_per_second)) # Time to refill a full bucket
+    return window_seconds, int(time.time()) // window_seconds
+
+def _take_shared_tokens(connection_id, limit_name, window_seconds, window, request_count):
+    """Adds request_count requests to the cross-container window. Fails open if the counter can't be updated."""
+    burst = RATE_LIMITS[limit_name][0]
+    connections_table, _ = get_tables()
+    try:
+        connections_table.update_item(
+            Key={'connectionId': f"{SHARED_COUNTER_KEY_PREFIX}{connection_id}#{limit_name}#{window}"},
+            UpdateExpression="ADD requestCount :count SET #ttl = :ttl",
+            ConditionExpression="attribute_not_exists(requestCount) OR requestCount < :burst",
+            ExpressionAttributeNames={'#ttl': 'ttl'},
+            ExpressionAttributeValues={
+                ':count': request_count,
+                ':burst': burst,
+                ':ttl': (window + 1) * window_seconds + SHARED_COUNTER_TTL_MARGIN_SECONDS
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        logger.error(f"RATE_LIMIT: Shared counter update failed for {connection_id} ({limit_name}): {str(e)}")
+        return True
+
+def allow_request(connection_id, action):
+    """True if connection_id may run action now. Call before any other table access."""
+    limit_name = limit_name_for(action)
+    bucket = _take_local_token(connection_id, limit_name)
+    if bucket is None:
+        logger.warning(f"RATE_LIMIT: Dropped '{action}' from {connection_id}, {limit_name} bucket empty in this container.")
+        return False
+    if limit_name in LOCAL_ONLY_LIMITS:
+        return True
+
+    window_seconds, window = _shared_window(limit_name)
+    if bucket[2] != window:
+        bucket[2], bucket[3] = window, 0
+    bucket[3] += 1
+    if bucket[0] >= RATE_LIMITS[limit_name][0] * SHARED_CHECK_BELOW_FRACTION:
+        return True
+    uncounted_requests, bucket[3] = bucket[3], 0
+    if not _take_shared_tokens(connection_id, limit_name, window_seconds, window, uncounted_requests):
+        logger.warning(f"RATE_LIMIT: Dropped '{action}' from {connection_id}, {limit_name} window limit reached.")
+        return False
+    return True
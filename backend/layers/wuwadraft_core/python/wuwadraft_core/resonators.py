@@ -0,0 +1,140 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/resonators.py
+"""The resonator catalogue: every new lobby's availableResonators, and the indexes scoring and pool filters use."""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+
+from .clients import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+# --- S3 Configuration for Resonator Data ---
+S3_BUCKET_NAME = os.environ.get('S3_ASSET_BUCKET_NAME', 'wuwadraft')
+RESONATORS_JSON_KEY = os.environ.get('S3_RESONATORS_KEY', 'data/resonators_master_data.json')
+
+# --- Fallback Resonator List ---
+# Sorted only when the S3 fetch actually fails, not at import time
+FALLBACK_RESONATOR_NAMES = (
+    'Jiyan', 'Yinlin', 'Changli', 'Jinhsi', 'Zhezhi', 'Xiangli Yao', 'The Shorekeeper',
+    'Camellya', 'Carlotta', 'Roccia', 'Brant', 'Cantarella', 'Phoebe', 'Zani',
+    'Ciaconna', 'Lingyang', 'Calcharo', 'Encore', 'Jianxin', 'Verina', 'Rover',
+    'Yangyang', 'Chixia', 'Baizhi', 'Sanhua', 'Yuanwu', 'Aalto', 'Danjin',
+    'Mortefi', 'Taoqi', 'Youhu', 'Lumi'
+)
+# Limited 5-stars, the only resonators whose sequences count towards the weighted box score
+FALLBACK_LIMITED_RESONATOR_NAMES = frozenset((
+    'Jiyan', 'Yinlin', 'Changli', 'Jinhsi', 'Zhezhi', 'Xiangli Yao', 'The Shorekeeper',
+    'Camellya', 'Carlotta', 'Roccia', 'Brant', 'Cantarella', 'Phoebe', 'Zani', 'Ciaconna'
+))
+CATALOGUE_CACHE_SECONDS = 300
+# Record attributes a lobby's pool filter can select on (element is a list: Rover has several)
+POOL_FILTER_ATTRIBUTES = {'rarity': int, 'isLimited': bool, 'element': str, 'weapon': str}
+
+# names: sorted tuple; index_by_name: name -> position in names; limited: tuple of bools by index;
+# version: digest of the records; attribute_index: attribute -> value -> frozenset of names
+ResonatorCatalogue = namedtuple('ResonatorCatalogue', ['names', 'index_by_name', 'limited', 'version', 'attribute_index'])
+_catalogue_cache = None # (time.monotonic() expiry, ResonatorCatalogue)
+
+def fetch_resonator_records():
+    """The resonator master data from S3: a list of dicts (name, rarity, isLimited, ...). Raises on failure."""
+    logger.info(f"S3_FETCH: Attempting to load resonator data from s3://{S3_BUCKET_NAME}/{RESONATORS_JSON_KEY}")
+    s3 = get_s3_client()
+    s3_object = s3.get_object(Bucket=S3_BUCKET_NAME, Key=RESONATORS_JSON_KEY)
+    resonator_data_json = s3_object['Body'].read().decode('utf-8')
+    return json.loads(resonator_data_json)
+
+def get_all_resonator_names_from_s3():
+    """Fetches resonator data from S3 and RETURNS the list of names."""
+    try:
+        resonators_list_of_dicts = fetch_resonator_records()
+        names = [resonator['name'] for resonator in resonators_list_of_dicts if 'name' in resonator]
+        logger.info(f"S3_FETCH: Successfully loaded {len(names)} resonator names from S3.")
+        return sorted(names)
+    except Exception as e:
+        logger.error(f"S3_FETCH_ERROR: Could not load resonator data from S3. Using fallback list. Error: {e}", exc_info=True)
+        return sorted(FALLBACK_RESONATOR_NAMES)
+
+def build_attribute_index(records):
+    """attribute -> value -> frozenset of the names with that value, for POOL_FILTER_ATTRIBUTES."""
+    attribute_index = {attribute: {} for attribute in POOL_FILTER_ATTRIBUTES}
+    for record in records:
+        if 'name' not in record:
+            continue
+        record_values = dict(record, isLimited=bool(record.get('isLimited'))) # Missing/null means standard
+        for attribute, values_by_value in attribute_index.items():
+            values = record_values.get(attribute)
+            for value in (values if isinstance(values, list) else [values]):
+                if value is not None:
+                    values_by_value.setdefault(value, set()).add(record['name'])
+    return {attribute: {value: frozenset(names) for value, names in values_by_value.items()}
+            for attribute, values_by_value in attribute_index.items()}
+
+def build_catalogue(records):
+    limited_by_name = {record['name']: bool(record.get('isLimited')) for record in records if 'name' in record}
+    names = tuple(sorted(limited_by_name))
+    version = hashlib.sha1(json.dumps(records, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return ResonatorCatalogue(names, {name: index for index, name in enumerate(names)},
+                              tuple(limited_by_name[name] for name in names), version, build_attribute_index(records))
+
+def get_resonator_catalogue():
+    """The catalogue, read from S3 at most once per CATALOGUE_CACHE_SECONDS per container.
+
+    An unchanged refresh keeps the cached catalogue, so its indexes (and scoring's points
+    table) are only rebuilt when the catalogue version changes.
+    """
+    global _catalogue_cache
+    now = time.monotonic()
+    if _catalogue_cache and _catalogue_cache[0] > now:
+        return _catalogue_cache[1]
+    try:
+        catalogue = build_catalogue(fetch_resonator_records())
+        logger.info(f"S3_FETCH: Loaded a catalogue of {len(catalogue.names)} resonators.")
+    except Exception as e:
+        logger.error(f"S3_FETCH_ERROR: Could not load the resonator catalogue from S3. Using fallback list. Error: {e}", exc_info=True)
+        catalogue = build_catalogue([{'name': name, 'isLimited': name in FALLBACK_LIMITED_RESONATOR_NAMES}
+                                     for name in FALLBACK_RESONATOR_NAMES])
+    if _catalogue_cache and _catalogue_cache[1].version == catalogue.version:
+        catalogue = _catalogue_cache[1]
+    _catalogue_cache = (now + CATALOGUE_CACHE_SECONDS, catalogue)
+    return catalogue
+
+def _matching_names(catalogue, criteria, what):
+    """Names matching every attribute of criteria ({attribute: value or [values]}); values of one attribute are alternatives."""
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError(f"{what} must be an object of {', '.join(POOL_FILTER_ATTRIBUTES)} values.")
+    matching = frozenset(catalogue.names)
+    for attribute, values in criteria.items():
+        if attribute not in POOL_FILTER_ATTRIBUTES:
+            raise ValueError(f"{what}: unknown attribute '{attribute}' (use {', '.join(POOL_FILTER_ATTRIBUTES)}).")
+        names_by_value = catalogue.attribute_index[attribute]
+        attribute_matches = set()
+        for value in (values if isinstance(values, list) else [values]):
+            if type(value) is not POOL_FILTER_ATTRIBUTES[attribute] or value not in names_by_value:
+                raise ValueError(f"{what}: no resonator has {attribute} {value!r}.")
+            attribute_matches |= names_by_value[value]
+        matching &= attribute_matches
+    return matching
+
+def resolve_pool_filter(catalogue, pool_filter):
+    """The sorted availableResonators a createLobby poolFilter selects. Raises ValueError on an invalid filter.
+
+    poolFilter is {"include": {...}, "exclude": [{...}, ...]}, both optional: include keeps
+    the resonators matching all of its attributes, and each exclude entry removes the
+    resonators matching all of its attributes. For example "no limited 5-stars" is
+    {"exclude": [{"rarity": 5, "isLimited": true}]} and "Spectro and Havoc only" is
+    {"include": {"element": ["Spectro", "Havoc"]}}.
+    """
+    if not isinstance(pool_filter, dict) or not set(pool_filter) <= {'include', 'exclude'}:
+        raise ValueError("poolFilter must be an object with 'include' and/or 'exclude'.")
+    pool = frozenset(catalogue.names)
+    if 'include' in pool_filter:
+        pool = _matching_names(catalogue, pool_filter['include'], "poolFilter include")
+    exclude = pool_filter.get('exclude', [])
+    if not isinstance(exclude, list):
+        raise ValueError("poolFilter exclude must be a list.")
+    for position, criteria in enumerate(exclude):
+        pool = pool - _matching_names(catalogue, criteria, f"poolFilter exclude {position}")
+    return sorted(pool)
@@ -0,0 +1,74 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/scoring.py
+"""Weighted box scores, computed on the server from the submitted sequences.
+
+A box scores SEQUENCE_POINTS for every limited resonator owned; standard resonators and
+"not owned" (-1) score nothing. The catalogue (resonators.get_resonator_catalogue) numbers
+the resonators, and the points table flattens (resonator index, sequence) into one lookup
+array where entry `index * SEQUENCE_SLOTS + sequence + 1` holds that entry's points, so
+nothing about limited or standard is decided per entry. encode_box turns a box into
+positions in that array; scoring is then a gather of those positions and a sum.
+
+NumPy isn't in the Lambda runtime, so the table is an array.array of small ints and the
+gather is map(table.__getitem__, ...), which runs in C. A 33-resonator box scores in a few
+microseconds, so score_boxes simply reuses one table across the whole batch.
+"""
+from array import array
+
+from .resonators import get_resonator_catalogue
+
+# Weighted points for sequences S0-S6
+SEQUENCE_POINTS = {
+    0: 3,  # S0
+    1: 5,  # S1
+    2: 9,  # S2
+    3: 10, # S3
+    4: 11, # S4
+    5: 12, # S5
+    6: 16  # S6
+}
+MIN_SEQUENCE = -1 # Not owned
+MAX_SEQUENCE = 6
+SEQUENCE_SLOTS = MAX_SEQUENCE - MIN_SEQUENCE + 1
+
+_points_table_cache = (None, None, None) # (catalogue, its points table, its base offset by name)
+
+def points_table(catalogue):
+    """(table, offset_by_name) for catalogue, cached for the last catalogue seen.
+
+    table is the flat (resonator index, sequence) -> points array; offset_by_name[name] + sequence
+    is the position of a resonator's entry for that sequence.
+    """
+    global _points_table_cache
+    cached_catalogue, table, offset_by_name = _points_table_cache
+    if cached_catalogue is catalogue:
+        return table, offset_by_name
+    table = array('H', bytes(2 * len(catalogue.names) * SEQUENCE_SLOTS))
+    for index, is_limited in enumerate(catalogue.limited):
+        if is_limited:
+            for sequence, points in SEQUENCE_POINTS.items():
+                table[index * SEQUENCE_SLOTS + sequence - MIN_SEQUENCE] = points
+    offset_by_name = {name: index * SEQUENCE_SLOTS - MIN_SEQUENCE for name, index in catalogue.index_by_name.items()}
+    _points_table_cache = (catalogue, table, offset_by_name)
+    return table, offset_by_name
+
+def is_valid_sequence(s_value):
+    return type(s_value) is int and MIN_SEQUENCE <= s_value <= MAX_SEQUENCE # type() so True/False don't pass as 1/0
+
+def encode_box(sequences, offset_by_name):
+    """Points table positions for a {'CharName': S_val} box. Unknown names and invalid values are skipped."""
+    return [
+        offset_by_name[char_name] + s_value
+        for char_name, s_value in sequences.items()
+        if char_name in offset_by_name and type(s_value) is int and MIN_SEQUENCE <= s_value <= MAX_SEQUENCE
+    ]
+
+def score_box(sequences, catalogue=None):
+    """Weighted box score of one {'CharName': S_val} box."""
+    table, offset_by_name = points_table(catalogue or get_resonator_catalogue())
+    return sum(map(table.__getitem__, encode_box(sequences or {}, offset_by_name)))
+
+def score_boxes(boxes, catalogue=None):
+    """Weighted box scores of many boxes (e.g. for analysis or matchmaking), in order."""
+    table, offset_by_name = points_table(catalogue or get_resonator_catalogue())
+    gather = table.__getitem__
+    return [sum(map(gather, encode_box(sequences or {}, offset_by_name))) for sequences in boxes]
@@ -0,0 +1,80 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/serialization.py
+"""DynamoDB AttributeValue (de)serializer for the low-level client.
+
+Unlike boto3's TypeSerializer/TypeDeserializer, numbers come back as plain int (or float for
+the few fractional values such as weighted box scores) instead of decimal.Decimal, so items
+can be used and JSON-encoded without Decimal round-trips. Writes accept int, float and
+Decimal. Dispatch is a dict lookup on the exact type, which covers every attribute type in
+the lobby/connection schema (strings, numbers, booleans, null, lists and maps).
+"""
+import decimal
+
+def _serialize_number(value):
+    return {'N': str(value)}
+
+def _serialize_list(value):
+    return {'L': [serialize(v) for v in value]}
+
+def _serialize_map(value):
+    return {'M': {k: serialize(v) for k, v in value.items()}}
+
+def _serialize_set(value):
+    if not value:
+        raise TypeError("DynamoDB does not support empty sets")
+    if all(isinstance(v, str) for v in value):
+        return {'SS': list(value)}
+    return {'NS': [str(v) for v in value]}
+
+_SERIALIZERS = {
+    str: lambda value: {'S': value},
+    bool: lambda value: {'BOOL': value},
+    int: _serialize_number,
+    float: _serialize_number,
+    decimal.Decimal: _serialize_number,
+    type(None): lambda value: {'NULL': True},
+    list: _serialize_list,
+    tuple: _serialize_list,
+    dict: _serialize_map,
+    set: _serialize_set,
+    frozenset: _serialize_set,
+    bytes: lambda value: {'B': value},
+}
+
+def serialize(value):
+    """Python value -> AttributeValue."""
+    serializer = _SERIALIZERS.get(type(value))
+    if serializer is None:
+        raise TypeError(f"Unsupported type for DynamoDB: {type(value).__name__}")
+    return serializer(value)
+
+def _deserialize_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+_DESERIALIZERS = {
+    'S': lambda value: value,
+    'N': _deserialize_number,
+    'BOOL': lambda value: value,
+    'NULL': lambda value: None,
+    'L': lambda value: [deserialize(v) for v in value],
+    'M': lambda value: {k: deserialize(v) for k, v in value.items()},
+    'SS': set,
+    'NS': lambda value: {_deserialize_number(v) for v in value},
+    'B': lambda value: value,
+    'BS': set,
+}
+
+def deserialize(attribute_value):
+    """AttributeValue -> Python value."""
+    for type_key, value in attribute_value.items():
+        return _DESERIALIZERS[type_key](value)
+
+def serialize_item(item):
+    return {k: serialize(v) for k, v in item.items()}
+
+def deserialize_item(item):
+    if item is None:
+        return None
+    return {k: deserialize(v) for k, v in item.items()}
@@ -0,0 +1,48 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/series.py
+"""Best-of-N series: one lobby plays several drafts with the same players, box scores and roles.
+
+createLobby sets seriesLength (odd, 1 = a single draft) and fearless. When a game's draft is
+complete the host sends nextGame: the finished game's bans and picks are appended to
+seriesHistory, and the next game's pool is worked out from the finished game's pool in
+memory (no S3 read). With fearless on, it leaves out every resonator picked so far in the series.
+"""
+MAX_SERIES_LENGTH = 7
+
+def parse_series_settings(message_data):
+    """(seriesLength, fearless) from a createLobby message. Raises ValueError on invalid settings."""
+    series_length = message_data.get('seriesLength', 1)
+    if type(series_length) is not int or not 1 <= series_length <= MAX_SERIES_LENGTH or series_length % 2 == 0:
+        raise ValueError(f"seriesLength must be an odd number from 1 to {MAX_SERIES_LENGTH}.")
+    fearless = message_data.get('fearless', False)
+    if type(fearless) is not bool:
+        raise ValueError("fearless must be true or false.")
+    return series_length, fearless and series_length > 1
+
+def get_series_length(lobby_item):
+    return int(lobby_item.get('seriesLength') or 1) # Lobbies created before series mode play one game
+
+def get_series_game(lobby_item):
+    """The 1-based game the lobby is on."""
+    return int(lobby_item.get('seriesGame') or 1)
+
+def game_record(lobby_item):
+    """The seriesHistory entry for the lobby's current game."""
+    return {
+        'game': get_series_game(lobby_item),
+        'bans': list(lobby_item.get('bans') or []),
+        'player1Picks': list(lobby_item.get('player1Picks') or []),
+        'player2Picks': list(lobby_item.get('player2Picks') or []),
+        'playerRoles': lobby_item.get('playerRoles')
+    }
+
+def next_game_pool(lobby_item):
+    """availableResonators for the game after the lobby's current one.
+
+    Everything that was in this game's pool comes back, less this game's picks under the
+    fearless rule; earlier games' picks were already left out of this game's pool.
+    """
+    picks = set(lobby_item.get('player1Picks') or []) | set(lobby_item.get('player2Picks') or [])
+    game_pool = set(lobby_item.get('availableResonators') or []) | set(lobby_item.get('bans') or []) | picks
+    if lobby_item.get('fearless'):
+        game_pool -= picks
+    return sorted(game_pool)
@@ -0,0 +1,171 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/spectators.py
+"""Read-only spectator connections and their fan-out.
+
+Spectators are kept out of the lobby item so that thousands of them don't grow it (or
+contend with draft writes). Each one is added to one of SPECTATOR_SHARDS string-set items
+next to the lobby, `<lobbyId>#SPECTATORS#<shard>`, picked by a hash of the connectionId.
+The lobby item only carries a `hasSpectators` flag, so broadcasts for lobbies nobody
+watches don't read the shards at all.
+
+Spectators get the lobbyStateUpdate without the players' box score sequences. The payload
+is encoded once per broadcast and the spectators are split into one batch per thread of
+a pool, each posting its batch in turn.
+"""
+import json
+import logging
+import math
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from .clients import get_dynamodb_client
+from .encoding import DecimalEncoder
+from .messaging import is_connection_known_gone, mark_connection_gone
+from .serialization import serialize_item, deserialize_item
+from .tables import get_tables, lobby_key
+
+logger = logging.getLogger(__name__)
+
+SPECTATOR_SHARDS = int(os.environ.get('SPECTATOR_SHARDS', 16))
+SPECTATOR_FANOUT_MAX_WORKERS = int(os.environ.get('SPECTATOR_FANOUT_MAX_WORKERS', 32))
+SPECTATOR_SHARD_SEPARATOR = '#SPECTATORS#'
+SPECTATOR_HIDDEN_FIELDS = ('player1Sequences', 'player2Sequences')
+BATCH_GET_MAX_KEYS = 100 # DynamoDB BatchGetItem limit
+BATCH_WRITE_MAX_ITEMS = 25 # DynamoDB BatchWriteItem limit
+
+def spectator_shard_id(lobby_id, shard):
+    return f"{lobby_id}{SPECTATOR_SHARD_SEPARATOR}{shard}"
+
+def shard_for_connection(connection_id):
+    # crc32 rather than hash(): str hashes are randomized per process, so containers would disagree
+    return zlib.crc32(connection_id.encode('utf-8')) % SPECTATOR_SHARDS
+
+def add_spectator(lobby_id, connection_id, ttl=None):
+    """Adds connection_id to its shard. Idempotent, so it is safe to repeat on retries."""
+    _, lobbies_table = get_tables()
+    update_kwargs = {
+        'Key': {'lobbyId': spectator_shard_id(lobby_id, shard_for_connection(connection_id))},
+        'UpdateExpression': "ADD connectionIds :connIds",
+        'ExpressionAttributeValues': {':connIds': {connection_id}}
+    }
+    if ttl: # Shards expire with their lobby
+        update_kwargs['UpdateExpression'] = "SET #ttl = :ttl ADD connectionIds :connIds"
+        update_kwargs['ExpressionAttributeNames'] = {'#ttl': 'ttl'}
+        update_kwargs['ExpressionAttributeValues'][':ttl'] = ttl
+    lobbies_table.update_item(**update_kwargs)
+
+def remove_spectators(lobby_id, connection_ids):
+    """Removes connection_ids from their shards, one write per shard touched."""
+    _, lobbies_table = get_tables()
+    by_shard = {}
+    for connection_id in dict.fromkeys(connection_ids):
+        if connection_id:
+            by_shard.setdefault(shard_for_connection(connection_id), set()).add(connection_id)
+    for shard, shard_connection_ids in by_shard.items():
+        try:
+            lobbies_table.update_item(
+                Key={'lobbyId': spectator_shard_id(lobby_id, shard)},
+                UpdateExpression="DELETE connectionIds :connIds",
+                # Without this, removing from a shard the teardown already deleted would recreate it
+                ConditionExpression="attribute_exists(connectionIds)",
+                ExpressionAttributeValues={':connIds': shard_connection_ids}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                logger.error(f"SPECTATORS: Failed to remove {len(shard_connection_ids)} spectator(s) from shard {shard} of lobby {lobby_id}: {str(e)}")
+
+def spectator_shard_keys(lobby_id):
+    """Primary keys of every spectator shard of a lobby, in the active table layout."""
+    return [lobby_key(spectator_shard_id(lobby_id, shard)) for shard in range(SPECTATOR_SHARDS)]
+
+def get_spectator_ids(lobby_id):
+    """Reads every shard with BatchGetItem and returns the spectators' connectionIds."""
+    _, lobbies_table = get_tables()
+    dynamodb_client = get_dynamodb_client()
+    spectator_ids = []
+    shard_keys = [serialize_item(key) for key in spectator_shard_keys(lobby_id)]
+    for start in range(0, len(shard_keys), BATCH_GET_MAX_KEYS):
+        request_items = {lobbies_table.name: {
+            'Keys': shard_keys[start:start + BATCH_GET_MAX_KEYS],
+            'ProjectionExpression': 'connectionIds'
+        }}
+        while request_items:
+            response = dynamodb_client.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(lobbies_table.name, []):
+                spectator_ids.extend(deserialize_item(item).get('connectionIds') or ())
+            request_items = response.get('UnprocessedKeys') # Throttled keys come back here
+    return spectator_ids
+
+def build_spectator_payload(state_payload):
+    """The lobbyStateUpdate spectators get: the full state minus the players' private fields."""
+    return {key: value for key, value in state_payload.items() if key not in SPECTATOR_HIDDEN_FIELDS}
+
+def _post_batch(apigw_client, connection_ids, data):
+    """Posts data to each connection in order. Returns (sent_count, gone_connection_ids)."""
+    sent_count = 0
+    gone_connection_ids = []
+    for connection_id in connection_ids:
+        try:
+            apigw_client.post_to_connection(ConnectionId=connection_id, Data=data)
+            sent_count += 1
+        except apigw_client.exceptions.GoneException:
+            mark_connection_gone(connection_id)
+            gone_connection_ids.append(connection_id)
+        except Exception as e:
+            logger.error(f"SPECTATORS: Failed to post to {connection_id}: {str(e)}")
+    return sent_count, gone_connection_ids
+
+def post_to_spectators(apigw_client, connection_ids, payload_dict, max_workers=SPECTATOR_FANOUT_MAX_WORKERS):
+    """Sends one payload to many connections in parallel batches. Returns (sent_count, gone_connection_ids).
+
+    Unlike send_message_to_client this encodes the payload once and doesn't log per send.
+    """
+    data = json.dumps(payload_dict, cls=DecimalEncoder).encode('utf-8')
+    live_ids = [cid for cid in dict.fromkeys(connection_ids) if cid and not is_connection_known_gone(cid)]
+    if not live_ids:
+        return 0, []
+    # One batch per worker, so every thread stays busy until the whole fan-out is done
+    batch_size = math.ceil(len(live_ids) / max(1, max_workers))
+    batches = [live_ids[i:i + batch_size] for i in range(0, len(live_ids), batch_size)]
+    sent_count = 0
+    gone_connection_ids = []
+    with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        for batch_sent, batch_gone in pool.map(lambda batch: _post_batch(apigw_client, batch, data), batches):
+            sent_count += batch_sent
+            gone_connection_ids.extend(batch_gone)
+    return sent_count, gone_connection_ids
+
+def fan_out_to_spectators(apigw_client, lobby_id, state_payload):
+    """Sends the trimmed state to every spectator of lobby_id and drops the ones that are gone."""
+    try:
+        spectator_ids = get_spectator_ids(lobby_id)
+        sent_count, gone_connection_ids = post_to_spectators(apigw_client, spectator_ids, build_spectator_payload(state_payload))
+        logger.info(f"SPECTATORS: Sent lobby {lobby_id} state to {sent_count}/{len(spectator_ids)} spectator(s).")
+        if gone_connection_ids:
+            remove_spectators(lobby_id, gone_connection_ids)
+    except Exception as e:
+        logger.error(f"SPECTATORS: Fan-out failed for lobby {lobby_id}: {str(e)}", exc_info=True)
+
+def delete_spectator_shards(lobby_id):
+    """Deletes every spectator shard of a lobby with BatchWriteItem."""
+    _, lobbies_table = get_tables()
+    dynamodb_client = get_dynamodb_client()
+    delete_requests = [{'DeleteRequest': {'Key': serialize_item(key)}} for key in spectator_shard_keys(lobby_id)]
+    for start in range(0, len(delete_requests), BATCH_WRITE_MAX_ITEMS):
+        request_items = {lobbies_table.name: delete_requests[start:start + BATCH_WRITE_MAX_ITEMS]}
+        while request_items:
+            request_items = dynamodb_client.batch_write_item(RequestItems=request_items).get('UnprocessedItems')
+
+def close_spectators(apigw_client, lobby_id, redirect_payload):
+    """Sends redirect_payload to every spectator of a lobby being torn down, then deletes the shards."""
+    try:
+        spectator_ids = get_spectator_ids(lobby_id)
+        if apigw_client and spectator_ids:
+            sent_count, _ = post_to_spectators(apigw_client, spectator_ids, redirect_payload)
+            logger.info(f"SPECTATORS: Redirected {sent_count}/{len(spectator_ids)} spectator(s) of lobby {lobby_id}.")
+        delete_spectator_shards(lobby_id)
+    except Exception as e:
+        # Shards carry the lobby's TTL, so anything left behind still expires
+        logger.error(f"SPECTATORS: Failed to close spectators of lobby {lobby_id}: {str(e)}", exc_info=True)
@@ -0,0 +1,154 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/tables.py
+"""DynamoDB table layout.
+
+'split' (default): separate WuwaDraftLobbies / WuwaDraftConnections tables.
+'single': one table with string keys pk/sk. A lobby lives at LOBBY#<lobbyId>/META and a
+connection's reverse lookup (currentLobbyId, playerName, ttl) at CONN#<connectionId>/META.
+This is a key remap onto one table to provision, not a different access pattern: each
+connection keeps its own partition, the draft event log stays on the lobby item
+(recentEvents), and reads are the same GetItems as in the split layout.
+In both layouts a lobby's spectator shards are lobby-table items of their own, keyed
+<lobbyId>#SPECTATORS#<shard> (see spectators).
+"""
+import os
+
+from .clients import get_dynamodb_client
+from .serialization import serialize, serialize_item, deserialize_item
+
+CONNECTIONS_TABLE_NAME = os.environ.get('CONNECTIONS_TABLE_NAME', 'WuwaDraftConnections')
+LOBBIES_TABLE_NAME = os.environ.get('LOBBIES_TABLE_NAME', 'WuwaDraftLobbies')
+TABLE_LAYOUT = os.environ.get('TABLE_LAYOUT', 'split')
+SINGLE_TABLE_NAME = os.environ.get('SINGLE_TABLE_NAME', 'WuwaDraft')
+LOBBY_PK_PREFIX = 'LOBBY#'
+CONNECTION_PK_PREFIX = 'CONN#'
+META_SK = 'META'
+
+def serialize_request(request):
+    """Serializes the Key/Item/ExpressionAttributeValues of a get/put/update/delete request in place."""
+    for field in ('Key', 'Item'):
+        if field in request:
+            request[field] = serialize_item(request[field])
+    if 'ExpressionAttributeValues' in request:
+        request['ExpressionAttributeValues'] = {k: serialize(v) for k, v in request['ExpressionAttributeValues'].items()}
+    return request
+
+class ClientTable:
+    """Table-like wrapper over the low-level client: plain Python values in and out, ints as ints.
+
+    Mirrors the subset of the boto3 Table API the handlers use (string condition/update/key
+    expressions only), so it can replace boto3.resource Tables without touching call sites.
+    """
+    def __init__(self, client, table_name):
+        self.client = client
+        self.name = table_name
+
+    def _call(self, operation, kwargs):
+        response = operation(**serialize_request({'TableName': self.name, **kwargs}))
+        for field in ('Item', 'Attributes'):
+            if field in response:
+                response[field] = deserialize_item(response[field])
+        return response
+
+    def get_item(self, **kwargs):
+        return self._call(self.client.get_item, kwargs)
+
+    def put_item(self, **kwargs):
+        return self._call(self.client.put_item, kwargs)
+
+    def update_item(self, **kwargs):
+        return self._call(self.client.update_item, kwargs)
+
+    def delete_item(self, **kwargs):
+        return self._call(self.client.delete_item, kwargs)
+
+    def query(self, **kwargs):
+        request = serialize_request({'TableName': self.name, **kwargs})
+        if 'ExclusiveStartKey' in request:
+            request['ExclusiveStartKey'] = serialize_item(request['ExclusiveStartKey'])
+        response = self.client.query(**request)
+        response['Items'] = [deserialize_item(item) for item in response.get('Items', [])]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = deserialize_item(response['LastEvaluatedKey'])
+        return response
+
+class KeyMappedTable:
+    """Lets handler code keep using {'lobbyId': ...} / {'connectionId': ...} keys on the single table."""
+    def __init__(self, table, key_attribute, pk_prefix):
+        self.table = table
+        self.name = table.name
+        self.key_attribute = key_attribute
+        self.pk_prefix = pk_prefix
+
+    def map_key(self, key):
+        return {'pk': f"{self.pk_prefix}{key[self.key_attribute]}", 'sk': META_SK}
+
+    def strip_keys(self, item):
+        if item:
+            item.pop('pk', None)
+            item.pop('sk', None)
+        return item
+
+    def get_item(self, Key, **kwargs):
+        response = self.table.get_item(Key=self.map_key(Key), **kwargs)
+        self.strip_keys(response.get('Item'))
+        return response
+
+    def put_item(self, Item, **kwargs):
+        return self.table.put_item(Item={**Item, **self.map_key(Item)}, **kwargs)
+
+    def update_item(self, Key, **kwargs):
+        response = self.table.update_item(Key=self.map_key(Key), **kwargs)
+        self.strip_keys(response.get('Attributes'))
+        return response
+
+    def delete_item(self, Key, **kwargs):
+        response = self.table.delete_item(Key=self.map_key(Key), **kwargs)
+        self.strip_keys(response.get('Attributes'))
+        return response
+
+    def query(self, **kwargs):
+        """Index queries only; LastEvaluatedKey keeps pk/sk so it can be passed back as ExclusiveStartKey."""
+        response = self.table.query(**kwargs)
+        for item in response['Items']:
+            self.strip_keys(item)
+        return response
+
+class LazyTable:
+    """Stands in for a table until its first use, so importing a handler doesn't build the DynamoDB client."""
+    def __init__(self, index):
+        self._index = index
+        self._table = None
+
+    def __getattr__(self, name):
+        if self._table is None:
+            self._table = _build_tables()[self._index]
+        return getattr(self._table, name)
+
+_tables = None
+_lazy_tables = (LazyTable(0), LazyTable(1))
+
+def get_tables():
+    """Returns (connections_table, lobbies_table) for TABLE_LAYOUT. Both are created on first use."""
+    return _lazy_tables
+
+def _build_tables():
+    global _tables
+    if _tables is None:
+        client = get_dynamodb_client()
+        if TABLE_LAYOUT == 'single':
+            single_table = ClientTable(client, SINGLE_TABLE_NAME)
+            _tables = (KeyMappedTable(single_table, 'connectionId', CONNECTION_PK_PREFIX),
+                       KeyMappedTable(single_table, 'lobbyId', LOBBY_PK_PREFIX))
+        else:
+            _tables = (ClientTable(client, CONNECTIONS_TABLE_NAME), ClientTable(client, LOBBIES_TABLE_NAME))
+    return _tables
+
+def lobby_key(lobby_id):
+    """Primary key of a lobby item in the active table layout."""
+    key = {'lobbyId': lobby_id}
+    return get_tables()[1].map_key(key) if TABLE_LAYOUT == 'single' else key
+
+def connection_key(connection_id):
+    """Primary key of a connection item in the active table layout."""
+    key = {'connectionId': connection_id}
+    return get_tables()[0].map_key(key) if TABLE_LAYOUT == 'single' else key
@@ -0,0 +1,109 @@
+# backend/layers/wuwadraft_core/python/wuwadraft_core/teardown.py
+"""Concurrent lobby teardown: one DynamoDB transaction plus parallel forceRedirect posts."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from .clients import get_dynamodb_client
+from .messaging import send_message_to_clients
+from .spectators import close_spectators
+from .tables import get_tables, lobby_key, connection_key, serialize_request
+
+logger = logging.getLogger(__name__)
+
+def detach_connection_transact_item(connection_id):
+    """TransactWriteItems entry that clears currentLobbyId on a connection that still exists."""
+    connections_table, _ = get_tables()
+    return {'Update': {
+        'TableName': connections_table.name,
+        'Key': connection_key(connection_id),
+        'UpdateExpression': "REMOVE currentLobbyId",
+        # Without this, updating a connection that already disconnected would recreate it (with no TTL)
+        'ConditionExpression': "attribute_exists(connectionId)"
+    }}
+
+def lobby_update_transact_item(lobby_id, update_expression, condition_expression=None,
+                               expression_attribute_names=None, expression_attribute_values=None):
+    """TransactWriteItems entry equivalent to a lobbies_table.update_item call."""
+    _, lobbies_table = get_tables()
+    update = {
+        'TableName': lobbies_table.name,
+        'Key': lobby_key(lobby_id),
+        'UpdateExpression': update_expression
+    }
+    if condition_expression:
+        update['ConditionExpression'] = condition_expression
+    if expression_attribute_names:
+        update['ExpressionAttributeNames'] = expression_attribute_names
+    if expression_attribute_values:
+        update['ExpressionAttributeValues'] = expression_attribute_values
+    return {'Update': update}
+
+def run_teardown_writes(transact_items, fallback_writes):
+    """Applies the lobby/connection writes as one transaction, falling back to single writes.
+
+    A transaction is all-or-nothing, so one connection that vanished mid-teardown cancels it.
+    In that case each (description, write, required) entry in fallback_writes is run on its
+    own: errors from required writes are raised, the rest are only logged. Returns the
+    TransactionCanceledException cancellation reasons, or None if the transaction committed.
+    """
+    # Items are built with plain Python values and serialized here for the low-level client
+    serialized_items = [{op: serialize_request(dict(request)) for op, request in item.items()} for item in transact_items]
+    try:
+        get_dynamodb_client().transact_write_items(TransactItems=serialized_items)
+        logger.info(f"TEARDOWN: Committed {len(transact_items)} write(s) in one transaction.")
+        return None
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        cancellation_reasons = [r.get('Code', 'None') for r in e.response.get('CancellationReasons', [])]
+        logger.warning(f"TEARDOWN: Transaction cancelled ({cancellation_reasons}). Falling back to individual writes.")
+        for description, write, required in fallback_writes:
+            try:
+                write()
+            except ClientError as write_err:
+                if required:
+                    raise
+                if write_err.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    logger.info(f"TEARDOWN: Skipped {description}, condition no longer holds.")
+                else:
+                    logger.error(f"TEARDOWN: Failed {description}: {str(write_err)}")
+            except Exception as write_err:
+                if required:
+                    raise
+                logger.error(f"TEARDOWN: Failed {description}: {str(write_err)}")
+        return cancellation_reasons
+
+def detach_connection_fallback(connection_id):
+    """Best-effort fallback write matching detach_connection_transact_item."""
+    return (f"clearing currentLobbyId on {connection_id}",
+            lambda: get_dynamodb_client().update_item(**serialize_request(detach_connection_transact_item(connection_id)['Update'])),
+            False)
+
+def teardown_lobby(apigw_client, lobby_id, notify_connection_ids, redirect_payload, detach_connection_ids,
+                   has_spectators=False):
+    """Deletes a lobby, detaches its connections and sends forceRedirect, all concurrently.
+
+    The lobby delete and every connection's REMOVE currentLobbyId go out as a single
+    transaction while the redirects are posted in parallel, so tear-down takes about one
+    round trip however many participants the lobby has. With has_spectators (the lobby
+    item's hasSpectators flag) the spectators are redirected and their shards deleted too.
+    """
+    _, lobbies_table = get_tables()
+    detach_ids = [cid for cid in dict.fromkeys(detach_connection_ids) if cid]
+    transact_items = [{'Delete': {'TableName': lobbies_table.name, 'Key': lobby_key(lobby_id)}}]
+    transact_items.extend(detach_connection_transact_item(cid) for cid in detach_ids)
+    fallback_writes = [(f"deleting lobby {lobby_id}", lambda: lobbies_table.delete_item(Key={'lobbyId': lobby_id}), True)]
+    fallback_writes.extend(detach_connection_fallback(cid) for cid in detach_ids)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        redirects = pool.submit(send_message_to_clients, apigw_client, notify_connection_ids, redirect_payload) if apigw_client else None
+        spectators = pool.submit(close_spectators, apigw_client, lobby_id, redirect_payload) if has_spectators else None
+        writes = pool.submit(run_teardown_writes, transact_items, fallback_writes)
+        writes.result() # Re-raises unexpected write errors
+        if redirects:
+            redirects.result()
+        if spectators:
+            spectators.result()
+    logger.info(f"TEARDOWN: Lobby {lobby_id} deleted, {len(detach_ids)} connection(s) detached.")
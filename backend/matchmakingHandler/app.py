@@ -0,0 +1,54 @@
+# backend/matchmakingHandler/app.py
+"""Runs the matchmaking engine (wuwadraft_core.matchmaking) on an EventBridge schedule.
+
+EventBridge schedules fire at most once a minute, so one invocation keeps ticking every
+MATCHMAKING_TICK_SECONDS until MATCHMAKING_RUN_SECONDS (or the Lambda timeout) is close.
+Give the function a reserved concurrency of 1: overlapping runs would be safe, since a pair
+is only claimed while both players are still queued, but they would just compete.
+"""
+import json
+import logging
+import os
+import time
+
+from wuwadraft_core import clients as core_clients
+from wuwadraft_core.matchmaking import run_matchmaking_tick
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# The WebSocket stage the matched players are connected to, e.g. https://abc123.execute-api.us-east-1.amazonaws.com/production
+WEBSOCKET_API_ENDPOINT = os.environ.get('WEBSOCKET_API_ENDPOINT')
+MATCHMAKING_TICK_SECONDS = float(os.environ.get('MATCHMAKING_TICK_SECONDS', 5))
+MATCHMAKING_RUN_SECONDS = float(os.environ.get('MATCHMAKING_RUN_SECONDS', 55)) # Just under the 1 minute schedule
+TICK_TIME_RESERVE_MS = 10000 # Don't start a tick with less than this left before the Lambda timeout
+
+def handler(event, context):
+    logger.info(f"Matchmaking run started: {json.dumps(event)}")
+    if not WEBSOCKET_API_ENDPOINT:
+        logger.error("WEBSOCKET_API_ENDPOINT is not set, matched players couldn't be notified.")
+        return {'statusCode': 500, 'body': 'WEBSOCKET_API_ENDPOINT not configured.'}
+    apigw_management_client = core_clients.get_apigw_management_client(WEBSOCKET_API_ENDPOINT)
+
+    run_started = time.monotonic()
+    ticks = 0
+    lobbies_created = 0
+    while True:
+        tick_started = time.monotonic()
+        try:
+            stats = run_matchmaking_tick(apigw_management_client)
+            lobbies_created += stats['lobbiesCreated']
+        except Exception as e:
+            logger.error(f"Matchmaking tick failed: {str(e)}", exc_info=True)
+        ticks += 1
+
+        next_tick = tick_started + MATCHMAKING_TICK_SECONDS
+        if next_tick - run_started >= MATCHMAKING_RUN_SECONDS:
+            break
+        if context and context.get_remaining_time_in_millis() - (next_tick - time.monotonic()) * 1000 < TICK_TIME_RESERVE_MS:
+            break
+        time.sleep(max(0, next_tick - time.monotonic()))
+
+    logger.info(f"Matchmaking run finished: {ticks} tick(s), {lobbies_created} lobby(ies) created.")
+    return {'statusCode': 200, 'body': json.dumps({'ticks': ticks, 'lobbiesCreated': lobbies_created})}
@@ -0,0 +1,12 @@
+# backend/tests/conftest.py
+"""Puts the wuwadraft_core layer on sys.path, as Lambda does, for every test module."""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PYTHON_DIR = os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python')
+
+if LAYER_PYTHON_DIR not in sys.path:
+    sys.path.insert(0, LAYER_PYTHON_DIR)
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
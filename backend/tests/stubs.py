@@ -0,0 +1,124 @@
+# backend/tests/stubs.py
+"""Stand-ins for the DynamoDB and API Gateway Management API clients.
+
+install_dynamodb() puts a StubDynamoDB into wuwadraft_core's client cache and drops any
+tables built on an earlier client, so the layer's tables talk to the stub. Items go in and
+come out in the low-level (typed) format, exactly as the real client would see them.
+"""
+import importlib.util
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+from wuwadraft_core import clients as core_clients
+from wuwadraft_core import messaging, tables
+from wuwadraft_core.serialization import deserialize_item, serialize_item
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_handler(handler_name):
+    """Imports backend/<handler_name>/app.py as a module."""
+    spec = importlib.util.spec_from_file_location(f"{handler_name}_app", os.path.join(BACKEND_DIR, handler_name, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def client_error(code, operation_name='UpdateItem', item=None):
+    """A ClientError as botocore raises it; item is returned as the ALL_OLD image of a failed condition."""
+    error_response = {'Error': {'Code': code, 'Message': code}}
+    if item is not None:
+        error_response['Item'] = serialize_item(item)
+    return ClientError(error_response, operation_name)
+
+
+class StubDynamoDB:
+    """Records every call. Each operation answers with responses[operation](**kwargs), or {} if unset."""
+    def __init__(self, **responses):
+        self.responses = responses
+        self.calls = []
+
+    def _call(self, operation, kwargs):
+        self.calls.append((operation, kwargs))
+        response = self.responses.get(operation)
+        return response(**kwargs) if response else {}
+
+    def get_item(self, **kwargs):
+        return self._call('get_item', kwargs)
+
+    def put_item(self, **kwargs):
+        return self._call('put_item', kwargs)
+
+    def update_item(self, **kwargs):
+        return self._call('update_item', kwargs)
+
+    def delete_item(self, **kwargs):
+        return self._call('delete_item', kwargs)
+
+    def query(self, **kwargs):
+        return self._call('query', kwargs)
+
+    def batch_get_item(self, **kwargs):
+        return self._call('batch_get_item', kwargs)
+
+    def batch_write_item(self, **kwargs):
+        return self._call('batch_write_item', kwargs)
+
+    def operations(self):
+        return [operation for operation, _ in self.calls]
+
+
+def item_response(item):
+    """A get_item answer holding item."""
+    return lambda **kwargs: {'Item': serialize_item(item)}
+
+
+def install_dynamodb(stub):
+    core_clients._clients['dynamodb'] = stub
+    tables._tables = None
+    for lazy_table in tables.get_tables():
+        lazy_table._table = None
+
+
+class GoneException(Exception):
+    pass
+
+
+class StubApiGateway:
+    """post_to_connection records the decoded payloads; connections in gone raise GoneException."""
+    class exceptions:
+        GoneException = GoneException
+
+    def __init__(self, gone=()):
+        self.gone = set(gone)
+        self.sent = []
+
+    def post_to_connection(self, ConnectionId, Data):
+        if ConnectionId in self.gone:
+            raise GoneException(ConnectionId)
+        self.sent.append((ConnectionId, json.loads(Data)))
+
+    def payloads_to(self, connection_id, message_type=None):
+        return [payload for sent_to, payload in self.sent
+                if sent_to == connection_id and (message_type is None or payload.get('type') == message_type)]
+
+
+def install_apigw(stub, endpoint_url='https://example.execute-api/test'):
+    """Serves stub for endpoint_url, which websocket_event() points at."""
+    core_clients._clients[('apigatewaymanagementapi', endpoint_url)] = stub
+    messaging.gone_connection_cache.clear()
+
+
+def websocket_event(connection_id, body):
+    """A $default route event from connection_id carrying body (a dict)."""
+    return {
+        'requestContext': {'connectionId': connection_id, 'domainName': 'example.execute-api', 'stage': 'test'},
+        'body': json.dumps(body)
+    }
+
+
+def written_item(update_kwargs):
+    """ExpressionAttributeValues of an update_item call, deserialized."""
+    return deserialize_item(update_kwargs.get('ExpressionAttributeValues') or {})
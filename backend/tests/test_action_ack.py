@@ -0,0 +1,75 @@
+# backend/tests/test_action_ack.py
+import unittest
+
+from wuwadraft_core import messaging
+
+from stubs import StubApiGateway, load_handler
+
+app = load_handler('defaultHandler')
+
+LOBBY_ID = 'ABCD1234'
+BAN_MESSAGE = {'action': 'makeBan', 'lobbyId': LOBBY_ID, 'resonatorName': 'Baizhi', 'requestId': 'req-2'}
+
+
+def lobby_before():
+    return {'lobbyId': LOBBY_ID, 'version': 7, 'eventSeq': 3, 'recentEvents': []}
+
+
+def lobby_after():
+    return {
+        'lobbyId': LOBBY_ID,
+        'version': 8,
+        'eventSeq': 4,
+        'recentEvents': [
+            {'seq': 3, 'type': 'ban', 'by': 'P2', 'resonator': 'Aalto'},
+            {'seq': 4, 'type': 'ban', 'by': 'P1', 'resonator': 'Baizhi'}
+        ],
+        'lobbyState': 'DRAFTING',
+        'currentPhase': 'BAN1',
+        'currentTurn': 'P2',
+        'turnExpiresAt': '2026-01-01T00:00:30+00:00',
+        'equilibrationBansMade': 0,
+        'lastAction': 'P1 banned Baizhi'
+    }
+
+
+class AcknowledgeDraftActionTest(unittest.TestCase):
+    def setUp(self):
+        messaging.gone_connection_cache.clear()
+        self.apigw = StubApiGateway()
+
+    def acknowledge(self, last_event_seq):
+        message_data = dict(BAN_MESSAGE, lastEventSeq=last_event_seq)
+        return app.acknowledge_draft_action(self.apigw, 'p1', LOBBY_ID, 'makeBan', message_data, lobby_before(), lobby_after())
+
+    def test_current_client_gets_the_events_and_is_left_out_of_the_broadcast(self):
+        self.assertEqual(self.acknowledge(3), 'p1')
+
+        acks = self.apigw.payloads_to('p1', 'actionAccepted')
+        self.assertEqual(len(acks), 1)
+        ack = acks[0]
+        self.assertEqual((ack['version'], ack['eventSeq'], ack['fromEventSeq'], ack['requestId']), (8, 4, 3, 'req-2'))
+        self.assertEqual([draft_event['seq'] for draft_event in ack['events']], [4])
+        for field in app.ACTION_ACK_FIELDS:
+            self.assertEqual(ack[field], lobby_after()[field], field)
+
+    def test_stale_client_gets_a_bare_ack_and_the_full_broadcast(self):
+        self.assertIsNone(self.acknowledge(2))
+
+        ack = self.apigw.payloads_to('p1', 'actionAccepted')[0]
+        self.assertEqual((ack['version'], ack['eventSeq']), (8, 4))
+        self.assertNotIn('events', ack)
+        for field in app.ACTION_ACK_FIELDS:
+            self.assertNotIn(field, ack)
+
+    def test_missing_last_event_seq_is_treated_as_stale(self):
+        self.assertIsNone(self.acknowledge(None))
+
+    def test_undelivered_ack_keeps_the_sender_in_the_broadcast(self):
+        self.apigw.gone.add('p1')
+        self.assertIsNone(self.acknowledge(3))
+        self.assertEqual(self.apigw.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# backend/tests/test_concurrency.py
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+from wuwadraft_core import concurrency, rate_limit
+from wuwadraft_core.concurrency import CONFLICT_MAX_ATTEMPTS, LobbyConflict
+
+from stubs import StubApiGateway, StubDynamoDB, client_error, install_apigw, install_dynamodb, load_handler, websocket_event
+
+app = load_handler('defaultHandler')
+
+LOBBY_ID = 'ABCD1234'
+
+
+class RetryOnConflictTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(concurrency.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_until_an_attempt_succeeds(self):
+        outcomes = [LobbyConflict('first'), LobbyConflict('second'), 'done']
+        reads = []
+
+        def operation():
+            reads.append(concurrency.consistent_read())
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(concurrency.retry_on_conflict(operation), 'done')
+        # Only retries need a consistent read
+        self.assertEqual(reads, [False, True, True])
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertFalse(concurrency.consistent_read())
+
+    def test_gives_up_after_the_last_attempt(self):
+        operation = mock.Mock(side_effect=LobbyConflict('busy'))
+        with self.assertRaises(LobbyConflict):
+            concurrency.retry_on_conflict(operation)
+        self.assertEqual(operation.call_count, CONFLICT_MAX_ATTEMPTS)
+        self.assertEqual(self.sleep.call_count, CONFLICT_MAX_ATTEMPTS - 1)
+        for (delay,), _ in self.sleep.call_args_list:
+            self.assertLessEqual(delay, concurrency.CONFLICT_MAX_BACKOFF_SECONDS)
+
+    def test_other_errors_are_not_retried(self):
+        operation = mock.Mock(side_effect=ValueError('bad input'))
+        with self.assertRaises(ValueError):
+            concurrency.retry_on_conflict(operation)
+        self.assertEqual(operation.call_count, 1)
+
+
+class UpdateLobbyTest(unittest.TestCase):
+    def update_failing_with(self, error):
+        dynamodb = StubDynamoDB(update_item=mock.Mock(side_effect=error))
+        install_dynamodb(dynamodb)
+        concurrency.update_lobby({'lobbyId': LOBBY_ID, 'version': 7},
+                                 Key={'lobbyId': LOBBY_ID}, UpdateExpression="SET lobbyState = :state",
+                                 ConditionExpression="lobbyState = :waiting",
+                                 ExpressionAttributeValues={':state': 'DRAFTING', ':waiting': 'WAITING'})
+        return dynamodb
+
+    def test_write_is_conditioned_on_the_read_version(self):
+        dynamodb = StubDynamoDB()
+        install_dynamodb(dynamodb)
+        concurrency.update_lobby({'lobbyId': LOBBY_ID, 'version': 7},
+                                 Key={'lobbyId': LOBBY_ID}, UpdateExpression="SET lobbyState = :state",
+                                 ExpressionAttributeValues={':state': 'DRAFTING'})
+        update_kwargs = dynamodb.calls[0][1]
+        self.assertEqual(update_kwargs['ConditionExpression'], "#lobbyVersion = :readLobbyVersion")
+        self.assertEqual(update_kwargs['ExpressionAttributeValues'][':readLobbyVersion'], {'N': '7'})
+        self.assertEqual(update_kwargs['ExpressionAttributeValues'][':nextLobbyVersion'], {'N': '8'})
+        self.assertEqual(update_kwargs['ReturnValuesOnConditionCheckFailure'], 'ALL_OLD')
+
+    def test_changed_version_is_a_conflict(self):
+        with self.assertRaises(LobbyConflict):
+            self.update_failing_with(client_error('ConditionalCheckFailedException', item={'lobbyId': LOBBY_ID, 'version': 8}))
+
+    def test_deleted_lobby_is_a_conflict(self):
+        with self.assertRaises(LobbyConflict):
+            self.update_failing_with(client_error('ConditionalCheckFailedException'))
+
+    def test_own_condition_failing_on_the_read_version_is_raised_as_is(self):
+        with self.assertRaises(ClientError) as raised:
+            self.update_failing_with(client_error('ConditionalCheckFailedException', item={'lobbyId': LOBBY_ID, 'version': 7}))
+        self.assertNotIsInstance(raised.exception, LobbyConflict)
+
+    def test_other_client_errors_are_raised_as_is(self):
+        with self.assertRaises(ClientError) as raised:
+            self.update_failing_with(client_error('ProvisionedThroughputExceededException'))
+        self.assertEqual(raised.exception.response['Error']['Code'], 'ProvisionedThroughputExceededException')
+
+
+class HandlerConflictTest(unittest.TestCase):
+    def setUp(self):
+        rate_limit._buckets.clear()
+        install_dynamodb(StubDynamoDB())
+        self.apigw = StubApiGateway()
+        install_apigw(self.apigw)
+        for target, attribute in ((concurrency.time, 'sleep'), (app, 'route_action')):
+            patcher = mock.patch.object(target, attribute)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_repeated_conflicts_answer_409_and_tell_the_sender(self):
+        app.route_action.side_effect = LobbyConflict('busy')
+        response = app.handler(websocket_event('p1', {'action': 'makeBan', 'lobbyId': LOBBY_ID, 'resonatorName': 'Aalto'}), None)
+
+        self.assertEqual(response['statusCode'], 409)
+        self.assertEqual(app.route_action.call_count, CONFLICT_MAX_ATTEMPTS)
+        errors = self.apigw.payloads_to('p1', 'error')
+        self.assertEqual([error['message'] for error in errors], ["The lobby is busy, please try again."])
+
+    def test_conflict_then_success_returns_the_retry_result(self):
+        app.route_action.side_effect = [LobbyConflict('busy'), {'statusCode': 200, 'body': 'ok'}]
+        response = app.handler(websocket_event('p1', {'action': 'makeBan', 'lobbyId': LOBBY_ID, 'resonatorName': 'Aalto'}), None)
+
+        self.assertEqual(response, {'statusCode': 200, 'body': 'ok'})
+        self.assertEqual(self.apigw.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# backend/tests/test_import_time.py
+"""Cold-start budget check: fails when a handler's module init exceeds tools/import_time.py's budget."""
+
+import importlib.util
+import os
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+spec = importlib.util.spec_from_file_location('import_time', os.path.join(BACKEND_DIR, 'tools', 'import_time.py'))
+import_time = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(import_time)
+
+RUNS = 3 # Fresh interpreters per handler; the median is compared with the budget
+
+
+class HandlerImportBudgetTest(unittest.TestCase):
+    def test_every_handler_within_budget(self):
+        for handler_name in import_time.HANDLERS:
+            with self.subTest(handler=handler_name):
+                init_ms, _ = import_time.measure_handler(handler_name, RUNS)
+                self.assertLessEqual(init_ms, import_time.DEFAULT_BUDGET_MS,
+                                     f"{handler_name} takes {init_ms:.1f} ms to import")
+
+    def test_default_handler_defers_uuid_and_random(self):
+        # Both are only needed by a few actions, so they are imported where used
+        _, per_module = import_time.measure_handler('defaultHandler', 1)
+        self.assertNotIn('uuid', per_module)
+        self.assertNotIn('random', per_module)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# backend/tests/test_rate_limit.py
+import unittest
+from unittest import mock
+
+from wuwadraft_core import rate_limit
+
+from stubs import StubDynamoDB, client_error, install_dynamodb
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimitTest(unittest.TestCase):
+    def setUp(self):
+        rate_limit._buckets.clear()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limit.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dynamodb = StubDynamoDB()
+        install_dynamodb(self.dynamodb)
+
+    def allowed(self, count, connection_id='conn-1', action='makeBan'):
+        return [rate_limit.allow_request(connection_id, action) for _ in range(count)]
+
+    def test_bucket_allows_a_burst_then_refills_over_time(self):
+        burst, refill_per_second = rate_limit.RATE_LIMITS['makeBan']
+        self.assertEqual(self.allowed(burst + 1), [True] * burst + [False])
+
+        self.clock.now += 1 / refill_per_second # One token back
+        self.assertEqual(self.allowed(2), [True, False])
+
+    def test_refill_is_capped_at_the_burst(self):
+        burst, _ = rate_limit.RATE_LIMITS['makeBan']
+        self.allowed(burst)
+        self.clock.now += 3600
+        self.assertEqual(self.allowed(burst + 1), [True] * burst + [False])
+
+    def test_buckets_are_per_connection_and_unlisted_actions_share_one(self):
+        burst, _ = rate_limit.RATE_LIMITS[rate_limit.DEFAULT_LIMIT_NAME]
+        self.assertEqual(self.allowed(burst, action='madeUpA'), [True] * burst)
+        self.assertFalse(rate_limit.allow_request('conn-1', 'madeUpB'))
+        self.assertTrue(rate_limit.allow_request('conn-2', 'madeUpB'))
+
+    def test_shared_counter_is_written_only_once_the_bucket_is_half_drained(self):
+        burst, _ = rate_limit.RATE_LIMITS['makeBan']
+        untouched = int(burst * rate_limit.SHARED_CHECK_BELOW_FRACTION)
+        self.allowed(untouched)
+        self.assertEqual(self.dynamodb.operations(), [])
+        self.allowed(1)
+        self.assertEqual(self.dynamodb.operations(), ['update_item'])
+        counted = int(self.dynamodb.calls[0][1]['ExpressionAttributeValues'][':count']['N'])
+        self.assertEqual(counted, untouched + 1) # Every request since the last write
+
+    def test_ping_never_touches_the_table(self):
+        burst, _ = rate_limit.RATE_LIMITS['ping']
+        self.allowed(burst, action='ping')
+        self.assertEqual(self.dynamodb.operations(), [])
+
+    def test_full_shared_window_drops_the_request(self):
+        self.dynamodb.responses['update_item'] = mock.Mock(side_effect=client_error('ConditionalCheckFailedException'))
+        burst, _ = rate_limit.RATE_LIMITS['makeBan']
+        results = self.allowed(burst)
+        self.assertFalse(results[-1])
+
+    def test_fails_open_when_the_shared_counter_cannot_be_written(self):
+        self.dynamodb.responses['update_item'] = mock.Mock(side_effect=client_error('ProvisionedThroughputExceededException'))
+        burst, _ = rate_limit.RATE_LIMITS['makeBan']
+        self.assertEqual(self.allowed(burst), [True] * burst)
+        self.assertIn('update_item', self.dynamodb.operations())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# backend/tests/test_recent_requests.py
+import unittest
+
+from wuwadraft_core import rate_limit
+from wuwadraft_core.draft_formats import DEFAULT_DRAFT_FORMAT_ID, get_draft_format, lobby_draft_format_fields
+
+from stubs import StubApiGateway, StubDynamoDB, install_apigw, install_dynamodb, item_response, load_handler, websocket_event, written_item
+
+app = load_handler('defaultHandler')
+
+LOBBY_ID = 'ABCD1234'
+
+
+def drafting_lobby(**fields):
+    lobby_item = {
+        **lobby_draft_format_fields(get_draft_format(DEFAULT_DRAFT_FORMAT_ID), 'P1_FAVORED'),
+        'playerRoles': {'P1_ROLE_IN_TEMPLATE': 'P1', 'P2_ROLE_IN_TEMPLATE': 'P2'},
+        'lobbyId': LOBBY_ID,
+        'version': 7,
+        'hostConnectionId': 'host',
+        'hostName': 'Host',
+        'player1ConnectionId': 'p1',
+        'player1Name': 'A',
+        'player2ConnectionId': 'p2',
+        'player2Name': 'B',
+        'lobbyState': 'DRAFTING',
+        'currentPhase': 'BAN1',
+        'currentTurn': 'P1',
+        'currentStepIndex': 0,
+        'bans': ['Aalto'],
+        'player1Picks': [],
+        'player2Picks': [],
+        'availableResonators': ['Baizhi', 'Calcharo'],
+        'lastAction': 'P1 banned Aalto',
+        'recentRequests': [{'requestId': 'req-1', 'statusCode': 200, 'body': 'Standard ban processed.'}]
+    }
+    lobby_item.update(fields)
+    return lobby_item
+
+
+class FindRecentRequestTest(unittest.TestCase):
+    def test_finds_a_recorded_request(self):
+        recorded = app.find_recent_request(drafting_lobby(), 'req-1')
+        self.assertEqual(recorded['body'], 'Standard ban processed.')
+
+    def test_unknown_or_missing_request_ids_are_not_replays(self):
+        self.assertIsNone(app.find_recent_request(drafting_lobby(), 'req-2'))
+        self.assertIsNone(app.find_recent_request(drafting_lobby(), None))
+        self.assertIsNone(app.find_recent_request(drafting_lobby(recentRequests=None), 'req-1'))
+
+    def test_append_keeps_the_newest_requests(self):
+        lobby_item = drafting_lobby(recentRequests=[
+            {'requestId': f"old-{n}", 'statusCode': 200, 'body': 'ok'} for n in range(app.RECENT_REQUESTS_LIMIT)
+        ])
+        recent_requests = app.append_recent_request(lobby_item, 'new', {'statusCode': 200, 'body': 'done'})
+        self.assertEqual(len(recent_requests), app.RECENT_REQUESTS_LIMIT)
+        self.assertEqual(recent_requests[-1], {'requestId': 'new', 'statusCode': 200, 'body': 'done'})
+        self.assertNotIn('old-0', [request['requestId'] for request in recent_requests])
+
+    def test_append_without_request_id_leaves_the_list_unchanged(self):
+        lobby_item = drafting_lobby()
+        self.assertEqual(app.append_recent_request(lobby_item, None, {'statusCode': 200, 'body': 'x'}), lobby_item['recentRequests'])
+
+
+class ResentBanTest(unittest.TestCase):
+    def setUp(self):
+        rate_limit._buckets.clear()
+        self.dynamodb = StubDynamoDB(get_item=item_response(drafting_lobby()))
+        install_dynamodb(self.dynamodb)
+        self.apigw = StubApiGateway()
+        install_apigw(self.apigw)
+
+    def test_resent_ban_returns_the_original_result_without_writing(self):
+        response = app.handler(websocket_event('p1', {
+            'action': 'makeBan', 'lobbyId': LOBBY_ID, 'resonatorName': 'Aalto', 'requestId': 'req-1'
+        }), None)
+
+        self.assertEqual(response, {'statusCode': 200, 'body': 'Standard ban processed.'})
+        self.assertEqual(self.dynamodb.operations(), ['get_item'])
+        # The sender gets the current state in case the original broadcast was lost
+        resent_state = self.apigw.payloads_to('p1', 'lobbyStateUpdate')
+        self.assertEqual(len(resent_state), 1)
+        self.assertEqual(resent_state[0]['bans'], ['Aalto'])
+
+    def test_new_request_id_is_not_replayed(self):
+        self.dynamodb.responses['update_item'] = lambda **kwargs: {'Attributes': {}}
+        app.handler(websocket_event('p1', {
+            'action': 'makeBan', 'lobbyId': LOBBY_ID, 'resonatorName': 'Baizhi', 'requestId': 'req-2'
+        }), None)
+        updates = [kwargs for operation, kwargs in self.dynamodb.calls if operation == 'update_item']
+        self.assertEqual(len(updates), 1)
+        recorded_ids = [request['requestId'] for request in written_item(updates[0])[':recent_requests']]
+        self.assertEqual(recorded_ids, ['req-1', 'req-2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
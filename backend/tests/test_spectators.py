@@ -0,0 +1,90 @@
+# backend/tests/test_spectators.py
+import unittest
+
+from wuwadraft_core import messaging, spectators
+from wuwadraft_core.serialization import deserialize_item, serialize_item
+from wuwadraft_core.tables import get_tables
+
+from stubs import StubApiGateway, StubDynamoDB, install_dynamodb
+
+LOBBY_ID = 'ABCD1234'
+
+
+def shard_item(*connection_ids):
+    return serialize_item({'connectionIds': set(connection_ids)})
+
+
+class GetSpectatorIdsTest(unittest.TestCase):
+    def test_reads_every_shard_and_follows_unprocessed_keys(self):
+        dynamodb = StubDynamoDB()
+        install_dynamodb(dynamodb)
+        lobbies_table_name = get_tables()[1].name
+        answers = []
+
+        def batch_get_item(RequestItems):
+            request = RequestItems[lobbies_table_name]
+            if not answers: # First call: one shard answered, the rest throttled
+                answers.append(request)
+                return {
+                    'Responses': {lobbies_table_name: [shard_item('s1', 's2')]},
+                    'UnprocessedKeys': {lobbies_table_name: {**request, 'Keys': request['Keys'][1:]}}
+                }
+            answers.append(request)
+            return {'Responses': {lobbies_table_name: [shard_item('s3')]}, 'UnprocessedKeys': {}}
+
+        dynamodb.responses['batch_get_item'] = batch_get_item
+        self.assertEqual(sorted(spectators.get_spectator_ids(LOBBY_ID)), ['s1', 's2', 's3'])
+        self.assertEqual(dynamodb.operations(), ['batch_get_item', 'batch_get_item'])
+        first_keys = [deserialize_item(key) for key in answers[0]['Keys']]
+        self.assertEqual(len(first_keys), spectators.SPECTATOR_SHARDS)
+        self.assertEqual(len(answers[1]['Keys']), spectators.SPECTATOR_SHARDS - 1)
+        self.assertEqual(answers[0]['ProjectionExpression'], 'connectionIds')
+
+
+class PostToSpectatorsTest(unittest.TestCase):
+    def setUp(self):
+        messaging.gone_connection_cache.clear()
+
+    def test_sends_to_every_live_connection_once(self):
+        apigw = StubApiGateway()
+        connection_ids = [f"s{n}" for n in range(10)]
+        sent_count, gone = spectators.post_to_spectators(apigw, connection_ids + ['s0', None], {'type': 'lobbyStateUpdate'}, max_workers=3)
+
+        self.assertEqual((sent_count, gone), (10, []))
+        self.assertEqual(sorted(sent_to for sent_to, _ in apigw.sent), sorted(connection_ids))
+
+    def test_returns_gone_connections_and_skips_known_gone_ones(self):
+        apigw = StubApiGateway(gone={'s2'})
+        messaging.mark_connection_gone('s3')
+        sent_count, gone = spectators.post_to_spectators(apigw, ['s1', 's2', 's3'], {'type': 'lobbyStateUpdate'})
+
+        self.assertEqual((sent_count, gone), (1, ['s2']))
+        self.assertEqual([sent_to for sent_to, _ in apigw.sent], ['s1'])
+        self.assertTrue(messaging.is_connection_known_gone('s2'))
+
+
+class FanOutToSpectatorsTest(unittest.TestCase):
+    def setUp(self):
+        messaging.gone_connection_cache.clear()
+        self.dynamodb = StubDynamoDB()
+        install_dynamodb(self.dynamodb)
+        lobbies_table_name = get_tables()[1].name
+        self.dynamodb.responses['batch_get_item'] = lambda RequestItems: {
+            'Responses': {lobbies_table_name: [shard_item('s1', 's2')]}
+        }
+
+    def test_sends_the_trimmed_state_and_drops_gone_spectators(self):
+        apigw = StubApiGateway(gone={'s2'})
+        spectators.fan_out_to_spectators(apigw, LOBBY_ID, {
+            'type': 'lobbyStateUpdate', 'lobbyId': LOBBY_ID, 'player1Sequences': {'A': 2}, 'player2Sequences': {}
+        })
+
+        self.assertEqual(apigw.payloads_to('s1'), [{'type': 'lobbyStateUpdate', 'lobbyId': LOBBY_ID}])
+        removals = [kwargs for operation, kwargs in self.dynamodb.calls if operation == 'update_item']
+        self.assertEqual(len(removals), 1)
+        self.assertTrue(removals[0]['UpdateExpression'].startswith('DELETE connectionIds'))
+        self.assertEqual(deserialize_item(removals[0]['ExpressionAttributeValues'])[':connIds'], {'s2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
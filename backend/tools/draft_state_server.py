@@ -0,0 +1,79 @@
+# backend/tools/draft_state_server.py
+"""Local stand-in for the draft-state HTTP endpoint (backend/draftStateHandler).
+
+Serves GET /lobbies/<lobbyId>/state by passing each request to draftStateHandler's handler
+as an API Gateway (HTTP API) event, so overlays and the ETag/304 behaviour can be tried
+without deploying. The handler reads the tables boto3 is configured for: your AWS account,
+or DynamoDB Local with AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000. TABLE_LAYOUT and
+the table name variables apply as in Lambda.
+
+Usage:
+    python draft_state_server.py
+    python draft_state_server.py --port 8080
+    curl -i http://localhost:8787/lobbies/ABCD1234/state
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python'))
+
+
+def load_handler_module():
+    spec = importlib.util.spec_from_file_location('draftStateHandler', os.path.join(BACKEND_DIR, 'draftStateHandler', 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_request_handler(lambda_handler):
+    class DraftStateRequestHandler(BaseHTTPRequestHandler):
+        def _invoke(self):
+            path_parts = urlsplit(self.path).path.strip('/').split('/')
+            if len(path_parts) != 3 or path_parts[0] != 'lobbies' or path_parts[2] != 'state':
+                self.send_error(404, "Expected /lobbies/<lobbyId>/state")
+                return
+            event = {
+                'requestContext': {'http': {'method': self.command}},
+                'headers': dict(self.headers.items()),
+                'pathParameters': {'lobbyId': unquote(path_parts[1])}
+            }
+            response = lambda_handler(event, None)
+            body = response.get('body', '').encode('utf-8')
+            self.send_response(response['statusCode'])
+            for name, value in response.get('headers', {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _invoke
+        do_OPTIONS = _invoke
+
+    return DraftStateRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the draft-state endpoint locally.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    args = parser.parse_args()
+
+    handler_module = load_handler_module()
+    server = ThreadingHTTPServer((args.host, args.port), make_request_handler(handler_module.handler))
+    print(f"Serving http://{args.host}:{args.port}/lobbies/<lobbyId>/state (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# backend/tools/equilibration_simulator.py
+"""Offline simulator for tuning the equilibration thresholds.
+
+Draws --pairs synthetic box pairs, scores them and applies the equilibration decision,
+then reports how often each outcome happens: neutral vs P1 favored draft order, 0/1/2
+equilibration bans, and the spread of scores and score differences. Run it with different
+--minor/--major/--extreme values to see what a threshold change would do before shipping it.
+
+Each synthetic player owns every limited resonator with their own probability, drawn from
+Beta(--ownership-alpha, --ownership-beta), and an owned resonator's sequence is drawn from
+--sequence-weights (S0..S6). Standard resonators score nothing, so only limited ones are
+drawn. The resonator list is the built-in fallback catalogue, or --catalogue with a JSON
+file shaped like the S3 master data (a list of {"name": ..., "isLimited": ...}).
+
+Scoring gathers from the same points table as wuwadraft_core.scoring, and the decision is
+a vectorized copy of wuwadraft_core.equilibration.decide_equilibration. --verify N replays
+the first N pairs through the production score_box and decide_equilibration and exits
+with status 1 on any difference, so the reported numbers are the ones live lobbies get.
+
+Needs NumPy (pip install numpy); the Lambdas themselves don't.
+
+Usage:
+    python equilibration_simulator.py
+    python equilibration_simulator.py --pairs 5000000 --major 15 --extreme 30
+    python equilibration_simulator.py --catalogue resonators_master_data.json --ownership-alpha 1 --ownership-beta 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("equilibration_simulator.py needs NumPy: pip install numpy")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python'))
+
+from wuwadraft_core.constants import (  # noqa: E402
+    SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY, SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN, SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS
+)
+from wuwadraft_core.equilibration import NEUTRAL_ORDER, P1_FAVORED_ORDER, decide_equilibration  # noqa: E402
+from wuwadraft_core.resonators import (  # noqa: E402
+    FALLBACK_LIMITED_RESONATOR_NAMES, FALLBACK_RESONATOR_NAMES, build_catalogue
+)
+from wuwadraft_core.scoring import MAX_SEQUENCE, MIN_SEQUENCE, points_table, score_box  # noqa: E402
+
+# Lower score player / banner slot codes in the vectorized decision
+NO_SLOT, P1_SLOT, P2_SLOT = 0, 1, 2
+SLOT_NAMES = {NO_SLOT: None, P1_SLOT: 'P1', P2_SLOT: 'P2'}
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def load_catalogue(path):
+    if path:
+        with open(path, encoding='utf-8') as catalogue_file:
+            return build_catalogue(json.load(catalogue_file))
+    return build_catalogue([{'name': name, 'isLimited': name in FALLBACK_LIMITED_RESONATOR_NAMES}
+                            for name in FALLBACK_RESONATOR_NAMES])
+
+
+class BoxGenerator:
+    """Synthetic boxes as sequence matrices over the catalogue's limited resonators (-1 = not owned)."""
+
+    def __init__(self, catalogue, ownership_alpha, ownership_beta, sequence_weights, rng):
+        table, offset_by_name = points_table(catalogue)
+        self.names = [name for name, is_limited in zip(catalogue.names, catalogue.limited) if is_limited]
+        self.table = np.array(table, dtype=np.int64)
+        self.offsets = np.array([offset_by_name[name] for name in self.names], dtype=np.int64)
+        self.ownership_alpha = ownership_alpha
+        self.ownership_beta = ownership_beta
+        self.cumulative_weights = np.cumsum(sequence_weights) / sum(sequence_weights)
+        self.rng = rng
+
+    def sequences(self, players):
+        ownership = self.rng.beta(self.ownership_alpha, self.ownership_beta, size=(players, 1))
+        owned = self.rng.random((players, len(self.names))) < ownership
+        # Inverse CDF of the sequence weights; much faster than rng.choice(p=...)
+        drawn = self.cumulative_weights.searchsorted(self.rng.random(owned.shape, dtype=np.float32), side='right')
+        return np.where(owned, np.minimum(drawn, MAX_SEQUENCE), MIN_SEQUENCE)
+
+    def scores(self, sequences):
+        """Weighted box scores: the same points table gather as scoring.score_box, one row per box."""
+        return self.table.take(self.offsets + sequences).sum(axis=1)
+
+    def box(self, sequence_row):
+        return dict(zip(self.names, (int(s_value) for s_value in sequence_row)))
+
+
+def decide_vectorized(p1_scores, p2_scores, minor_threshold, major_threshold, extreme_threshold):
+    """decide_equilibration over arrays: (score_diff, neutral, lower_score_slot, bans, banner_slot)."""
+    score_diff = np.abs(p1_scores - p2_scores)
+    lower_score_slot = np.where(p1_scores < p2_scores, P1_SLOT, np.where(p2_scores < p1_scores, P2_SLOT, NO_SLOT))
+    neutral = score_diff < minor_threshold
+    banner_slot = np.where(neutral, NO_SLOT, lower_score_slot)
+    bans = np.where(score_diff >= extreme_threshold, 2, np.where(score_diff >= major_threshold, 1, 0))
+    bans = np.where(banner_slot == NO_SLOT, 0, bans)
+    return score_diff, neutral, lower_score_slot, bans, banner_slot
+
+
+def verify(generator, p1_sequences, p2_sequences, p1_scores, p2_scores, decided, catalogue, thresholds):
+    """Replays pairs through score_box and decide_equilibration; returns the number of mismatches."""
+    score_diff, neutral, lower_score_slot, bans, banner_slot = decided
+    mismatches = 0
+    for i in range(len(p1_scores)):
+        p1_score = score_box(generator.box(p1_sequences[i]), catalogue)
+        p2_score = score_box(generator.box(p2_sequences[i]), catalogue)
+        expected = decide_equilibration(p1_score, p2_score, *thresholds)
+        simulated = (
+            int(p1_scores[i]), int(p2_scores[i]), int(score_diff[i]),
+            NEUTRAL_ORDER if neutral[i] else P1_FAVORED_ORDER,
+            SLOT_NAMES[int(lower_score_slot[i])], int(bans[i]), SLOT_NAMES[int(banner_slot[i])]
+        )
+        if simulated != (p1_score, p2_score) + tuple(expected):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  MISMATCH pair {i}: simulated {simulated}, production {(p1_score, p2_score) + tuple(expected)}")
+    return mismatches
+
+
+def histogram_percentiles(histogram, percentiles):
+    cumulative = np.cumsum(histogram)
+    return [int(np.searchsorted(cumulative, cumulative[-1] * p / 100)) for p in percentiles]
+
+
+def share(count, total):
+    return f"{count:>12,d}  {100 * count / total:6.2f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate equilibration outcomes over synthetic box pairs.")
+    parser.add_argument('--pairs', type=int, default=1_000_000)
+    parser.add_argument('--chunk', type=int, default=200_000, help="Pairs generated and decided per batch.")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--catalogue', help="Resonator master data JSON (default: the built-in fallback catalogue).")
+    parser.add_argument('--ownership-alpha', type=float, default=1.5,
+                        help="Per-player ownership probability ~ Beta(alpha, beta).")
+    parser.add_argument('--ownership-beta', type=float, default=2.5)
+    parser.add_argument('--sequence-weights', default='60,18,8,5,3,2,4',
+                        help="Relative weights of S0..S6 for an owned resonator.")
+    parser.add_argument('--minor', type=int, default=SCORE_DIFF_THRESHOLD_MINOR_P1_PRIORITY)
+    parser.add_argument('--major', type=int, default=SCORE_DIFF_THRESHOLD_MAJOR_ONE_EQ_BAN)
+    parser.add_argument('--extreme', type=int, default=SCORE_DIFF_THRESHOLD_EXTREME_TWO_EQ_BANS)
+    parser.add_argument('--verify', type=int, default=2000,
+                        help="Pairs replayed through the production functions (0 to skip).")
+    args = parser.parse_args()
+
+    sequence_weights = [float(weight) for weight in args.sequence_weights.split(',')]
+    if len(sequence_weights) != MAX_SEQUENCE + 1 or min(sequence_weights) < 0 or sum(sequence_weights) <= 0:
+        parser.error(f"--sequence-weights needs {MAX_SEQUENCE + 1} non-negative weights (S0..S6)")
+
+    catalogue = load_catalogue(args.catalogue)
+    thresholds = (args.minor, args.major, args.extreme)
+    generator = BoxGenerator(catalogue, args.ownership_alpha, args.ownership_beta, sequence_weights,
+                             np.random.default_rng(args.seed))
+    max_score = int(generator.table.max(initial=0)) * len(generator.names)
+    print(f"Simulating {args.pairs:,d} pairs over {len(generator.names)} limited resonators, "
+          f"thresholds minor={args.minor} major={args.major} extreme={args.extreme}")
+
+    neutral_count = 0
+    ban_counts = np.zeros(3, dtype=np.int64)
+    score_histogram = np.zeros(max_score + 1, dtype=np.int64)
+    diff_histogram = np.zeros(max_score + 1, dtype=np.int64)
+    started = time.perf_counter()
+    done = 0
+    while done < args.pairs:
+        pairs = min(args.chunk, args.pairs - done)
+        p1_sequences = generator.sequences(pairs)
+        p2_sequences = generator.sequences(pairs)
+        p1_scores = generator.scores(p1_sequences)
+        p2_scores = generator.scores(p2_sequences)
+        decided = decide_vectorized(p1_scores, p2_scores, *thresholds)
+        score_diff, neutral, _, bans, _ = decided
+
+        if done == 0 and args.verify:
+            checked = min(args.verify, pairs)
+            verify_started = time.perf_counter()
+            mismatches = verify(generator, p1_sequences[:checked], p2_sequences[:checked], p1_scores[:checked],
+                                p2_scores[:checked], [column[:checked] for column in decided], catalogue, thresholds)
+            if mismatches:
+                sys.exit(f"Verification FAILED: {mismatches} of {checked} pairs differ from production.")
+            print(f"Verified {checked:,d} pairs against score_box/decide_equilibration: identical")
+            started += time.perf_counter() - verify_started # Keep verification out of the throughput
+
+        neutral_count += int(neutral.sum())
+        ban_counts += np.bincount(bans, minlength=3)
+        score_histogram += np.bincount(p1_scores, minlength=max_score + 1)
+        score_histogram += np.bincount(p2_scores, minlength=max_score + 1)
+        diff_histogram += np.bincount(score_diff, minlength=max_score + 1)
+        done += pairs
+    elapsed = time.perf_counter() - started
+
+    total = args.pairs
+    print(f"Draft order:")
+    print(f"  neutral      {share(neutral_count, total)}")
+    print(f"  P1 favored   {share(total - neutral_count, total)}")
+    print(f"Equilibration bans:")
+    for ban_count in range(3):
+        print(f"  {ban_count}            {share(int(ban_counts[ban_count]), total)}")
+    percentile_labels = "/".join(f"p{p:g}" for p in PERCENTILES)
+    print(f"Box score  {percentile_labels}: {'/'.join(map(str, histogram_percentiles(score_histogram, PERCENTILES)))}")
+    print(f"Score diff {percentile_labels}: {'/'.join(map(str, histogram_percentiles(diff_histogram, PERCENTILES)))}")
+    print(f"{total:,d} pairs in {elapsed:.2f} s ({total / elapsed / 1e6:.2f} M pairs/s)")
+
+
+if __name__ == '__main__':
+    main()
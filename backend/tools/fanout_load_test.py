@@ -0,0 +1,111 @@
+# backend/tools/fanout_load_test.py
+"""Measures spectator fan-out throughput without AWS.
+
+Posts one spectator lobbyStateUpdate to --spectators connections through
+wuwadraft_core.spectators.post_to_spectators, using a stand-in API Gateway Management
+client whose post_to_connection sleeps for --latency-ms (roughly one post round trip from
+Lambda). Each worker count in --workers is timed over --runs fan-outs and reported as
+posts per second; --sequential adds the one-post-at-a-time loop that participant
+broadcasts use, for comparison.
+
+Usage:
+    python fanout_load_test.py
+    python fanout_load_test.py --spectators 5000 --latency-ms 20
+    python fanout_load_test.py --workers 1 8 32 64 --gone-percent 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python'))
+
+from wuwadraft_core.encoding import DecimalEncoder  # noqa: E402
+from wuwadraft_core.lobby_state import build_lobby_state_payload  # noqa: E402
+from wuwadraft_core.messaging import gone_connection_cache  # noqa: E402
+from wuwadraft_core.spectators import build_spectator_payload, post_to_spectators  # noqa: E402
+
+SAMPLE_LOBBY_ITEM = {
+    'hostName': 'Host', 'player1Name': 'Alice', 'player2Name': 'Bob',
+    'lobbyState': 'DRAFTING', 'currentPhase': 'PICK1', 'currentTurn': 'P1',
+    'bans': ['Jiyan', 'Yinlin'], 'player1Picks': ['Changli'], 'player2Picks': ['Jinhsi'],
+    'availableResonators': ['Zhezhi', 'Xiangli Yao', 'The Shorekeeper', 'Camellya', 'Carlotta', 'Roccia'],
+    'turnExpiresAt': 1735689630000, 'eventSeq': 6,
+    'player1Sequences': {'Changli': 6}, 'player2Sequences': {'Jinhsi': 2}
+}
+
+
+class FakeApiGatewayClient:
+    """post_to_connection that takes latency_seconds and raises GoneException for gone_ids."""
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def __init__(self, latency_seconds, gone_ids=()):
+        self.latency_seconds = latency_seconds
+        self.gone_ids = set(gone_ids)
+
+    def post_to_connection(self, ConnectionId, Data):
+        time.sleep(self.latency_seconds)
+        if ConnectionId in self.gone_ids:
+            raise self.exceptions.GoneException(ConnectionId)
+
+
+def sequential_fan_out(apigw_client, connection_ids, payload):
+    """One post at a time, encoding per send, as send_message_to_client does for participants."""
+    for connection_id in connection_ids:
+        try:
+            apigw_client.post_to_connection(ConnectionId=connection_id, Data=json.dumps(payload, cls=DecimalEncoder).encode('utf-8'))
+        except apigw_client.exceptions.GoneException:
+            pass
+
+
+def time_fan_out(fan_out, runs):
+    """Returns the median wall time of fan_out() over runs, in seconds."""
+    durations = []
+    for _ in range(runs):
+        gone_connection_cache.clear() # Every run starts from a cold container's view
+        start = time.perf_counter()
+        fan_out()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report spectator fan-out throughput against a simulated API Gateway.")
+    parser.add_argument('--spectators', type=int, default=2000, help="Connections to post to per fan-out.")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Simulated post_to_connection round trip.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[8, 16, 32, 64], help="Pool sizes to measure.")
+    parser.add_argument('--runs', type=int, default=3, help="Fan-outs per configuration; the median is reported.")
+    parser.add_argument('--gone-percent', type=float, default=0, help="Share of connections that raise GoneException.")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Also time the one-at-a-time loop (slow: spectators x latency).")
+    args = parser.parse_args()
+
+    connection_ids = [f"conn-{i:06d}=" for i in range(args.spectators)]
+    gone_ids = connection_ids[:int(args.spectators * args.gone_percent / 100)]
+    payload = build_spectator_payload(build_lobby_state_payload('LOADTEST', SAMPLE_LOBBY_ITEM, "Alice picked Changli."))
+    latency_seconds = args.latency_ms / 1000
+
+    print(f"{args.spectators} spectators, {args.latency_ms:.0f} ms per post, {len(gone_ids)} gone, median of {args.runs} run(s)")
+    if args.sequential:
+        apigw_client = FakeApiGatewayClient(latency_seconds, gone_ids)
+        elapsed = time_fan_out(lambda: sequential_fan_out(apigw_client, connection_ids, payload), args.runs)
+        print(f"  sequential: {elapsed * 1000:9.1f} ms  {args.spectators / elapsed:9.0f} posts/s")
+
+    for workers in args.workers:
+        apigw_client = FakeApiGatewayClient(latency_seconds, gone_ids)
+        results = []
+        elapsed = time_fan_out(lambda: results.append(post_to_spectators(apigw_client, connection_ids, payload, max_workers=workers)), args.runs)
+        sent_count, gone_connection_ids = results[-1]
+        print(f"  {workers:3d} workers: {elapsed * 1000:8.1f} ms  {args.spectators / elapsed:9.0f} posts/s"
+              f"  (sent {sent_count}, gone {len(gone_connection_ids)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# backend/tools/import_time.py
+"""Measures the cold-start import cost of each Lambda handler module.
+
+Every run imports a handler's app.py in a fresh interpreter (with the wuwadraft_core layer on
+sys.path, as in Lambda) and records how long module initialization took, plus the heaviest
+imports reported by `python -X importtime`. The median over --runs is reported per handler.
+
+The script exits with status 1 if any handler's median init time is over --budget-ms
+(default 100 ms), so it doubles as a cold-start regression check before deploying.
+
+Usage:
+    python import_time.py
+    python import_time.py --runs 9 --top 5
+    python import_time.py --budget-ms 60
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PYTHON_DIR = os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python')
+HANDLERS = ['connectHandler', 'defaultHandler', 'disconnectHandler', 'draftStateHandler', 'matchmakingHandler']
+DEFAULT_BUDGET_MS = 100
+
+# Runs inside the child interpreter: imports one handler's app.py and prints the init time
+IMPORT_SNIPPET = """
+import importlib.util, sys, time
+print("HANDLER_IMPORT_START", file=sys.stderr, flush=True)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(sys.argv[1], sys.argv[2])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print(f"INIT_MS {(time.perf_counter() - start) * 1000:.2f}")
+"""
+
+
+def parse_importtime(stderr):
+    """Returns {module: cumulative_us} for the handler's top-level imports in `-X importtime` output.
+
+    Interpreter start-up imports (before HANDLER_IMPORT_START) aren't the handler's cost, and
+    nested imports are already part of the cumulative time of the module that triggered them.
+    """
+    cumulative = {}
+    handler_started = False
+    for line in stderr.splitlines():
+        if line.startswith('HANDLER_IMPORT_START'):
+            handler_started = True
+            continue
+        if not handler_started or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def measure_once(handler_name):
+    """Imports one handler in a fresh interpreter. Returns (init_ms, {module: cumulative_us})."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [LAYER_PYTHON_DIR, env.get('PYTHONPATH')]))
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1') # Clients are lazy, but keep boto3 happy if one isn't
+    app_path = os.path.join(BACKEND_DIR, handler_name, 'app.py')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SNIPPET, handler_name, app_path],
+        capture_output=True, text=True, env=env, check=True
+    )
+    init_ms = next(float(line.split()[1]) for line in result.stdout.splitlines() if line.startswith('INIT_MS'))
+    return init_ms, parse_importtime(result.stderr)
+
+
+def measure_handler(handler_name, runs):
+    """Returns (median_init_ms, {module: median_cumulative_us})."""
+    init_times = []
+    per_module = {}
+    for _ in range(runs):
+        init_ms, cumulative = measure_once(handler_name)
+        init_times.append(init_ms)
+        for module_name, cumulative_us in cumulative.items():
+            per_module.setdefault(module_name, []).append(cumulative_us)
+    return statistics.median(init_times), {name: statistics.median(values) for name, values in per_module.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-handler import (cold-start init) cost.")
+    parser.add_argument('handlers', nargs='*', default=HANDLERS, help="Handler directories to measure (default: all).")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per handler; the median is reported.")
+    parser.add_argument('--top', type=int, default=8, help="Heaviest imports to list per handler.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail (exit 1) if a handler's median init time exceeds this.")
+    args = parser.parse_args()
+
+    over_budget = []
+    for handler_name in args.handlers:
+        init_ms, per_module = measure_handler(handler_name, args.runs)
+        print(f"{handler_name}: {init_ms:.1f} ms init (median of {args.runs})")
+        heaviest = sorted(((us, name) for name, us in per_module.items()), reverse=True)
+        for cumulative_us, module_name in heaviest[:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {module_name}")
+        if init_ms > args.budget_ms:
+            over_budget.append(handler_name)
+
+    if over_budget:
+        print(f"Cold-start budget of {args.budget_ms:.0f} ms exceeded by: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"All handlers within the {args.budget_ms:.0f} ms cold-start budget.")
+
+
+if __name__ == '__main__':
+    main()
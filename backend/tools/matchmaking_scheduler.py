@@ -0,0 +1,136 @@
+# backend/tools/matchmaking_scheduler.py
+"""Local scheduler for the matchmaking engine (wuwadraft_core.matchmaking).
+
+By default it simulates: --initial players are queued at once, --arrivals more join every
+tick, and pair_queue runs every --tick-seconds on a simulated clock over a queue kept in
+score order, so many minutes of matchmaking take a moment. Each tick reports the queue
+size, pairs made and pairing time; the summary has the waits and score differences of the
+pairs. Scores are drawn from a normal distribution (--mean-score, --score-stdev).
+
+With --live it instead runs run_matchmaking_tick, exactly as the matchmaking Lambda does,
+against the tables boto3 is configured for (e.g. DynamoDB Local with
+AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000), every --tick-seconds of real time.
+Messages to matched players are printed instead of posted.
+
+Usage:
+    python matchmaking_scheduler.py
+    python matchmaking_scheduler.py --initial 5000 --arrivals 200 --ticks 20
+    python matchmaking_scheduler.py --live --ticks 12
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'wuwadraft_core', 'python'))
+
+from wuwadraft_core.matchmaking import QueuedPlayer, pair_queue, run_matchmaking_tick  # noqa: E402
+
+
+class PrintingApiGatewayClient:
+    """post_to_connection that prints what would have been sent."""
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def post_to_connection(self, ConnectionId, Data):
+        message = json.loads(Data)
+        print(f"    -> {ConnectionId}: {message.get('type')} {message.get('lobbyId', '')}")
+
+
+class LocalScheduler:
+    """Calls tick(now) every interval seconds on a simulated (or, with real_time, the wall) clock."""
+
+    def __init__(self, tick, interval, real_time=False):
+        self.tick = tick
+        self.interval = interval
+        self.real_time = real_time
+        self.now = time.time()
+
+    def run(self, ticks):
+        for tick_number in range(ticks):
+            tick_started = time.monotonic()
+            self.tick(tick_number, self.now)
+            if self.real_time:
+                time.sleep(max(0, self.interval - (time.monotonic() - tick_started)))
+                self.now = time.time()
+            else:
+                self.now += self.interval
+
+
+def simulate(args):
+    rng = random.Random(args.seed)
+    queue = [] # QueuedPlayers, kept in score order as the index keeps them
+    next_player_number = [0]
+    waits = []
+    score_diffs = []
+    pair_times_ms = []
+
+    def enqueue(count, now):
+        for _ in range(count):
+            score = max(0, round(rng.gauss(args.mean_score, args.score_stdev)))
+            bisect.insort(queue, QueuedPlayer(score, now, f"conn-{next_player_number[0]:07d}", "Player"))
+            next_player_number[0] += 1
+
+    def tick(tick_number, now):
+        enqueue(args.initial if tick_number == 0 else args.arrivals, now)
+        queued = len(queue)
+        started = time.perf_counter()
+        pairs, unpaired = pair_queue(queue, now)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queue[:] = unpaired # Still in score order
+        pair_times_ms.append(elapsed_ms)
+        for player1, player2 in pairs:
+            waits.extend((now - player1.queued_at, now - player2.queued_at))
+            score_diffs.append(abs(player1.score - player2.score))
+        print(f"  tick {tick_number:3d}: {queued:6d} queued  {len(pairs):5d} pairs  {len(unpaired):6d} left  {elapsed_ms:7.2f} ms")
+
+    print(f"Simulating {args.ticks} tick(s) every {args.tick_seconds:g} s: {args.initial} initial players, {args.arrivals} per tick")
+    LocalScheduler(tick, args.tick_seconds).run(args.ticks)
+    if score_diffs:
+        print(f"Paired {len(waits)} players. Pairing: median {statistics.median(pair_times_ms):.2f} ms, max {max(pair_times_ms):.2f} ms")
+        print(f"  wait (s):   median {statistics.median(waits):.0f}, max {max(waits):.0f}")
+        print(f"  score diff: median {statistics.median(score_diffs):g}, max {max(score_diffs):g}")
+
+
+def run_live(args):
+    apigw_client = PrintingApiGatewayClient()
+
+    def tick(tick_number, now):
+        stats = run_matchmaking_tick(apigw_client, now)
+        print(f"  tick {tick_number:3d}: {stats}")
+
+    print(f"Running {args.ticks} live tick(s) every {args.tick_seconds:g} s (Ctrl+C to stop)")
+    try:
+        LocalScheduler(tick, args.tick_seconds, real_time=True).run(args.ticks)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the matchmaking engine on a local schedule.")
+    parser.add_argument('--live', action='store_true', help="Tick against the configured tables instead of simulating.")
+    parser.add_argument('--ticks', type=int, default=12)
+    parser.add_argument('--tick-seconds', type=float, default=5)
+    parser.add_argument('--initial', type=int, default=2000, help="Players queued before the first tick (simulation).")
+    parser.add_argument('--arrivals', type=int, default=100, help="Players joining per tick (simulation).")
+    parser.add_argument('--mean-score', type=float, default=120)
+    parser.add_argument('--score-stdev', type=float, default=40)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.live:
+        run_live(args)
+    else:
+        simulate(args)
+
+
+if __name__ == '__main__':
+    main()
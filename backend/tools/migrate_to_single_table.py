@@ -0,0 +1,129 @@
+# backend/tools/migrate_to_single_table.py
+"""Copies live WuwaDraftLobbies / WuwaDraftConnections items into the single-table layout.
+
+Lobbies are written to LOBBY#<lobbyId>/META and connections to CONN#<connectionId>/META,
+matching TABLE_LAYOUT='single' in the Lambda handlers. Items are copied as-is (plus pk/sk,
+and an ISO createdAt from before timestamps were epoch ms is converted for the Number sort
+key of the public lobbies index), so the copy can be re-run safely; items whose TTL has
+already passed are skipped.
+
+Usage:
+    python migrate_to_single_table.py --create-table
+    python migrate_to_single_table.py --dry-run
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import boto3
+
+LOBBY_PK_PREFIX = 'LOBBY#'
+CONNECTION_PK_PREFIX = 'CONN#'
+META_SK = 'META'
+PUBLIC_LOBBIES_INDEX = 'PublicLobbiesIndex' # Sparse index behind listLobbies, see wuwadraft_core.lobby_browser
+PUBLIC_LOBBIES_PROJECTION = ['lobbyId', 'hostName', 'player1Name', 'player2Name', 'equilibrationEnabled', 'ttl']
+MATCHMAKING_QUEUE_INDEX = 'MatchmakingQueueIndex' # Sparse, score-ordered queue, see wuwadraft_core.matchmaking
+MATCHMAKING_QUEUE_PROJECTION = ['connectionId', 'playerName', 'matchmakingQueuedAt']
+
+
+def create_single_table(dynamodb, table_name):
+    """Creates the pk/sk table (on-demand, TTL on `ttl`, public lobby and matchmaking indexes) if it doesn't exist yet."""
+    client = dynamodb.meta.client
+    existing_tables = client.list_tables()['TableNames']
+    if table_name in existing_tables:
+        print(f"Table {table_name} already exists.")
+        return
+    print(f"Creating table {table_name}...")
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'pk', 'KeyType': 'HASH'},
+            {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'pk', 'AttributeType': 'S'},
+            {'AttributeName': 'sk', 'AttributeType': 'S'},
+            {'AttributeName': 'publicListing', 'AttributeType': 'S'},
+            {'AttributeName': 'createdAt', 'AttributeType': 'N'}, # Epoch ms
+            {'AttributeName': 'matchmakingQueue', 'AttributeType': 'S'},
+            {'AttributeName': 'matchmakingScore', 'AttributeType': 'N'}
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': PUBLIC_LOBBIES_INDEX,
+            'KeySchema': [
+                {'AttributeName': 'publicListing', 'KeyType': 'HASH'},
+                {'AttributeName': 'createdAt', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': PUBLIC_LOBBIES_PROJECTION}
+        }, {
+            'IndexName': MATCHMAKING_QUEUE_INDEX,
+            'KeySchema': [
+                {'AttributeName': 'matchmakingQueue', 'KeyType': 'HASH'},
+                {'AttributeName': 'matchmakingScore', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': MATCHMAKING_QUEUE_PROJECTION}
+        }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+    client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'ttl'}
+    )
+    print(f"Table {table_name} created with TTL on 'ttl'.")
+
+
+def scan_live_items(table):
+    """Yields every item in the table whose TTL (if any) hasn't passed."""
+    now = int(time.time())
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            if 'ttl' in item and int(item['ttl']) < now:
+                continue
+            yield item
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def copy_items(source_table, target_table, key_attribute, pk_prefix, dry_run):
+    copied = 0
+    with target_table.batch_writer(overwrite_by_pkeys=['pk', 'sk']) as batch:
+        for item in scan_live_items(source_table):
+            item['pk'] = f"{pk_prefix}{item[key_attribute]}"
+            item['sk'] = META_SK
+            if isinstance(item.get('createdAt'), str):
+                item['createdAt'] = int(datetime.fromisoformat(item['createdAt'].replace('Z', '+00:00')).timestamp() * 1000)
+            if not dry_run:
+                batch.put_item(Item=item)
+            copied += 1
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy lobby and connection items into the single-table layout.")
+    parser.add_argument('--lobbies-table', default='WuwaDraftLobbies')
+    parser.add_argument('--connections-table', default='WuwaDraftConnections')
+    parser.add_argument('--single-table', default='WuwaDraft')
+    parser.add_argument('--region', default=None)
+    parser.add_argument('--create-table', action='store_true', help="Create the single table first if it is missing.")
+    parser.add_argument('--dry-run', action='store_true', help="Scan and count items without writing.")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb', region_name=args.region)
+    if args.create_table and not args.dry_run:
+        create_single_table(dynamodb, args.single_table)
+
+    target_table = dynamodb.Table(args.single_table)
+    lobbies_copied = copy_items(dynamodb.Table(args.lobbies_table), target_table, 'lobbyId', LOBBY_PK_PREFIX, args.dry_run)
+    connections_copied = copy_items(dynamodb.Table(args.connections_table), target_table, 'connectionId', CONNECTION_PK_PREFIX, args.dry_run)
+
+    action = "Would copy" if args.dry_run else "Copied"
+    print(f"{action} {lobbies_copied} lobbies and {connections_copied} connections into {args.single_table}.")
+
+
+if __name__ == '__main__':
+    main()
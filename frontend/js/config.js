@@ -11,3 +11,16 @@ export const EQUILIBRATION_PHASE_NAME = "EQUILIBRATE_BANS";
 
 // LocalStorage keys
 export const LOCAL_STORAGE_SEQUENCES_KEY = "wuwaDraftLastSubmittedSequences";
+
+// SessionStorage key for the resume token (survives a page refresh, not a new tab)
+export const RESUME_SESSION_STORAGE_KEY = "wuwaDraftResumeSession";
+
+// Reconnect settings (server holds a dropped player's slot for 120s by default)
+export const RECONNECT_MAX_ATTEMPTS = 8;
+export const RECONNECT_BASE_DELAY_MS = 1000;
+export const RECONNECT_MAX_DELAY_MS = 15000;
+
+// Time sync: pings carrying clientTime, answered with the server's clock (fits the server's ping rate limit)
+export const TIME_SYNC_INITIAL_PINGS = 3;
+export const TIME_SYNC_PING_SPACING_MS = 1000;
+export const TIME_SYNC_SAMPLE_LIMIT = 8;
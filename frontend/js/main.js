@@ -69,6 +69,9 @@ document.addEventListener("DOMContentLoaded", async () => {
     elements.createStartBtn.addEventListener("click", () => {
       const name = elements.createNameInput.value.trim();
       const enableEquilibration = elements.enableEquilibrationToggle.checked;
+      const isPublic = elements.publicLobbyToggle
+        ? elements.publicLobbyToggle.checked
+        : false;
 
       if (!name) {
         alert("Please enter your name.");
@@ -93,6 +96,7 @@ document.addEventListener("DOMContentLoaded", async () => {
         action: "createLobby",
         name: name,
         enableEquilibration: enableEquilibration,
+        isPublic: isPublic,
       });
 
       // Reset button state after a timeout in case something goes wrong
@@ -130,6 +134,37 @@ document.addEventListener("DOMContentLoaded", async () => {
     });
   }
 
+  // Public lobby browser on the Join Lobby Screen
+  if (elements.browseLobbiesBtn) {
+    elements.browseLobbiesBtn.addEventListener("click", () => {
+      sendMessageToServer({ action: "listLobbies" });
+    });
+  }
+  if (elements.publicLobbyMoreBtn) {
+    elements.publicLobbyMoreBtn.addEventListener("click", () => {
+      sendMessageToServer({
+        action: "listLobbies",
+        cursor: elements.publicLobbyMoreBtn.dataset.cursor,
+      });
+    });
+  }
+
+  // Spectate (read-only) from the Join Lobby Screen
+  if (elements.joinSpectateBtn && elements.joinLobbyIdInput) {
+    elements.joinSpectateBtn.addEventListener("click", () => {
+      const lobbyId = elements.joinLobbyIdInput.value.trim().toUpperCase();
+      if (!lobbyId) {
+        alert("Please enter the Lobby ID to spectate.");
+        return;
+      }
+      sendMessageToServer({
+        action: "spectateLobby",
+        lobbyId: lobbyId,
+      });
+      // The spectator's lobbyStateUpdate drives the screen like a player's
+    });
+  }
+
   // Back Buttons
   if (elements.createBackBtn) {
     elements.createBackBtn.addEventListener("click", () =>
@@ -210,7 +245,7 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   // Ready Buttons
   function handleReadyClick() {
-    sendMessageToServer({ action: "playerReady" });
+    sendMessageToServer({ action: "playerReady", lobbyId: state.currentLobbyId });
 
     // Temporarily disable button to prevent multiple clicks until server responds
     if (state.myAssignedSlot === "P1" && elements.player1ReadyBtn) {
@@ -6,9 +6,59 @@ import {
   updateDraftScreenUI,
   startOrUpdateTimerDisplay,
   stopTimerDisplay,
+  renderPublicLobbyList,
+  scheduleReconnectTimeout,
 } from "./uiViews.js"; // Assuming uiViews exports showScreen
 import { elements } from "./uiElements.js"; // Import elements object
 
+// Applies a message's draft events (selections) and header fields to the last known
+// state, for a resumed session's missed events or an actionAccepted ack
+function replayDraftEvents(message) {
+  const replayedState = { ...state.currentDraftState };
+  delete replayedState.serverTime; // Stale; only a serverTime sent with the events is current
+  replayedState.bans = [...(replayedState.bans || [])];
+  replayedState.player1Picks = [...(replayedState.player1Picks || [])];
+  replayedState.player2Picks = [...(replayedState.player2Picks || [])];
+  let replayedAvailable = [...(replayedState.availableResonators || [])];
+  (message.events || []).forEach((draftEvent) => {
+    if (draftEvent.kind === "ban") {
+      replayedState.bans.push(draftEvent.resonator);
+    } else if (draftEvent.kind === "pick") {
+      const picksKey =
+        draftEvent.slot === "P1" ? "player1Picks" : "player2Picks";
+      replayedState[picksKey].push(draftEvent.resonator);
+    }
+    replayedAvailable = replayedAvailable.filter(
+      (name) => name !== draftEvent.resonator
+    );
+  });
+  replayedState.availableResonators = replayedAvailable;
+
+  // Header fields (phase, turn, timer, pause flags) always come from the server
+  [
+    "eventSeq",
+    "lobbyState",
+    "currentPhase",
+    "currentTurn",
+    "equilibrationBansMade",
+    "turnExpiresAt",
+    "draftPaused",
+    "pausedTurnRemainingSeconds",
+    "hostDisconnected",
+    "player1Disconnected",
+    "player2Disconnected",
+    "reconnectExpiresAt",
+    "lastAction",
+    "serverTime",
+  ].forEach((key) => {
+    if (message.hasOwnProperty(key)) {
+      replayedState[key] = message[key];
+    }
+  });
+  replayedState.type = "lobbyStateUpdate";
+  return replayedState;
+}
+
 export function handleWebSocketMessage(jsonData) {
   //console.log("MH_TRACE: handleWebSocketMessage START");
   //console.log("MH_TRACE: Raw data:", jsonData);
@@ -20,6 +70,7 @@ export function handleWebSocketMessage(jsonData) {
       case "lobbyCreated":
         //console.log("MessageHandler: Received lobbyCreated message:", message);
         state.setLobbyInfo(message.lobbyId, true, message.message);
+        state.setResumeToken(message.resumeToken || null);
         if (message.hasOwnProperty("equilibrationEnabled")) {
           state.setEquilibrationEnabledForLobby(message.equilibrationEnabled);
         }
@@ -53,6 +104,7 @@ export function handleWebSocketMessage(jsonData) {
           isJoiningClientTheHost,
           message.assignedSlot
         );
+        state.setResumeToken(message.resumeToken || null);
 
         let wasRedirectedToBSS = false;
         if (message.hasOwnProperty("equilibrationEnabled")) {
@@ -91,6 +143,16 @@ export function handleWebSocketMessage(jsonData) {
         }
         break;
 
+      case "lobbyList":
+        renderPublicLobbyList(message);
+        break;
+
+      case "spectateJoined":
+        console.log("MessageHandler: Received spectateJoined message:", message);
+        // Spectators have no slot and aren't host, so every control stays disabled
+        state.setLobbyInfo(message.lobbyId, false, null);
+        break;
+
       case "boxScoreSubmitted":
         //console.log(
         //  "MH_TRACE: Case boxScoreSubmitted - score acknowledged by server for this client."
@@ -116,6 +178,9 @@ export function handleWebSocketMessage(jsonData) {
           elements.createStartBtn.innerHTML = "Start Lobby";
         }
 
+        // A dropped player or host is held until reconnectExpiresAt (null when nobody is away)
+        scheduleReconnectTimeout(message.lobbyId, message.reconnectExpiresAt);
+
         // Add DRAFT_COMPLETE logging
         if (message.currentPhase === "DRAFT_COMPLETE") {
           console.log(
@@ -150,6 +215,7 @@ export function handleWebSocketMessage(jsonData) {
 
         // Store the whole message as the current draft state
         state.setCurrentDraftState(message);
+        state.setLastEventSeq(message.eventSeq);
 
         // Update granular state variables from the message
         // It's important that these are set before updateDraftScreenUI is called
@@ -167,6 +233,9 @@ export function handleWebSocketMessage(jsonData) {
         state.setDraftPhase(message.currentPhase || null);
         state.setDraftTurn(message.currentTurn || null);
         state.setTurnExpiry(message.turnExpiresAt || null);
+        if (typeof message.serverTime === "number") {
+          state.setServerClockOffset(message.serverTime);
+        }
 
         // Logic to determine if the client (player) has submitted their score for BSS
         if (state.myAssignedSlot === "P1") {
@@ -262,6 +331,41 @@ export function handleWebSocketMessage(jsonData) {
         // ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         break; // End of case "lobbyStateUpdate"
 
+      case "sessionResumed":
+        console.log("MessageHandler: Received sessionResumed message:", message);
+        state.setLobbyInfo(message.lobbyId, message.isHost, message.assignedSlot);
+        state.setResumeToken(message.resumeToken);
+        state.setLocalPlayerHasSubmittedScore(!!message.playerScoreSubmitted);
+
+        if (message.fullState || !state.currentDraftState) {
+          // Server follows up with a full lobbyStateUpdate
+          break;
+        }
+
+        // Replay only the selections missed while disconnected onto the last known state
+        handleWebSocketMessage(JSON.stringify(replayDraftEvents(message)));
+        break;
+
+      case "actionAccepted":
+        // Our ban/pick was written. With events, the server left us out of its broadcast
+        // because we had the state it was applied to, so apply it here.
+        if (
+          message.events &&
+          state.currentDraftState &&
+          state.currentLobbyId === message.lobbyId &&
+          state.lastEventSeq === message.fromEventSeq
+        ) {
+          handleWebSocketMessage(JSON.stringify(replayDraftEvents(message)));
+        }
+        break;
+
+      case "resumeFailed":
+        console.warn("MessageHandler: Resume failed:", message.message);
+        alert(`Could not rejoin the lobby: ${message.message}`);
+        state.clearLobbyState();
+        showScreen("welcome-screen");
+        break;
+
       // --- NEW CASE ADDED ---
       case "forceRedirect":
         //console.log("MH_TRACE: Case forceRedirect");
@@ -308,6 +412,35 @@ export function handleWebSocketMessage(jsonData) {
         alert(`Server Error: ${message.message}`); // Show error to user
         break;
 
+      case "pong":
+        if (typeof message.clientTime === "number") {
+          state.addTimeSyncSample(message.clientTime, message.serverTime, Date.now());
+        }
+        break;
+
+      case "turnTimeoutEarly":
+        // Our countdown ran ahead of the server's. Correct the clock offset and restart the
+        // countdown; it sends turnTimeout itself when the turn has really ended.
+        console.log(
+          `MessageHandler: turnTimeout was ${message.turnExpiresAt - message.serverTime}ms early, correcting the clock offset.`
+        );
+        state.correctServerClockOffset(message.serverTime);
+        if (
+          state.currentLobbyId === message.lobbyId &&
+          state.currentTurnExpiresAt === message.turnExpiresAt
+        ) {
+          startOrUpdateTimerDisplay();
+        }
+        break;
+
+      case "reconnectTimeoutEarly":
+        // Nobody's hold had expired yet by the server's clock; correct ours and wait again
+        state.correctServerClockOffset(message.serverTime);
+        if (state.currentLobbyId === message.lobbyId) {
+          scheduleReconnectTimeout(message.lobbyId, message.reconnectExpiresAt);
+        }
+        break;
+
       case "echo":
         //console.log("MH_TRACE: Case echo");
         //console.log("MessageHandler: Echo:", message.received_message);
@@ -1,4 +1,5 @@
 // frontend/js/state.js
+import { RESUME_SESSION_STORAGE_KEY, TIME_SYNC_SAMPLE_LIMIT } from "./config.js";
 
 // Using 'let' so they can be reassigned
 export let currentLobbyId = null;
@@ -12,7 +13,9 @@ export let currentTurn = null; // e.g., 'P1', 'P2'
 export let activeElementFilter = "All"; // Track the active element filter ('All', 'Aero', etc.)
 export let activeRarityFilter = null; // Track the active rarity filter ('All', 'Common', 'Uncommon', 'Rare', 'Epic', 'Legendary')
 export let currentDraftState = null; // Store the latest full draft state object
-export let currentTurnExpiresAt = null; // Holds the ISO timestamp string or null
+export let currentTurnExpiresAt = null; // Holds the expiry in epoch milliseconds or null
+export let serverClockOffsetMs = 0; // Server clock minus this client's clock
+let timeSyncSamples = []; // Recent { offsetMs, roundTripMs } from pong replies
 export let timerIntervalId = null; // Holds the ID returned by setInterval
 export let equilibrationEnabledForLobby = false;
 export let localPlayerHasSubmittedScore = false;
@@ -26,6 +29,10 @@ export let player2Picks = [];
 export let availableResonators = [];
 // --- END ADD ---
 
+// Reconnect-and-resume state
+export let resumeToken = null; // Issued by the server on join, rotated on every resume
+export let lastEventSeq = 0; // Last draft event sequence number this client has applied
+
 // Functions to update state
 export function setLobbyInfo(lobbyId, isHost, slot) {
   console.log(
@@ -73,15 +80,50 @@ export function setCurrentDraftState(newState) {
   currentDraftState = newState;
 }
 
-export function setTurnExpiry(isoTimestamp) {
+export function setTurnExpiry(expiresAtMs) {
 
-  if (currentTurnExpiresAt !== isoTimestamp) {
-    currentTurnExpiresAt = isoTimestamp;
+  if (currentTurnExpiresAt !== expiresAtMs) {
+    currentTurnExpiresAt = expiresAtMs;
   } else {
-    currentTurnExpiresAt = isoTimestamp;
+    currentTurnExpiresAt = expiresAtMs;
   }
 }
 
+// Rough offset from a broadcast's serverTime (off by its one-way latency); only used until a pong arrives
+export function setServerClockOffset(serverTimeMs) {
+  if (timeSyncSamples.length > 0) return;
+  serverClockOffsetMs = serverTimeMs - Date.now();
+}
+
+// A turnTimeout the server found early proves the offset runs ahead of its clock. The bound
+// from its serverTime (off by the reply's one-way latency) can only run late, so use that
+// until new pongs arrive.
+export function correctServerClockOffset(serverTimeMs) {
+  timeSyncSamples = [];
+  serverClockOffsetMs = Math.min(serverClockOffsetMs, serverTimeMs - Date.now());
+}
+
+// Offset from a ping/pong round trip, assuming the server read its clock halfway through.
+// The sample with the shortest round trip has the smallest error, so that one is used.
+export function addTimeSyncSample(clientSentMs, serverTimeMs, clientReceivedMs) {
+  const roundTripMs = clientReceivedMs - clientSentMs;
+  if (!(roundTripMs >= 0)) return;
+  timeSyncSamples.push({
+    offsetMs: serverTimeMs - (clientSentMs + clientReceivedMs) / 2,
+    roundTripMs,
+  });
+  if (timeSyncSamples.length > TIME_SYNC_SAMPLE_LIMIT) timeSyncSamples.shift();
+  const best = timeSyncSamples.reduce((a, b) =>
+    b.roundTripMs < a.roundTripMs ? b : a
+  );
+  serverClockOffsetMs = best.offsetMs;
+}
+
+// The current time on the server's clock, for countdowns against server timestamps
+export function serverNow() {
+  return Date.now() + serverClockOffsetMs;
+}
+
 export function setPlayer1Picks(picks) {
   player1Picks = picks;
 }
@@ -95,6 +137,50 @@ export function setAvailableResonators(resonators) {
 }
 // --- END ADD ---
 
+// --- Resume Session State ---
+export function setResumeToken(token) {
+  resumeToken = token || null;
+  persistResumeSession();
+}
+
+export function setLastEventSeq(seq) {
+  if (typeof seq === "number") {
+    lastEventSeq = seq;
+  }
+}
+
+// Saves what a reconnect needs so a page refresh can resume the same slot
+function persistResumeSession() {
+  try {
+    if (resumeToken && currentLobbyId) {
+      sessionStorage.setItem(
+        RESUME_SESSION_STORAGE_KEY,
+        JSON.stringify({
+          lobbyId: currentLobbyId,
+          resumeToken: resumeToken,
+          slot: myAssignedSlot,
+          userName: currentUserName,
+        })
+      );
+    } else {
+      sessionStorage.removeItem(RESUME_SESSION_STORAGE_KEY);
+    }
+  } catch (e) {
+    console.warn("State: Could not persist resume session:", e);
+  }
+}
+
+export function loadPersistedResumeSession() {
+  try {
+    const raw = sessionStorage.getItem(RESUME_SESSION_STORAGE_KEY);
+    return raw ? JSON.parse(raw) : null;
+  } catch (e) {
+    console.warn("State: Could not read resume session:", e);
+    return null;
+  }
+}
+// --- END Resume Session State ---
+
 export function clearLobbyState() {
   console.log("State: Clearing all lobby state");
   currentLobbyId = null;
@@ -106,6 +192,9 @@ export function clearLobbyState() {
   player1ScoreSubmitted = false;
   player2ScoreSubmitted = false;
   hasPopulatedBoxScoreScreenThisTurn = false; // Reset the BSS population flag
+  resumeToken = null;
+  lastEventSeq = 0;
+  persistResumeSession(); // Drops the stored token
   // Keep currentUserName for convenience
 }
 
@@ -26,6 +26,11 @@ export const elements = {
   joinLobbyIdInput: null,
   toggleLobbyIdVisibilityBtn: null,
   joinStartBtn: null,
+  joinSpectateBtn: null,
+  publicLobbyToggle: null,
+  browseLobbiesBtn: null,
+  publicLobbyList: null,
+  publicLobbyMoreBtn: null,
   joinBackBtn: null,
   lobbyIdDisplay: null,
   toggleLobbyIdDisplayBtn: null,
@@ -105,6 +110,11 @@ export function initializeElements() {
     "toggle-lobby-id-visibility"
   );
   elements.joinStartBtn = document.getElementById("join-start-btn");
+  elements.joinSpectateBtn = document.getElementById("join-spectate-btn");
+  elements.publicLobbyToggle = document.getElementById("public-lobby-toggle");
+  elements.browseLobbiesBtn = document.getElementById("browse-lobbies-btn");
+  elements.publicLobbyList = document.getElementById("public-lobby-list");
+  elements.publicLobbyMoreBtn = document.getElementById("public-lobby-more-btn");
   elements.joinBackBtn = document.getElementById("join-back-btn");
 
   // Lobby Wait Screen Elements
@@ -856,7 +856,7 @@ function updateCountdown(expiryTime, intervalId) {
     return;
   }
 
-  const now = Date.now();
+  const now = state.serverNow();
   const remainingMs = expiryTime - now;
 
   if (remainingMs <= 0) {
@@ -886,6 +886,7 @@ function updateCountdown(expiryTime, intervalId) {
       );
       sendMessageToServer({
         action: "turnTimeout",
+        lobbyId: state.currentLobbyId,
         expectedPhase: state.currentPhase,
         expectedTurn: state.myAssignedSlot,
       });
@@ -921,6 +922,28 @@ function updateCountdown(expiryTime, intervalId) {
   }
 }
 
+// Set while a held place (a dropped player or host) has a pending reconnect deadline
+let reconnectTimeoutId = null;
+
+// Tells the server once a held place's grace window has passed, so it is released even if
+// nobody else disconnects. Only participants report it; reconnectExpiresAt is server time.
+export function scheduleReconnectTimeout(lobbyId, reconnectExpiresAt) {
+  if (reconnectTimeoutId) {
+    clearTimeout(reconnectTimeoutId);
+    reconnectTimeoutId = null;
+  }
+  if (!reconnectExpiresAt || !(state.isCurrentUserHost || state.myAssignedSlot)) {
+    return;
+  }
+  const delayMs = Math.max(reconnectExpiresAt - state.serverNow(), 0) + 500; // Land just after the deadline
+  reconnectTimeoutId = setTimeout(() => {
+    reconnectTimeoutId = null;
+    if (state.currentLobbyId === lobbyId) {
+      sendMessageToServer({ action: "reconnectTimeout", lobbyId });
+    }
+  }, delayMs);
+}
+
 // This function starts a new timer cycle
 export function startOrUpdateTimerDisplay() {
   console.log(
@@ -956,10 +979,10 @@ export function startOrUpdateTimerDisplay() {
 
   try {
     const expiryTimestamp = new Date(state.currentTurnExpiresAt).getTime();
-    const now = Date.now();
+    const now = state.serverNow();
     const initialRemainingMs = expiryTimestamp - now; // Calculate initial remaining
     console.log(
-      `TIMER_INIT: Initial remainingMs = ${initialRemainingMs} (ServerExpiry: ${expiryTimestamp}, ClientNow: ${now})`
+      `TIMER_INIT: Initial remainingMs = ${initialRemainingMs} (ServerExpiry: ${expiryTimestamp}, ServerNow: ${now})`
     );
 
     if (isNaN(expiryTimestamp)) {
@@ -1434,6 +1457,38 @@ export function initializeCopyButton() {
   }
 }
 
+// Renders a lobbyList page. The first page (no cursor) replaces the list, later pages append.
+export function renderPublicLobbyList(lobbyListData) {
+  if (!elements.publicLobbyList) return;
+  if (!lobbyListData.cursor) {
+    elements.publicLobbyList.innerHTML = "";
+  }
+  const lobbies = lobbyListData.lobbies || [];
+  if (!lobbyListData.cursor && lobbies.length === 0) {
+    const emptyItem = document.createElement("li");
+    emptyItem.className = "list-group-item";
+    emptyItem.textContent = "No open public lobbies.";
+    elements.publicLobbyList.appendChild(emptyItem);
+  }
+  lobbies.forEach((lobby) => {
+    const openSlots = [lobby.player1Name, lobby.player2Name].filter((name) => !name).length;
+    const item = document.createElement("li");
+    item.className = "list-group-item list-group-item-action";
+    item.style.cursor = "pointer";
+    item.textContent = `${lobby.hostName || "Host"}'s lobby (${openSlots} open slot${openSlots === 1 ? "" : "s"})`;
+    item.addEventListener("click", () => {
+      if (elements.joinLobbyIdInput) {
+        elements.joinLobbyIdInput.value = lobby.lobbyId;
+      }
+    });
+    elements.publicLobbyList.appendChild(item);
+  });
+  if (elements.publicLobbyMoreBtn) {
+    elements.publicLobbyMoreBtn.dataset.cursor = lobbyListData.nextCursor || "";
+    toggleElementVisibility(elements.publicLobbyMoreBtn, !!lobbyListData.nextCursor);
+  }
+}
+
 export function applyCharacterFilter() {
   // This function is now just a trigger to re-render the grid.
   // main.js is responsible for setting state.activeElementFilter and state.activeRarityFilter.
@@ -1779,7 +1834,14 @@ export function handleCharacterSelection(event) {
 
   const message = {
     action: action,
+    lobbyId: state.currentLobbyId, // Lets the server skip the connection lookup
     resonatorName: resonatorName,
+    // The state this selection was made from; if the server has it too, it acks us with just the change
+    lastEventSeq: state.lastEventSeq,
+    // A resent copy of this selection gets the original result instead of a conflict
+    requestId: crypto.randomUUID
+      ? crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(16).slice(2)}`,
   };
   sendMessageToServer(message);
 
@@ -1,10 +1,62 @@
 // frontend/js/websocket.js
-import { WEBSOCKET_URL } from "./config.js";
+import {
+  WEBSOCKET_URL,
+  RECONNECT_MAX_ATTEMPTS,
+  RECONNECT_BASE_DELAY_MS,
+  RECONNECT_MAX_DELAY_MS,
+  TIME_SYNC_INITIAL_PINGS,
+  TIME_SYNC_PING_SPACING_MS,
+} from "./config.js";
 import { handleWebSocketMessage } from "./messageHandler.js"; // Import the handler
 import { showScreen } from "./uiViews.js"; // Import for potential error navigation
-import { clearLobbyState } from "./state.js"; // Import to clear state on disconnect
+import * as state from "./state.js"; // Clear state on disconnect, read resume token
 
 let socket = null;
+let intentionalClose = false; // Set by closeWebSocket so a deliberate close doesn't reconnect
+let reconnectAttempts = 0;
+let reconnectTimeoutId = null;
+
+// --- Reconnect-and-resume ---
+function getResumeSession() {
+  const persisted = state.loadPersistedResumeSession();
+  const lobbyId = state.currentLobbyId || (persisted && persisted.lobbyId);
+  const resumeToken = state.resumeToken || (persisted && persisted.resumeToken);
+  if (!lobbyId || !resumeToken) return null;
+  return { lobbyId, resumeToken, userName: persisted && persisted.userName };
+}
+
+function sendResumeIfNeeded() {
+  const session = getResumeSession();
+  if (!session) return;
+  if (!state.currentUserName && session.userName) {
+    state.setUserName(session.userName);
+  }
+  console.log(`WS: Resuming session in lobby ${session.lobbyId}`);
+  sendMessageToServer({
+    action: "resumeSession",
+    lobbyId: session.lobbyId,
+    resumeToken: session.resumeToken,
+    // Without a local draft state (e.g. page reload) ask for the full state
+    lastSeenEventSeq: state.currentDraftState ? state.lastEventSeq : null,
+  });
+}
+
+function scheduleReconnect() {
+  if (reconnectTimeoutId) return;
+  reconnectAttempts += 1;
+  const delay = Math.min(
+    RECONNECT_BASE_DELAY_MS * 2 ** (reconnectAttempts - 1),
+    RECONNECT_MAX_DELAY_MS
+  );
+  console.log(
+    `WS: Reconnecting in ${delay}ms (attempt ${reconnectAttempts}/${RECONNECT_MAX_ATTEMPTS})`
+  );
+  reconnectTimeoutId = setTimeout(() => {
+    reconnectTimeoutId = null;
+    initializeWebSocket();
+  }, delay);
+}
+// --- END Reconnect-and-resume ---
 
 export function initializeWebSocket() {
   if (
@@ -17,10 +69,13 @@ export function initializeWebSocket() {
   }
 
   console.log("WS: Attempting to connect WebSocket to:", WEBSOCKET_URL);
+  intentionalClose = false;
   socket = new WebSocket(WEBSOCKET_URL);
 
   socket.addEventListener("open", (event) => {
     console.log("WS: WebSocket connection established successfully!", event);
+    reconnectAttempts = 0;
+    sendResumeIfNeeded(); // Rebinds our slot if we were in a lobby before this connection
   });
 
   socket.addEventListener("message", (event) => {
@@ -30,6 +85,7 @@ export function initializeWebSocket() {
 
   socket.addEventListener("error", (event) => {
     console.error("WS: WebSocket error observed:", event);
+    if (reconnectAttempts > 0) return; // The close handler keeps retrying
     // Optional: Show error state to user, maybe navigate home
     alert("WebSocket connection error. Please refresh.");
     // clearLobbyState(); // Clear potentially invalid state
@@ -41,12 +97,16 @@ export function initializeWebSocket() {
 
   socket.addEventListener("open", (event) => {
     console.log("WS: WebSocket connection established successfully!", event);
+    // A few spaced time-sync pings up front so countdowns run on server time
+    for (let i = 0; i < TIME_SYNC_INITIAL_PINGS; i++) {
+      setTimeout(sendTimeSyncPing, i * TIME_SYNC_PING_SPACING_MS);
+    }
     // Start sending pings
     if (pingIntervalId) clearInterval(pingIntervalId); // Clear previous interval if any
     pingIntervalId = setInterval(() => {
       if (socket && socket.readyState === WebSocket.OPEN) {
         console.log("WS: Sending ping");
-        sendMessageToServer({ action: "ping" }); // Use existing send function
+        sendTimeSyncPing(); // Keep-alive that also refreshes the clock offset
       } else {
         console.log("WS: Skipping ping, socket not open.");
         if (pingIntervalId) clearInterval(pingIntervalId); // Stop if socket closed
@@ -79,11 +139,22 @@ export function initializeWebSocket() {
         `WS: WebSocket connection died (event code ${event.code}?)`
       );
     }
+    socket = null; // Clear socket variable
+
+    // The server holds our slot for a grace period, so try to resume before giving up
+    if (
+      !intentionalClose &&
+      getResumeSession() &&
+      reconnectAttempts < RECONNECT_MAX_ATTEMPTS
+    ) {
+      scheduleReconnect();
+      return;
+    }
+
+    reconnectAttempts = 0;
     alert("WebSocket connection closed. You may need to rejoin.");
-    clearLobbyState(); // Clear lobby state on disconnect
+    state.clearLobbyState(); // Clear lobby state on disconnect
     showScreen("welcome-screen"); // Navigate back to welcome on disconnect
-    socket = null; // Clear socket variable
-    // Optional: Implement reconnection logic here? For now, just go home.
   });
 }
 
@@ -117,8 +188,19 @@ export function sendMessageToServer(messageObject) {
   }
 }
 
+// Ping carrying the send time; the server's pong lets state estimate the clock offset
+export function sendTimeSyncPing() {
+  if (!socket || socket.readyState !== WebSocket.OPEN) return; // Closed before a delayed sync ping fired
+  sendMessageToServer({ action: "ping", clientTime: Date.now() });
+}
+
 // Optional: Function to explicitly close the socket if needed
 export function closeWebSocket() {
+  intentionalClose = true;
+  if (reconnectTimeoutId) {
+    clearTimeout(reconnectTimeoutId);
+    reconnectTimeoutId = null;
+  }
   if (socket && socket.readyState === WebSocket.OPEN) {
     console.log("WS: Closing WebSocket connection.");
     socket.close(1000, "User initiated disconnect"); // Send code 1000